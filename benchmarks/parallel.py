@@ -0,0 +1,92 @@
+"""Serial versus thread-parallel report generation.
+
+Generates a synthetic project (source, spec and test file per module) and times
+a full Project.iter_reports() scan with one worker and with a thread pool. On
+free-threaded builds with the GIL disabled, sndtk uses the thread pool by
+default; with the GIL enabled it stays serial, and this benchmark shows why.
+
+Usage:
+    python benchmarks/parallel.py [--modules N] [--functions N] [--workers N] [--repeat N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sndtk.project import Project
+from sndtk.project.threads import gil_enabled
+
+
+def generate_project(root: Path, modules: int, functions: int) -> None:
+    for i in range(modules):
+        source = root / f"module{i}.py"
+        source.write_text(
+            "".join(
+                f"def function{j}(value: int) -> int:\n"
+                f'    """Return value plus {j}."""\n'
+                f"    total = value\n"
+                f"    for step in range({j}):\n"
+                f"        total += step\n"
+                f"    return total\n\n\n"
+                for j in range(functions)
+            )
+        )
+        (root / f"module{i}_test.py").write_text(
+            "".join(f"def test__function{j}__works():\n    pass\n\n\n" for j in range(functions))
+        )
+        spec = {
+            "filepath": str(source),
+            "testpath": str(root / f"module{i}_test.py"),
+            "functions": [
+                {
+                    "identifier": f"function{j}",
+                    "scenarios": [
+                        {"testname": f"test__function{j}__works", "description": "Works"}
+                    ],
+                }
+                for j in range(functions)
+            ],
+        }
+        (root / f"module{i}_spec.json").write_text(json.dumps(spec))
+
+
+def measure(root: Path, workers: int, repeat: int) -> float:
+    """Return the median wall time in seconds of a full cold scan."""
+    timings = []
+    for _ in range(repeat):
+        project = Project(root, workers=workers)
+        start = time.perf_counter()
+        for _report in project.iter_reports():
+            pass
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", type=int, default=200)
+    parser.add_argument("--functions", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=max(2, os.cpu_count() or 1))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil_enabled() else 'disabled'}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        generate_project(root, args.modules, args.functions)
+        serial = measure(root, 1, args.repeat)
+        threaded = measure(root, args.workers, args.repeat)
+
+    print(f"serial:              {serial * 1000:8.1f} ms")
+    print(f"threaded ({args.workers:2d} workers): {threaded * 1000:8.1f} ms")
+    print(f"speedup:             {serial / threaded:8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Startup-time benchmark for the sndtk CLI.
+
+Imports ``sndtk.__main__`` in fresh interpreters under ``python -X importtime``
+and compares the median cumulative import time against a budget. Exits with
+status 1 when the budget is exceeded, so it can gate CI.
+
+Usage:
+    python benchmarks/startup.py [--runs N] [--budget-ms MS] [--show N]
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+
+MODULE = "sndtk.__main__"
+HEAVY_MODULES = ("pydantic", "pathspec", "tomli")
+IMPORTTIME = re.compile(r"import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)")
+
+
+def measure() -> tuple[int, list[tuple[int, str]], list[str]]:
+    """Import MODULE once in a fresh interpreter.
+
+    Returns:
+        The cumulative import time of MODULE in microseconds, the cumulative time
+        of each module it imports directly, and the names of all modules it loaded.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {MODULE}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0
+    children: list[tuple[int, str]] = []
+    loaded: list[str] = []
+    # importtime prints children before their parent, so everything between the
+    # previous top-level import (e.g. site) and MODULE was loaded by MODULE.
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        if match is None:
+            continue
+        _, cumulative, indent, name = match.groups()
+        if len(indent) == 1:
+            if name == MODULE:
+                total = int(cumulative)
+                break
+            children, loaded = [], []
+            continue
+        loaded.append(name)
+        if len(indent) == 3:
+            children.append((int(cumulative), name))
+    return total, children, loaded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--show", type=int, default=5, help="Number of slowest imports to list")
+    args = parser.parse_args()
+
+    totals: list[int] = []
+    children: list[tuple[int, str]] = []
+    loaded: list[str] = []
+    for _ in range(args.runs):
+        total, children, loaded = measure()
+        totals.append(total)
+
+    median_ms = statistics.median(totals) / 1000
+    print(f"import {MODULE}: median {median_ms:.1f} ms, min {min(totals) / 1000:.1f} ms")
+    for cumulative, name in sorted(children, reverse=True)[: args.show]:
+        print(f"  {cumulative / 1000:6.1f} ms  {name}")
+
+    heavy = sorted({name.split(".")[0] for name in loaded} & set(HEAVY_MODULES))
+    if heavy:
+        print(f"FAIL: heavy dependencies imported at startup: {', '.join(heavy)}")
+        return 1
+    if median_ms > args.budget_ms:
+        print(f"FAIL: over budget of {args.budget_ms:.1f} ms")
+        return 1
+    print(f"OK: within budget of {args.budget_ms:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .project import Project
+
+# sndtk.__main__ も読み込むパッケージのため、公開APIは初回アクセス時に読み込む
+_LAZY_ATTRIBUTES = {
+    "Project": ".project",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(module, __name__), name)
+
+
+__all__ = [
+    "Project",
+]
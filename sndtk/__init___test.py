@@ -0,0 +1,17 @@
+"""Tests for the sndtk package."""
+
+import pytest
+
+import sndtk
+from sndtk.project import Project
+
+
+def test____getattr____returns_project_on_first_access() -> None:
+    """Returns the Project class from its submodule on first access."""
+    assert sndtk.Project is Project
+
+
+def test____getattr____raises_attribute_error_for_unknown_name() -> None:
+    """Raises AttributeError for a name that is not exported."""
+    with pytest.raises(AttributeError, match="has no attribute 'Unknown'"):
+        sndtk.__getattr__("Unknown")
@@ -1,20 +1,35 @@
+from __future__ import annotations
+
 import argparse
 import logging
-from collections.abc import Generator
-from os import listdir
+import sqlite3
+import sys
+import time
+from collections.abc import Generator, Iterable
+from contextlib import closing, nullcontext
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from sndtk.filters import (
-    CompositeFileFilter,
-    ConfigFilter,
-    ExactFilter,
-    GitignoreFilter,
-    PatternFilter,
-)
-from sndtk.report import FileReport
-from sndtk.spec import FileSpec
+from sndtk.cache import CacheStore
+from sndtk.config import Settings
+from sndtk.spec.paths import spec_path_for
 from sndtk.spec.types import Identifier
 
+# Reports, specs and filters pull in pydantic, pathspec and tomli, which dominate
+# startup time, so they are imported by the commands that need them.
+if TYPE_CHECKING:
+    from sndtk.git import GitTree
+    from sndtk.parsers.types import Function
+    from sndtk.report import CoverageGate, FileReport
+
+# Same as sndtk.project.order.ORDERS, which is not imported here to keep startup fast
+ORDERS = ("path", "recent", "churn", "size")
+
+# Exit code for invalid arguments, the same as argparse uses for usage errors
+EXIT_USAGE = 2
+# Exit code when the time budget ran out (or a file timed out) before every file was evaluated
+EXIT_NOT_EVALUATED = 3
+
 
 def setup_logging(verbose: int) -> None:
     """Set up logging configuration based on verbose level.
@@ -36,38 +51,207 @@ def setup_logging(verbose: int) -> None:
     )
 
 
-def walk(path: Path) -> Generator[Path]:
+def open_cache(root: Path, settings: Settings) -> CacheStore | None:
+    logger = logging.getLogger(__name__)
+    if not settings.cache:
+        logger.debug("Cache disabled by configuration")
+        return None
+    try:
+        return CacheStore(root / settings.cache_dir, settings.cache_max_size)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Failed to open cache, continuing without it: {e}")
+        return None
+
+
+def generate_reports(
+    root: Path,
+    identifier: Identifier | None = None,
+    cache: CacheStore | None = None,
+    orphans: bool = False,
+    profile: bool = False,
+    settings: Settings | None = None,
+    deadline: float | None = None,
+    order: str | None = None,
+    targets: list[Identifier] | None = None,
+    select: list[str] | None = None,
+    gate: CoverageGate | None = None,
+    tree: GitTree | None = None,
+) -> Generator[FileReport]:
+    """Generate file reports for every source file under root, in walk order.
+
+    With targets, only the targeted files and functions are reported, in input order.
+
+    Args:
+        root: Project root to scan
+        identifier: Restrict the reports to this file or function
+        cache: Persistent parse cache
+        orphans: Also report spec files whose source file no longer exists
+        profile: Run the staged pipeline and print per-stage metrics to stderr when done
+        settings: [tool.sndtk] settings (loaded from root when omitted)
+        deadline: time.monotonic() value after which remaining files are reported as not evaluated
+        order: Evaluate files in this order (path, recent, churn or size) instead of walk order
+        targets: Report these files and functions instead of walking root
+        select: Only report files and functions matching these glob patterns (path::identifier)
+        gate: Coverage gate to give an upper bound on the functions still to be reported.
+            The bound is counted from each file as the pipeline reads it, so it is known once
+            the walk is done; targets get no bound
+        tree: Read source, spec and test files from this git revision instead of the working tree
+    """
+    from sndtk.filters import SelectFilter
+    from sndtk.project import Pipeline, Project
+
+    selector = SelectFilter(select, root) if select else None
+    # A walk prints each report once, so only targets (which may share a file) keep reports
+    project = Project(
+        root, cache, settings=settings, select=selector, tree=tree, remember=targets is not None
+    )
+    try:
+        if targets is not None:
+            yield from project.iter_targets(targets, deadline=deadline)
+            return
+
+        if not profile:
+            yield from project.iter_reports(
+                identifier, orphans=orphans, deadline=deadline, order=order, gate=gate
+            )
+            return
+
+        pipeline = Pipeline(project, identifier, orphans, deadline=deadline, order=order, gate=gate)
+        try:
+            yield from pipeline
+        finally:
+            print(pipeline.format_metrics(), file=sys.stderr)
+    finally:
+        project.close()
+
+
+def create_specs(reports: Iterable[FileReport], limit: int | None) -> int:
+    """Create specs for functions without one, writing each spec file once.
+
+    Args:
+        reports: File reports to collect functions from
+        limit: Maximum number of function specs to create (None for no limit)
+
+    Returns:
+        int: Number of function specs created
+    """
     logger = logging.getLogger(__name__)
-    for item in listdir(path):
-        item_path = path / item
-        if item_path.is_dir():
-            logger.debug(f"Entering directory: {item_path}")
-            yield from walk(item_path)
+    from sndtk.spec import FileSpec
+
+    created = 0
+    # Several targets may name the same file, so every spec file is saved once at the end
+    pending: dict[Path, tuple[FileSpec, list[Function]]] = {}
+    for report in reports:
+        if limit is not None and created >= limit:
+            break
+
+        filespec: FileSpec | None
+        if report.filepath in pending:
+            filespec, added = pending[report.filepath]
         else:
-            logger.debug(f"Found file: {item_path}")
-            yield item_path
+            filespec, added = report.filespec, []
+        specced = {spec.identifier for spec in filespec.functions} if filespec else set()
+        functions = [
+            function_report.function
+            for function_report in report.functions
+            if function_report.function.identifier not in specced
+        ]
+        if limit is not None:
+            functions = functions[: limit - created]
+        if len(functions) == 0:
+            continue
+
+        for function in functions:
+            logger.info(f"Creating spec for {function.identifier}")
+            if filespec is None:
+                filespec = FileSpec.create(report.filepath, function)
+            else:
+                filespec.add(function)
+
+        assert filespec is not None
+        pending[report.filepath] = (filespec, added + functions)
+        created += len(functions)
 
+    for filespec, functions in pending.values():
+        specpath = filespec.save()
+        for function in functions:
+            print(f"Created spec for {function.identifier} in {specpath}")
 
-def generate_reports(root: Path, identifier: Identifier | None = None) -> Generator[FileReport]:
+    logger.info(f"Created {created} function specs")
+    return created
+
+
+def report_stale(reports: Iterable[FileReport], *, prune: bool = False) -> int:
+    """Report spec entries whose function or source file no longer exists.
+
+    Args:
+        reports: File reports, including orphan reports for spec files without a source
+        prune: Remove the stale entries (and orphaned spec files) instead of reporting them
+
+    Returns:
+        int: Exit code (1 if stale entries were reported, 0 otherwise)
+    """
     logger = logging.getLogger(__name__)
-    logger.info(f"Generating reports for root: {root}")
+    found = 0
+    for report in reports:
+        if not report.orphaned and len(report.stale) == 0:
+            continue
+        found += 1
 
-    filter = CompositeFileFilter(
-        GitignoreFilter(),
-        PatternFilter(),
-        ConfigFilter(),
-    )
+        if not prune:
+            print(report.format_stale())
+            continue
+
+        assert report.filespec is not None
+        specpath = spec_path_for(report.filepath)
+        if report.orphaned:
+            logger.info(f"Removing orphaned spec file {specpath}")
+            specpath.unlink()
+            print(f"Removed orphaned spec {specpath}")
+        else:
+            logger.info(f"Pruning {len(report.stale)} stale entries from {specpath}")
+            report.filespec.remove({function.identifier for function in report.stale}).save()
+            print(f"Pruned {len(report.stale)} stale entries from {specpath}")
 
-    if identifier is not None:
-        filter.add(ExactFilter(identifier.filepath))
+    logger.info(f"Found stale spec entries in {found} files")
+    return 0 if prune or found == 0 else 1
 
-    for path in walk(root):
-        if path.suffix == ".py":
-            if filter.is_ignored(path):
-                logger.debug(f"Ignoring file (filtered): {path}")
-                continue
-            logger.debug(f"Processing file: {path}")
-            yield FileReport.generate(path, identifier)
+
+def report_changed(reports: Iterable[FileReport], *, accept: bool = False) -> int:
+    """Report covered functions whose body changed since their spec was written.
+
+    Args:
+        reports: File reports to inspect
+        accept: Record the current fingerprints instead of reporting the changes
+
+    Returns:
+        int: Exit code (1 if changed functions were reported, 0 otherwise)
+    """
+    logger = logging.getLogger(__name__)
+    found = 0
+    for report in reports:
+        changed = report.changed_functions()
+        if len(changed) == 0:
+            continue
+        found += len(changed)
+
+        if not accept:
+            print(report.format_changed())
+            continue
+
+        assert report.filespec is not None
+        fingerprints = {
+            function.function.identifier: function.function.fingerprint for function in changed
+        }
+        for function_spec in report.filespec.functions:
+            function_spec.fingerprint = fingerprints.get(
+                function_spec.identifier, function_spec.fingerprint
+            )
+        specpath = report.filespec.save()
+        print(f"Accepted changes to {len(changed)} functions in {specpath}")
+
+    logger.info(f"Found {found} changed functions")
+    return 0 if accept or found == 0 else 1
 
 
 def main(
@@ -76,57 +260,112 @@ def main(
     create: bool = False,
     first: bool = False,
     identifier: Identifier | None = None,
+    limit: int | None = 0,
+    stale: bool = False,
+    prune: bool = False,
+    changed: bool = False,
+    accept: bool = False,
+    profile: bool = False,
+    time_budget: float | None = None,
+    order: str | None = None,
+    targets: list[Identifier] | None = None,
+    select: list[str] | None = None,
+    summary: str | None = None,
+    depth: int | None = None,
+    fail_under: float | None = None,
+    fast_fail: bool = False,
+    snapshot: Path | None = None,
+    baseline: Path | None = None,
+    rev: str | None = None,
 ) -> int:
+    deadline = None if time_budget is None else time.monotonic() + time_budget
     logger = logging.getLogger(__name__)
+    has_specific_target = identifier is not None and identifier.function_identifier != ""
+    # Targets without a function identifier would create specs for every function in the file
+    batch_targets = bool(targets) and all(t.function_identifier != "" for t in targets or [])
     if create:
-        # Allow create without first if a specific function is targeted
-        has_specific_target = identifier is not None and identifier.function_identifier != ""
-        assert first or has_specific_target, (
+        # Allow create without first if specific functions are targeted or a batch is requested
+        assert first or has_specific_target or batch_targets or limit != 0, (
             "Create one function spec at a time to avoid task explosion"
         )
         logger.info("Create mode enabled")
+        from sndtk.spec import FileSpec
+
+    from sndtk.report import CoverageGate, FileReport, Snapshot, SnapshotDiff, TreeSummary
 
+    tree = TreeSummary(root) if summary == "tree" else None
     uncovered_count = 0
+    unevaluated_count = 0
 
-    reports = generate_reports(root, identifier)
-    for report in reports:
-        if first:
-            function_report = report.get_first_uncovered_function()
-            if function_report is not None:
-                if not create:
-                    logger.debug(
-                        f"Found first uncovered function: {function_report.function.identifier}"
-                    )
-                    print(
-                        FileReport(
-                            filepath=report.filepath,
-                            filespec=report.filespec,
-                            functions=[function_report],
-                        )
-                    )
-                    return 1
+    settings = Settings.load(root)
+    thresholds = dict(settings.fail_under)
+    if fail_under is not None:
+        thresholds["."] = fail_under
+    # Without thresholds, --fast-fail stops at the first uncovered function as before
+    gate = CoverageGate(root, thresholds or {".": 100.0}) if thresholds or fast_fail else None
+    revision = None
+    if rev is not None:
+        from sndtk.git import GitError, GitTree
 
-                logger.info(f"Creating spec for {function_report.function.identifier}")
-                if report.filespec is None:
-                    filespec = FileSpec.create(report.filepath, function_report.function)
-                else:
-                    filespec = report.filespec.add(function_report.function)
-
-                specpath = filespec.save()
-                print(f"Created spec for {function_report.function.identifier} in {specpath}")
-                return 0
-        elif create and identifier is not None and identifier.function_identifier != "":
-            # Create mode with specific target function
-            function_report = next(
-                (
-                    fr
-                    for fr in report.functions
-                    if fr.function.identifier == identifier.function_identifier
-                ),
-                None,
+        try:
+            revision = GitTree(rev, root)
+        except GitError as e:
+            print(f"Could not read revision {rev}: {e}", file=sys.stderr)
+            return EXIT_USAGE
+    # A baseline is compared with a snapshot of this run, kept in memory unless it is saved
+    current = Snapshot.create(snapshot, root) if snapshot or baseline else None
+    with (
+        revision or nullcontext(),
+        open_cache(root, settings) or nullcontext() as cache,
+        current or nullcontext(),
+        closing(
+            generate_reports(
+                root,
+                identifier,
+                cache,
+                orphans=stale or prune,
+                profile=profile,
+                settings=settings,
+                deadline=deadline,
+                order=order,
+                targets=targets,
+                select=select,
+                gate=gate if fast_fail else None,
+                tree=revision,
             )
-            if function_report is not None:
-                if not function_report.covered:
+        ) as reports,
+    ):
+        if stale or prune:
+            return report_stale(reports, prune=prune)
+        if changed or accept:
+            return report_changed(reports, accept=accept)
+
+        if create and targets and not first:
+            create_specs(reports, None if batch_targets else limit)
+            return 0
+
+        if create and limit != 0 and not has_specific_target:
+            create_specs(reports, limit)
+            return 0
+
+        for report in reports:
+            unevaluated_count += report.unevaluated is not None
+            if first:
+                function_report = report.get_first_uncovered_function()
+                if function_report is not None:
+                    if not create:
+                        logger.debug(
+                            f"Found first uncovered function: {function_report.function.identifier}"
+                        )
+                        print(
+                            FileReport(
+                                filepath=report.filepath,
+                                filespec=report.filespec,
+                                functions=[function_report],
+                            )
+                        )
+                        return 1
+
                     logger.info(f"Creating spec for {function_report.function.identifier}")
                     if report.filespec is None:
                         filespec = FileSpec.create(report.filepath, function_report.function)
@@ -136,26 +375,232 @@ def main(
                     specpath = filespec.save()
                     print(f"Created spec for {function_report.function.identifier} in {specpath}")
                     return 0
+            elif create and identifier is not None and identifier.function_identifier != "":
+                # Create mode with specific target function
+                function_report = next(
+                    (
+                        fr
+                        for fr in report.functions
+                        if fr.function.identifier == identifier.function_identifier
+                    ),
+                    None,
+                )
+                if function_report is not None:
+                    if not function_report.covered:
+                        logger.info(f"Creating spec for {function_report.function.identifier}")
+                        if report.filespec is None:
+                            filespec = FileSpec.create(report.filepath, function_report.function)
+                        else:
+                            filespec = report.filespec.add(function_report.function)
+
+                        specpath = filespec.save()
+                        print(
+                            f"Created spec for {function_report.function.identifier} in {specpath}"
+                        )
+                        return 0
+                    else:
+                        logger.info(
+                            f"Function {function_report.function.identifier} is already covered"
+                        )
+                        return 0
                 else:
-                    logger.info(
-                        f"Function {function_report.function.identifier} is already covered"
+                    logger.warning(
+                        f"Function {identifier.function_identifier} not found in {report.filepath}"
                     )
-                    return 0
+                    return 1
             else:
-                logger.warning(
-                    f"Function {identifier.function_identifier} not found in {report.filepath}"
-                )
+                uncovered_count += report.uncovered_count(identifier)
+                if gate is not None:
+                    gate.add(report)
+                if current is not None:
+                    current.add(report)
+                if tree is not None:
+                    # Only the per-directory totals are kept, so skip formatting the file report
+                    tree.add(report)
+                else:
+                    logger.info(f"Report for {report.filepath}: {report}")
+                    print(report)
+                if fast_fail and gate is not None and gate.outcome() is not None:
+                    print("⏹️ Stopped early: the coverage outcome is decided", file=sys.stderr)
+                    break
+
+        if tree is not None:
+            print(tree.format(depth))
+
+        if thresholds:
+            assert gate is not None
+            print(gate.format())
+
+        diff = None
+        if baseline is not None:
+            assert current is not None
+            with Snapshot.load(baseline) as previous:
+                diff = SnapshotDiff.generate(previous, current)
+            print(diff)
+        if current is not None:
+            current.save()
+
+        if unevaluated_count > 0:
+            print(f"⏸️ {unevaluated_count} paths not evaluated", file=sys.stderr)
+
+        if thresholds or diff is not None:
+            # Gates replace the default of failing on any uncovered function
+            if thresholds and gate is not None and not gate.passed:
                 return 1
+            if diff is not None and diff.regressed:
+                return 1
+        elif uncovered_count > 0:
+            return 1
+        if unevaluated_count > 0:
+            return EXIT_NOT_EVALUATED
+        if first:
+            logger.info("No uncovered functions found")
+        return 0
+
+
+def read_targets(source: str) -> list[str]:
+    """Read newline-separated targets, skipping blank lines.
+
+    Args:
+        source: Path of the file to read, or "-" for stdin
+
+    Returns:
+        list[str]: Targets in input order
+    """
+    text = sys.stdin.read() if source == "-" else Path(source).read_text()
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def cache_command(root: Path, action: str) -> int:
+    """Inspect or maintain the on-disk cache.
+
+    Args:
+        root: Project root containing the cache directory
+        action: One of "stats", "prune" or "clear"
+    """
+    settings = Settings.load(root)
+    cache_path = root / settings.cache_dir
+    if not cache_path.exists():
+        print(f"No cache found at {cache_path}")
+        return 0
+
+    with CacheStore(cache_path, settings.cache_max_size) as cache:
+        if action == "stats":
+            print(cache.stats())
+        elif action == "prune":
+            count = cache.prune()
+            cache.vacuum()
+            print(f"Evicted {count} entries from {cache_path}")
+        elif action == "clear":
+            count = cache.clear()
+            cache.vacuum()
+            print(f"Cleared {count} entries from {cache_path}")
         else:
-            logger.info(f"Report for {report.filepath}: {report}")
-            uncovered_count += report.uncovered_count(identifier)
-            print(report)
+            raise ValueError(f"Unknown cache action: {action}")
+    return 0
+
+
+def migrate_command(root: Path, *, dry_run: bool = False) -> int:
+    """Move orphaned spec entries to renamed or moved functions by body fingerprint.
+
+    Args:
+        root: Project root to scan
+        dry_run: Print the planned migrations without rewriting any spec
 
-    if first:
-        logger.info("No uncovered functions found")
+    Returns:
+        int: Exit code
+    """
+    logger = logging.getLogger(__name__)
+    from sndtk.report import MigrationPlan
+
+    settings = Settings.load(root)
+    with open_cache(root, settings) or nullcontext() as cache:
+        plan = MigrationPlan.generate(generate_reports(root, None, cache, orphans=True))
+
+    for migration in plan.migrations:
+        print(migration)
+    if dry_run:
+        print(
+            f"Would migrate {len(plan.migrations)} functions and record "
+            f"{len(plan.fingerprints)} fingerprints"
+        )
+        logger.info("Dry run, no spec files were changed")
         return 0
 
-    return 0 if uncovered_count == 0 else 1
+    paths = plan.apply()
+    print(
+        f"Migrated {len(plan.migrations)} functions and recorded "
+        f"{len(plan.fingerprints)} fingerprints in {len(paths)} spec files"
+    )
+    return 0
+
+
+def query_command(root: Path) -> int:
+    """Answer NDJSON requests from stdin on stdout until stdin is closed.
+
+    The project, its filters and its caches stay warm between requests.
+
+    Args:
+        root: Project root to scan
+
+    Returns:
+        int: Exit code
+    """
+    from sndtk.project import Project, QuerySession
+
+    settings = Settings.load(root)
+    with open_cache(root, settings) or nullcontext() as cache:
+        project = Project(root, cache, settings=settings)
+        try:
+            QuerySession(project).serve(sys.stdin, sys.stdout)
+        finally:
+            project.close()
+    return 0
+
+
+def diff_command(old: Path, new: Path) -> int:
+    """Print functions whose coverage changed between two snapshots.
+
+    Args:
+        old: Snapshot to compare against
+        new: Snapshot of the later run
+
+    Returns:
+        int: 1 if any function became uncovered, otherwise 0
+    """
+    from sndtk.report import Snapshot, SnapshotDiff
+
+    with Snapshot.load(old) as before, Snapshot.load(new) as after:
+        diff = SnapshotDiff.generate(before, after)
+    print(diff)
+    return 1 if diff.regressed else 0
+
+
+def history_command(root: Path, revisions: str) -> int:
+    """Print coverage totals for every commit in a range, oldest first.
+
+    Files are read from the git object store. After the first commit only the files
+    affected by each commit's changes are reported again.
+
+    Args:
+        root: Project root to scan
+        revisions: Commit range such as A..B
+
+    Returns:
+        int: Exit code
+    """
+    from sndtk.git import GitError
+    from sndtk.project import History
+
+    settings = Settings.load(root)
+    try:
+        with open_cache(root, settings) or nullcontext() as cache:
+            for coverage in History(root, revisions, cache, settings).iter_commits():
+                print(coverage, flush=True)
+    except GitError as e:
+        print(f"Could not read history {revisions}: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    return 0
 
 
 def cli() -> int:
@@ -164,18 +609,248 @@ def cli() -> int:
     parser.add_argument("--root", type=Path, default=Path("."))
     parser.add_argument("--create", action="store_true")
     parser.add_argument("--first", action="store_true")
-    parser.add_argument("--target", type=str, default="")
+    parser.add_argument(
+        "--target",
+        action="append",
+        default=[],
+        help="Report only this file (path.py) or function (path.py::name); repeatable",
+    )
+    parser.add_argument(
+        "--targets-from",
+        metavar="FILE",
+        help="Read additional newline-separated targets from FILE ('-' for stdin)",
+    )
+    parser.add_argument(
+        "--select",
+        action="append",
+        metavar="PATTERN",
+        help=(
+            "Only report files and functions matching PATTERN, a glob relative to --root with an "
+            "optional ::identifier glob (e.g. 'pkg/**/*.py::Service*::handle_*'); repeatable"
+        ),
+    )
+    parser.add_argument(
+        "--order",
+        choices=ORDERS,
+        help=(
+            "Evaluate files in this order instead of directory order: path, recent (newest "
+            "first), churn (most commits in git log first) or size (smallest first)"
+        ),
+    )
+    parser.add_argument(
+        "--summary",
+        choices=["tree"],
+        help=(
+            "Print totals instead of per-file reports: tree aggregates function and scenario "
+            "coverage per directory"
+        ),
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        metavar="N",
+        help="With --summary tree, print directories at most N levels below --root",
+    )
+    parser.add_argument(
+        "--fail-under",
+        type=float,
+        metavar="PCT",
+        help=(
+            "Exit with 1 when less than PCT%% of the functions under --root are covered, "
+            "instead of on any uncovered function (overrides [tool.sndtk.fail_under] for '.')"
+        ),
+    )
+    parser.add_argument(
+        "--fast-fail",
+        action="store_true",
+        help=(
+            "Stop as soon as the coverage thresholds are certain to pass or fail, using an "
+            "upper bound on the functions in the files not yet reported"
+        ),
+    )
+    parser.add_argument(
+        "--rev",
+        metavar="COMMIT",
+        help=(
+            "Report on the files of a git revision, read from the object store without "
+            "checking it out (settings and filters still come from the working tree)"
+        ),
+    )
+    parser.add_argument(
+        "--snapshot",
+        type=Path,
+        metavar="FILE",
+        help="Save the covered state and scenario status of every function to FILE (SQLite)",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        metavar="FILE",
+        help=(
+            "Compare with a snapshot saved by --snapshot, print the changed functions and fail "
+            "only on newly uncovered functions"
+        ),
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=0,
+        help="With --create, create specs for up to N functions in one pass",
+    )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="With --create, create specs for every function without one",
+    )
+    parser.add_argument(
+        "--stale",
+        action="store_true",
+        help="Report spec entries whose function or source file no longer exists",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Remove spec entries whose function or source file no longer exists",
+    )
+    parser.add_argument(
+        "--changed-functions",
+        action="store_true",
+        help="Report covered functions whose body changed since their spec was written",
+    )
+    parser.add_argument(
+        "--accept-changes",
+        action="store_true",
+        help="Record the current body fingerprints of changed functions in their specs",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Run the staged pipeline and print per-stage timings and queue depths to stderr",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        metavar="SECONDS",
+        help=(
+            "Stop after SECONDS, print the reports completed so far, mark the remaining files "
+            f"as not evaluated and exit with code {EXIT_NOT_EVALUATED}"
+        ),
+    )
     parser.add_argument("-v", "--verbose", action="count", default=0)
 
+    subparsers = parser.add_subparsers(dest="command")
+    cache_parser = subparsers.add_parser("cache", help="Inspect or maintain the on-disk cache")
+    cache_parser.add_argument("action", choices=["stats", "prune", "clear"])
+    migrate_parser = subparsers.add_parser(
+        "migrate", help="Move spec entries of renamed or moved functions"
+    )
+    migrate_parser.add_argument("--dry-run", action="store_true")
+    subparsers.add_parser(
+        "query", help="Answer NDJSON requests from stdin on stdout, keeping caches warm"
+    )
+    diff_parser = subparsers.add_parser(
+        "diff", help="Print functions whose coverage changed between two --snapshot files"
+    )
+    diff_parser.add_argument("old", type=Path)
+    diff_parser.add_argument("new", type=Path)
+    history_parser = subparsers.add_parser(
+        "history", help="Print coverage totals for every commit in a range, read from git"
+    )
+    history_parser.add_argument("revisions", metavar="A..B")
+
     args = parser.parse_args()
 
     setup_logging(args.verbose)
 
+    if args.command == "cache":
+        return cache_command(args.root, args.action)
+    if args.command == "migrate":
+        return migrate_command(args.root, dry_run=args.dry_run)
+    if args.command == "query":
+        return query_command(args.root)
+    if args.command == "diff":
+        for path in (args.old, args.new):
+            if not path.is_file():
+                parser.error(f"No snapshot found at {path}")
+        return diff_command(args.old, args.new)
+    if args.command == "history":
+        return history_command(args.root, args.revisions)
+
+    if args.limit < 0:
+        parser.error("--limit must not be negative")
+    if args.time_budget is not None and args.time_budget <= 0:
+        parser.error("--time-budget must be positive")
+
+    if args.depth is not None and args.summary is None:
+        parser.error("--depth requires --summary tree")
+    if args.depth is not None and args.depth < 0:
+        parser.error("--depth must not be negative")
+    if args.fail_under is not None and not 0 <= args.fail_under <= 100:
+        parser.error("--fail-under must be between 0 and 100")
+    if args.snapshot is not None or args.baseline is not None:
+        # A partial run would show every function it did not reach as removed
+        modes = [
+            args.create,
+            args.first,
+            args.fast_fail,
+            args.stale,
+            args.prune,
+            args.changed_functions,
+            args.accept_changes,
+        ]
+        if any(modes):
+            parser.error("--snapshot and --baseline require a full report run")
+        if args.target or args.targets_from or args.select:
+            parser.error("--snapshot and --baseline cannot be combined with --target or --select")
+    if args.rev is not None:
+        # The revision is read-only, and its files have no mtime or size on disk to order by
+        if args.create or args.prune or args.accept_changes:
+            parser.error("--rev cannot be combined with options that write specs")
+        if args.order not in (None, "path"):
+            parser.error("--rev supports only --order path")
+    if args.baseline is not None and not args.baseline.is_file():
+        parser.error(f"No snapshot found at {args.baseline}")
+
+    strings = [target for target in args.target if target]
+    if args.targets_from is not None:
+        try:
+            strings += read_targets(args.targets_from)
+        except OSError as e:
+            parser.error(f"Could not read targets: {e}")
+    try:
+        identifiers = [Identifier.from_string(string) for string in strings]
+    except ValueError as e:
+        parser.error(str(e))
+    targets = [identifier for identifier in identifiers if identifier is not None]
+    if args.create and not (args.first or args.all or args.limit != 0):
+        # Same guard as main, reported as a usage error instead of an assertion
+        if not targets or any(target.function_identifier == "" for target in targets):
+            parser.error(
+                "--create needs --first, --limit, --all or function targets (path.py::name)"
+            )
+
     return main(
         root=args.root,
         create=args.create,
         first=args.first,
-        identifier=Identifier.from_string(args.target) if args.target else None,
+        identifier=targets[0] if len(targets) == 1 else None,
+        limit=None if args.all else args.limit,
+        stale=args.stale,
+        prune=args.prune,
+        changed=args.changed_functions,
+        accept=args.accept_changes,
+        profile=args.profile,
+        time_budget=args.time_budget,
+        order=args.order,
+        targets=targets if len(targets) > 1 else None,
+        select=args.select,
+        summary=args.summary,
+        depth=args.depth,
+        fail_under=args.fail_under,
+        fast_fail=args.fast_fail,
+        snapshot=args.snapshot,
+        baseline=args.baseline,
+        rev=args.rev,
     )
 
 
@@ -1,12 +1,44 @@
 """Tests for __main__ module."""
 
+import json
 import logging
+import subprocess
+import sys
 import tempfile
+import threading
+import time
 from io import StringIO
 from pathlib import Path
+from typing import Any
 from unittest.mock import patch
 
-from sndtk.__main__ import cli, generate_reports, main, setup_logging, walk
+import pytest
+
+from sndtk.__main__ import (
+    EXIT_NOT_EVALUATED,
+    ORDERS,
+    cache_command,
+    cli,
+    create_specs,
+    diff_command,
+    generate_reports,
+    history_command,
+    main,
+    migrate_command,
+    open_cache,
+    query_command,
+    read_targets,
+    report_changed,
+    report_stale,
+    setup_logging,
+)
+from sndtk.cache import CacheStore
+from sndtk.config import Settings
+from sndtk.conftest import git
+from sndtk.git import GitTree
+from sndtk.project import Project
+from sndtk.project.pipeline import DEFAULT_QUEUE_SIZE, STAGES
+from sndtk.report import CoverageGate, FileReport, Snapshot
 from sndtk.spec.types import Identifier
 
 
@@ -38,65 +70,6 @@ def test__setup_logging__sets_debug_level_when_verbose_is_greater_than_two() ->
     assert logging.getLogger().level == logging.DEBUG
 
 
-def test__walk__yields_no_paths_when_directory_is_empty() -> None:
-    """Yields no paths when directory is empty (boundary value)."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        path = Path(tmpdir)
-        results = list(walk(path))
-        assert len(results) == 0
-
-
-def test__walk__yields_files_when_directory_contains_only_files() -> None:
-    """Yields files correctly when directory contains only files."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        path = Path(tmpdir)
-        file1 = path / "file1.txt"
-        file2 = path / "file2.txt"
-        file1.touch()
-        file2.touch()
-        results = list(walk(path))
-        assert len(results) == 2
-        assert file1 in results
-        assert file2 in results
-
-
-def test__walk__yields_files_from_nested_directories() -> None:
-    """Yields files correctly from nested directories."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        path = Path(tmpdir)
-        subdir = path / "subdir"
-        subdir.mkdir()
-        file1 = path / "file1.txt"
-        file2 = subdir / "file2.txt"
-        file1.touch()
-        file2.touch()
-        results = list(walk(path))
-        assert len(results) == 2
-        assert file1 in results
-        assert file2 in results
-
-
-def test__walk__yields_files_from_mixed_structure() -> None:
-    """Yields files correctly from mixed file and directory structure."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        path = Path(tmpdir)
-        file1 = path / "file1.txt"
-        subdir1 = path / "subdir1"
-        subdir1.mkdir()
-        file2 = subdir1 / "file2.txt"
-        subdir2 = subdir1 / "subdir2"
-        subdir2.mkdir()
-        file3 = subdir2 / "file3.txt"
-        file1.touch()
-        file2.touch()
-        file3.touch()
-        results = list(walk(path))
-        assert len(results) == 3
-        assert file1 in results
-        assert file2 in results
-        assert file3 in results
-
-
 def test__generate_reports__generates_reports_with_no_identifier() -> None:
     """Generates reports correctly with no identifier."""
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -443,7 +416,27 @@ def test__cli__calls_main_successfully_with_default_arguments() -> None:
         result = cli()
         mock_setup_logging.assert_called_once_with(0)
         mock_main.assert_called_once_with(
-            root=Path("."), create=False, first=False, identifier=None
+            root=Path("."),
+            create=False,
+            first=False,
+            identifier=None,
+            limit=0,
+            stale=False,
+            prune=False,
+            changed=False,
+            accept=False,
+            profile=False,
+            time_budget=None,
+            order=None,
+            targets=None,
+            select=None,
+            summary=None,
+            depth=None,
+            fail_under=None,
+            fast_fail=False,
+            snapshot=None,
+            baseline=None,
+            rev=None,
         )
         assert result == 0
 
@@ -460,7 +453,27 @@ def test__cli__calls_main_correctly_with_custom_root_path() -> None:
             result = cli()
             mock_setup_logging.assert_called_once_with(0)
             mock_main.assert_called_once_with(
-                root=Path(tmpdir), create=False, first=False, identifier=None
+                root=Path(tmpdir),
+                create=False,
+                first=False,
+                identifier=None,
+                limit=0,
+                stale=False,
+                prune=False,
+                changed=False,
+                accept=False,
+                profile=False,
+                time_budget=None,
+                order=None,
+                targets=None,
+                select=None,
+                summary=None,
+                depth=None,
+                fail_under=None,
+                fast_fail=False,
+                snapshot=None,
+                baseline=None,
+                rev=None,
             )
             assert result == 0
 
@@ -475,7 +488,29 @@ def test__cli__calls_main_correctly_with_create_and_first_flags() -> None:
         mock_main.return_value = 0
         result = cli()
         mock_setup_logging.assert_called_once_with(0)
-        mock_main.assert_called_once_with(root=Path("."), create=True, first=True, identifier=None)
+        mock_main.assert_called_once_with(
+            root=Path("."),
+            create=True,
+            first=True,
+            identifier=None,
+            limit=0,
+            stale=False,
+            prune=False,
+            changed=False,
+            accept=False,
+            profile=False,
+            time_budget=None,
+            order=None,
+            targets=None,
+            select=None,
+            summary=None,
+            depth=None,
+            fail_under=None,
+            fast_fail=False,
+            snapshot=None,
+            baseline=None,
+            rev=None,
+        )
         assert result == 0
 
 
@@ -679,3 +714,1405 @@ def test__main__raises_assertion_error_when_create_is_true_and_first_is_false_an
                 raise AssertionError("Expected AssertionError")
             except AssertionError as e:
                 assert "Create one function spec at a time" in str(e)
+
+
+def test__open_cache__returns_none_when_cache_is_disabled() -> None:
+    """Returns None when cache is disabled in settings."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        assert open_cache(path, Settings(cache=False)) is None
+        assert not (path / ".sndtk_cache").exists()
+
+
+def test__open_cache__opens_cache_in_configured_directory() -> None:
+    """Opens cache correctly in the configured directory under root."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        cache = open_cache(path, Settings(cache_dir="custom"))
+        assert cache is not None
+        cache.close()
+        assert (path / "custom" / "cache.db").exists()
+
+
+def test__open_cache__returns_none_when_cache_cannot_be_opened() -> None:
+    """Returns None when the cache directory cannot be created."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        (path / "blocked").write_text("not a directory")
+        assert open_cache(path, Settings(cache_dir="blocked")) is None
+
+
+def test__main__uses_cache_across_runs() -> None:
+    """Reuses cached parse results across runs."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        pyproject_toml = path / "pyproject.toml"
+        pyproject_toml.write_text("[tool.sndtk]\nexclude = []\n")
+        test_file = path / "test.py"
+        test_file.write_text("def test_function():\n    pass\n")
+        with patch("sys.stdout", new=StringIO()):
+            main(path)
+            main(path)
+        with CacheStore(path / ".sndtk_cache", 1024) as cache:
+            stats = cache.stats()
+        assert stats.runs == 2
+        assert stats.hits >= 1
+
+
+def test__cache_command__reports_missing_cache() -> None:
+    """Reports that no cache exists when the cache directory is missing (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            result = cache_command(path, "stats")
+        assert result == 0
+        assert "No cache found" in mock_stdout.getvalue()
+        assert not (path / ".sndtk_cache").exists()
+
+
+def test__cache_command__prints_stats() -> None:
+    """Prints entry count, size and hit rate for stats."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        with CacheStore(path / ".sndtk_cache", 1024) as cache:
+            cache.put("key", b"value")
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            result = cache_command(path, "stats")
+        assert result == 0
+        assert "entries: 1" in mock_stdout.getvalue()
+
+
+def test__cache_command__prunes_entries_over_limit() -> None:
+    """Prunes entries over the configured size limit."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        (path / "pyproject.toml").write_text("[tool.sndtk]\ncache_max_size = 4\n")
+        with CacheStore(path / ".sndtk_cache", 1024) as cache:
+            cache.put("a", b"1234")
+            cache.put("b", b"1234")
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            result = cache_command(path, "prune")
+        assert result == 0
+        assert "Evicted 1 entries" in mock_stdout.getvalue()
+
+
+def test__cache_command__clears_all_entries() -> None:
+    """Clears all entries."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        with CacheStore(path / ".sndtk_cache", 1024) as cache:
+            cache.put("a", b"1234")
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            result = cache_command(path, "clear")
+        assert result == 0
+        assert "Cleared 1 entries" in mock_stdout.getvalue()
+
+
+def test__cli__calls_cache_command_for_cache_subcommand() -> None:
+    """Calls cache_command correctly for the cache subcommand."""
+    with (
+        patch("sys.argv", ["sndtk", "cache", "stats"]),
+        patch("sndtk.__main__.cache_command") as mock_cache_command,
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sndtk.__main__.setup_logging"),
+    ):
+        mock_cache_command.return_value = 0
+        result = cli()
+        mock_cache_command.assert_called_once_with(Path("."), "stats")
+        mock_main.assert_not_called()
+        assert result == 0
+
+
+def test__create_specs__returns_zero_when_no_reports() -> None:
+    """Returns 0 when there are no reports (boundary value)."""
+    with patch("sys.stdout", new=StringIO()):
+        assert create_specs([], 5) == 0
+
+
+def test__create_specs__creates_specs_up_to_limit() -> None:
+    """Creates specs for at most limit functions across files."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        file1 = path / "a.py"
+        file1.write_text("def f1():\n    pass\n\ndef f2():\n    pass\n")
+        file2 = path / "b.py"
+        file2.write_text("def g1():\n    pass\n")
+        reports = [FileReport.generate(file1, None), FileReport.generate(file2, None)]
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            created = create_specs(reports, 2)
+        assert created == 2
+        assert mock_stdout.getvalue().count("Created spec") == 2
+        spec = json.loads((path / "a_spec.json").read_text())
+        assert [f["identifier"] for f in spec["functions"]] == ["f1", "f2"]
+        assert not (path / "b_spec.json").exists()
+
+
+def test__create_specs__creates_all_specs_when_limit_is_none() -> None:
+    """Creates specs for every function without one when limit is None."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        file1 = path / "a.py"
+        file1.write_text("def f1():\n    pass\n\ndef f2():\n    pass\n")
+        file2 = path / "b.py"
+        file2.write_text("def g1():\n    pass\n")
+        reports = [FileReport.generate(file1, None), FileReport.generate(file2, None)]
+        with patch("sys.stdout", new=StringIO()):
+            created = create_specs(reports, None)
+        assert created == 3
+        assert (path / "b_spec.json").exists()
+
+
+def test__create_specs__writes_each_spec_file_once() -> None:
+    """Writes each spec file once per run regardless of the number of functions."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        file1 = path / "a.py"
+        file1.write_text("def f1():\n    pass\n\ndef f2():\n    pass\n\ndef f3():\n    pass\n")
+        reports = [FileReport.generate(file1, None)]
+        with (
+            patch("sys.stdout", new=StringIO()),
+            patch("sndtk.spec.file.FileSpec.save", autospec=True) as mock_save,
+        ):
+            mock_save.return_value = path / "a_spec.json"
+            create_specs(reports, None)
+        assert mock_save.call_count == 1
+
+
+def test__create_specs__skips_functions_that_already_have_specs() -> None:
+    """Skips functions that already have a spec entry, even when uncovered."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        file1 = path / "a.py"
+        file1.write_text("def f1():\n    pass\n\ndef f2():\n    pass\n")
+        spec = {
+            "filepath": str(file1),
+            "testpath": str(path / "a_test.py"),
+            "functions": [
+                {
+                    "identifier": "f1",
+                    "scenarios": [{"testname": "test__f1__missing", "description": "Missing"}],
+                }
+            ],
+        }
+        (path / "a_spec.json").write_text(json.dumps(spec))
+        reports = [FileReport.generate(file1, None)]
+        with patch("sys.stdout", new=StringIO()):
+            created = create_specs(reports, None)
+        assert created == 1
+        updated = json.loads((path / "a_spec.json").read_text())
+        assert [f["identifier"] for f in updated["functions"]] == ["f1", "f2"]
+
+
+def test__main__creates_specs_in_batch_when_limit_is_given() -> None:
+    """Creates specs for up to limit functions without first when limit is given."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        pyproject_toml = path / "pyproject.toml"
+        pyproject_toml.write_text("[tool.sndtk]\nexclude = []\n")
+        test_file = path / "test.py"
+        test_file.write_text("def f1():\n    pass\n\ndef f2():\n    pass\n\ndef f3():\n    pass\n")
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            result = main(path, create=True, limit=2)
+        assert result == 0
+        assert mock_stdout.getvalue().count("Created spec") == 2
+        spec = json.loads((path / "test_spec.json").read_text())
+        assert len(spec["functions"]) == 2
+
+
+def test__main__creates_all_specs_when_limit_is_none() -> None:
+    """Creates specs for every function without one when limit is None (--all)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        pyproject_toml = path / "pyproject.toml"
+        pyproject_toml.write_text("[tool.sndtk]\nexclude = []\n")
+        test_file = path / "test.py"
+        test_file.write_text("def f1():\n    pass\n\ndef f2():\n    pass\n\ndef f3():\n    pass\n")
+        with patch("sys.stdout", new=StringIO()):
+            result = main(path, create=True, limit=None)
+        assert result == 0
+        spec = json.loads((path / "test_spec.json").read_text())
+        assert len(spec["functions"]) == 3
+
+
+def test__cli__calls_main_correctly_with_limit() -> None:
+    """Calls main correctly with --create --limit N."""
+    with (
+        patch("sys.argv", ["sndtk", "--create", "--limit", "5"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sndtk.__main__.setup_logging"),
+    ):
+        mock_main.return_value = 0
+        cli()
+        assert mock_main.call_args.kwargs["limit"] == 5
+
+
+def test__cli__calls_main_correctly_with_all() -> None:
+    """Calls main with no limit when --all is given."""
+    with (
+        patch("sys.argv", ["sndtk", "--create", "--all"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sndtk.__main__.setup_logging"),
+    ):
+        mock_main.return_value = 0
+        cli()
+        assert mock_main.call_args.kwargs["limit"] is None
+
+
+def test__cli__exits_when_limit_is_negative() -> None:
+    """Exits with a usage error when --limit is negative (boundary value)."""
+    with (
+        patch("sys.argv", ["sndtk", "--create", "--limit", "-1"]),
+        patch("sys.stderr", new=StringIO()),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sndtk.__main__.setup_logging"),
+        pytest.raises(SystemExit),
+    ):
+        cli()
+    mock_main.assert_not_called()
+
+
+def write_spec(filepath: Path, identifiers: list[str]) -> Path:
+    spec = {
+        "filepath": str(filepath),
+        "testpath": str(filepath.with_name(filepath.stem + "_test.py")),
+        "functions": [{"identifier": identifier, "scenarios": []} for identifier in identifiers],
+    }
+    spec_path = filepath.with_name(filepath.stem + "_spec.json")
+    spec_path.write_text(json.dumps(spec))
+    return spec_path
+
+
+def test__generate_reports__yields_orphan_reports_when_orphans_is_true() -> None:
+    """Yields orphan reports for spec files whose source does not exist when orphans is True."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_spec(path / "deleted.py", ["f1"])
+        results = list(generate_reports(path, None, orphans=True))
+        assert len(results) == 1
+        assert results[0].orphaned is True
+        assert results[0].filepath == path / "deleted.py"
+
+
+def test__generate_reports__skips_orphan_spec_files_by_default() -> None:
+    """Skips spec files without a source when orphans is False."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_spec(path / "deleted.py", ["f1"])
+        assert list(generate_reports(path, None)) == []
+
+
+def test__report_stale__returns_zero_when_nothing_is_stale() -> None:
+    """Returns 0 and prints nothing when there are no stale entries (boundary value)."""
+    report = FileReport(filepath=Path("test.py"), filespec=None, functions=[])
+    with patch("sys.stdout", new=StringIO()) as mock_stdout:
+        assert report_stale([report]) == 0
+    assert mock_stdout.getvalue() == ""
+
+
+def test__report_stale__prints_stale_entries_and_returns_one() -> None:
+    """Prints stale entries and orphaned spec files and returns 1."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        source = path / "module.py"
+        source.write_text("def kept():\n    pass\n")
+        write_spec(source, ["kept", "removed"])
+        write_spec(path / "deleted.py", ["f1"])
+        reports = list(generate_reports(path, None, orphans=True))
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert report_stale(reports) == 1
+        output = mock_stdout.getvalue()
+        assert "🗑️ removed" in output
+        assert "Source file not found" in output
+
+
+def test__report_stale__prunes_stale_entries_and_orphaned_spec_files() -> None:
+    """Removes stale entries and orphaned spec files when prune is True."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        source = path / "module.py"
+        source.write_text("def kept():\n    pass\n")
+        spec_path = write_spec(source, ["kept", "removed"])
+        orphan_path = write_spec(path / "deleted.py", ["f1"])
+        reports = list(generate_reports(path, None, orphans=True))
+        with patch("sys.stdout", new=StringIO()):
+            assert report_stale(reports, prune=True) == 0
+        assert not orphan_path.exists()
+        spec = json.loads(spec_path.read_text())
+        assert [function["identifier"] for function in spec["functions"]] == ["kept"]
+
+
+def test__main__reports_stale_entries_when_stale_is_true() -> None:
+    """Reports stale entries and returns 1 when stale is True."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        source = path / "module.py"
+        source.write_text("def kept():\n    pass\n")
+        write_spec(source, ["removed"])
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert main(path, stale=True) == 1
+        assert "🗑️ removed" in mock_stdout.getvalue()
+
+
+def test__main__prunes_stale_entries_when_prune_is_true() -> None:
+    """Prunes stale entries and returns 0 when prune is True."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        orphan_path = write_spec(path / "deleted.py", ["f1"])
+        with patch("sys.stdout", new=StringIO()):
+            assert main(path, prune=True) == 0
+        assert not orphan_path.exists()
+
+
+def test__cli__calls_main_correctly_with_stale_and_prune_flags() -> None:
+    """Calls main correctly with --stale and --prune flags."""
+    with (
+        patch("sys.argv", ["sndtk", "--stale", "--prune"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sndtk.__main__.setup_logging"),
+    ):
+        mock_main.return_value = 0
+        cli()
+        assert mock_main.call_args.kwargs["stale"] is True
+        assert mock_main.call_args.kwargs["prune"] is True
+
+
+def write_renamed_module(path: Path) -> Path:
+    source = path / "module.py"
+    source.write_text("def new(a):\n    return a * 42\n")
+    digest = FileReport.generate(source, None).functions[0].function.fingerprint
+    spec = {
+        "filepath": str(source),
+        "testpath": str(path / "module_test.py"),
+        "functions": [{"identifier": "old", "fingerprint": digest, "scenarios": []}],
+    }
+    spec_path = path / "module_spec.json"
+    spec_path.write_text(json.dumps(spec))
+    return spec_path
+
+
+def test__migrate_command__migrates_renamed_functions() -> None:
+    """Rewrites spec entries of renamed functions and prints the migrations."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        spec_path = write_renamed_module(path)
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert migrate_command(path) == 0
+        assert "-> " in mock_stdout.getvalue()
+        spec = json.loads(spec_path.read_text())
+        assert spec["functions"][0]["identifier"] == "new"
+
+
+def test__migrate_command__does_not_write_on_dry_run() -> None:
+    """Prints planned migrations without rewriting specs when dry_run is True."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        spec_path = write_renamed_module(path)
+        before = spec_path.read_bytes()
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert migrate_command(path, dry_run=True) == 0
+        assert "-> " in mock_stdout.getvalue()
+        assert spec_path.read_bytes() == before
+
+
+def test__migrate_command__reports_nothing_to_migrate() -> None:
+    """Reports zero migrations when nothing matches (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert migrate_command(path) == 0
+        assert "Migrated 0 functions" in mock_stdout.getvalue()
+
+
+def test__cli__calls_migrate_command_for_migrate_subcommand() -> None:
+    """Calls migrate_command correctly for the migrate subcommand."""
+    with (
+        patch("sys.argv", ["sndtk", "migrate", "--dry-run"]),
+        patch("sndtk.__main__.migrate_command") as mock_migrate_command,
+        patch("sndtk.__main__.setup_logging"),
+    ):
+        mock_migrate_command.return_value = 0
+        assert cli() == 0
+        mock_migrate_command.assert_called_once_with(Path("."), dry_run=True)
+
+
+def write_changed_module(path: Path) -> Path:
+    source = path / "module.py"
+    source.write_text("def f():\n    return 2\n")
+    (path / "module_test.py").write_text("def test__f__works():\n    pass\n")
+    spec = {
+        "filepath": str(source),
+        "testpath": str(path / "module_test.py"),
+        "functions": [
+            {
+                "identifier": "f",
+                "fingerprint": "0000000000000000",
+                "scenarios": [{"testname": "test__f__works", "description": "Works"}],
+            }
+        ],
+    }
+    spec_path = path / "module_spec.json"
+    spec_path.write_text(json.dumps(spec))
+    return spec_path
+
+
+def test__report_changed__prints_changed_functions_and_returns_one() -> None:
+    """Prints covered functions whose body changed and returns 1."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_changed_module(path)
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert report_changed(generate_reports(path)) == 1
+        assert "✏️ f" in mock_stdout.getvalue()
+
+
+def test__report_changed__returns_zero_when_nothing_changed() -> None:
+    """Returns 0 and prints nothing when no function changed (boundary value)."""
+    with patch("sys.stdout", new=StringIO()) as mock_stdout:
+        assert report_changed([FileReport(filepath=Path("a.py"), filespec=None, functions=[])]) == 0
+    assert mock_stdout.getvalue() == ""
+
+
+def test__report_changed__records_fingerprints_when_accept_is_true() -> None:
+    """Records the current fingerprints when accept is True."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        spec_path = write_changed_module(path)
+        with patch("sys.stdout", new=StringIO()):
+            assert report_changed(generate_reports(path), accept=True) == 0
+            assert report_changed(generate_reports(path)) == 0
+        spec = json.loads(spec_path.read_text())
+        assert spec["functions"][0]["fingerprint"] != "0000000000000000"
+
+
+def test__main__reports_changed_functions_when_changed_is_true() -> None:
+    """Reports changed functions and returns 1 when changed is True."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_changed_module(path)
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert main(path, changed=True) == 1
+        assert "✏️ f" in mock_stdout.getvalue()
+
+
+def test__cli__calls_main_correctly_with_changed_functions_flags() -> None:
+    """Calls main correctly with --changed-functions and --accept-changes flags."""
+    with (
+        patch("sys.argv", ["sndtk", "--changed-functions", "--accept-changes"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sndtk.__main__.setup_logging"),
+    ):
+        mock_main.return_value = 0
+        cli()
+        assert mock_main.call_args.kwargs["changed"] is True
+        assert mock_main.call_args.kwargs["accept"] is True
+
+
+def test__cli__prints_help_without_importing_heavy_dependencies() -> None:
+    """Prints help without importing pydantic, pathspec or tomli."""
+    code = (
+        "import sys\n"
+        "from sndtk.__main__ import cli\n"
+        "sys.argv = ['sndtk', '--help']\n"
+        "try:\n"
+        "    cli()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print([m for m in ('pydantic', 'pathspec', 'tomli') if m in sys.modules])\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert "usage: sndtk" in result.stdout
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test__generate_reports__prints_stage_metrics_when_profiling() -> None:
+    """Yields the same reports through the staged pipeline and prints stage metrics."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        for i in range(3):
+            (path / f"module{i}.py").write_text(f"def f{i}():\n    pass\n")
+        expected = [r.filepath for r in generate_reports(path)]
+        with patch("sys.stderr", new=StringIO()) as mock_stderr:
+            results = [r.filepath for r in generate_reports(path, profile=True)]
+        assert results == expected
+        lines = mock_stderr.getvalue().splitlines()
+        assert lines[0].split()[0] == "stage"
+        assert [line.split()[0] for line in lines[1:]] == [
+            "walker",
+            "filter",
+            "reader",
+            "parser",
+            "verifier",
+            "emitter",
+        ]
+
+
+def test__main__prints_stage_metrics_when_profile_is_true() -> None:
+    """Prints stage metrics to stderr after the report when profile is True."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        (path / "module.py").write_text("def f():\n    pass\n")
+        with (
+            patch("sys.stdout", new=StringIO()) as mock_stdout,
+            patch("sys.stderr", new=StringIO()) as mock_stderr,
+        ):
+            assert main(path, profile=True) == 1
+        assert "⚠️ f: No scenarios defined" in mock_stdout.getvalue()
+        assert "verifier" in mock_stderr.getvalue()
+
+
+def test__main__prints_stage_metrics_when_first_stops_early() -> None:
+    """Stops the pipeline and prints stage metrics when --first returns early."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        for i in range(5):
+            (path / f"module{i}.py").write_text(f"def f{i}():\n    pass\n")
+        with (
+            patch("sys.stdout", new=StringIO()),
+            patch("sys.stderr", new=StringIO()) as mock_stderr,
+        ):
+            assert main(path, first=True, profile=True) == 1
+        assert "emitter" in mock_stderr.getvalue()
+
+
+def test__cli__calls_main_correctly_with_profile_flag() -> None:
+    """Calls main with profile enabled when --profile is given."""
+    with (
+        patch("sys.argv", ["sndtk", "--profile"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sndtk.__main__.setup_logging"),
+    ):
+        mock_main.return_value = 0
+        cli()
+        assert mock_main.call_args.kwargs["profile"] is True
+
+
+def test__main__prints_files_skipped_by_settings() -> None:
+    """Prints generated files as skipped and does not count their functions as uncovered."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        (path / "pyproject.toml").write_text('[tool.sndtk]\ngenerated_markers = ["@generated"]\n')
+        (path / "client.py").write_text("# @generated\ndef f():\n    pass\n")
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert main(path) == 0
+        assert f"⏭️ {path / 'client.py'}: Generated file: @generated" in mock_stdout.getvalue()
+
+
+def run_with_slow_file(path: Path, slow: Path, time_budget: float) -> tuple[int, str, str]:
+    from sndtk.project.project import Project
+
+    release = threading.Event()
+    report = Project.report
+
+    def slow_report(self: Project, filepath: Path, *args: Any) -> FileReport:
+        if filepath == slow:
+            release.wait(5)
+        return report(self, filepath, *args)
+
+    try:
+        with (
+            patch.object(Project, "report", new=slow_report),
+            # A second verifier thread keeps the other files moving while the slow one blocks
+            patch("sndtk.project.project.default_workers", return_value=2),
+            patch("sys.stdout", new=StringIO()) as mock_stdout,
+            patch("sys.stderr", new=StringIO()) as mock_stderr,
+        ):
+            code = main(path, time_budget=time_budget)
+    finally:
+        release.set()
+    return code, mock_stdout.getvalue(), mock_stderr.getvalue()
+
+
+def test__main__returns_not_evaluated_code_when_time_budget_runs_out() -> None:
+    """Prints completed reports, marks the rest as not evaluated and returns 3."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        (path / "constants.py").write_text("X = 1\n")
+        (path / "slow.py").write_text("def f():\n    pass\n")
+        code, stdout, stderr = run_with_slow_file(path, path / "slow.py", 1.0)
+        assert code == EXIT_NOT_EVALUATED
+        assert f"🪽 {path / 'constants.py'}" in stdout
+        assert f"⏸️ {path / 'slow.py'}: Not evaluated: time budget exhausted" in stdout
+        assert "1 paths not evaluated" in stderr
+
+
+def test__main__returns_one_for_uncovered_functions_despite_time_budget() -> None:
+    """Returns 1 when an evaluated file has uncovered functions even if others were not evaluated."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        (path / "module.py").write_text("def f():\n    pass\n")
+        (path / "slow.py").write_text("def g():\n    pass\n")
+        code, stdout, _ = run_with_slow_file(path, path / "slow.py", 1.0)
+        assert code == 1
+        assert "⚠️ f: No scenarios defined" in stdout
+
+
+def test__cli__calls_main_correctly_with_time_budget() -> None:
+    """Passes --time-budget to main as seconds."""
+    with (
+        patch("sys.argv", ["sndtk", "--time-budget", "2.5"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sndtk.__main__.setup_logging"),
+    ):
+        mock_main.return_value = 0
+        cli()
+        assert mock_main.call_args.kwargs["time_budget"] == 2.5
+
+
+def test__cli__rejects_non_positive_time_budget() -> None:
+    """Exits with a usage error when --time-budget is zero or negative (boundary value)."""
+    with (
+        patch("sys.argv", ["sndtk", "--time-budget", "0"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sys.stderr", new=StringIO()),
+        pytest.raises(SystemExit),
+    ):
+        cli()
+    mock_main.assert_not_called()
+
+
+def test__main__finds_first_uncovered_function_in_given_order() -> None:
+    """Returns the first uncovered function in the given order, evaluating only that file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        for name in ["b.py", "c.py", "a.py"]:
+            (path / name).write_text(f"def {name[0]}():\n    pass\n")
+        with (
+            patch("sys.stdout", new=StringIO()) as mock_stdout,
+            patch("sndtk.report.FileReport.generate", wraps=FileReport.generate) as mock_generate,
+            patch("sndtk.project.project.default_workers", return_value=1),
+        ):
+            assert main(path, first=True, order="path") == 1
+        assert f"❌ {path / 'a.py'}:" in mock_stdout.getvalue()
+        assert mock_generate.call_count == 1
+
+
+def test__cli__calls_main_correctly_with_order() -> None:
+    """Passes --order to main."""
+    with (
+        patch("sys.argv", ["sndtk", "--first", "--order", "churn"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sndtk.__main__.setup_logging"),
+    ):
+        mock_main.return_value = 0
+        cli()
+        assert mock_main.call_args.kwargs["order"] == "churn"
+
+
+def test__cli__offers_every_supported_order() -> None:
+    """Offers the same orders as the ordering module."""
+    from sndtk.project.order import ORDERS as SUPPORTED_ORDERS
+
+    assert ORDERS == SUPPORTED_ORDERS
+
+
+def write_targets_project(path: Path) -> None:
+    (path / "a.py").write_text("def f():\n    pass\n\n\ndef g():\n    pass\n")
+    (path / "b.py").write_text("def h():\n    pass\n")
+
+
+def test__generate_reports__yields_target_reports_in_input_order() -> None:
+    """Yields one report per target in input order instead of walking root."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_targets_project(path)
+        targets = [Identifier(path / "b.py", ""), Identifier(path / "a.py", "g")]
+        results = list(generate_reports(path, targets=targets))
+        assert [r.filepath for r in results] == [path / "b.py", path / "a.py"]
+        assert [f.function.identifier for f in results[1].functions] == ["g"]
+
+
+def test__main__reports_multiple_targets_in_input_order() -> None:
+    """Prints a report for every target in input order and parses each file once."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_targets_project(path)
+        targets = [
+            Identifier(path / "a.py", "g"),
+            Identifier(path / "b.py", "h"),
+            Identifier(path / "a.py", "f"),
+        ]
+        with (
+            patch("sys.stdout", new=StringIO()) as mock_stdout,
+            patch("sndtk.report.FileReport.generate", wraps=FileReport.generate) as mock_generate,
+        ):
+            assert main(path, targets=targets) == 1
+        output = mock_stdout.getvalue()
+        assert output.index("⚠️ g:") < output.index("⚠️ h:") < output.index("⚠️ f:")
+        assert mock_generate.call_count == 2
+
+
+def test__main__creates_specs_for_multiple_targets() -> None:
+    """Creates specs for every targeted function without creating specs for the others."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_targets_project(path)
+        targets = [Identifier(path / "a.py", "g"), Identifier(path / "b.py", "h")]
+        with patch("sys.stdout", new=StringIO()):
+            assert main(path, create=True, targets=targets) == 0
+        a_spec = json.loads((path / "a_spec.json").read_text())
+        b_spec = json.loads((path / "b_spec.json").read_text())
+        assert [f["identifier"] for f in a_spec["functions"]] == ["g"]
+        assert [f["identifier"] for f in b_spec["functions"]] == ["h"]
+
+
+def test__read_targets__reads_stdin_skipping_blank_lines() -> None:
+    """Reads newline-separated targets from stdin, skipping blank lines."""
+    with patch("sys.stdin", new=StringIO("a.py::f\n\n  b.py  \n")):
+        assert read_targets("-") == ["a.py::f", "b.py"]
+
+
+def test__read_targets__reads_targets_from_file() -> None:
+    """Reads newline-separated targets from the given file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "targets.txt"
+        source.write_text("a.py::f\nb.py::g\n")
+        assert read_targets(str(source)) == ["a.py::f", "b.py::g"]
+
+
+def test__cli__passes_repeated_targets_to_main() -> None:
+    """Passes repeated --target and --targets-from identifiers to main in input order."""
+    with (
+        patch("sys.argv", ["sndtk", "--target", "a.py::f", "--targets-from", "-"]),
+        patch("sys.stdin", new=StringIO("b.py\nc.py::g\n")),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sndtk.__main__.setup_logging"),
+    ):
+        mock_main.return_value = 0
+        cli()
+        assert mock_main.call_args.kwargs["identifier"] is None
+        assert mock_main.call_args.kwargs["targets"] == [
+            Identifier(Path("a.py"), "f"),
+            Identifier(Path("b.py"), ""),
+            Identifier(Path("c.py"), "g"),
+        ]
+
+
+def test__cli__rejects_invalid_target() -> None:
+    """Exits with a usage error when a target is not a valid identifier."""
+    with (
+        patch("sys.argv", ["sndtk", "--targets-from", "-"]),
+        patch("sys.stdin", new=StringIO("a.py::f\nnot-an-identifier\n")),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sys.stderr", new=StringIO()),
+        pytest.raises(SystemExit),
+    ):
+        cli()
+    mock_main.assert_not_called()
+
+
+def test__generate_reports__reports_only_selected_functions() -> None:
+    """Reports only the files and functions matching the select patterns."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_targets_project(path)
+        results = list(generate_reports(path, select=["a.py::g"]))
+        assert [r.filepath for r in results] == [path / "a.py"]
+        assert [f.function.identifier for f in results[0].functions] == ["g"]
+
+
+def test__main__reports_only_selected_functions() -> None:
+    """Prints and counts only the functions matching the select patterns."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_targets_project(path)
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert main(path, select=["*.py::[fh]", "a.py::f"]) == 1
+        output = mock_stdout.getvalue()
+        assert "⚠️ f:" in output
+        assert "g:" not in output
+        assert "h:" not in output
+
+
+def test__cli__passes_select_patterns_to_main() -> None:
+    """Passes repeated --select patterns to main."""
+    with (
+        patch("sys.argv", ["sndtk", "--select", "pkg/**/*.py", "--select", "a.py::f*"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sndtk.__main__.setup_logging"),
+    ):
+        mock_main.return_value = 0
+        cli()
+        assert mock_main.call_args.kwargs["select"] == ["pkg/**/*.py", "a.py::f*"]
+
+
+def test__query_command__answers_requests_from_stdin() -> None:
+    """Writes one NDJSON response per request read from stdin and returns 0."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_targets_project(path)
+        requests = [
+            {"id": 1, "method": "report", "target": f"{path / 'a.py'}::f"},
+            {"id": 2, "method": "first", "path": str(path / "b.py")},
+        ]
+        stdin = StringIO("".join(json.dumps(request) + "\n" for request in requests))
+        with patch("sys.stdin", new=stdin), patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert query_command(path) == 0
+        responses = [json.loads(line) for line in mock_stdout.getvalue().splitlines()]
+        assert [f["identifier"] for f in responses[0]["result"]["functions"]] == ["f"]
+        assert responses[1]["result"]["identifier"] == "h"
+
+
+def test__cli__calls_query_command_for_query_subcommand() -> None:
+    """Dispatches the query subcommand to query_command with the root."""
+    with (
+        patch("sys.argv", ["sndtk", "--root", "pkg", "query"]),
+        patch("sndtk.__main__.query_command", return_value=0) as mock_query,
+        patch("sndtk.__main__.setup_logging"),
+    ):
+        assert cli() == 0
+    mock_query.assert_called_once_with(Path("pkg"))
+
+
+def test__main__prints_directory_tree_summary_instead_of_file_reports() -> None:
+    """Prints per-directory totals instead of per-file reports when summary is tree."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        (path / "pkg").mkdir()
+        (path / "pkg" / "a.py").write_text("def f():\n    pass\n")
+        (path / "b.py").write_text("X = 1\n")
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert main(path, summary="tree") == 1
+        lines = mock_stdout.getvalue().splitlines()
+        assert lines[0].startswith(f"❌ {path} 0.00% (0/1 functions covered")
+        assert lines[1].startswith("  ❌ pkg/ 0.00%")
+        assert len(lines) == 2
+
+
+def test__main__limits_tree_summary_to_depth() -> None:
+    """Prints only the directories down to the given depth."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        (path / "pkg").mkdir()
+        (path / "pkg" / "a.py").write_text("X = 1\n")
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert main(path, summary="tree", depth=0) == 0
+        assert mock_stdout.getvalue() == f"🪽 {path} no functions (1 files)\n"
+
+
+def test__cli__passes_summary_and_depth_to_main() -> None:
+    """Passes --summary and --depth to main."""
+    with (
+        patch("sys.argv", ["sndtk", "--summary", "tree", "--depth", "2"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sndtk.__main__.setup_logging"),
+    ):
+        mock_main.return_value = 0
+        cli()
+        assert mock_main.call_args.kwargs["summary"] == "tree"
+        assert mock_main.call_args.kwargs["depth"] == 2
+
+
+def test__cli__rejects_depth_without_summary() -> None:
+    """Exits with a usage error when --depth is given without --summary."""
+    with (
+        patch("sys.argv", ["sndtk", "--depth", "1"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sys.stderr", new=StringIO()),
+        pytest.raises(SystemExit),
+    ):
+        cli()
+    mock_main.assert_not_called()
+
+
+def test__cli__rejects_negative_depth() -> None:
+    """Exits with a usage error when --depth is negative (boundary value)."""
+    with (
+        patch("sys.argv", ["sndtk", "--summary", "tree", "--depth", "-1"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sys.stderr", new=StringIO()),
+        pytest.raises(SystemExit),
+    ):
+        cli()
+    mock_main.assert_not_called()
+
+
+def write_gate_project(path: Path) -> None:
+    """Write a.py with one covered function and b.py with one function without spec."""
+    (path / "a.py").write_text("def f():\n    pass\n")
+    (path / "a_test.py").write_text("def test__f__works():\n    pass\n")
+    (path / "a_spec.json").write_text(
+        json.dumps(
+            {
+                "filepath": str(path / "a.py"),
+                "testpath": str(path / "a_test.py"),
+                "functions": [
+                    {
+                        "identifier": "f",
+                        "scenarios": [{"testname": "test__f__works", "description": "Works"}],
+                    }
+                ],
+            }
+        )
+    )
+    (path / "b.py").write_text("def g():\n    pass\n")
+
+
+def test__main__passes_when_coverage_reaches_fail_under() -> None:
+    """Returns 0 despite uncovered functions when the covered percentage reaches fail_under."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_gate_project(path)
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert main(path, fail_under=50) == 0
+        assert "✅ .: 50.00% of functions covered (minimum 50%)" in mock_stdout.getvalue()
+
+
+def test__main__fails_when_coverage_is_below_fail_under() -> None:
+    """Returns 1 when the covered percentage is below fail_under (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_gate_project(path)
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert main(path, fail_under=50.1) == 1
+        assert "❌ .: 50.00% of functions covered (minimum 50.1%)" in mock_stdout.getvalue()
+
+
+def test__main__applies_per_directory_thresholds_from_settings() -> None:
+    """Checks every directory threshold from [tool.sndtk.fail_under]."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        (path / "pkg").mkdir()
+        (path / "pkg" / "c.py").write_text("def h():\n    pass\n")
+        write_gate_project(path)
+        settings = Settings(fail_under={".": 30, "pkg": 50})
+        with (
+            patch("sndtk.__main__.Settings.load", return_value=settings),
+            patch("sys.stdout", new=StringIO()) as mock_stdout,
+        ):
+            assert main(path) == 1
+        output = mock_stdout.getvalue()
+        assert "✅ .: 33.33% of functions covered (minimum 30%)" in output
+        assert "❌ pkg: 0.00% of functions covered (minimum 50%)" in output
+
+
+def test__main__stops_early_when_fast_fail_outcome_is_decided() -> None:
+    """Stops reading reports once the threshold can no longer be reached and returns 1."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_gate_project(path)
+        (path / "c.py").write_text("def h():\n    pass\n")
+        with (
+            patch("sys.stdout", new=StringIO()) as mock_stdout,
+            patch("sys.stderr", new=StringIO()) as mock_stderr,
+        ):
+            assert main(path, fail_under=80, fast_fail=True, order="path") == 1
+        assert "c.py" not in mock_stdout.getvalue()
+        assert "Stopped early" in mock_stderr.getvalue()
+
+
+def test__main__stops_early_on_tree_larger_than_window() -> None:
+    """Decides the outcome long before the end on a tree larger than the in-flight window."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        count = DEFAULT_QUEUE_SIZE * (len(STAGES) + 1) * 3
+        for i in range(count):
+            # Small enough for the size-based bound to allow only the one function
+            (path / f"module{i:03d}.py").write_text(f"def f{i}():0\n")
+        generate = FileReport.generate
+
+        def slow_generate(*args: Any, **kwargs: Any) -> FileReport:
+            # Real files take a while to verify; the walk ahead of the window only reads sizes
+            time.sleep(0.001)
+            return generate(*args, **kwargs)
+
+        with (
+            patch("sys.stdout", new=StringIO()) as mock_stdout,
+            patch("sys.stderr", new=StringIO()) as mock_stderr,
+            patch("sndtk.report.FileReport.generate", side_effect=slow_generate),
+        ):
+            assert main(path, fail_under=80, fast_fail=True) == 1
+        assert "Stopped early" in mock_stderr.getvalue()
+        assert mock_stdout.getvalue().count("module") < count // 2
+
+
+def test__cli__passes_fail_under_and_fast_fail_to_main() -> None:
+    """Passes --fail-under and --fast-fail to main."""
+    with (
+        patch("sys.argv", ["sndtk", "--fail-under", "75.5", "--fast-fail"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sndtk.__main__.setup_logging"),
+    ):
+        mock_main.return_value = 0
+        cli()
+        assert mock_main.call_args.kwargs["fail_under"] == 75.5
+        assert mock_main.call_args.kwargs["fast_fail"] is True
+
+
+def test__cli__rejects_fail_under_out_of_range() -> None:
+    """Exits with a usage error when --fail-under is above 100 (boundary value)."""
+    with (
+        patch("sys.argv", ["sndtk", "--fail-under", "100.5"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sys.stderr", new=StringIO()),
+        pytest.raises(SystemExit),
+    ):
+        cli()
+    mock_main.assert_not_called()
+
+
+def test__generate_reports__estimates_functions_for_gate() -> None:
+    """Gives the gate an upper bound on the functions of every file as the files are read."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_gate_project(path)
+        gate = CoverageGate(path, {".": 50})
+        assert len(list(generate_reports(path, gate=gate))) == 2
+        assert gate.complete
+        assert gate.thresholds[0].remaining == 2
+
+
+def test__generate_reports__reads_each_file_once_for_gate() -> None:
+    """Counts the functions from the contents read for reporting instead of reading files twice."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_gate_project(path)
+        read_bytes = Project.read_bytes
+        with patch.object(
+            Project, "read_bytes", autospec=True, side_effect=read_bytes
+        ) as mock_read:
+            list(generate_reports(path, gate=CoverageGate(path, {".": 50})))
+        assert sorted(call.args[1].name for call in mock_read.call_args_list) == ["a.py", "b.py"]
+
+
+def test__main__saves_snapshot_of_run() -> None:
+    """Saves the covered state of every reported function to the snapshot path."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_gate_project(path)
+        snapshot = path / "snap.db"
+        with patch("sys.stdout", new=StringIO()):
+            assert main(path, snapshot=snapshot) == 1
+        with Snapshot.load(snapshot) as saved:
+            assert saved.functions() == {("a.py", "f"): True, ("b.py", "g"): False}
+
+
+def test__main__fails_only_on_regressions_against_baseline() -> None:
+    """Returns 0 with uncovered functions already uncovered in the baseline and 1 on a regression."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_gate_project(path)
+        baseline = path / "snap.db"
+        with patch("sys.stdout", new=StringIO()):
+            main(path, snapshot=baseline)
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert main(path, baseline=baseline) == 0
+        assert "0 newly uncovered, 0 newly covered, 0 removed" in mock_stdout.getvalue()
+
+        (path / "a_test.py").write_text("")
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert main(path, baseline=baseline, snapshot=baseline) == 1
+        assert "❌ a.py::f: Newly uncovered" in mock_stdout.getvalue()
+        with Snapshot.load(baseline) as saved:
+            assert saved.functions()[("a.py", "f")] is False
+
+
+def test__main__reports_nothing_removed_when_walk_is_cut_short() -> None:
+    """Does not report functions as removed when the time budget ends the walk early."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_gate_project(path)
+        baseline = path / "snap.db"
+        with patch("sys.stdout", new=StringIO()):
+            main(path, snapshot=baseline)
+        with (
+            patch("sys.stdout", new=StringIO()) as mock_stdout,
+            patch(
+                "sndtk.project.Pipeline.run_walker", autospec=True, side_effect=lambda self: None
+            ),
+        ):
+            main(path, baseline=baseline, time_budget=0.2)
+        assert "0 newly uncovered, 0 newly covered, 0 removed" in mock_stdout.getvalue()
+
+
+def test__diff_command__prints_changes_between_snapshots() -> None:
+    """Prints the changed functions and returns 1 when a function became uncovered."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_gate_project(path)
+        with patch("sys.stdout", new=StringIO()):
+            main(path, snapshot=path / "old.db")
+            (path / "b.py").write_text("")
+            main(path, snapshot=path / "new.db")
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert diff_command(path / "old.db", path / "new.db") == 0
+            assert diff_command(path / "new.db", path / "old.db") == 1
+        assert "🗑️ b.py::g: Removed" in mock_stdout.getvalue()
+
+
+def test__cli__passes_snapshot_and_baseline_to_main() -> None:
+    """Passes --snapshot and --baseline to main."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        baseline = Path(tmpdir) / "base.db"
+        baseline.write_bytes(b"")
+        with (
+            patch("sys.argv", ["sndtk", "--snapshot", "new.db", "--baseline", str(baseline)]),
+            patch("sndtk.__main__.main") as mock_main,
+            patch("sndtk.__main__.setup_logging"),
+        ):
+            mock_main.return_value = 0
+            cli()
+            assert mock_main.call_args.kwargs["snapshot"] == Path("new.db")
+            assert mock_main.call_args.kwargs["baseline"] == baseline
+
+
+def test__cli__rejects_snapshot_with_partial_run() -> None:
+    """Exits with a usage error when --snapshot is combined with --first."""
+    with (
+        patch("sys.argv", ["sndtk", "--snapshot", "new.db", "--first"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sys.stderr", new=StringIO()),
+        pytest.raises(SystemExit),
+    ):
+        cli()
+    mock_main.assert_not_called()
+
+
+def test__cli__rejects_snapshot_with_partial_scope() -> None:
+    """Exits with a usage error when --snapshot or --baseline is combined with --select or --target."""
+    for args in (
+        ["--snapshot", "new.db", "--select", "pkg/**"],
+        ["--snapshot", "new.db", "--target", "a.py", "--target", "b.py"],
+    ):
+        with (
+            patch("sys.argv", ["sndtk", *args]),
+            patch("sndtk.__main__.main") as mock_main,
+            patch("sys.stderr", new=StringIO()) as mock_stderr,
+            pytest.raises(SystemExit),
+        ):
+            cli()
+        mock_main.assert_not_called()
+        assert "cannot be combined with --target or --select" in mock_stderr.getvalue()
+
+
+def test__cli__rejects_missing_baseline() -> None:
+    """Exits with a usage error when the --baseline file does not exist."""
+    with (
+        patch("sys.argv", ["sndtk", "--baseline", "missing.db"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sys.stderr", new=StringIO()),
+        pytest.raises(SystemExit),
+    ):
+        cli()
+    mock_main.assert_not_called()
+
+
+def test__cli__calls_diff_command_for_diff_subcommand() -> None:
+    """Dispatches the diff subcommand to diff_command with both snapshots."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        old, new = Path(tmpdir) / "old.db", Path(tmpdir) / "new.db"
+        old.write_bytes(b"")
+        new.write_bytes(b"")
+        with (
+            patch("sys.argv", ["sndtk", "diff", str(old), str(new)]),
+            patch("sndtk.__main__.diff_command", return_value=1) as mock_diff,
+            patch("sndtk.__main__.setup_logging"),
+        ):
+            assert cli() == 1
+        mock_diff.assert_called_once_with(old, new)
+
+
+def commit_gate_project(path: Path) -> None:
+    """Commit the gate project, then break coverage of a.py in the working tree."""
+    write_gate_project(path)
+    git(path, "init", "-q")
+    git(path, "add", ".")
+    git(path, "commit", "-q", "-m", "initial")
+    (path / "a_test.py").write_text("")
+
+
+def test__main__reports_git_revision() -> None:
+    """Reports the files of the revision instead of the working tree."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir).resolve()
+        commit_gate_project(path)
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert main(path, fail_under=50, rev="HEAD") == 0
+        assert "✅ .: 50.00% of functions covered (minimum 50%)" in mock_stdout.getvalue()
+        with patch("sys.stdout", new=StringIO()):
+            assert main(path, fail_under=50) == 1
+
+
+def test__main__returns_usage_error_for_unknown_revision() -> None:
+    """Returns 2 with a message when the revision cannot be read."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir).resolve()
+        commit_gate_project(path)
+        with patch("sys.stderr", new=StringIO()) as mock_stderr:
+            assert main(path, rev="nope") == 2
+        assert "Could not read revision nope" in mock_stderr.getvalue()
+
+
+def test__generate_reports__reads_files_from_git_tree() -> None:
+    """Generates the reports from the files of the given git tree."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir).resolve()
+        commit_gate_project(path)
+        (path / "c.py").write_text("def h():\n    pass\n")
+        with GitTree("HEAD", path) as tree:
+            reports = list(generate_reports(path, tree=tree))
+            assert [report.filepath.name for report in reports] == ["a.py", "b.py"]
+            assert reports[0].functions[0].covered
+
+
+def test__cli__passes_rev_to_main() -> None:
+    """Passes --rev to main."""
+    with (
+        patch("sys.argv", ["sndtk", "--rev", "main"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sndtk.__main__.setup_logging"),
+    ):
+        mock_main.return_value = 0
+        cli()
+        assert mock_main.call_args.kwargs["rev"] == "main"
+
+
+def test__cli__rejects_rev_with_spec_writing_options() -> None:
+    """Exits with a usage error when --rev is combined with --create."""
+    with (
+        patch("sys.argv", ["sndtk", "--rev", "main", "--create"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sys.stderr", new=StringIO()),
+        pytest.raises(SystemExit),
+    ):
+        cli()
+    mock_main.assert_not_called()
+
+
+def test__cli__rejects_rev_with_working_tree_order() -> None:
+    """Exits with a usage error when --rev is combined with an order other than path."""
+    with (
+        patch("sys.argv", ["sndtk", "--rev", "main", "--order", "recent"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sys.stderr", new=StringIO()),
+        pytest.raises(SystemExit),
+    ):
+        cli()
+    mock_main.assert_not_called()
+
+
+def test__history_command__prints_totals_of_every_commit() -> None:
+    """Prints one line of totals per commit of the range, oldest first."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir).resolve()
+        commit_gate_project(path)
+        git(path, "commit", "-q", "-am", "drop test")
+        with patch("sys.stdout", new=StringIO()) as mock_stdout:
+            assert history_command(path, "HEAD") == 0
+        lines = mock_stdout.getvalue().splitlines()
+        assert len(lines) == 2
+        assert "50.00% (1/2 functions covered" in lines[0]
+        assert lines[0].endswith("initial")
+        assert "0.00% (0/2 functions covered" in lines[1]
+
+
+def test__history_command__returns_usage_error_for_unknown_range() -> None:
+    """Returns 2 with a message when the range cannot be read."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir).resolve()
+        commit_gate_project(path)
+        with patch("sys.stderr", new=StringIO()) as mock_stderr:
+            assert history_command(path, "nope..HEAD") == 2
+        assert "Could not read history nope..HEAD" in mock_stderr.getvalue()
+
+
+def test__cli__calls_history_command_for_history_subcommand() -> None:
+    """Dispatches the history subcommand to history_command with the range."""
+    with (
+        patch("sys.argv", ["sndtk", "history", "main..HEAD"]),
+        patch("sndtk.__main__.history_command") as mock_history,
+        patch("sndtk.__main__.setup_logging"),
+    ):
+        mock_history.return_value = 0
+        assert cli() == 0
+        mock_history.assert_called_once_with(Path("."), "main..HEAD")
+
+
+def test__main__merges_targets_in_same_file_into_one_spec() -> None:
+    """Creates one spec file holding every targeted function of a file without a spec."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_targets_project(path)
+        targets = [Identifier(path / "a.py", "f"), Identifier(path / "a.py", "g")]
+        with patch("sys.stdout", new=StringIO()):
+            assert main(path, create=True, targets=targets) == 0
+        a_spec = json.loads((path / "a_spec.json").read_text())
+        assert [f["identifier"] for f in a_spec["functions"]] == ["f", "g"]
+
+
+def test__main__rejects_file_targets_for_batch_create() -> None:
+    """Refuses to create specs for whole target files without a limit."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_targets_project(path)
+        targets = [Identifier(path / "a.py", ""), Identifier(path / "b.py", "")]
+        with pytest.raises(AssertionError, match="task explosion"):
+            main(path, create=True, targets=targets)
+        assert not (path / "a_spec.json").exists()
+
+
+def test__main__limits_specs_created_for_file_targets() -> None:
+    """Creates at most limit specs when whole files are targeted with a limit."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_targets_project(path)
+        targets = [Identifier(path / "a.py", ""), Identifier(path / "b.py", "")]
+        with patch("sys.stdout", new=StringIO()):
+            assert main(path, create=True, targets=targets, limit=1) == 0
+        a_spec = json.loads((path / "a_spec.json").read_text())
+        assert [f["identifier"] for f in a_spec["functions"]] == ["f"]
+        assert not (path / "b_spec.json").exists()
+
+
+def test__create_specs__merges_reports_of_same_file() -> None:
+    """Adds the functions of several reports of one file to a single saved spec."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_targets_project(path)
+        reports = [
+            FileReport.generate(path / "a.py", Identifier(path / "a.py", "f")),
+            FileReport.generate(path / "a.py", Identifier(path / "a.py", "g")),
+            FileReport.generate(path / "a.py", Identifier(path / "a.py", "g")),
+        ]
+        with patch("sys.stdout", new=StringIO()):
+            assert create_specs(reports, None) == 2
+        a_spec = json.loads((path / "a_spec.json").read_text())
+        assert [f["identifier"] for f in a_spec["functions"]] == ["f", "g"]
+
+
+def test__cli__rejects_create_with_file_targets() -> None:
+    """Exits with a usage error when --create targets whole files without a limit."""
+    with (
+        patch("sys.argv", ["sndtk", "--create", "--target", "a.py", "--target", "b.py"]),
+        patch("sndtk.__main__.main") as mock_main,
+        patch("sys.stderr", new=StringIO()),
+        pytest.raises(SystemExit),
+    ):
+        cli()
+    mock_main.assert_not_called()
+
+
+def test__main__returns_not_evaluated_code_when_test_file_times_out() -> None:
+    """Shows the file as not evaluated and returns 3 when parsing its test file times out."""
+    from sndtk.parsers.python import ParseTimeoutError, PythonParser
+
+    parse = PythonParser.parse
+
+    def fake_parse(self: PythonParser, path: Path) -> Any:
+        if path.name.endswith("_test.py"):
+            raise ParseTimeoutError(path, 1)
+        return parse(self, path)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        write_gate_project(path)
+        (path / "b.py").unlink()
+        for time_budget in (None, 30.0):
+            with (
+                patch.object(PythonParser, "parse", fake_parse),
+                patch("sys.stdout", new=StringIO()) as mock_stdout,
+                patch("sys.stderr", new=StringIO()),
+            ):
+                assert main(path, time_budget=time_budget) == EXIT_NOT_EVALUATED
+            assert f"⏸️ {path / 'a.py'}: Not evaluated" in mock_stdout.getvalue()
@@ -0,0 +1,3 @@
+from .store import CacheStats, CacheStore
+
+__all__ = ["CacheStats", "CacheStore"]
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+
+logger = logging.getLogger(__name__)
+
+RECENT_RUNS = 10
+KEPT_RUNS = 100
+# 他のプロセスが書き込み中の場合に待つ時間 (秒)
+BUSY_TIMEOUT = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp REAL NOT NULL,
+    hits INTEGER NOT NULL,
+    misses INTEGER NOT NULL
+);
+"""
+
+
+def format_size(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+    value = size / 1024
+    for unit in ("KB", "MB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+@dataclass
+class CacheStats:
+    entries: int
+    size: int
+    max_size: int
+    runs: int
+    hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float | None:
+        total = self.hits + self.misses
+        if total == 0:
+            return None
+        return self.hits / total
+
+    def __str__(self) -> str:
+        hit_rate = "n/a" if self.hit_rate is None else f"{self.hit_rate:.2%}"
+        return "\n".join(
+            [
+                f"entries: {self.entries}",
+                f"size: {format_size(self.size)} (limit {format_size(self.max_size)})",
+                f"hit rate (last {self.runs} runs): {hit_rate} "
+                f"({self.hits} hits, {self.misses} misses)",
+            ]
+        )
+
+
+class CacheStore:
+    """
+    SQLiteを用いた容量上限付きの永続キャッシュ
+
+    上限を超えた場合は最終アクセス時刻の古いエントリから削除する。
+    接続はロックで保護されており、複数のスレッドから共有できる。
+    書き込みは1件ごとに確定し (WALモード)、複数のプロセスが同時に同じキャッシュを使えるようにする
+    """
+
+    def __init__(self, path: Path, max_size: int) -> None:
+        """
+        Args:
+            path: キャッシュディレクトリのパス
+            max_size: キャッシュエントリの合計サイズの上限 (バイト)
+        """
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.accessed: set[str] = set()
+        self.lock = threading.RLock()
+
+        path.mkdir(parents=True, exist_ok=True)
+        gitignore_path = path / ".gitignore"
+        if not gitignore_path.exists():
+            gitignore_path.write_text("# Created by sndtk automatically.\n*\n")
+
+        logger.debug(f"Opening cache at {path}")
+        self.connection = sqlite3.connect(
+            path / "cache.db",
+            timeout=BUSY_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self.connection.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    @contextmanager
+    def transaction(self) -> Generator[None]:
+        """
+        複数の書き込みを1つのトランザクションにまとめ、抜けるときに確定する
+
+        Returns:
+            Generator[None]: トランザクションの範囲
+        """
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+
+    def get(self, key: str) -> bytes | None:
+        with self.lock:
+            try:
+                row = self.connection.execute(
+                    "SELECT value FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                # 他のプロセスとの競合などで読めない場合は、キャッシュがないものとして続ける
+                logger.warning(f"Failed to read cache entry, treating it as a miss: {e}")
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.accessed.add(key)
+            return bytes(row[0])
+
+    def put(self, key: str, value: bytes) -> None:
+        with self.lock:
+            try:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, accessed) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, value, len(value), time.time()),
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to write cache entry, skipping it: {e}")
+
+    def size(self) -> int:
+        with self.lock:
+            row = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+            return int(row[0])
+
+    def stats(self, runs: int = RECENT_RUNS) -> CacheStats:
+        entries, size = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        recent, hits, misses = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(hits), 0), COALESCE(SUM(misses), 0) FROM "
+            "(SELECT hits, misses FROM runs ORDER BY id DESC LIMIT ?)",
+            (runs,),
+        ).fetchone()
+        return CacheStats(
+            entries=entries,
+            size=size,
+            max_size=self.max_size,
+            runs=recent,
+            hits=hits,
+            misses=misses,
+        )
+
+    def prune(self) -> int:
+        """
+        合計サイズが上限以下になるまでLRU順にエントリを削除する
+
+        Returns:
+            int: 削除したエントリ数
+        """
+        with self.lock:
+            self.flush()
+            excess = self.size() - self.max_size
+            if excess <= 0:
+                return 0
+
+            evicted: list[tuple[str]] = []
+            for key, size in self.connection.execute(
+                "SELECT key, size FROM entries ORDER BY accessed ASC"
+            ):
+                if excess <= 0:
+                    break
+                evicted.append((key,))
+                excess -= size
+
+            with self.transaction():
+                self.connection.executemany("DELETE FROM entries WHERE key = ?", evicted)
+            logger.info(f"Evicted {len(evicted)} cache entries")
+            return len(evicted)
+
+    def clear(self) -> int:
+        """
+        全てのエントリと実行履歴を削除する
+
+        Returns:
+            int: 削除したエントリ数
+        """
+        with self.transaction():
+            count = self.connection.execute("DELETE FROM entries").rowcount
+            self.connection.execute("DELETE FROM runs")
+            self.accessed.clear()
+            logger.info(f"Cleared {count} cache entries")
+            return count
+
+    def vacuum(self) -> None:
+        with self.lock:
+            self.connection.execute("VACUUM")
+            self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def flush(self) -> None:
+        """アクセス時刻の更新をまとめて書き込む"""
+        with self.lock:
+            if not self.accessed:
+                return
+            now = time.time()
+            try:
+                with self.transaction():
+                    self.connection.executemany(
+                        "UPDATE entries SET accessed = ? WHERE key = ?",
+                        [(now, key) for key in self.accessed],
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to update cache access times: {e}")
+            self.accessed.clear()
+
+    def close(self) -> None:
+        """実行統計を記録し、上限を超えていればエントリを削除して閉じる"""
+        with self.lock:
+            try:
+                if self.hits or self.misses:
+                    with self.transaction():
+                        self.connection.execute(
+                            "INSERT INTO runs (timestamp, hits, misses) VALUES (?, ?, ?)",
+                            (time.time(), self.hits, self.misses),
+                        )
+                        self.connection.execute(
+                            "DELETE FROM runs WHERE id NOT IN "
+                            "(SELECT id FROM runs ORDER BY id DESC LIMIT ?)",
+                            (KEPT_RUNS,),
+                        )
+                self.prune()
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to record cache statistics: {e}")
+            self.connection.close()
+
+    def __enter__(self) -> CacheStore:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
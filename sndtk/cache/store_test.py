@@ -0,0 +1,337 @@
+"""Tests for CacheStore."""
+
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from .store import CacheStats, CacheStore, format_size
+
+
+def test__format_size__formats_bytes_below_one_kilobyte() -> None:
+    """Returns size in bytes when size is below 1 KB (boundary value)."""
+    assert format_size(0) == "0 B"
+    assert format_size(1023) == "1023 B"
+
+
+def test__format_size__formats_larger_units() -> None:
+    """Returns size in KB, MB and GB correctly."""
+    assert format_size(1024) == "1.0 KB"
+    assert format_size(1536 * 1024) == "1.5 MB"
+    assert format_size(3 * 1024**3) == "3.0 GB"
+
+
+def test__CacheStats__hit_rate__returns_none_when_no_lookups() -> None:
+    """Returns None when there were no lookups (boundary value)."""
+    stats = CacheStats(entries=0, size=0, max_size=10, runs=0, hits=0, misses=0)
+    assert stats.hit_rate is None
+
+
+def test__CacheStats__hit_rate__returns_ratio_of_hits() -> None:
+    """Returns ratio of hits to lookups."""
+    stats = CacheStats(entries=1, size=1, max_size=10, runs=2, hits=3, misses=1)
+    assert stats.hit_rate == 0.75
+
+
+def test__CacheStats____str____formats_stats() -> None:
+    """Formats entries, size and hit rate correctly."""
+    stats = CacheStats(entries=2, size=2048, max_size=1024**2, runs=3, hits=1, misses=1)
+    assert str(stats) == (
+        "entries: 2\nsize: 2.0 KB (limit 1.0 MB)\nhit rate (last 3 runs): 50.00% (1 hits, 1 misses)"
+    )
+
+
+def test__CacheStats____str____formats_missing_hit_rate() -> None:
+    """Formats hit rate as n/a when there were no lookups (boundary value)."""
+    stats = CacheStats(entries=0, size=0, max_size=0, runs=0, hits=0, misses=0)
+    assert "hit rate (last 0 runs): n/a" in str(stats)
+
+
+def test__CacheStore____init____creates_cache_directory_and_gitignore() -> None:
+    """Creates cache directory, database and .gitignore when they do not exist."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "nested" / "cache"
+        with CacheStore(path, 1024):
+            pass
+        assert (path / "cache.db").exists()
+        assert (path / ".gitignore").read_text().endswith("*\n")
+
+
+def test__CacheStore____init____keeps_existing_entries() -> None:
+    """Keeps entries from a previous session when reopened."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        with CacheStore(path, 1024) as cache:
+            cache.put("key", b"value")
+        with CacheStore(path, 1024) as cache:
+            assert cache.get("key") == b"value"
+
+
+def test__CacheStore__get__returns_none_and_counts_miss_when_key_not_exists() -> None:
+    """Returns None and counts a miss when key does not exist."""
+    with tempfile.TemporaryDirectory() as tmpdir, CacheStore(Path(tmpdir), 1024) as cache:
+        assert cache.get("missing") is None
+        assert cache.misses == 1
+        assert cache.hits == 0
+
+
+def test__CacheStore__get__returns_value_and_counts_hit_when_key_exists() -> None:
+    """Returns value and counts a hit when key exists."""
+    with tempfile.TemporaryDirectory() as tmpdir, CacheStore(Path(tmpdir), 1024) as cache:
+        cache.put("key", b"value")
+        assert cache.get("key") == b"value"
+        assert cache.hits == 1
+        assert cache.accessed == {"key"}
+
+
+def test__CacheStore__put__replaces_existing_value() -> None:
+    """Replaces the value when key already exists."""
+    with tempfile.TemporaryDirectory() as tmpdir, CacheStore(Path(tmpdir), 1024) as cache:
+        cache.put("key", b"old")
+        cache.put("key", b"newer")
+        assert cache.get("key") == b"newer"
+        assert cache.size() == 5
+
+
+def test__CacheStore__size__returns_zero_when_empty() -> None:
+    """Returns 0 when cache is empty (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir, CacheStore(Path(tmpdir), 1024) as cache:
+        assert cache.size() == 0
+
+
+def test__CacheStore__size__returns_total_size_of_entries() -> None:
+    """Returns total size of all entry values."""
+    with tempfile.TemporaryDirectory() as tmpdir, CacheStore(Path(tmpdir), 1024) as cache:
+        cache.put("a", b"12")
+        cache.put("b", b"345")
+        assert cache.size() == 5
+
+
+def test__CacheStore__stats__returns_entries_and_recent_runs() -> None:
+    """Returns entry count, size and hit counts aggregated over recent runs."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        with CacheStore(path, 1024) as cache:
+            cache.get("key")
+            cache.put("key", b"value")
+        with CacheStore(path, 1024) as cache:
+            cache.get("key")
+        with CacheStore(path, 1024) as cache:
+            stats = cache.stats()
+        assert stats.entries == 1
+        assert stats.size == 5
+        assert stats.runs == 2
+        assert stats.hits == 1
+        assert stats.misses == 1
+
+
+def test__CacheStore__stats__limits_to_requested_number_of_runs() -> None:
+    """Aggregates only the requested number of most recent runs."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        with CacheStore(path, 1024) as cache:
+            cache.get("key")
+        with CacheStore(path, 1024) as cache:
+            cache.put("key", b"value")
+            cache.get("key")
+        with CacheStore(path, 1024) as cache:
+            stats = cache.stats(runs=1)
+        assert stats.runs == 1
+        assert stats.hits == 1
+        assert stats.misses == 0
+
+
+def test__CacheStore__prune__returns_zero_when_under_limit() -> None:
+    """Returns 0 and keeps entries when size is within the limit (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir, CacheStore(Path(tmpdir), 4) as cache:
+        cache.put("a", b"1234")
+        assert cache.prune() == 0
+        assert cache.get("a") == b"1234"
+
+
+def test__CacheStore__prune__evicts_least_recently_accessed_entries() -> None:
+    """Evicts least recently accessed entries until size is within the limit."""
+    with tempfile.TemporaryDirectory() as tmpdir, CacheStore(Path(tmpdir), 8) as cache:
+        cache.put("old", b"1234")
+        cache.put("new", b"1234")
+        time.sleep(0.01)
+        cache.get("old")
+        cache.flush()
+        cache.put("newest", b"1234")
+        assert cache.prune() == 1
+        assert cache.get("new") is None
+        assert cache.get("old") == b"1234"
+        assert cache.get("newest") == b"1234"
+
+
+def test__CacheStore__clear__removes_all_entries_and_runs() -> None:
+    """Removes all entries and run history and returns the number of removed entries."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        with CacheStore(path, 1024) as cache:
+            cache.put("a", b"1")
+            cache.get("a")
+        with CacheStore(path, 1024) as cache:
+            assert cache.clear() == 1
+            stats = cache.stats()
+        assert stats.entries == 0
+        assert stats.runs == 0
+
+
+def test__CacheStore__clear__returns_zero_when_empty() -> None:
+    """Returns 0 when cache is empty (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir, CacheStore(Path(tmpdir), 1024) as cache:
+        assert cache.clear() == 0
+
+
+def test__CacheStore__vacuum__shrinks_database_after_clear() -> None:
+    """Shrinks the database file after entries are removed."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        with CacheStore(path, 1024**2) as cache:
+            for i in range(100):
+                cache.put(str(i), b"x" * 4096)
+            cache.flush()
+            before = sum(file.stat().st_size for file in path.glob("cache.db*"))
+            cache.clear()
+            cache.vacuum()
+            after = sum(file.stat().st_size for file in path.glob("cache.db*"))
+        assert after < before
+
+
+def test__CacheStore__flush__updates_access_times_of_hit_entries() -> None:
+    """Updates access times of hit entries and clears pending accesses."""
+    with tempfile.TemporaryDirectory() as tmpdir, CacheStore(Path(tmpdir), 1024) as cache:
+        cache.put("key", b"value")
+        (before,) = cache.connection.execute("SELECT accessed FROM entries").fetchone()
+        time.sleep(0.01)
+        cache.get("key")
+        cache.flush()
+        (after,) = cache.connection.execute("SELECT accessed FROM entries").fetchone()
+        assert after > before
+        assert cache.accessed == set()
+
+
+def test__CacheStore__close__records_run_when_lookups_happened() -> None:
+    """Records a run when there were lookups."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        cache = CacheStore(path, 1024)
+        cache.get("key")
+        cache.close()
+        with CacheStore(path, 1024) as cache:
+            assert cache.stats().runs == 1
+
+
+def test__CacheStore__close__does_not_record_run_without_lookups() -> None:
+    """Does not record a run when there were no lookups (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        CacheStore(path, 1024).close()
+        with CacheStore(path, 1024) as cache:
+            assert cache.stats().runs == 0
+
+
+def test__CacheStore__close__prunes_entries_over_limit() -> None:
+    """Prunes entries when size exceeds the limit."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        cache = CacheStore(path, 4)
+        cache.put("a", b"1234")
+        cache.put("b", b"1234")
+        cache.close()
+        with CacheStore(path, 4) as cache:
+            assert cache.size() == 4
+
+
+def test__CacheStore____enter____returns_self() -> None:
+    """Returns the store itself."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = CacheStore(Path(tmpdir), 1024)
+        with cache as entered:
+            assert entered is cache
+
+
+def test__CacheStore____exit____closes_store() -> None:
+    """Closes the store when leaving the context, even on exceptions."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        try:
+            with CacheStore(path, 1024) as cache:
+                cache.put("key", b"value")
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        with CacheStore(path, 1024) as cache:
+            assert cache.get("key") == b"value"
+
+
+def test__CacheStore__get__can_be_shared_across_threads() -> None:
+    """Serves lookups and stores from several threads on one connection."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with CacheStore(Path(tmpdir), 1024 * 1024) as cache:
+
+            def work(i: int) -> None:
+                cache.put(f"key{i}", b"value")
+                assert cache.get(f"key{i}") == b"value"
+
+            threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert cache.hits == 8
+
+
+def test__CacheStore__put__commits_each_entry_immediately() -> None:
+    """Commits each entry so another connection sees it and can write while the store is open."""
+    with tempfile.TemporaryDirectory() as tmpdir, CacheStore(Path(tmpdir), 1024) as cache:
+        cache.put("key", b"value")
+        with CacheStore(Path(tmpdir), 1024) as other:
+            assert other.get("key") == b"value"
+            other.put("other", b"value")
+        assert cache.get("other") == b"value"
+
+
+def test__CacheStore__put__skips_entry_when_database_is_locked() -> None:
+    """Drops the entry instead of failing when the database cannot be written."""
+    with tempfile.TemporaryDirectory() as tmpdir, CacheStore(Path(tmpdir), 1024) as cache:
+        locker = sqlite3.connect(Path(tmpdir) / "cache.db", isolation_level=None)
+        locker.execute("BEGIN IMMEDIATE")
+        cache.connection.execute("PRAGMA busy_timeout = 10")
+        cache.put("key", b"value")
+        locker.execute("ROLLBACK")
+        locker.close()
+        assert cache.get("key") is None
+
+
+def test__CacheStore__get__treats_database_error_as_miss() -> None:
+    """Counts a miss instead of failing when the entry cannot be read."""
+    with tempfile.TemporaryDirectory() as tmpdir, CacheStore(Path(tmpdir), 1024) as cache:
+        with patch.object(cache, "connection") as mock_connection:
+            mock_connection.execute.side_effect = sqlite3.OperationalError("database is locked")
+            assert cache.get("key") is None
+        assert cache.misses == 1
+
+
+def test__CacheStore__transaction__commits_writes_together() -> None:
+    """Commits every write in the block at once and rolls back on errors."""
+    with tempfile.TemporaryDirectory() as tmpdir, CacheStore(Path(tmpdir), 1024) as cache:
+        with cache.transaction():
+            cache.put("a", b"1")
+            cache.put("b", b"2")
+        try:
+            with cache.transaction():
+                cache.put("c", b"3")
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        assert cache.size() == 2
+
+
+def test__CacheStore____init____enables_write_ahead_log() -> None:
+    """Opens the database in WAL mode so that readers do not block writers."""
+    with tempfile.TemporaryDirectory() as tmpdir, CacheStore(Path(tmpdir), 1024) as cache:
+        assert cache.connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+SIZE_UNITS = {
+    "": 1,
+    "K": 1024,
+    "M": 1024**2,
+    "G": 1024**3,
+}
+
+
+def parse_size(value: int | str) -> int:
+    """
+    サイズ指定をバイト数に変換する
+
+    Args:
+        value: バイト数、または "64MB" のような単位付き文字列
+
+    Returns:
+        int: バイト数
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid size: {value}")
+    if isinstance(value, int):
+        if value < 0:
+            raise ValueError(f"Invalid size: {value}")
+        return value
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid size: {value}")
+    match = re.fullmatch(r"\s*(\d+)\s*([KMG]?)B?\s*", value.upper())
+    if match is None:
+        raise ValueError(f"Invalid size: {value}")
+    number, unit = match.groups()
+    return int(number) * SIZE_UNITS[unit]
+
+
+@dataclass
+class Settings:
+    """[tool.sndtk] の設定値"""
+
+    cache: bool = True
+    cache_dir: str = ".sndtk_cache"
+    cache_max_size: int = 64 * 1024**2
+    # これより大きいファイルは解析せずにスキップする (Noneの場合は制限なし)
+    max_file_size: int | None = None
+    # ファイルの先頭にこれらの文字列があれば生成されたファイルとしてスキップする
+    generated_markers: list[str] = field(default_factory=list)
+    # 1ファイルの解析の制限時間 (秒)。指定した場合はワーカープロセスで解析する
+    parse_timeout: float | None = None
+    # ディレクトリ (ルートからの相対パス) ごとの関数カバレッジの下限 (%)
+    fail_under: dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, root_path: Path = Path(".")) -> Settings:
+        pyproject_path = root_path / "pyproject.toml"
+        if not pyproject_path.exists():
+            logger.debug(f"pyproject.toml not found at {pyproject_path}, using defaults")
+            return cls()
+
+        import tomli
+
+        try:
+            with open(pyproject_path, "rb") as f:
+                data = tomli.load(f)
+        except (tomli.TOMLDecodeError, OSError) as e:
+            logger.error(f"Failed to load settings: {e}", exc_info=True)
+            raise ValueError("Failed to load settings") from e
+
+        return cls.from_dict(data.get("tool", {}).get("sndtk", {}))
+
+    @classmethod
+    def from_dict(cls, config: dict[str, Any]) -> Settings:
+        settings = cls()
+
+        cache = config.get("cache", settings.cache)
+        if not isinstance(cache, bool):
+            raise ValueError("cache must be a boolean")
+        settings.cache = cache
+
+        cache_dir = config.get("cache_dir", settings.cache_dir)
+        if not isinstance(cache_dir, str):
+            raise ValueError("cache_dir must be a string")
+        settings.cache_dir = cache_dir
+
+        settings.cache_max_size = parse_size(config.get("cache_max_size", settings.cache_max_size))
+
+        max_file_size = config.get("max_file_size")
+        if max_file_size is not None:
+            settings.max_file_size = parse_size(max_file_size)
+
+        generated_markers = config.get("generated_markers", settings.generated_markers)
+        if not isinstance(generated_markers, list) or not all(
+            isinstance(marker, str) and marker for marker in generated_markers
+        ):
+            raise ValueError("generated_markers must be a list of non-empty strings")
+        settings.generated_markers = generated_markers
+
+        parse_timeout = config.get("parse_timeout")
+        if parse_timeout is not None:
+            if (
+                isinstance(parse_timeout, bool)
+                or not isinstance(parse_timeout, int | float)
+                or parse_timeout <= 0
+            ):
+                raise ValueError("parse_timeout must be a positive number of seconds")
+            settings.parse_timeout = float(parse_timeout)
+
+        fail_under = config.get("fail_under", settings.fail_under)
+        if not isinstance(fail_under, dict) or not all(
+            isinstance(minimum, int | float)
+            and not isinstance(minimum, bool)
+            and 0 <= minimum <= 100
+            for minimum in fail_under.values()
+        ):
+            raise ValueError("fail_under must map directories to percentages between 0 and 100")
+        settings.fail_under = {
+            directory: float(minimum) for directory, minimum in fail_under.items()
+        }
+
+        return settings
@@ -0,0 +1,139 @@
+"""Tests for Settings."""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from .settings import Settings, parse_size
+
+
+def test__parse_size__returns_integer_unchanged() -> None:
+    """Returns integer byte counts unchanged."""
+    assert parse_size(1024) == 1024
+
+
+def test__parse_size__returns_zero_for_zero() -> None:
+    """Returns 0 when size is 0 (boundary value)."""
+    assert parse_size(0) == 0
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("10", 10),
+        ("10B", 10),
+        ("2KB", 2 * 1024),
+        ("2k", 2 * 1024),
+        ("64MB", 64 * 1024**2),
+        (" 1 GB ", 1024**3),
+    ],
+)
+def test__parse_size__parses_strings_with_units(value: str, expected: int) -> None:
+    """Parses strings with units correctly (B, KB, MB, GB, case insensitive)."""
+    assert parse_size(value) == expected
+
+
+@pytest.mark.parametrize("value", [-1, True, "", "MB", "1.5MB", "10TB", 1.5])
+def test__parse_size__raises_value_error_for_invalid_sizes(value: object) -> None:
+    """Raises ValueError when size is negative, boolean, malformed or has an unknown unit."""
+    with pytest.raises(ValueError):
+        parse_size(value)  # type: ignore[arg-type]
+
+
+def test__Settings__load__returns_defaults_when_pyproject_toml_not_exists() -> None:
+    """Returns defaults when pyproject.toml does not exist."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        settings = Settings.load(Path(tmpdir))
+        assert settings == Settings()
+
+
+def test__Settings__load__loads_settings_from_pyproject_toml() -> None:
+    """Loads settings correctly from pyproject.toml."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root_path = Path(tmpdir)
+        (root_path / "pyproject.toml").write_text(
+            '[tool.sndtk]\ncache = false\ncache_dir = ".cache"\ncache_max_size = "1MB"\n'
+        )
+        settings = Settings.load(root_path)
+        assert settings.cache is False
+        assert settings.cache_dir == ".cache"
+        assert settings.cache_max_size == 1024**2
+
+
+def test__Settings__load__returns_defaults_when_tool_sndtk_section_is_missing() -> None:
+    """Returns defaults when [tool.sndtk] section is missing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root_path = Path(tmpdir)
+        (root_path / "pyproject.toml").write_text('[project]\nname = "test"\n')
+        assert Settings.load(root_path) == Settings()
+
+
+def test__Settings__load__raises_value_error_when_toml_is_invalid() -> None:
+    """Raises ValueError when pyproject.toml is invalid TOML."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root_path = Path(tmpdir)
+        (root_path / "pyproject.toml").write_text("[tool.sndtk\n")
+        with pytest.raises(ValueError, match="Failed to load settings"):
+            Settings.load(root_path)
+
+
+def test__Settings__from_dict__returns_defaults_for_empty_dict() -> None:
+    """Returns defaults when config is empty (boundary value)."""
+    settings = Settings.from_dict({})
+    assert settings.cache is True
+    assert settings.cache_dir == ".sndtk_cache"
+    assert settings.cache_max_size == 64 * 1024**2
+    assert settings.max_file_size is None
+    assert settings.generated_markers == []
+    assert settings.parse_timeout is None
+
+
+def test__Settings__from_dict__accepts_integer_cache_max_size() -> None:
+    """Accepts cache_max_size given as an integer byte count."""
+    assert Settings.from_dict({"cache_max_size": 100}).cache_max_size == 100
+
+
+@pytest.mark.parametrize(
+    ("config", "message"),
+    [
+        ({"cache": "yes"}, "cache must be a boolean"),
+        ({"cache_dir": 1}, "cache_dir must be a string"),
+        ({"cache_max_size": "big"}, "Invalid size"),
+        ({"max_file_size": "huge"}, "Invalid size"),
+        ({"generated_markers": "@generated"}, "generated_markers must be a list"),
+        ({"generated_markers": [""]}, "generated_markers must be a list"),
+        ({"parse_timeout": 0}, "parse_timeout must be a positive number"),
+        ({"parse_timeout": "5s"}, "parse_timeout must be a positive number"),
+        ({"fail_under": 80}, "fail_under must map directories"),
+        ({"fail_under": {"pkg": 101}}, "fail_under must map directories"),
+        ({"fail_under": {"pkg": True}}, "fail_under must map directories"),
+    ],
+)
+def test__Settings__from_dict__raises_value_error_for_invalid_types(
+    config: dict[str, object], message: str
+) -> None:
+    """Raises ValueError when a setting has an invalid type or value."""
+    with pytest.raises(ValueError, match=message):
+        Settings.from_dict(config)
+
+
+def test__Settings__from_dict__loads_file_size_limit_and_generated_markers() -> None:
+    """Loads max_file_size with units and the list of generated-file markers."""
+    settings = Settings.from_dict(
+        {"max_file_size": "2MB", "generated_markers": ["@generated", "DO NOT EDIT"]}
+    )
+    assert settings.max_file_size == 2 * 1024**2
+    assert settings.generated_markers == ["@generated", "DO NOT EDIT"]
+
+
+def test__Settings__from_dict__loads_parse_timeout() -> None:
+    """Loads parse_timeout given as an integer or float number of seconds."""
+    assert Settings.from_dict({"parse_timeout": 2}).parse_timeout == 2.0
+    assert Settings.from_dict({"parse_timeout": 0.5}).parse_timeout == 0.5
+
+
+def test__Settings__from_dict__loads_fail_under_thresholds() -> None:
+    """Loads per-directory fail_under percentages as floats."""
+    settings = Settings.from_dict({"fail_under": {".": 60, "pkg/legacy": 12.5}})
+    assert settings.fail_under == {".": 60.0, "pkg/legacy": 12.5}
@@ -0,0 +1,27 @@
+"""Helpers shared by the tests that need a git repository."""
+
+import subprocess
+import tempfile
+from collections.abc import Generator
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def git(root: Path, *args: str) -> str:
+    """Run git in the root as a fixed test user and return its output."""
+    result = subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=root,
+        check=True,
+        capture_output=True,
+    )
+    return result.stdout.decode().strip()
+
+
+@contextmanager
+def make_repository() -> Generator[Path]:
+    """An empty repository in a temporary directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir).resolve()
+        git(root, "init", "-q")
+        yield root
@@ -3,6 +3,7 @@ from .config import ConfigFilter
 from .exact import ExactFilter
 from .gitignore import GitignoreFilter
 from .pattern import PatternFilter
+from .select import SelectFilter
 from .types import FileFilter
 
 __all__ = [
@@ -12,4 +13,5 @@ __all__ = [
     "FileFilter",
     "GitignoreFilter",
     "PatternFilter",
+    "SelectFilter",
 ]
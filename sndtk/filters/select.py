@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+from .types import FileFilter
+
+
+def translate(pattern: str, separator: str) -> str:
+    """
+    グロブパターンを正規表現に変換する
+
+    * と ? は区切り文字をまたがず、** は区切り文字を含む任意の文字列に一致する。
+    区切り文字が続く ** は0個以上の階層に一致する
+
+    Args:
+        pattern: グロブパターン
+        separator: 階層の区切り文字 (パスの場合 "/"、関数の識別子の場合 "::")
+
+    Returns:
+        str: パターン全体に一致する正規表現
+    """
+    segment = f"[^{re.escape(separator[0])}]"
+    parts: list[str] = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**", i):
+            i += 2
+            if pattern.startswith(separator, i):
+                parts.append(f"(?:.*{re.escape(separator)})?")
+                i += len(separator)
+            else:
+                parts.append(".*")
+        elif pattern[i] == "*":
+            parts.append(f"{segment}*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append(segment)
+            i += 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(parts)
+
+
+class SelectFilter(FileFilter):
+    """
+    --select のパターン (path/**/*.py::Class*::method_*) でファイルと関数を選択するフィルター
+
+    ファイルの部分はディレクトリの枝刈りにも用いる。全てのパターンは
+    ファイルの部分と関数の部分をそれぞれ1つの正規表現にまとめて一度だけコンパイルする
+    """
+
+    def __init__(self, patterns: list[str], root: Path = Path(".")) -> None:
+        """
+        Args:
+            patterns: ルートからの相対パスのグロブと、:: に続く関数の識別子のグロブ (省略時は全ての関数)
+            root: パターンの基準となるディレクトリ
+        """
+        if not patterns:
+            raise ValueError("At least one select pattern is required")
+        self.patterns = patterns
+        self.root = root
+        files: list[str] = []
+        functions: list[str] = []
+        self.segments: list[list[re.Pattern[str] | None]] = []
+        for pattern in patterns:
+            file_pattern, _, function_pattern = pattern.partition("::")
+            file_regex = translate(file_pattern, "/")
+            files.append(f"(?:{file_regex})")
+            functions.append(f"(?:{file_regex})::(?:{translate(function_pattern or '**', '::')})")
+            # 枝刈りのために階層ごとの正規表現も保持する。** の階層はNone
+            self.segments.append(
+                [
+                    None if segment == "**" else re.compile(translate(segment, "/"))
+                    for segment in file_pattern.split("/")
+                ]
+            )
+        self.file_regex = re.compile("|".join(files))
+        self.function_regex = re.compile("|".join(functions))
+
+    def relative(self, path: Path) -> str:
+        """
+        パターンと照合するためのルートからの相対パスを返す
+
+        Args:
+            path: 走査で見つかったパス
+
+        Returns:
+            str: ルートからの相対パス (ルートの外の場合はそのままのパス)
+        """
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def is_ignored(self, path: Path) -> bool:
+        return self.file_regex.fullmatch(self.relative(path)) is None
+
+    def may_contain(self, directory: Path) -> bool:
+        """
+        ディレクトリの下に選択されうるファイルがあるかどうかを判定する
+
+        Args:
+            directory: 判定するディレクトリ
+
+        Returns:
+            bool: いずれかのパターンに一致するファイルを含みうる場合True
+        """
+        relative = self.relative(directory)
+        parts = [] if relative == "." else relative.split("/")
+        for segments in self.segments:
+            for i, part in enumerate(parts):
+                if i >= len(segments):
+                    break
+                segment = segments[i]
+                if segment is None:
+                    return True
+                if segment.fullmatch(part) is None:
+                    break
+            else:
+                if len(segments) > len(parts):
+                    return True
+        return False
+
+    def matches_function(self, path: Path, function_identifier: str) -> bool:
+        """
+        関数がいずれかのパターンに一致するかどうかを判定する
+
+        Args:
+            path: 関数が定義されているファイルのパス
+            function_identifier: 関数の識別子
+
+        Returns:
+            bool: 一致する場合True
+        """
+        return (
+            self.function_regex.fullmatch(f"{self.relative(path)}::{function_identifier}")
+            is not None
+        )
@@ -0,0 +1,95 @@
+"""Tests for SelectFilter."""
+
+import re
+from pathlib import Path
+
+import pytest
+
+from .select import SelectFilter, translate
+
+
+def test__translate__keeps_single_star_within_one_segment() -> None:
+    """Translates * and ? so that they do not match the separator."""
+    regex = re.compile(translate("pkg/*_?.py", "/"))
+    assert regex.fullmatch("pkg/service_a.py")
+    assert not regex.fullmatch("pkg/sub/service_a.py")
+
+
+def test__translate__matches_any_depth_with_double_star() -> None:
+    """Translates **/ into zero or more whole segments."""
+    regex = re.compile(translate("pkg/**/*.py", "/"))
+    assert regex.fullmatch("pkg/a.py")
+    assert regex.fullmatch("pkg/x/y/a.py")
+    assert not regex.fullmatch("pkgx/a.py")
+
+
+def test__translate__uses_double_colon_separator_for_identifiers() -> None:
+    """Does not let * cross :: when translating identifier patterns."""
+    regex = re.compile(translate("Service*::handle_*", "::"))
+    assert regex.fullmatch("ServiceA::handle_get")
+    assert not regex.fullmatch("ServiceA::Inner::handle_get")
+
+
+def test__translate__escapes_regex_metacharacters() -> None:
+    """Escapes characters that have a meaning in regular expressions."""
+    regex = re.compile(translate("a.py", "/"))
+    assert regex.fullmatch("a.py")
+    assert not regex.fullmatch("abpy")
+
+
+def test__SelectFilter____init____compiles_one_regex_for_files_and_one_for_functions() -> None:
+    """Compiles every pattern into one file regex and one function regex."""
+    select = SelectFilter(["a/*.py::f", "b/**/*.py"])
+    assert select.file_regex.fullmatch("b/c/d.py")
+    assert select.function_regex.fullmatch("a/x.py::f")
+    assert len(select.segments) == 2
+
+
+def test__SelectFilter____init____raises_value_error_without_patterns() -> None:
+    """Raises ValueError when no pattern is given (boundary value)."""
+    with pytest.raises(ValueError):
+        SelectFilter([])
+
+
+def test__SelectFilter__relative__returns_path_relative_to_root() -> None:
+    """Returns the POSIX path relative to the root."""
+    select = SelectFilter(["**"], Path("/repo"))
+    assert select.relative(Path("/repo/pkg/a.py")) == "pkg/a.py"
+
+
+def test__SelectFilter__relative__returns_path_outside_root_unchanged() -> None:
+    """Returns a path outside the root unchanged (boundary value)."""
+    select = SelectFilter(["**"], Path("/repo"))
+    assert select.relative(Path("/other/a.py")) == "/other/a.py"
+
+
+def test__SelectFilter__is_ignored__ignores_files_not_matching_any_pattern() -> None:
+    """Ignores files that match none of the file patterns."""
+    select = SelectFilter(["pkg/**/*.py::Service*", "tools/run.py"], Path("/repo"))
+    assert not select.is_ignored(Path("/repo/pkg/api/service.py"))
+    assert not select.is_ignored(Path("/repo/tools/run.py"))
+    assert select.is_ignored(Path("/repo/other/service.py"))
+
+
+def test__SelectFilter__may_contain__prunes_directories_that_cannot_match() -> None:
+    """Returns False for directories under which no pattern can match."""
+    select = SelectFilter(["pkg/api/*.py"], Path("/repo"))
+    assert select.may_contain(Path("/repo/pkg"))
+    assert select.may_contain(Path("/repo/pkg/api"))
+    assert not select.may_contain(Path("/repo/pkg/api/v1"))
+    assert not select.may_contain(Path("/repo/docs"))
+
+
+def test__SelectFilter__may_contain__enters_every_directory_below_double_star() -> None:
+    """Returns True for every directory below a ** segment."""
+    select = SelectFilter(["pkg/**/*.py"], Path("/repo"))
+    assert select.may_contain(Path("/repo/pkg/a/b/c"))
+    assert not select.may_contain(Path("/repo/other"))
+
+
+def test__SelectFilter__matches_function__matches_identifier_pattern_for_file() -> None:
+    """Matches functions against the identifier pattern of the patterns for their file."""
+    select = SelectFilter(["pkg/*.py::Service*::handle_*", "tools/*.py"], Path("/repo"))
+    assert select.matches_function(Path("/repo/pkg/a.py"), "ServiceA::handle_get")
+    assert not select.matches_function(Path("/repo/pkg/a.py"), "ServiceA::close")
+    assert select.matches_function(Path("/repo/tools/a.py"), "Anything::at_all")
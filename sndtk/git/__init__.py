@@ -0,0 +1,4 @@
+from .cat_file import CatFile, GitError, run_git
+from .tree import Blob, GitTree, list_commits
+
+__all__ = ["Blob", "CatFile", "GitError", "GitTree", "list_commits", "run_git"]
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import logging
+import subprocess
+import threading
+from pathlib import Path
+from types import TracebackType
+from typing import IO
+
+logger = logging.getLogger(__name__)
+
+
+class GitError(Exception):
+    """gitの実行に失敗した場合、またはオブジェクトが見つからない場合の例外"""
+
+
+def run_git(cwd: Path, *args: str) -> bytes:
+    """
+    gitのコマンドを実行して標準出力を返す
+
+    Args:
+        cwd: gitを実行するディレクトリ
+        args: gitのサブコマンドと引数
+
+    Returns:
+        bytes: 標準出力
+    """
+    try:
+        result = subprocess.run(["git", "-C", str(cwd), *args], capture_output=True, check=False)
+    except OSError as e:
+        raise GitError(f"Could not run git: {e}") from e
+    if result.returncode != 0:
+        message = result.stderr.decode(errors="replace").strip()
+        raise GitError(f"git {args[0]} failed: {message}")
+    return result.stdout
+
+
+class CatFile:
+    """
+    1つの git cat-file --batch プロセスでオブジェクトの内容を読み込む
+
+    オブジェクトごとにプロセスを起動しないため、多数のファイルを読む場合も起動のコストは一度だけになる。
+    要求と応答はロックで直列化するため、複数のスレッドから共有できる
+    """
+
+    def __init__(self, cwd: Path) -> None:
+        """
+        Args:
+            cwd: gitリポジトリ内のディレクトリ
+        """
+        self.cwd = cwd
+        self.lock = threading.Lock()
+        try:
+            self.process: subprocess.Popen[bytes] = subprocess.Popen(
+                ["git", "-C", str(cwd), "cat-file", "--batch"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError as e:
+            raise GitError(f"Could not run git: {e}") from e
+        logger.debug(f"Started git cat-file process {self.process.pid}")
+
+    def read(self, oid: str) -> bytes:
+        """
+        オブジェクトの内容を読み込む
+
+        Args:
+            oid: オブジェクトのハッシュ
+
+        Returns:
+            bytes: オブジェクトの内容
+        """
+        with self.lock:
+            stdin, stdout = self.streams()
+            try:
+                stdin.write(f"{oid}\n".encode())
+                stdin.flush()
+                header = stdout.readline().decode().split()
+            except OSError as e:
+                raise GitError(f"git cat-file exited while reading {oid}") from e
+            if len(header) != 3:
+                raise GitError(f"Object not found: {oid}")
+            size = int(header[2])
+            content = stdout.read(size)
+            stdout.read(1)
+        if len(content) != size:
+            raise GitError(f"git cat-file exited while reading {oid}")
+        return content
+
+    def streams(self) -> tuple[IO[bytes], IO[bytes]]:
+        stdin, stdout = self.process.stdin, self.process.stdout
+        if stdin is None or stdout is None or stdin.closed:
+            raise GitError("git cat-file process is closed")
+        return stdin, stdout
+
+    def close(self) -> None:
+        """プロセスの入力を閉じて終了を待つ"""
+        with self.lock:
+            if self.process.stdin is not None and not self.process.stdin.closed:
+                self.process.stdin.close()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            if self.process.stdout is not None:
+                self.process.stdout.close()
+        logger.debug(f"Stopped git cat-file process {self.process.pid}")
+
+    def __enter__(self) -> CatFile:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
@@ -0,0 +1,108 @@
+"""Tests for the git cat-file process."""
+
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from sndtk.conftest import git, make_repository
+from sndtk.git.cat_file import CatFile, GitError, run_git
+
+
+def commit_file(root: Path, content: bytes) -> str:
+    """Commit a.py with the content and return the blob hash."""
+    (root / "a.py").write_bytes(content)
+    git(root, "add", ".")
+    git(root, "commit", "-q", "-m", "initial")
+    return git(root, "rev-parse", "HEAD:a.py")
+
+
+def test__run_git__returns_standard_output() -> None:
+    """Returns the standard output of the git command."""
+    with make_repository() as root:
+        oid = commit_file(root, b"x = 1\n")
+        assert run_git(root, "rev-parse", "HEAD:a.py").decode().strip() == oid
+
+
+def test__run_git__raises_git_error_on_failure() -> None:
+    """Raises GitError with the message of git when the command fails."""
+    with tempfile.TemporaryDirectory() as tmpdir, pytest.raises(GitError, match="rev-parse"):
+        run_git(Path(tmpdir), "rev-parse", "HEAD")
+
+
+def test__run_git__raises_git_error_without_git() -> None:
+    """Raises GitError when git cannot be run."""
+    with (
+        patch("sndtk.git.cat_file.subprocess.run", side_effect=FileNotFoundError("git")),
+        pytest.raises(GitError, match="Could not run git"),
+    ):
+        run_git(Path("."), "status")
+
+
+def test__CatFile____init____starts_batch_process() -> None:
+    """Starts one git cat-file --batch process in the directory."""
+    with make_repository() as root:
+        commit_file(root, b"")
+        with CatFile(root) as cat_file:
+            assert cat_file.cwd == root
+            assert cat_file.process.poll() is None
+
+
+def test__CatFile__read__reads_objects_with_one_process() -> None:
+    """Returns the exact contents of several objects read through the same process."""
+    with make_repository() as root:
+        content = b"def f():\n    pass\n\n\n"
+        oid = commit_file(root, content)
+        with CatFile(root) as cat_file:
+            pid = cat_file.process.pid
+            assert cat_file.read(oid) == content
+            assert cat_file.read(oid) == content
+            assert cat_file.process.pid == pid
+
+
+def test__CatFile__read__raises_for_missing_object() -> None:
+    """Raises GitError for an object that is not in the repository and keeps working."""
+    with make_repository() as root:
+        oid = commit_file(root, b"x = 1\n")
+        with CatFile(root) as cat_file:
+            with pytest.raises(GitError, match="Object not found"):
+                cat_file.read("0" * 40)
+            assert cat_file.read(oid) == b"x = 1\n"
+
+
+def test__CatFile__streams__raises_after_close() -> None:
+    """Raises GitError when the process has been closed."""
+    with make_repository() as root:
+        commit_file(root, b"")
+        cat_file = CatFile(root)
+        cat_file.close()
+        with pytest.raises(GitError, match="closed"):
+            cat_file.streams()
+
+
+def test__CatFile__close__waits_for_process_to_exit() -> None:
+    """Closes the input and waits until the process has exited."""
+    with make_repository() as root:
+        commit_file(root, b"")
+        cat_file = CatFile(root)
+        cat_file.close()
+        assert cat_file.process.returncode is not None
+
+
+def test__CatFile____enter____returns_itself() -> None:
+    """Returns the process wrapper itself as the context value."""
+    with make_repository() as root:
+        commit_file(root, b"")
+        cat_file = CatFile(root)
+        with cat_file as entered:
+            assert entered is cat_file
+
+
+def test__CatFile____exit____closes_process() -> None:
+    """Stops the process when leaving the context."""
+    with make_repository() as root:
+        commit_file(root, b"")
+        with CatFile(root) as cat_file:
+            pass
+        assert cat_file.process.returncode is not None
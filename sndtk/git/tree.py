@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import logging
+import os
+from collections.abc import Callable, Generator
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+
+from .cat_file import CatFile, GitError, run_git
+
+logger = logging.getLogger(__name__)
+
+SYMLINK_MODE = "120000"
+GITLINK_MODE = "160000"
+
+
+@dataclass(frozen=True)
+class Blob:
+    """ツリーに含まれるファイルのオブジェクト"""
+
+    oid: str
+    size: int | None
+
+
+def list_commits(cwd: Path, revisions: str) -> list[tuple[str, str]]:
+    """
+    範囲に含まれるコミットを古い順に列挙する。マージされたブランチのコミットは辿らない
+
+    Args:
+        cwd: gitリポジトリ内のディレクトリ
+        revisions: コミットの範囲 (A..B など)
+
+    Returns:
+        list[tuple[str, str]]: コミットのハッシュと件名
+    """
+    if revisions.startswith("-"):
+        raise GitError(f"Invalid revision range: {revisions}")
+    output = run_git(cwd, "log", "--reverse", "--first-parent", "--format=%H %s", revisions, "--")
+    commits = []
+    for line in output.decode(errors="replace").splitlines():
+        commit, _, subject = line.partition(" ")
+        commits.append((commit, subject))
+    return commits
+
+
+class GitTree:
+    """
+    作業ツリーの代わりに、コミットのツリーからファイルを読み込む
+
+    パスは作業ツリーと同じく現在のディレクトリからの相対パス (または絶対パス) で指定し、
+    リポジトリのルートからのパスに変換してツリーを引く。シンボリックリンクとサブモジュールは含まない
+    """
+
+    def __init__(self, rev: str, cwd: Path = Path("."), cat_file: CatFile | None = None) -> None:
+        """
+        Args:
+            rev: コミットを指すリビジョン (ブランチ名、タグ、コミットのハッシュなど)
+            cwd: gitリポジトリ内のディレクトリ
+            cat_file: オブジェクトの読み込みに用いるプロセス (Noneの場合は起動する)
+        """
+        self.toplevel = Path(run_git(cwd, "rev-parse", "--show-toplevel").decode().strip())
+        self.commit = self.resolve(rev)
+        self.cwd = Path(os.path.realpath(os.getcwd()))
+        self.blobs: dict[str, Blob] = {}
+        self.children: dict[str, dict[str, bool]] = {"": {}}
+        output = run_git(self.toplevel, "ls-tree", "-r", "-z", "-l", "--full-tree", self.commit)
+        for entry in output.split(b"\0"):
+            if entry:
+                meta, _, name = entry.partition(b"\t")
+                mode, kind, oid, size = meta.decode().split()
+                if kind == "blob" and mode != SYMLINK_MODE:
+                    self.add(name.decode(errors="surrogateescape"), Blob(oid, int(size)))
+        self.cat_file = cat_file or CatFile(self.toplevel)
+        self.owns_cat_file = cat_file is None
+        logger.info(f"Reading {len(self.blobs)} files from {rev} ({self.commit[:12]})")
+
+    def resolve(self, rev: str) -> str:
+        """
+        リビジョンをコミットのハッシュに解決する
+
+        Args:
+            rev: リビジョン
+
+        Returns:
+            str: コミットのハッシュ
+        """
+        if rev.startswith("-"):
+            raise GitError(f"Invalid revision: {rev}")
+        try:
+            output = run_git(self.toplevel, "rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}")
+        except GitError as e:
+            raise GitError(f"Unknown revision: {rev}") from e
+        return output.decode().strip()
+
+    def add(self, name: str, blob: Blob) -> None:
+        """
+        ファイルをツリーに加え、親ディレクトリを登録する
+
+        Args:
+            name: リポジトリのルートからのパス
+            blob: ファイルのオブジェクト
+        """
+        self.blobs[name] = blob
+        parent, _, base = name.rpartition("/")
+        self.children.setdefault(parent, {})[base] = False
+        while parent:
+            directory = parent
+            parent, _, base = directory.rpartition("/")
+            siblings = self.children.setdefault(parent, {})
+            if base in siblings:
+                break
+            siblings[base] = True
+            self.children.setdefault(directory, {})
+
+    def remove(self, name: str) -> None:
+        """
+        ファイルをツリーから除き、空になった親ディレクトリを削除する
+
+        Args:
+            name: リポジトリのルートからのパス
+        """
+        if self.blobs.pop(name, None) is None:
+            return
+        directory, _, base = name.rpartition("/")
+        while True:
+            siblings = self.children[directory]
+            del siblings[base]
+            if siblings or not directory:
+                break
+            del self.children[directory]
+            directory, _, base = directory.rpartition("/")
+
+    def update(self, rev: str) -> list[str]:
+        """
+        別のコミットに移り、前のコミットとの差分だけをツリーに反映する
+
+        Args:
+            rev: 移るコミットのリビジョン
+
+        Returns:
+            list[str]: 追加、変更、削除されたファイルのリポジトリのルートからのパス
+        """
+        commit = self.resolve(rev)
+        output = run_git(
+            self.toplevel, "diff-tree", "-r", "-z", "--no-renames", self.commit, commit
+        )
+        fields = output.split(b"\0")
+        changed = []
+        for meta, path in zip(fields[0::2], fields[1::2], strict=False):
+            _, mode, _, oid, status = meta.decode().lstrip(":").split()
+            name = path.decode(errors="surrogateescape")
+            self.remove(name)
+            if status != "D" and mode not in (SYMLINK_MODE, GITLINK_MODE):
+                # diff-tree は大きさを出力しないため、必要になったときに内容から求める
+                self.add(name, Blob(oid, None))
+            changed.append(name)
+        logger.info(f"Moved to {commit[:12]}: {len(changed)} files changed")
+        self.commit = commit
+        return changed
+
+    def key(self, path: Path) -> str | None:
+        """
+        パスをリポジトリのルートからのパスに変換する
+
+        Args:
+            path: 現在のディレクトリからの相対パスまたは絶対パス
+
+        Returns:
+            str | None: リポジトリのルートからのパス (ルートの場合は空文字列)、リポジトリの外の場合None
+        """
+        absolute = os.path.normpath(self.cwd / path)
+        relative = os.path.relpath(absolute, self.toplevel)
+        if relative == os.curdir:
+            return ""
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            return None
+        return Path(relative).as_posix()
+
+    def blob(self, path: Path) -> Blob:
+        key = self.key(path)
+        blob = self.blobs.get(key) if key is not None else None
+        if blob is None:
+            raise FileNotFoundError(f"{path} does not exist in {self.commit[:12]}")
+        return blob
+
+    def is_file(self, path: Path) -> bool:
+        key = self.key(path)
+        return key is not None and key in self.blobs
+
+    def is_dir(self, path: Path) -> bool:
+        key = self.key(path)
+        return key is not None and key in self.children
+
+    def size(self, path: Path) -> int:
+        blob = self.blob(path)
+        return blob.size if blob.size is not None else len(self.read_bytes(path))
+
+    def read_bytes(self, path: Path) -> bytes:
+        """
+        ファイルの内容を読み込む
+
+        Args:
+            path: ファイルのパス
+
+        Returns:
+            bytes: コミット時点のファイルの内容
+        """
+        return self.cat_file.read(self.blob(path).oid)
+
+    def walk(self, path: Path, enter: Callable[[Path], bool] | None = None) -> Generator[Path]:
+        """
+        ディレクトリ以下のファイルを走査する。作業ツリーの walk と同じく、渡したパスを先頭に付けて返す
+
+        Args:
+            path: 走査するディレクトリ
+            enter: ディレクトリに入るかどうかを判定する関数 (Noneの場合は全てのディレクトリに入る)
+
+        Returns:
+            Generator[Path]: ファイルのパス
+        """
+        key = self.key(path)
+        entries = self.children.get(key, {}) if key is not None else {}
+        for name, is_directory in entries.items():
+            item_path = path / name
+            if is_directory:
+                if enter is not None and not enter(item_path):
+                    logger.debug(f"Pruning directory: {item_path}")
+                    continue
+                yield from self.walk(item_path, enter)
+            else:
+                yield item_path
+
+    def close(self) -> None:
+        """起動した git cat-file プロセスを終了する"""
+        if self.owns_cat_file:
+            self.cat_file.close()
+
+    def __enter__(self) -> GitTree:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
@@ -0,0 +1,249 @@
+"""Tests for reading files from a git revision."""
+
+import os
+from collections.abc import Generator
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+from sndtk.conftest import git, make_repository
+from sndtk.git.cat_file import CatFile, GitError
+from sndtk.git.tree import Blob, GitTree, list_commits
+
+
+@contextmanager
+def make_revisions() -> Generator[Path]:
+    """A repository with two commits; the working tree differs from both."""
+    with make_repository() as root:
+        (root / "pkg" / "sub").mkdir(parents=True)
+        (root / "a.py").write_text("def f():\n    pass\n")
+        (root / "pkg" / "b.py").write_text("x = 1\n")
+        (root / "pkg" / "sub" / "c.py").write_text("")
+        os.symlink("a.py", root / "link.py")
+        git(root, "add", ".")
+        git(root, "commit", "-q", "-m", "first")
+        (root / "a.py").write_text("def g():\n    pass\n")
+        git(root, "commit", "-q", "-am", "second")
+        (root / "a.py").write_text("uncommitted\n")
+        (root / "new.py").write_text("")
+        yield root
+
+
+def test__GitTree____init____lists_files_of_revision() -> None:
+    """Lists the regular files of the commit, not the working tree or symlinks."""
+    with make_revisions() as repository:
+        with GitTree("HEAD~1", repository) as tree:
+            assert tree.toplevel == repository
+            assert set(tree.blobs) == {"a.py", "pkg/b.py", "pkg/sub/c.py"}
+            assert len(tree.commit) == 40
+
+
+def test__GitTree____init____uses_shared_cat_file() -> None:
+    """Uses the given cat-file process without taking ownership of it."""
+    with make_revisions() as repository:
+        with CatFile(repository) as cat_file:
+            tree = GitTree("HEAD", repository, cat_file)
+            assert tree.cat_file is cat_file
+            assert not tree.owns_cat_file
+
+
+def test__GitTree__resolve__returns_commit_hash() -> None:
+    """Resolves branch names and relative revisions to the commit hash."""
+    with make_revisions() as repository:
+        with GitTree("HEAD", repository) as tree:
+            assert tree.resolve("HEAD") == tree.commit
+            assert tree.resolve("HEAD~1") != tree.commit
+
+
+def test__GitTree__resolve__raises_for_unknown_revision() -> None:
+    """Raises GitError for a revision that does not name a commit."""
+    with make_revisions() as repository:
+        with pytest.raises(GitError, match="Unknown revision: nope"):
+            GitTree("nope", repository)
+
+
+def test__GitTree__resolve__rejects_option_like_revision() -> None:
+    """Raises GitError for a revision starting with a dash (boundary value)."""
+    with make_revisions() as repository:
+        with pytest.raises(GitError, match="Invalid revision"):
+            GitTree("--all", repository)
+
+
+def test__GitTree__add__registers_parent_directories() -> None:
+    """Registers the file in its directory and every missing parent directory."""
+    with make_revisions() as repository:
+        with GitTree("HEAD", repository) as tree:
+            tree.add("x/y/z.py", Blob("abc", 1))
+            assert tree.children["x/y"] == {"z.py": False}
+            assert tree.children["x"] == {"y": True}
+            assert tree.children[""]["x"] is True
+
+
+def test__GitTree__key__converts_paths_to_repository_paths() -> None:
+    """Converts absolute and relative paths to paths from the repository root."""
+    with make_revisions() as repository:
+        with GitTree("HEAD", repository) as tree:
+            assert tree.key(repository / "pkg" / "b.py") == "pkg/b.py"
+            assert tree.key(repository) == ""
+            assert tree.key(Path(os.path.relpath(repository / "a.py"))) == "a.py"
+
+
+def test__GitTree__key__returns_none_outside_repository() -> None:
+    """Returns None for a path outside the repository (boundary value)."""
+    with make_revisions() as repository:
+        with GitTree("HEAD", repository) as tree:
+            assert tree.key(repository.parent) is None
+
+
+def test__GitTree__blob__raises_for_missing_file() -> None:
+    """Raises FileNotFoundError for a file that is not in the commit."""
+    with make_revisions() as repository:
+        with GitTree("HEAD", repository) as tree:
+            assert tree.blob(repository / "a.py").size == len("def g():\n    pass\n")
+            with pytest.raises(FileNotFoundError):
+                tree.blob(repository / "new.py")
+
+
+def test__GitTree__is_file__checks_files_of_revision() -> None:
+    """Returns True only for regular files of the commit."""
+    with make_revisions() as repository:
+        with GitTree("HEAD", repository) as tree:
+            assert tree.is_file(repository / "a.py")
+            assert not tree.is_file(repository / "new.py")
+            assert not tree.is_file(repository / "pkg")
+
+
+def test__GitTree__is_dir__checks_directories_of_revision() -> None:
+    """Returns True for the root and directories of the commit and False for files."""
+    with make_revisions() as repository:
+        with GitTree("HEAD", repository) as tree:
+            assert tree.is_dir(repository)
+            assert tree.is_dir(repository / "pkg" / "sub")
+            assert not tree.is_dir(repository / "a.py")
+
+
+def test__GitTree__size__returns_blob_size() -> None:
+    """Returns the size of the file in the commit."""
+    with make_revisions() as repository:
+        with GitTree("HEAD", repository) as tree:
+            assert tree.size(repository / "pkg" / "b.py") == len("x = 1\n")
+
+
+def test__GitTree__read_bytes__reads_contents_at_revision() -> None:
+    """Returns the committed contents instead of the working tree contents."""
+    with make_revisions() as repository:
+        with GitTree("HEAD~1", repository) as old, GitTree("HEAD", repository) as new:
+            assert old.read_bytes(repository / "a.py") == b"def f():\n    pass\n"
+            assert new.read_bytes(repository / "a.py") == b"def g():\n    pass\n"
+
+
+def test__GitTree__walk__yields_files_under_directory() -> None:
+    """Yields every file below the directory, prefixed with the given path."""
+    with make_revisions() as repository:
+        with GitTree("HEAD", repository) as tree:
+            assert list(tree.walk(repository)) == [
+                repository / "a.py",
+                repository / "pkg" / "b.py",
+                repository / "pkg" / "sub" / "c.py",
+            ]
+            assert list(tree.walk(repository / "pkg" / "sub")) == [
+                repository / "pkg" / "sub" / "c.py"
+            ]
+
+
+def test__GitTree__walk__prunes_directories() -> None:
+    """Does not enter directories rejected by enter."""
+    with make_revisions() as repository:
+        with GitTree("HEAD", repository) as tree:
+            paths = list(tree.walk(repository, lambda path: path.name != "sub"))
+            assert paths == [repository / "a.py", repository / "pkg" / "b.py"]
+
+
+def test__GitTree__close__stops_only_owned_process() -> None:
+    """Stops the cat-file process it started but not a shared one."""
+    with make_revisions() as repository:
+        with CatFile(repository) as cat_file:
+            GitTree("HEAD", repository, cat_file).close()
+            assert cat_file.process.poll() is None
+            tree = GitTree("HEAD", repository)
+            tree.close()
+            assert tree.cat_file.process.returncode is not None
+
+
+def test__GitTree____enter____returns_itself() -> None:
+    """Returns the tree itself as the context value."""
+    with make_revisions() as repository:
+        tree = GitTree("HEAD", repository)
+        with tree as entered:
+            assert entered is tree
+
+
+def test__GitTree____exit____closes_tree() -> None:
+    """Stops the cat-file process when leaving the context."""
+    with make_revisions() as repository:
+        with GitTree("HEAD", repository) as tree:
+            pass
+        assert tree.cat_file.process.returncode is not None
+
+
+def test__list_commits__lists_commits_oldest_first() -> None:
+    """Returns the hash and subject of every commit in the range, oldest first."""
+    with make_revisions() as repository:
+        with GitTree("HEAD", repository) as tree:
+            commits = list_commits(repository, "HEAD~1..HEAD")
+            assert commits == [(tree.commit, "second")]
+            assert [subject for _, subject in list_commits(repository, "HEAD")] == [
+                "first",
+                "second",
+            ]
+
+
+def test__list_commits__rejects_option_like_range() -> None:
+    """Raises GitError for a range starting with a dash (boundary value)."""
+    with make_revisions() as repository, pytest.raises(GitError, match="Invalid revision range"):
+        list_commits(repository, "--all")
+
+
+def test__GitTree__remove__removes_empty_parent_directories() -> None:
+    """Removes the file and every parent directory left empty, but not the root."""
+    with make_revisions() as repository:
+        with GitTree("HEAD", repository) as tree:
+            tree.remove("pkg/sub/c.py")
+            assert "pkg/sub" not in tree.children
+            assert tree.children["pkg"] == {"b.py": False}
+            tree.remove("pkg/b.py")
+            assert "pkg" not in tree.children
+            assert "pkg" not in tree.children[""]
+            tree.remove("missing.py")
+
+
+def test__GitTree__update__applies_changes_between_commits() -> None:
+    """Moves to the commit and returns only the files that changed since the previous one."""
+    with make_revisions() as repository:
+        with GitTree("HEAD~1", repository) as tree:
+            assert tree.update("HEAD") == ["a.py"]
+            assert tree.read_bytes(repository / "a.py") == b"def g():\n    pass\n"
+            assert tree.commit == tree.resolve("HEAD")
+            assert tree.update("HEAD") == []
+
+
+def test__GitTree__update__removes_deleted_files() -> None:
+    """Removes files deleted by the commit and adds files it creates."""
+    with make_revisions() as repository:
+        git(repository, "rm", "-q", "pkg/sub/c.py")
+        git(repository, "add", "new.py")
+        git(repository, "commit", "-q", "-m", "third")
+        with GitTree("HEAD~1", repository) as tree:
+            assert sorted(tree.update("HEAD")) == ["new.py", "pkg/sub/c.py"]
+            assert not tree.is_dir(repository / "pkg" / "sub")
+            assert tree.is_file(repository / "new.py")
+
+
+def test__GitTree__size__reads_size_of_updated_file() -> None:
+    """Returns the size from the contents when the listing did not include it."""
+    with make_revisions() as repository:
+        with GitTree("HEAD~1", repository) as tree:
+            tree.update("HEAD")
+            assert tree.blobs["a.py"].size is None
+            assert tree.size(repository / "a.py") == len("def g():\n    pass\n")
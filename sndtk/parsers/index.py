@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import logging
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from sndtk.parsers.python import PythonParser
+
+if TYPE_CHECKING:
+    from sndtk.git import GitTree
+
+logger = logging.getLogger(__name__)
+
+
+class SymbolIndex:
+    """
+    テストファイルごとに定義されている関数名の索引
+
+    同じテストファイルを参照するシナリオが複数あっても、ファイルの解析は一度だけ行う。
+    内容が同じテストファイルはパーサーの記録を共有する。
+    複数のスレッドから共有できる
+    """
+
+    def __init__(self, parser: PythonParser | None = None, tree: GitTree | None = None) -> None:
+        """
+        Args:
+            parser: テストファイルの解析に用いるパーサー
+            tree: 指定した場合、テストファイルの有無をコミットのツリーで判定する
+        """
+        self.parser = parser or PythonParser()
+        self.tree = tree
+        self.symbols: dict[Path, frozenset[str]] = {}
+        self.keys: dict[Path, Path] = {}
+        self.lock = threading.Lock()
+
+    def key(self, testpath: Path) -> Path:
+        """
+        テストファイルの索引のキーを返す
+
+        パスごとに一度だけシンボリックリンクを解決し、シナリオごとのファイルシステムへの問い合わせを省く
+
+        Args:
+            testpath: テストファイルのパス
+
+        Returns:
+            Path: 解決済みの絶対パス
+        """
+        absolute = testpath if testpath.is_absolute() else Path.cwd() / testpath
+        with self.lock:
+            key = self.keys.get(absolute)
+        if key is None:
+            key = absolute.resolve()
+            with self.lock:
+                self.keys[absolute] = key
+        return key
+
+    def names(self, testpath: Path) -> frozenset[str] | None:
+        """
+        テストファイルに定義されている関数名を返す
+
+        Args:
+            testpath: テストファイルのパス
+
+        Returns:
+            frozenset[str] | None: 関数名の集合、ファイルが存在しない場合None
+        """
+        key = self.key(testpath)
+        with self.lock:
+            names = self.symbols.get(key)
+        if names is not None:
+            return names
+        exists = self.tree.is_file(testpath) if self.tree is not None else testpath.exists()
+        if not exists:
+            return None
+
+        logger.debug(f"Indexing test file {testpath}")
+        names = frozenset(function.name for function in self.parser.parse(testpath))
+        with self.lock:
+            return self.symbols.setdefault(key, names)
+
+    def invalidate(self, path: Path) -> bool:
+        """
+        ファイルの索引を破棄する
+
+        Args:
+            path: 変更されたファイルのパス
+
+        Returns:
+            bool: 索引が破棄された場合True
+        """
+        key = self.key(path)
+        with self.lock:
+            self.keys.pop(path if path.is_absolute() else Path.cwd() / path, None)
+            return self.symbols.pop(key, None) is not None
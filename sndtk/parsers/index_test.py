@@ -0,0 +1,109 @@
+"""Tests for SymbolIndex."""
+
+import ast
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from sndtk.git import GitTree
+from sndtk.parsers.index import SymbolIndex
+from sndtk.parsers.python import PythonParser
+
+
+def test__SymbolIndex__names__returns_function_names_in_test_file() -> None:
+    """Returns the names of the functions defined in the test file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        testpath = Path(tmpdir) / "module_test.py"
+        testpath.write_text(
+            "def test_a():\n    pass\n\nclass TestB:\n    def test_c(self):\n        pass\n"
+        )
+        assert SymbolIndex().names(testpath) == frozenset({"test_a", "test_c"})
+
+
+def test__SymbolIndex__names__returns_none_when_test_file_not_found() -> None:
+    """Returns None when the test file does not exist."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        assert SymbolIndex().names(Path(tmpdir) / "missing_test.py") is None
+
+
+def test__SymbolIndex__names__parses_each_test_file_once() -> None:
+    """Parses each test file only once across repeated lookups."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        testpath = Path(tmpdir) / "module_test.py"
+        testpath.write_text("def test_a():\n    pass\n")
+        index = SymbolIndex()
+        with patch.object(index.parser, "parse", wraps=index.parser.parse) as mock_parse:
+            index.names(testpath)
+            index.names(testpath)
+        mock_parse.assert_called_once_with(testpath)
+
+
+def test__SymbolIndex__invalidate__reparses_test_file_after_invalidation() -> None:
+    """Re-parses the test file on the next lookup after it is invalidated."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        testpath = Path(tmpdir) / "module_test.py"
+        testpath.write_text("def test_a():\n    pass\n")
+        index = SymbolIndex()
+        index.names(testpath)
+        testpath.write_text("def test_b():\n    pass\n")
+        assert index.invalidate(testpath) is True
+        assert index.names(testpath) == frozenset({"test_b"})
+
+
+def test__SymbolIndex__invalidate__returns_false_when_path_not_indexed() -> None:
+    """Returns False when the path was never indexed (boundary value)."""
+    assert SymbolIndex().invalidate(Path("missing_test.py")) is False
+
+
+def test__SymbolIndex____init____uses_given_parser() -> None:
+    """Uses the given parser to parse test files."""
+    parser = PythonParser()
+    assert SymbolIndex(parser).parser is parser
+
+
+def test__SymbolIndex____init____creates_parser_when_not_given() -> None:
+    """Creates an uncached parser when none is given (boundary value)."""
+    index = SymbolIndex()
+    assert index.parser.cache is None
+    assert index.symbols == {}
+
+
+def test__SymbolIndex__names__shares_parse_between_identical_test_files() -> None:
+    """Parses byte-identical test files at different paths only once."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = [Path(tmpdir) / f"module{i}_test.py" for i in range(3)]
+        for path in paths:
+            path.write_text("def test_a():\n    pass\n")
+        index = SymbolIndex()
+        with patch("sndtk.parsers.python.ast.parse", wraps=ast.parse) as mock_parse:
+            assert all(index.names(path) == frozenset({"test_a"}) for path in paths)
+        mock_parse.assert_called_once()
+
+
+def test__SymbolIndex__key__resolves_each_path_once() -> None:
+    """Resolves symbolic links only on the first lookup of a path."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        testpath = Path(tmpdir) / "module_test.py"
+        index = SymbolIndex()
+        with patch.object(Path, "resolve", autospec=True, side_effect=lambda p: p) as mock_resolve:
+            assert index.key(testpath) == testpath
+            assert index.key(testpath) == testpath
+        mock_resolve.assert_called_once()
+
+
+def test__SymbolIndex__key__makes_relative_paths_absolute() -> None:
+    """Returns the same key for a relative path and its absolute form."""
+    index = SymbolIndex()
+    relative = Path("sndtk") / "parsers" / "index_test.py"
+    assert index.key(relative) == index.key(Path.cwd() / relative)
+    assert index.key(relative).is_absolute()
+
+
+def test__SymbolIndex__names__reads_test_file_from_git_tree() -> None:
+    """Looks up and parses the test file in the git tree instead of the working tree."""
+    tree = MagicMock(spec=GitTree)
+    tree.is_file.side_effect = lambda path: path == Path("module_test.py")
+    tree.read_bytes.return_value = b"def test_a():\n    pass\n"
+    index = SymbolIndex(PythonParser(tree=tree), tree)
+    assert index.names(Path("module_test.py")) == frozenset({"test_a"})
+    assert index.names(Path("other_test.py")) is None
@@ -1,14 +1,167 @@
 from __future__ import annotations
 
 import ast
+import hashlib
+import json
 import logging
+import mmap
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
 from collections.abc import Generator
+from dataclasses import replace
 from pathlib import Path
+from typing import TYPE_CHECKING
 
+from sndtk.cache import CacheStore
 from sndtk.parsers.types import Function
 
+if TYPE_CHECKING:
+    from sndtk.git import GitTree
+    from sndtk.parsers.worker import ParseWorker
+
 logger = logging.getLogger(__name__)
 
+CACHE_VERSION = 3
+# ASTはPythonのバージョンによって異なるため、解析結果のキャッシュはバージョンごとに分ける
+PYTHON_VERSION = f"{sys.version_info.major}.{sys.version_info.minor}"
+MMAP_THRESHOLD = 1 << 20
+# 最も短い関数定義 `def f():0` と、次の定義との間の改行の大きさ
+MIN_FUNCTION_SIZE = len(b"def f():0\n")
+# 同じ内容のファイルの解析結果を実行中に記録しておく件数。長時間のセッションでも増え続けないよう古いものから捨てる
+MEMO_SIZE = 1024
+
+# 関数定義の `def` は必ず物理行の先頭 (インデントの後) に現れる
+DEF_PATTERN = re.compile(rb"(?:\A(?:\xef\xbb\xbf)?|[\r\n])[ \t\f]*def[ \t\f\\]")
+CODING_PATTERN = re.compile(rb"[ \t\f]*#.*?coding[:=][ \t]*([-\w.]+)")
+
+
+class ParseTimeoutError(TimeoutError):
+    """ファイルの解析が制限時間内に終わらなかったことを表す例外"""
+
+    def __init__(self, filepath: Path, timeout: float) -> None:
+        """
+        Args:
+            filepath: 解析していたファイルのパス
+            timeout: 制限時間 (秒)
+        """
+        super().__init__(f"Parse timed out after {timeout:g} s")
+        self.filepath = filepath
+        self.timeout = timeout
+
+
+def may_define_functions(source_code: bytes | mmap.mmap) -> bool:
+    """
+    ソースコードのバイト列に関数定義の候補があるかを構文解析せずに判定する
+
+    行頭の `def` を探すだけなので、文字列やコメント中の `def` でもTrueになるが、
+    実際の関数定義を見逃すことはない。ASCII互換でないエンコーディングが宣言されている場合はTrueを返す
+
+    Args:
+        source_code: ファイルの内容
+
+    Returns:
+        bool: 関数定義が含まれる可能性がある場合True
+    """
+    if DEF_PATTERN.search(source_code):
+        return True
+    for line in bytes(source_code[:1024]).splitlines()[:2]:
+        match = CODING_PATTERN.match(line)
+        if match is None:
+            continue
+        try:
+            return "\ndef ".encode(match.group(1).decode("ascii")) != b"\ndef "
+        except (LookupError, UnicodeError):
+            return True
+    return False
+
+
+def estimate_functions(source_code: bytes | mmap.mmap) -> int | None:
+    """
+    構文解析せずに、ソースコードに定義されている関数の数の上限を見積もる
+
+    行頭の `def` を数えるため、文字列やコメント中の `def` も数えるが、実際の関数定義より少なくはならない
+
+    Args:
+        source_code: ファイルの内容
+
+    Returns:
+        int | None: 関数の数の上限。ASCII互換でないエンコーディングが宣言されていて数えられない場合None
+    """
+    count = len(DEF_PATTERN.findall(source_code))
+    if count == 0 and may_define_functions(source_code):
+        return None
+    return count
+
+
+def bound_functions(size: int) -> int:
+    """
+    ファイルを読み込まずに、大きさから定義されうる関数の数の上限を求める
+
+    関数定義はそれぞれ物理行の先頭から始まり、最も短いものでも MIN_FUNCTION_SIZE から改行を除いた
+    大きさがあるため、estimate_functions より緩いが内容によらず成り立つ
+
+    Args:
+        size: ファイルの大きさ (バイト)
+
+    Returns:
+        int: 関数の数の上限
+    """
+    return (size + 1) // MIN_FUNCTION_SIZE
+
+
+def serialize(node: object) -> str:
+    """
+    ASTをPythonのバージョンによらない文字列に変換する
+
+    ast.dump は3.13から空のフィールドを省略し、3.12では type_params などのフィールドが増えたため、
+    値が空リストまたはNoneのフィールドは常に省略する
+
+    Args:
+        node: 変換するAST、そのリスト、または定数
+
+    Returns:
+        str: ノードの種類と空でないフィールドを並べた文字列
+    """
+    if isinstance(node, ast.AST):
+        fields = []
+        for name in node._fields:
+            value = getattr(node, name, None)
+            if value is None or (isinstance(value, list) and len(value) == 0):
+                continue
+            fields.append(f"{name}={serialize(value)}")
+        return f"{type(node).__name__}({', '.join(fields)})"
+    if isinstance(node, list):
+        return f"[{', '.join(serialize(item) for item in node)}]"
+    return repr(node)
+
+
+def fingerprint(node: ast.FunctionDef) -> str:
+    """
+    関数本体の正規化されたASTからフィンガープリントを計算する
+
+    関数名・引数・デコレータ・docstring・位置情報は含まないため、
+    名前の変更やクラスへの移動では変化しない
+
+    Args:
+        node: 対象の関数定義ノード
+
+    Returns:
+        str: 16桁の16進数文字列
+    """
+    body = node.body
+    if (
+        len(body) > 0
+        and isinstance(body[0], ast.Expr)
+        and isinstance(body[0].value, ast.Constant)
+        and isinstance(body[0].value.value, str)
+    ):
+        body = body[1:]
+    dump = "\n".join(serialize(statement) for statement in body)
+    return hashlib.sha256(dump.encode()).hexdigest()[:16]
+
 
 def handle_function(
     node: ast.FunctionDef, filepath: Path, context: list[str]
@@ -20,6 +173,7 @@ def handle_function(
         line=node.lineno,
         column=node.col_offset,
         identifier=identifier,
+        fingerprint=fingerprint(node),
     )
 
     for child in ast.iter_child_nodes(node):
@@ -38,11 +192,62 @@ def search(node: ast.AST, filepath: Path, context: list[str] = []) -> Generator[
         yield from search(child, filepath, context)
 
 
+def encode_functions(functions: list[Function]) -> bytes:
+    return json.dumps(
+        [
+            [
+                function.name,
+                function.line,
+                function.column,
+                function.identifier,
+                function.fingerprint,
+            ]
+            for function in functions
+        ]
+    ).encode()
+
+
+def decode_functions(data: bytes, filepath: Path) -> list[Function]:
+    return [
+        Function(
+            filepath=filepath,
+            name=name,
+            line=line,
+            column=column,
+            identifier=identifier,
+            fingerprint=digest,
+        )
+        for name, line, column, identifier, digest in json.loads(data)
+    ]
+
+
 class PythonParser:
     """
     Pythonコードを解析するクラス
     """
 
+    def __init__(
+        self,
+        cache: CacheStore | None = None,
+        timeout: float | None = None,
+        tree: GitTree | None = None,
+    ) -> None:
+        """
+        同じ内容のファイルは、パスが異なっても実行中に一度だけ解析する
+
+        Args:
+            cache: 解析結果をファイル内容のハッシュで保存するキャッシュ
+            timeout: 1ファイルの解析の制限時間 (秒)。指定した場合はスレッドごとのワーカープロセスで解析する
+            tree: 指定した場合、作業ツリーの代わりにコミットのツリーからファイルを読み込む
+        """
+        self.cache = cache
+        self.timeout = timeout
+        self.tree = tree
+        self.memo: OrderedDict[str, list[Function]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.workers: list[ParseWorker] = []
+
     def parse(self, filepath: Path) -> Generator[Function]:
         """
         Pythonコードを解析する
@@ -54,12 +259,111 @@ class PythonParser:
             ast.Module: 解析結果のASTモジュール
         """
         logger.debug(f"Parsing Python file: {filepath}")
-        with open(filepath) as f:
+        if self.tree is not None:
+            # 内容のハッシュでキャッシュを引くため、変更のないファイルはコミットが違っても再解析しない
+            yield from self.parse_source(filepath, self.tree.read_bytes(filepath))
+            return
+        with open(filepath, "rb") as f:
+            if os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    if not may_define_functions(mapped):
+                        logger.debug(f"Skipped {filepath}: no function definitions")
+                        return
             source_code = f.read()
 
-        tree = ast.parse(source_code, filename=str(filepath))
-        function_count = 0
-        for function in search(tree, filepath):
-            function_count += 1
-            yield function
-        logger.debug(f"Parsed {function_count} functions from {filepath}")
+        yield from self.parse_source(filepath, source_code)
+
+    def parse_source(self, filepath: Path, source_code: bytes) -> list[Function]:
+        """
+        読み込み済みのPythonコードを解析する
+
+        Args:
+            filepath: 解析対象のPythonファイルのパス
+            source_code: ファイルの内容
+
+        Returns:
+            list[Function]: 定義されている関数
+        """
+        if not may_define_functions(source_code):
+            logger.debug(f"Skipped {filepath}: no function definitions")
+            return []
+
+        digest = hashlib.sha256(source_code).hexdigest()
+        key = f"python:{CACHE_VERSION}:{PYTHON_VERSION}:{digest}"
+        with self.lock:
+            memo = self.memo.get(key)
+            if memo is not None:
+                self.memo.move_to_end(key)
+        if memo is not None:
+            logger.debug(f"Reusing {len(memo)} functions parsed from identical contents")
+            return [replace(function, filepath=filepath) for function in memo]
+
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                functions = decode_functions(cached, filepath)
+                logger.debug(f"Loaded {len(functions)} functions from cache for {filepath}")
+                return self.remember(key, functions)
+
+        functions = self.parse_functions(filepath, source_code)
+        if self.cache is not None:
+            self.cache.put(key, encode_functions(functions))
+        logger.debug(f"Parsed {len(functions)} functions from {filepath}")
+        return self.remember(key, functions)
+
+    def parse_functions(self, filepath: Path, source_code: bytes) -> list[Function]:
+        """
+        キャッシュを介さずにソースコードを構文解析する
+
+        制限時間が設定されている場合は、呼び出したスレッド専用のワーカープロセスで解析する
+
+        Args:
+            filepath: 解析対象のPythonファイルのパス
+            source_code: ファイルの内容
+
+        Returns:
+            list[Function]: 定義されている関数
+
+        Raises:
+            ParseTimeoutError: 解析が制限時間を超えた場合
+        """
+        if self.timeout is None:
+            tree = ast.parse(source_code, filename=str(filepath))
+            return list(search(tree, filepath))
+
+        from sndtk.parsers.worker import ParseWorker
+
+        worker: ParseWorker | None = getattr(self.local, "worker", None)
+        if worker is None:
+            worker = self.local.worker = ParseWorker()
+            with self.lock:
+                self.workers.append(worker)
+        return worker.parse(filepath, source_code, self.timeout)
+
+    def close(self) -> None:
+        """起動したワーカープロセスを全て終了する"""
+        with self.lock:
+            workers, self.workers = self.workers, []
+        for worker in workers:
+            worker.close()
+        self.local = threading.local()
+
+    def remember(self, key: str, functions: list[Function]) -> list[Function]:
+        """
+        解析結果を内容のハッシュで記録する
+
+        記録するのは複製なので、返した関数が呼び出し側で変更されても影響しない。
+        記録が MEMO_SIZE 件を超えた場合は最も長く参照されていないものを捨てる
+
+        Args:
+            key: ファイル内容のハッシュを含むキー
+            functions: 解析結果
+
+        Returns:
+            list[Function]: 渡された解析結果
+        """
+        with self.lock:
+            self.memo.setdefault(key, [replace(function) for function in functions])
+            if len(self.memo) > MEMO_SIZE:
+                self.memo.popitem(last=False)
+        return functions
@@ -2,9 +2,26 @@
 
 import ast
 import tempfile
+import threading
 from pathlib import Path
+from unittest.mock import MagicMock, patch
 
-from sndtk.parsers.python import PythonParser, handle_function, search
+from sndtk.cache import CacheStore
+from sndtk.git import GitTree
+from sndtk.parsers.python import (
+    ParseTimeoutError,
+    PythonParser,
+    bound_functions,
+    decode_functions,
+    encode_functions,
+    estimate_functions,
+    fingerprint,
+    handle_function,
+    may_define_functions,
+    search,
+    serialize,
+)
+from sndtk.parsers.types import Function
 
 
 def test__handle_function__yields_function_with_empty_context() -> None:
@@ -265,3 +282,368 @@ def test__PythonParser__parse__parses_file_with_class_methods() -> None:
         assert results[1].identifier == "MyClass::method2"
     finally:
         filepath.unlink()
+
+
+def test__PythonParser__parse__stores_result_in_cache() -> None:
+    """Stores parse result in the cache on a miss and reuses it on a hit."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "module.py"
+        filepath.write_text("def function1():\n    pass\n")
+        with CacheStore(Path(tmpdir) / "cache", 1024) as cache:
+            first = list(PythonParser(cache).parse(filepath))
+            second = list(PythonParser(cache).parse(filepath))
+            assert first == second
+            assert cache.misses == 1
+            assert cache.hits == 1
+
+
+def test__PythonParser__parse__restamps_cached_functions_with_filepath() -> None:
+    """Restamps cached functions with the parsed filepath when contents are identical."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath1 = Path(tmpdir) / "a.py"
+        filepath2 = Path(tmpdir) / "b.py"
+        filepath1.write_text("def function1():\n    pass\n")
+        filepath2.write_text("def function1():\n    pass\n")
+        with CacheStore(Path(tmpdir) / "cache", 1024) as cache:
+            list(PythonParser(cache).parse(filepath1))
+            results = list(PythonParser(cache).parse(filepath2))
+            assert cache.hits == 1
+            assert results[0].filepath == filepath2
+
+
+def test__PythonParser____init____initializes_without_cache() -> None:
+    """Initializes successfully without a cache (boundary value)."""
+    parser = PythonParser()
+    assert parser.cache is None
+
+
+def test__PythonParser____init____initializes_with_cache() -> None:
+    """Initializes successfully with a cache."""
+    with tempfile.TemporaryDirectory() as tmpdir, CacheStore(Path(tmpdir), 1024) as cache:
+        parser = PythonParser(cache)
+        assert parser.cache is cache
+
+
+def test__encode_functions__encodes_empty_list() -> None:
+    """Encodes an empty function list (boundary value)."""
+    assert encode_functions([]) == b"[]"
+
+
+def test__encode_functions__encodes_functions_without_filepath() -> None:
+    """Encodes functions without their filepath."""
+    function = Function(
+        filepath=Path("module.py"), name="method", line=3, column=4, identifier="Class::method"
+    )
+    data = encode_functions([function])
+    assert b"module.py" not in data
+    assert b"Class::method" in data
+
+
+def test__decode_functions__decodes_functions_with_filepath() -> None:
+    """Decodes encoded functions and stamps them with the given filepath."""
+    function = Function(
+        filepath=Path("a.py"), name="method", line=3, column=4, identifier="Class::method"
+    )
+    results = decode_functions(encode_functions([function]), Path("b.py"))
+    assert results == [
+        Function(filepath=Path("b.py"), name="method", line=3, column=4, identifier="Class::method")
+    ]
+
+
+def test__decode_functions__decodes_empty_list() -> None:
+    """Decodes an empty function list (boundary value)."""
+    assert decode_functions(b"[]", Path("a.py")) == []
+
+
+def parse_function(source: str) -> ast.FunctionDef:
+    node = ast.parse(source).body[0]
+    if isinstance(node, ast.ClassDef):
+        node = node.body[0]
+    assert isinstance(node, ast.FunctionDef)
+    return node
+
+
+def test__fingerprint__ignores_name_arguments_and_position() -> None:
+    """Returns the same fingerprint when only name, arguments, decorators or position change."""
+    original = parse_function("def f(a):\n    return a + 1\n")
+    renamed = parse_function(
+        "class C:\n    @staticmethod\n    def g(self, a):\n        return a + 1\n"
+    )
+    assert fingerprint(original) == fingerprint(renamed)
+
+
+def test__fingerprint__ignores_docstring_and_formatting() -> None:
+    """Returns the same fingerprint when only the docstring, comments or formatting change."""
+    original = parse_function("def f(a):\n    return a + 1\n")
+    documented = parse_function('def f(a):\n    """Docs."""\n    # comment\n    return (a  +  1)\n')
+    assert fingerprint(original) == fingerprint(documented)
+
+
+def test__fingerprint__changes_when_body_changes() -> None:
+    """Returns a different fingerprint when the body changes."""
+    original = parse_function("def f(a):\n    return a + 1\n")
+    changed = parse_function("def f(a):\n    return a + 2\n")
+    assert fingerprint(original) != fingerprint(changed)
+
+
+def test__fingerprint__handles_docstring_only_body() -> None:
+    """Returns a 16 character hex digest for a docstring-only body (boundary value)."""
+    digest = fingerprint(parse_function('def f():\n    """Only docs."""\n'))
+    assert len(digest) == 16
+    int(digest, 16)
+
+
+def test__fingerprint__matches_pinned_digests() -> None:
+    """Returns the same digests on every supported Python version."""
+    sources = {
+        "def f(a, *args, key=None, **kwargs):\n    return g(a, *args, key=key, **kwargs)\n": (
+            "e8d89b624f470ebb"
+        ),
+        "def f(items):\n    for item in items:\n        if item:\n"
+        "            yield [x for x in item if x]\n    return None\n": "f9d4985e3561efee",
+        "def f():\n    class C:\n        def m(self):\n            pass\n"
+        "    return lambda: C()\n": "0792c177143cb3d6",
+    }
+    for source, digest in sources.items():
+        assert fingerprint(parse_function(source)) == digest
+
+
+def test__bound_functions__allows_one_function_per_ten_bytes() -> None:
+    """Bounds the functions by the shortest definition and its line break."""
+    source = b"def f():0\ndef g():0"
+    assert len(list(search(ast.parse(source), Path("a.py")))) == 2
+    assert bound_functions(len(source)) == 2
+
+
+def test__bound_functions__returns_zero_for_empty_file() -> None:
+    """Returns zero for an empty file (boundary value)."""
+    assert bound_functions(0) == 0
+
+
+def test__serialize__omits_empty_fields() -> None:
+    """Leaves out fields that are None or empty lists, as ast.dump does only from 3.13."""
+    call = ast.Call(func=ast.Name(id="f", ctx=ast.Load()), args=[], keywords=[])
+    assert serialize(call) == "Call(func=Name(id='f', ctx=Load()))"
+
+
+def test__serialize__serializes_lists_and_constants() -> None:
+    """Serializes every node of a list and constants by their repr."""
+    node = ast.parse("x = [1, 'a']").body[0]
+    assert serialize(node) == (
+        "Assign(targets=[Name(id='x', ctx=Store())], "
+        "value=List(elts=[Constant(value=1), Constant(value='a')], ctx=Load()))"
+    )
+
+
+def test__handle_function__records_fingerprint() -> None:
+    """Records the body fingerprint of the function."""
+    node = parse_function("def f(a):\n    return a + 1\n")
+    results = list(handle_function(node, Path("test.py"), []))
+    assert results[0].fingerprint == fingerprint(node)
+
+
+def test__PythonParser__parse_source__parses_given_bytes_without_reading_file() -> None:
+    """Parses the given source bytes without reading the file."""
+    functions = PythonParser().parse_source(Path("missing.py"), b"def f():\n    pass\n")
+    assert [function.identifier for function in functions] == ["f"]
+    assert functions[0].filepath == Path("missing.py")
+
+
+def test__PythonParser__parse_source__uses_cache_for_same_contents() -> None:
+    """Returns cached functions for contents that were parsed before."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with CacheStore(Path(tmpdir), 1024 * 1024) as cache:
+            PythonParser(cache).parse_source(Path("a.py"), b"def f():\n    pass\n")
+            functions = PythonParser(cache).parse_source(Path("b.py"), b"def f():\n    pass\n")
+            assert cache.hits == 1
+            assert functions[0].filepath == Path("b.py")
+
+
+def test__PythonParser__parse_source__keys_cache_by_python_version() -> None:
+    """Does not reuse functions cached by another Python version."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with CacheStore(Path(tmpdir), 1024 * 1024) as cache:
+            with patch("sndtk.parsers.python.PYTHON_VERSION", "3.11"):
+                PythonParser(cache).parse_source(Path("a.py"), b"def f():\n    pass\n")
+            with patch("sndtk.parsers.python.PYTHON_VERSION", "3.13"):
+                PythonParser(cache).parse_source(Path("a.py"), b"def f():\n    pass\n")
+            assert cache.hits == 0
+
+
+def test__may_define_functions__detects_def_at_line_start() -> None:
+    """Returns True for def at the start of a line, after indentation, a BOM or a CR."""
+    assert may_define_functions(b"def f():\n    pass\n")
+    assert may_define_functions(b"class A:\n\tdef f(self):\n\t\tpass\n")
+    assert may_define_functions(b"\xef\xbb\xbfdef f(): pass\n")
+    assert may_define_functions(b"x = 1\r\x0cdef f(): pass\r")
+    assert may_define_functions(b"def\\\n f(): pass\n")
+
+
+def test__may_define_functions__rejects_sources_without_def_statement() -> None:
+    """Returns False when def only appears inside other names or not at a line start."""
+    assert not may_define_functions(b"")
+    assert not may_define_functions(b"undef = 1\nx.define = 2\nfrom m import default\n")
+    assert not may_define_functions(b"x = 1  # def f(): pass\n")
+
+
+def test__may_define_functions__assumes_definitions_for_non_ascii_encodings() -> None:
+    """Returns True when the coding cookie declares an unknown or non-ASCII-compatible encoding."""
+    assert may_define_functions(b"# -*- coding: utf-16 -*-\nx = 1\n")
+    assert may_define_functions(b"#!/usr/bin/env python\n# coding: unknown\nx = 1\n")
+    assert not may_define_functions(b"# coding: latin-1\nx = 1\n")
+
+
+def test__may_define_functions__never_misses_functions_in_this_package() -> None:
+    """Returns True for every module of this package that defines a function."""
+    for path in Path(__file__).parent.parent.rglob("*.py"):
+        source_code = path.read_bytes()
+        tree = ast.parse(source_code)
+        if any(isinstance(node, ast.FunctionDef) for node in ast.walk(tree)):
+            assert may_define_functions(source_code), path
+
+
+def test__PythonParser__parse_source__skips_ast_parse_without_def() -> None:
+    """Returns an empty list without running ast.parse when no def can be present."""
+    with patch("sndtk.parsers.python.ast.parse") as mock_parse:
+        functions = PythonParser().parse_source(Path("consts.py"), b"X = 1\nY = 'def'\n")
+        assert functions == []
+        mock_parse.assert_not_called()
+
+
+def test__PythonParser__parse__scans_large_files_with_mmap() -> None:
+    """Skips large files without function definitions using a memory-mapped scan."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "large.py"
+        filepath.write_bytes(b"X = 1\n" * 100)
+        with (
+            patch("sndtk.parsers.python.MMAP_THRESHOLD", 10),
+            patch("sndtk.parsers.python.ast.parse") as mock_parse,
+        ):
+            assert list(PythonParser().parse(filepath)) == []
+            mock_parse.assert_not_called()
+
+        filepath.write_bytes(b"X = 1\n" * 100 + b"def f():\n    pass\n")
+        with patch("sndtk.parsers.python.MMAP_THRESHOLD", 10):
+            functions = list(PythonParser().parse(filepath))
+        assert [function.identifier for function in functions] == ["f"]
+
+
+def test__PythonParser__parse_source__parses_identical_contents_once() -> None:
+    """Parses identical contents once per run and re-stamps the functions with each path."""
+    parser = PythonParser()
+    with patch("sndtk.parsers.python.ast.parse", wraps=ast.parse) as mock_parse:
+        first = parser.parse_source(Path("a/client.py"), b"def f():\n    pass\n")
+        second = parser.parse_source(Path("b/client.py"), b"def f():\n    pass\n")
+    mock_parse.assert_called_once()
+    assert first[0].filepath == Path("a/client.py")
+    assert second[0].filepath == Path("b/client.py")
+    assert second[0].identifier == "f"
+
+
+def test__PythonParser__parse_source__reuses_cached_contents_without_cache_lookup() -> None:
+    """Looks up the persistent cache only once for contents seen earlier in the run."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with CacheStore(Path(tmpdir), 1024 * 1024) as cache:
+            PythonParser(cache).parse_source(Path("a.py"), b"def f():\n    pass\n")
+            parser = PythonParser(cache)
+            parser.parse_source(Path("b.py"), b"def f():\n    pass\n")
+            parser.parse_source(Path("c.py"), b"def f():\n    pass\n")
+            assert cache.hits == 1
+
+
+def test__PythonParser__remember__stores_copies_of_functions() -> None:
+    """Keeps the remembered functions unchanged when the returned ones are modified."""
+    parser = PythonParser()
+    functions = [Function(filepath=Path("a.py"), name="f", line=1, column=0, identifier="f")]
+    assert parser.remember("key", functions) is functions
+    functions[0].name = "g"
+    assert parser.memo["key"][0].name == "f"
+
+
+def test__PythonParser__remember__evicts_least_recently_used_contents() -> None:
+    """Discards the least recently used result once more than MEMO_SIZE contents are remembered."""
+    parser = PythonParser()
+    with patch("sndtk.parsers.python.MEMO_SIZE", 2):
+        for name in ("a", "b", "c"):
+            parser.parse_source(Path(f"{name}.py"), f"def {name}():\n    pass\n".encode())
+        parser.parse_source(Path("b.py"), b"def b():\n    pass\n")
+        parser.parse_source(Path("d.py"), b"def d():\n    pass\n")
+    assert [functions[0].name for functions in parser.memo.values()] == ["b", "d"]
+
+
+def test__PythonParser____init____starts_with_empty_memo() -> None:
+    """Starts without any remembered parse results (boundary value)."""
+    assert PythonParser().memo == {}
+
+
+def test__ParseTimeoutError____init____records_path_and_timeout() -> None:
+    """Keeps the file path and timeout and states the timeout in the message."""
+    error = ParseTimeoutError(Path("slow.py"), 2.5)
+    assert error.filepath == Path("slow.py")
+    assert error.timeout == 2.5
+    assert str(error) == "Parse timed out after 2.5 s"
+    assert isinstance(error, TimeoutError)
+
+
+def test__PythonParser__parse_functions__parses_in_process_without_timeout() -> None:
+    """Parses in the calling process when no timeout is configured (boundary value)."""
+    parser = PythonParser()
+    functions = parser.parse_functions(Path("module.py"), b"def f():\n    pass\n")
+    assert [function.identifier for function in functions] == ["f"]
+    assert parser.workers == []
+
+
+def test__PythonParser__parse_functions__uses_one_worker_per_thread() -> None:
+    """Parses in a worker process that is reused by the same thread when a timeout is set."""
+    parser = PythonParser(timeout=30)
+    try:
+        parser.parse_functions(Path("a.py"), b"def f():\n    pass\n")
+        parser.parse_functions(Path("b.py"), b"def g():\n    pass\n")
+        thread = threading.Thread(
+            target=parser.parse_functions, args=(Path("c.py"), b"def h():\n    pass\n")
+        )
+        thread.start()
+        thread.join()
+        assert len(parser.workers) == 2
+    finally:
+        parser.close()
+
+
+def test__PythonParser__close__stops_all_workers() -> None:
+    """Stops the worker processes of every thread."""
+    parser = PythonParser(timeout=30)
+    parser.parse_functions(Path("a.py"), b"def f():\n    pass\n")
+    (worker,) = parser.workers
+    parser.close()
+    assert worker.process is None
+    assert parser.workers == []
+
+
+def test__estimate_functions__counts_def_at_line_starts() -> None:
+    """Counts every def at the start of a line, including nested ones."""
+    source_code = b"def f():\n    def g():\n        pass\n\n\nclass A:\n    def h(self): pass\n"
+    assert estimate_functions(source_code) == 3
+    assert estimate_functions(b"x = 1  # def f(): pass\n") == 0
+
+
+def test__estimate_functions__returns_none_for_non_ascii_encodings() -> None:
+    """Returns None when definitions cannot be counted because of the declared encoding."""
+    assert estimate_functions(b"# -*- coding: utf-16 -*-\nx = 1\n") is None
+
+
+def test__estimate_functions__never_underestimates_functions_in_this_package() -> None:
+    """Returns at least the number of parsed functions for every module of this package."""
+    for path in Path(__file__).parent.parent.rglob("*.py"):
+        source_code = path.read_bytes()
+        estimate = estimate_functions(source_code)
+        assert estimate is not None
+        assert estimate >= len(list(search(ast.parse(source_code), path))), path
+
+
+def test__PythonParser__parse__reads_file_from_git_tree() -> None:
+    """Parses the contents read from the git tree instead of the working tree."""
+    tree = MagicMock(spec=GitTree)
+    tree.read_bytes.return_value = b"def committed():\n    pass\n"
+    functions = list(PythonParser(tree=tree).parse(Path("missing.py")))
+    assert [function.name for function in functions] == ["committed"]
+    tree.read_bytes.assert_called_once_with(Path("missing.py"))
@@ -9,3 +9,4 @@ class Function:
     line: int
     column: int
     identifier: str
+    fingerprint: str = ""
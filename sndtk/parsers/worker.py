@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import ast
+import logging
+import multiprocessing
+from multiprocessing.connection import Connection
+from multiprocessing.context import ForkServerContext, SpawnContext
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+
+from sndtk.parsers.python import ParseTimeoutError, decode_functions, encode_functions, search
+from sndtk.parsers.types import Function
+
+logger = logging.getLogger(__name__)
+
+
+def serve(connection: Connection) -> None:
+    """
+    ワーカープロセスの本体。受け取ったソースコードを解析し、エンコードした関数を送り返す
+
+    Args:
+        connection: 親プロセスとの接続
+    """
+    while True:
+        try:
+            filepath, source_code = connection.recv()
+        except EOFError:
+            return
+        try:
+            tree = ast.parse(source_code, filename=filepath)
+            connection.send((True, encode_functions(list(search(tree, Path(filepath))))))
+        except Exception as e:
+            connection.send((False, e))
+
+
+class ParseWorker:
+    """
+    別プロセスで構文解析を行うワーカー
+
+    解析が制限時間を超えた場合はプロセスを強制終了し、次の解析で新しいプロセスを起動する
+    """
+
+    def __init__(self) -> None:
+        self.process: BaseProcess | None = None
+        self.connection: Connection | None = None
+
+    def start(self) -> Connection:
+        """
+        ワーカープロセスを起動する
+
+        Returns:
+            Connection: ワーカープロセスとの接続
+        """
+        # スレッドを使うプロセスからの fork は安全でないため、forkserver か spawn で起動する
+        context: ForkServerContext | SpawnContext
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+        else:
+            context = multiprocessing.get_context("spawn")
+        connection, child = context.Pipe()
+        process = context.Process(target=serve, args=(child,), name="sndtk-parser", daemon=True)
+        process.start()
+        child.close()
+        logger.debug(f"Started parser process {process.pid}")
+        self.process, self.connection = process, connection
+        return connection
+
+    def parse(self, filepath: Path, source_code: bytes, timeout: float) -> list[Function]:
+        """
+        ワーカープロセスでソースコードを解析する
+
+        Args:
+            filepath: 解析対象のPythonファイルのパス
+            source_code: ファイルの内容
+            timeout: 制限時間 (秒)
+
+        Returns:
+            list[Function]: 定義されている関数
+        """
+        connection = self.connection or self.start()
+        try:
+            connection.send((str(filepath), source_code))
+            finished = connection.poll(timeout)
+            if finished:
+                ok, payload = connection.recv()
+        except (EOFError, OSError) as e:
+            self.close()
+            raise RuntimeError(f"Parser process exited while parsing {filepath}") from e
+        if not finished:
+            logger.warning(f"Parsing {filepath} took longer than {timeout:g} s, aborting")
+            self.close()
+            raise ParseTimeoutError(filepath, timeout)
+        if not ok:
+            raise payload
+        return decode_functions(payload, filepath)
+
+    def close(self) -> None:
+        """ワーカープロセスを終了する"""
+        if self.process is None or self.connection is None:
+            return
+        self.connection.close()
+        self.process.kill()
+        self.process.join()
+        logger.debug(f"Stopped parser process {self.process.pid}")
+        self.process, self.connection = None, None
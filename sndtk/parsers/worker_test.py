@@ -0,0 +1,115 @@
+"""Tests for ParseWorker."""
+
+import multiprocessing
+import threading
+from pathlib import Path
+
+import pytest
+
+from sndtk.parsers.python import ParseTimeoutError, decode_functions
+from sndtk.parsers.worker import ParseWorker, serve
+
+# Parsing a 3 million term expression takes several seconds, far beyond the timeouts below
+SLOW_SOURCE = b"def f():\n    return " + b"1+" * 3_000_000 + b"1\n"
+
+
+def test__serve__parses_requests_until_connection_closes() -> None:
+    """Sends back the encoded functions of each request and returns when the connection closes."""
+    connection, child = multiprocessing.Pipe()
+    thread = threading.Thread(target=serve, args=(child,))
+    thread.start()
+    connection.send(("module.py", b"def f():\n    pass\n"))
+    ok, payload = connection.recv()
+    connection.close()
+    thread.join(timeout=5)
+    assert ok is True
+    assert [function.identifier for function in decode_functions(payload, Path("m.py"))] == ["f"]
+    assert not thread.is_alive()
+
+
+def test__serve__sends_back_syntax_errors() -> None:
+    """Sends back the exception instead of exiting when the source cannot be parsed."""
+    connection, child = multiprocessing.Pipe()
+    thread = threading.Thread(target=serve, args=(child,))
+    thread.start()
+    connection.send(("broken.py", b"def f(:\n"))
+    ok, payload = connection.recv()
+    connection.close()
+    thread.join(timeout=5)
+    assert ok is False
+    assert isinstance(payload, SyntaxError)
+
+
+def test__ParseWorker____init____starts_without_process() -> None:
+    """Does not start a process until the first parse (boundary value)."""
+    worker = ParseWorker()
+    assert worker.process is None
+    assert worker.connection is None
+
+
+def test__ParseWorker__start__starts_daemon_process() -> None:
+    """Starts a daemon parser process and keeps the connection to it."""
+    worker = ParseWorker()
+    try:
+        connection = worker.start()
+        assert worker.connection is connection
+        assert worker.process is not None
+        assert worker.process.daemon
+        assert worker.process.is_alive()
+    finally:
+        worker.close()
+
+
+def test__ParseWorker__parse__parses_in_worker_process() -> None:
+    """Parses the source in the worker process and stamps the functions with the path."""
+    worker = ParseWorker()
+    try:
+        functions = worker.parse(
+            Path("module.py"), b"class A:\n    def f(self):\n        pass\n", 30
+        )
+        assert [function.identifier for function in functions] == ["A::f"]
+        assert functions[0].filepath == Path("module.py")
+    finally:
+        worker.close()
+
+
+def test__ParseWorker__parse__raises_errors_from_worker() -> None:
+    """Raises the error raised by ast.parse in the worker and keeps the process."""
+    worker = ParseWorker()
+    try:
+        with pytest.raises(SyntaxError):
+            worker.parse(Path("broken.py"), b"def f(:\n", 30)
+        assert worker.process is not None
+    finally:
+        worker.close()
+
+
+def test__ParseWorker__parse__kills_process_on_timeout() -> None:
+    """Raises ParseTimeoutError, kills the process and restarts it on the next parse."""
+    worker = ParseWorker()
+    try:
+        with pytest.raises(ParseTimeoutError, match=r"Parse timed out after 0\.01 s"):
+            worker.parse(Path("slow.py"), SLOW_SOURCE, 0.01)
+        assert worker.process is None
+        functions = worker.parse(Path("module.py"), b"def f():\n    pass\n", 30)
+        assert [function.identifier for function in functions] == ["f"]
+    finally:
+        worker.close()
+
+
+def test__ParseWorker__close__stops_process() -> None:
+    """Stops the process and forgets it."""
+    worker = ParseWorker()
+    worker.start()
+    process = worker.process
+    worker.close()
+    assert process is not None and not process.is_alive()
+    assert worker.process is None
+    assert worker.connection is None
+
+
+def test__ParseWorker__close__does_nothing_without_process() -> None:
+    """Does nothing when no process was started (boundary value)."""
+    worker = ParseWorker()
+    worker.close()
+    assert worker.process is None
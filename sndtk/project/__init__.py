@@ -0,0 +1,16 @@
+from .history import CommitCoverage, History
+from .pipeline import Pipeline, StageMetrics
+from .project import Project
+from .query import QueryError, QuerySession
+from .walk import walk
+
+__all__ = [
+    "CommitCoverage",
+    "History",
+    "Pipeline",
+    "Project",
+    "QueryError",
+    "QuerySession",
+    "StageMetrics",
+    "walk",
+]
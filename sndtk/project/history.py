@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Generator, Iterable
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+from sndtk.cache import CacheStore
+from sndtk.config import Settings
+from sndtk.git import GitTree, list_commits
+from sndtk.report import CoverageCounts, FileReport
+from sndtk.spec.paths import spec_path_for
+
+from .project import Project
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CommitCoverage:
+    """コミット1つ分のカバレッジの集計"""
+
+    commit: str
+    subject: str
+    counts: CoverageCounts
+    reported: int = 0
+
+    def __str__(self) -> str:
+        return f"{self.commit[:12]} {self.counts}  {self.subject}"
+
+
+class History:
+    """
+    コミットの範囲のカバレッジの推移を、作業ツリーを切り替えずに集計する
+
+    1つのツリーを前のコミットとの差分だけ更新し、変更されたソース、スペック、テストファイルに
+    依存するファイルだけをレポートし直す。それ以外のファイルの集計は次のコミットに引き継ぐため、
+    2つ目以降のコミットの費用は変更されたファイルの数に比例する
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        revisions: str,
+        cache: CacheStore | None = None,
+        settings: Settings | None = None,
+    ) -> None:
+        """
+        Args:
+            root: プロジェクトのルートディレクトリ
+            revisions: 集計するコミットの範囲 (A..B など)
+            cache: 解析結果のキャッシュ
+            settings: [tool.sndtk] の設定値 (Noneの場合rootのpyproject.tomlから読み込む)
+        """
+        self.root = root
+        self.cache = cache
+        self.settings = settings
+        self.commits = list_commits(root, revisions)
+        self.counts: dict[Path, CoverageCounts] = {}
+        self.dependents: dict[str, set[Path]] = {}
+        self.total = CoverageCounts()
+
+    def path_for(self, tree: GitTree, name: str) -> Path | None:
+        """
+        リポジトリのルートからのパスをプロジェクトの走査で得られる形のパスに変換する
+
+        Args:
+            tree: コミットのツリー
+            name: リポジトリのルートからのパス
+
+        Returns:
+            Path | None: rootからのパス、root の外の場合None
+        """
+        prefix = tree.key(self.root)
+        if prefix is None:
+            return None
+        if prefix == "":
+            return self.root / name
+        if not name.startswith(prefix + "/"):
+            return None
+        return self.root / name[len(prefix) + 1 :]
+
+    def record(self, tree: GitTree, report: FileReport) -> None:
+        """
+        レポートを集計に加え、レポートが依存するファイルを登録する
+
+        Args:
+            tree: コミットのツリー
+            report: ソースファイルのレポート
+        """
+        counts = CoverageCounts.generate(report)
+        self.counts[report.filepath] = counts
+        self.total.add(counts)
+        dependencies = [report.filepath, spec_path_for(report.filepath)]
+        if report.filespec is not None:
+            dependencies.extend(report.filespec.testpaths())
+        for dependency in dependencies:
+            name = tree.key(dependency)
+            if name is not None:
+                self.dependents.setdefault(name, set()).add(report.filepath)
+
+    def discard(self, path: Path) -> None:
+        """
+        ファイルの集計を取り除く
+
+        Args:
+            path: ソースファイルのパス
+        """
+        counts = self.counts.pop(path, None)
+        if counts is not None:
+            self.total.subtract(counts)
+
+    def affected(self, tree: GitTree, changed: Iterable[str]) -> set[Path]:
+        """
+        変更されたファイルによってレポートし直すソースファイルを求める
+
+        Args:
+            tree: コミットのツリー
+            changed: 変更されたファイルのリポジトリのルートからのパス
+
+        Returns:
+            set[Path]: 変更されたファイルに依存するソースファイルと、追加または削除されたソースファイル
+        """
+        paths: set[Path] = set()
+        for name in changed:
+            paths.update(self.dependents.get(name, ()))
+            if name.endswith(".py"):
+                path = self.path_for(tree, name)
+                if path is not None:
+                    paths.add(path)
+        return paths
+
+    def iter_commits(self) -> Generator[CommitCoverage]:
+        """
+        範囲のコミットを古い順に集計する
+
+        Returns:
+            Generator[CommitCoverage]: コミットごとの集計
+        """
+        if not self.commits:
+            return
+        first, subject = self.commits[0]
+        with GitTree(first, self.root) as tree:
+            project = Project(
+                self.root, self.cache, settings=self.settings, tree=tree, remember=False
+            )
+            try:
+                for report in project.iter_reports():
+                    self.record(tree, report)
+                yield CommitCoverage(first, subject, replace(self.total), len(self.counts))
+                for commit, subject in self.commits[1:]:
+                    reported = self.advance(project, tree, tree.update(commit))
+                    yield CommitCoverage(commit, subject, replace(self.total), reported)
+            finally:
+                project.close()
+
+    def advance(self, project: Project, tree: GitTree, changed: list[str]) -> int:
+        """
+        移ったコミットの変更を集計に反映する
+
+        Args:
+            project: コミットのツリーを読み込むプロジェクト
+            tree: 変更を反映済みのツリー
+            changed: 変更されたファイルのリポジトリのルートからのパス
+
+        Returns:
+            int: レポートし直したファイルの数
+        """
+        for name in changed:
+            project.index.invalidate(tree.toplevel / name)
+        reported = 0
+        for path in sorted(self.affected(tree, changed)):
+            self.discard(path)
+            project.reports.pop(path, None)
+            if not project.is_file(path) or project.classify(path, project.filter) is None:
+                continue
+            self.record(tree, project.report(path))
+            reported += 1
+        logger.debug(f"Reported {reported} files for {len(changed)} changed files")
+        return reported
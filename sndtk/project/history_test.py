@@ -0,0 +1,145 @@
+"""Tests for History and CommitCoverage."""
+
+import json
+from collections.abc import Generator
+from contextlib import contextmanager
+from pathlib import Path
+
+from sndtk.conftest import git, make_repository
+from sndtk.git import GitTree
+from sndtk.project.history import CommitCoverage, History
+from sndtk.project.project import Project
+from sndtk.report import CoverageCounts
+
+
+@contextmanager
+def make_history() -> Generator[Path]:
+    """A repository where a.py loses coverage, then b.py is renamed to c.py."""
+    with make_repository() as root:
+        (root / "a.py").write_text("def f():\n    pass\n")
+        (root / "a_test.py").write_text("def test__f__works():\n    pass\n")
+        spec = {
+            "filepath": str(root / "a.py"),
+            "testpath": str(root / "a_test.py"),
+            "functions": [
+                {
+                    "identifier": "f",
+                    "scenarios": [{"testname": "test__f__works", "description": "Works"}],
+                }
+            ],
+        }
+        (root / "a_spec.json").write_text(json.dumps(spec))
+        (root / "b.py").write_text("def g():\n    pass\n")
+        git(root, "add", ".")
+        git(root, "commit", "-q", "-m", "first")
+        (root / "a_test.py").write_text("")
+        git(root, "commit", "-q", "-am", "second")
+        git(root, "mv", "b.py", "c.py")
+        git(root, "commit", "-q", "-m", "third")
+        yield root
+
+
+def test__CommitCoverage____str____formats_commit_totals_and_subject() -> None:
+    """Formats the short hash, the totals and the subject on one line."""
+    coverage = CommitCoverage("0123456789abcdef", "Add f", CoverageCounts(files=1, covered=1))
+    assert str(coverage) == (
+        "0123456789ab 100.00% (1/1 functions covered, 0 uncovered, 0 without spec; "
+        "0/0 scenarios)  Add f"
+    )
+
+
+def test__History____init____lists_commits_of_range() -> None:
+    """Lists the commits of the range oldest first and starts with empty totals."""
+    with make_history() as repository:
+        history = History(repository, "HEAD~2..HEAD")
+        assert [subject for _, subject in history.commits] == ["second", "third"]
+        assert history.total == CoverageCounts()
+
+
+def test__History__path_for__converts_to_paths_under_root() -> None:
+    """Returns the path under the root, or None for files outside the root."""
+    with make_history() as repository:
+        (repository / "pkg").mkdir()
+        with GitTree("HEAD", repository) as tree:
+            assert History(repository, "HEAD").path_for(tree, "a.py") == repository / "a.py"
+            history = History(repository / "pkg", "HEAD")
+            assert history.path_for(tree, "pkg/b.py") == repository / "pkg" / "b.py"
+            assert history.path_for(tree, "a.py") is None
+
+
+def test__History__record__adds_counts_and_dependencies() -> None:
+    """Adds the counts of the report and registers its source, spec and test files."""
+    with make_history() as repository:
+        history = History(repository, "HEAD")
+        with GitTree("HEAD~2", repository) as tree:
+            history.record(tree, Project(repository, tree=tree).report(repository / "a.py"))
+        assert history.total == CoverageCounts(files=1, covered=1, scenarios=1, passing=1)
+        assert set(history.dependents) == {"a.py", "a_spec.json", "a_test.py"}
+
+
+def test__History__discard__subtracts_counts_of_file() -> None:
+    """Subtracts the counts of the file and ignores files without counts."""
+    with make_history() as repository:
+        history = History(repository, "HEAD")
+        history.counts[repository / "a.py"] = CoverageCounts(files=1, covered=1)
+        history.total = CoverageCounts(files=2, covered=1, unspecced=1)
+        history.discard(repository / "a.py")
+        history.discard(repository / "b.py")
+        assert history.total == CoverageCounts(files=1, unspecced=1)
+        assert history.counts == {}
+
+
+def test__History__affected__collects_dependents_and_changed_sources() -> None:
+    """Returns the sources depending on the changed files and the changed sources themselves."""
+    with make_history() as repository:
+        history = History(repository, "HEAD")
+        history.dependents = {"a_test.py": {repository / "a.py"}}
+        with GitTree("HEAD", repository) as tree:
+            affected = history.affected(tree, ["a_test.py", "c.py", "README.md"])
+        assert affected == {repository / "a.py", repository / "a_test.py", repository / "c.py"}
+
+
+def test__History__iter_commits__reports_totals_of_every_commit() -> None:
+    """Yields the totals of each commit, re-reporting only the files affected by its changes."""
+    with make_history() as repository:
+        commits = list(History(repository, "HEAD").iter_commits())
+        assert [coverage.subject for coverage in commits] == ["first", "second", "third"]
+        assert [coverage.reported for coverage in commits] == [2, 1, 1]
+        assert [(c.counts.covered, c.counts.uncovered) for c in commits] == [
+            (1, 0),
+            (0, 1),
+            (0, 1),
+        ]
+        assert [coverage.counts.files for coverage in commits] == [2, 2, 2]
+
+
+def test__History__iter_commits__yields_nothing_for_empty_range() -> None:
+    """Yields nothing when the range contains no commits (boundary value)."""
+    with make_history() as repository:
+        assert list(History(repository, "HEAD..HEAD").iter_commits()) == []
+
+
+def test__History__advance__reports_files_depending_on_changed_test_file() -> None:
+    """Reports the source again with the test file of the new commit."""
+    with make_history() as repository:
+        history = History(repository, "HEAD")
+        with GitTree("HEAD~2", repository) as tree:
+            project = Project(repository, tree=tree)
+            for report in project.iter_reports():
+                history.record(tree, report)
+            assert history.advance(project, tree, tree.update("HEAD~1")) == 1
+            assert history.counts[repository / "a.py"].uncovered == 1
+            assert history.counts[repository / "b.py"].unspecced == 1
+
+
+def test__History__advance__drops_deleted_files() -> None:
+    """Removes the counts of deleted files and reports added files."""
+    with make_history() as repository:
+        history = History(repository, "HEAD")
+        with GitTree("HEAD~1", repository) as tree:
+            project = Project(repository, tree=tree)
+            for report in project.iter_reports():
+                history.record(tree, report)
+            assert history.advance(project, tree, tree.update("HEAD")) == 1
+            assert set(history.counts) == {repository / "a.py", repository / "c.py"}
+            assert history.total.files == 2
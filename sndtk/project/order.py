@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import logging
+import subprocess
+from collections import Counter
+from collections.abc import Iterable
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+ORDERS = ("path", "recent", "churn", "size")
+CHURN_COMMITS = 1000
+
+
+def churn(root: Path, commits: int = CHURN_COMMITS) -> Counter[Path]:
+    """
+    直近のコミットでファイルが変更された回数を git log から数える
+
+    Args:
+        root: 集計するディレクトリ
+        commits: 集計するコミット数の上限
+
+    Returns:
+        Counter[Path]: rootを先頭に付けたパスごとの変更回数。gitが使えない場合は空
+    """
+    try:
+        result = subprocess.run(
+            [
+                "git",
+                "-C",
+                str(root),
+                "log",
+                f"--max-count={commits}",
+                "--format=",
+                "--name-only",
+                "--relative",
+                "-z",
+                "--",
+                ".",
+            ],
+            capture_output=True,
+            check=False,
+        )
+    except OSError as e:
+        logger.warning(f"Could not run git to rank files by churn: {e}")
+        return Counter()
+    if result.returncode != 0:
+        logger.warning(f"Could not read git history of {root}: {result.stderr.decode().strip()}")
+        return Counter()
+    names = result.stdout.decode(errors="surrogateescape").split("\0")
+    return Counter(root / name for name in names if name)
+
+
+def order_paths(paths: Iterable[Path], order: str, root: Path) -> list[Path]:
+    """
+    ファイルを解析せずにstatの情報またはgitの履歴で並べ替える
+
+    同順位のファイルはパス順に並べるため、結果はファイルシステムに依存しない
+
+    Args:
+        paths: 並べ替えるファイルのパス
+        order: path (パス順)、recent (更新が新しい順)、churn (変更回数が多い順)、size (小さい順)
+        root: プロジェクトのルートディレクトリ
+
+    Returns:
+        list[Path]: 並べ替えたパス
+    """
+    if order == "path":
+        return sorted(paths)
+    if order == "recent":
+        return sorted(paths, key=lambda path: (-path.stat().st_mtime, path))
+    if order == "churn":
+        counts = churn(root)
+        return sorted(paths, key=lambda path: (-counts[path], path))
+    if order == "size":
+        return sorted(paths, key=lambda path: (path.stat().st_size, path))
+    raise ValueError(f"Unknown order: {order} (expected one of {', '.join(ORDERS)})")
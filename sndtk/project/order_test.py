@@ -0,0 +1,83 @@
+"""Tests for file ordering."""
+
+import os
+import tempfile
+from collections import Counter
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from sndtk.conftest import git, make_repository
+from sndtk.project.order import churn, order_paths
+
+
+def write_files(root: Path) -> list[Path]:
+    paths = [root / "b.py", root / "a.py", root / "c.py"]
+    for path, size, mtime in zip(paths, [30, 20, 10], [100, 300, 200], strict=True):
+        path.write_text("#" * size)
+        os.utime(path, (mtime, mtime))
+    return paths
+
+
+def test__churn__counts_commits_per_file() -> None:
+    """Counts how many recent commits touched each file, relative to the root."""
+    with make_repository() as root:
+        (root / "pkg").mkdir()
+        for i in range(3):
+            (root / "pkg" / "hot.py").write_text(str(i))
+            if i == 0:
+                (root / "pkg" / "cold.py").write_text("")
+            git(root, "add", ".")
+            git(root, "commit", "-q", "-m", f"commit {i}")
+        assert churn(root / "pkg") == Counter(
+            {root / "pkg" / "hot.py": 3, root / "pkg" / "cold.py": 1}
+        )
+        assert churn(root, commits=1) == Counter({root / "pkg" / "hot.py": 1})
+
+
+def test__churn__returns_empty_counter_outside_git_repository() -> None:
+    """Returns an empty counter when the root is not inside a git repository."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        assert churn(Path(tmpdir)) == Counter()
+
+
+def test__churn__returns_empty_counter_without_git() -> None:
+    """Returns an empty counter when git cannot be run."""
+    with patch("sndtk.project.order.subprocess.run", side_effect=FileNotFoundError("git")):
+        assert churn(Path(".")) == Counter()
+
+
+def test__order_paths__sorts_by_path() -> None:
+    """Sorts files by path."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        b, a, c = write_files(Path(tmpdir))
+        assert order_paths([b, a, c], "path", Path(tmpdir)) == [a, b, c]
+
+
+def test__order_paths__sorts_recently_modified_first() -> None:
+    """Sorts the most recently modified files first."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        b, a, c = write_files(Path(tmpdir))
+        assert order_paths([b, a, c], "recent", Path(tmpdir)) == [a, c, b]
+
+
+def test__order_paths__sorts_smallest_first() -> None:
+    """Sorts the smallest files first."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        b, a, c = write_files(Path(tmpdir))
+        assert order_paths([b, a, c], "size", Path(tmpdir)) == [c, a, b]
+
+
+def test__order_paths__sorts_most_changed_first_and_ties_by_path() -> None:
+    """Sorts files with the most commits first and files with equal churn by path."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        b, a, c = write_files(Path(tmpdir))
+        with patch("sndtk.project.order.churn", return_value=Counter({c: 2})):
+            assert order_paths([b, a, c], "churn", Path(tmpdir)) == [c, a, b]
+
+
+def test__order_paths__raises_value_error_for_unknown_order() -> None:
+    """Raises ValueError for an unknown order."""
+    with pytest.raises(ValueError, match="Unknown order: random"):
+        order_paths([], "random", Path("."))
@@ -0,0 +1,503 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable, Generator, Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from sndtk.parsers.python import ParseTimeoutError, bound_functions, estimate_functions
+from sndtk.parsers.types import Function
+from sndtk.report import FileReport
+from sndtk.spec.types import Identifier
+
+if TYPE_CHECKING:
+    from sndtk.report import CoverageGate
+
+    from .project import Project
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("filter", "reader", "parser", "verifier")
+DEFAULT_QUEUE_SIZE = 64
+POLL_INTERVAL = 0.05
+BUDGET_EXHAUSTED = "time budget exhausted"
+WALK_UNFINISHED = "time budget exhausted before all files were found"
+
+
+@dataclass
+class Task:
+    """パイプラインを流れる1ファイル分の作業"""
+
+    index: int
+    path: Path
+    orphaned: bool = False
+    skipped: bool = False
+    source: bytes | None = None
+    functions: list[Function] | None = None
+    report: FileReport | None = None
+    error: BaseException | None = None
+    unevaluated: str | None = None
+
+
+@dataclass
+class StageMetrics:
+    """ステージごとの処理件数、処理時間、入力キューの深さ"""
+
+    name: str
+    workers: int
+    items: int = 0
+    skipped: int = 0
+    busy: float = 0.0
+    max_depth: int = 0
+    total_depth: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, depth: int, elapsed: float, skipped: bool = False) -> None:
+        """
+        1件の処理を記録する
+
+        Args:
+            depth: 処理を始めた時点の入力キューの深さ
+            elapsed: 処理に要した時間 (秒)
+            skipped: このステージで作業を対象外とした場合True
+        """
+        with self.lock:
+            self.items += 1
+            self.skipped += skipped
+            self.busy += elapsed
+            self.max_depth = max(self.max_depth, depth)
+            self.total_depth += depth
+
+    @property
+    def mean_depth(self) -> float:
+        if self.items == 0:
+            return 0.0
+        return self.total_depth / self.items
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name:<10}{self.workers:>8}{self.items:>8}{self.skipped:>8}{self.busy * 1000:>12.1f}"
+            f"{self.max_depth:>12}{self.mean_depth:>12.1f}"
+        )
+
+
+class Pipeline:
+    """
+    走査、フィルター、読み込み、解析、検証、出力の各ステージを容量付きのキューで繋いだパイプライン
+
+    ステージごとにスレッド数を指定でき、キューが満杯になると上流のステージは待機する。
+    処理中のファイル数は全キューの容量の合計までに制限され、レポートは走査順に出力される
+    """
+
+    def __init__(
+        self,
+        project: Project,
+        identifier: Identifier | None = None,
+        orphans: bool = False,
+        workers: Mapping[str, int] | None = None,
+        maxsize: int = DEFAULT_QUEUE_SIZE,
+        deadline: float | None = None,
+        order: str | None = None,
+        under: Path | None = None,
+        gate: CoverageGate | None = None,
+    ) -> None:
+        """
+        Args:
+            project: レポートを生成するプロジェクト
+            identifier: 対象を絞り込む識別子
+            orphans: ソースファイルが存在しないスペックファイルのレポートも含める場合True
+            workers: ステージ名ごとのスレッド数 (filter, reader, parser, verifier)
+            maxsize: ステージ間のキューの容量
+            deadline: 打ち切る時刻 (time.monotonic の値)。過ぎた時点で走査済みの残りのファイルを
+                評価されなかったものとして出力し、停止する
+            order: ファイルを処理する順序 (path, recent, churn, size)。Noneの場合は走査順
+            under: 走査を始めるディレクトリ (Noneの場合プロジェクトのルート)
+            gate: 指定した場合、処理中の窓とは別に先行して走査してファイルの大きさから関数の数の上限を
+                記録し、読み込んだファイルは内容から数えた上限で狭める
+        """
+        counts = {
+            "filter": 1,
+            "reader": 2,
+            "parser": project.workers,
+            "verifier": project.workers,
+        }
+        for name, count in (workers or {}).items():
+            if name not in counts:
+                raise ValueError(f"Unknown pipeline stage: {name}")
+            if count < 1:
+                raise ValueError(f"{name} workers must be positive: {count}")
+            counts[name] = count
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be positive: {maxsize}")
+
+        self.project = project
+        self.identifier = identifier
+        self.orphans = orphans
+        self.deadline = deadline
+        self.order = order
+        self.under = under
+        self.gate = gate
+        self.filter = project.filter_for(identifier)
+        self.handlers: tuple[Callable[[Task], bool], ...] = (
+            self.classify,
+            self.read,
+            self.parse,
+            self.verify,
+        )
+        self.metrics = [
+            StageMetrics("walker", 1),
+            *(StageMetrics(name, counts[name]) for name in STAGES),
+            StageMetrics("emitter", 1),
+        ]
+        # queues[i] はステージ i の入力キュー、最後のキューは出力用
+        self.queues: list[queue.Queue[Task | None]] = [
+            queue.Queue(maxsize) for _ in range(len(STAGES) + 1)
+        ]
+        self.producers = [1, *(counts[name] for name in STAGES)]
+        self.consumers = [*(counts[name] for name in STAGES), 1]
+        self.window = threading.Semaphore(maxsize * len(self.queues))
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        self.skipped: list[tuple[Path, str]] = []
+        # 走査したが出力していないファイル。出力した時点で取り除くため、処理中の窓の大きさに収まる
+        self.walked: dict[int, Path] = {}
+        self.walk_finished = threading.Event()
+
+    def classify(self, task: Task) -> bool:
+        """
+        フィルターを適用し、孤立したスペックファイルはソースファイルのパスに置き換える
+
+        Returns:
+            bool: フィルターで除外した場合True
+        """
+        target = self.project.classify(task.path, self.filter, self.orphans)
+        if target is None:
+            task.skipped = True
+            return True
+        task.path, task.orphaned = target
+        return False
+
+    def read(self, task: Task) -> bool:
+        """
+        ソースファイルを読み込む。生成済みのレポートがあるファイルは読み込まない
+
+        設定によりスキップするファイルは、ここでスキップのレポートを生成して以降の段階を省く
+
+        Returns:
+            bool: 設定によりスキップするファイルの場合True
+        """
+        if task.skipped:
+            return False
+        if task.orphaned or task.path in self.project.reports:
+            # 孤立したスペックファイルには関数がなく、生成済みのレポートは読み込まないため数えられない
+            self.expect(task.path, 0 if task.orphaned else None)
+            return False
+        reason = self.project.skip_reason(task.path)
+        if reason is not None:
+            with self.lock:
+                self.skipped.append((task.path, reason))
+            task.report = FileReport.generate_skipped(task.path, reason)
+            if self.project.remember:
+                with self.project.lock:
+                    task.report = self.project.reports.setdefault(task.path, task.report)
+            self.expect(task.path, 0)
+            return True
+        task.source = self.project.read_bytes(task.path)
+        if self.gate is not None:
+            self.expect(task.path, estimate_functions(task.source))
+        return False
+
+    def expect(self, path: Path, estimate: int | None) -> None:
+        """
+        ゲートが指定されていれば、読み込んだファイルの関数の数の上限を記録する
+
+        Args:
+            path: ソースファイルのパス
+            estimate: 関数の数の上限。Noneの場合は上限が分からない
+        """
+        if self.gate is not None:
+            self.gate.expect(path, estimate)
+
+    def parse(self, task: Task) -> bool:
+        """読み込んだソースファイルを解析する"""
+        if task.source is not None:
+            try:
+                task.functions = self.project.parser.parse_source(task.path, task.source)
+            except ParseTimeoutError as e:
+                task.unevaluated = str(e)
+            task.source = None
+        return False
+
+    def verify(self, task: Task) -> bool:
+        """スペックを読み込み、シナリオを検証してレポートを生成する"""
+        if task.skipped or task.report is not None:
+            return False
+        if task.orphaned:
+            task.report = FileReport.generate_orphan(task.path, self.project.tree)
+        elif task.unevaluated is not None:
+            task.report = FileReport.generate_unevaluated(task.path, task.unevaluated)
+        else:
+            task.report = self.project.report(task.path, self.identifier, task.functions)
+        task.functions = None
+        return False
+
+    def put(self, index: int, task: Task | None) -> bool:
+        """
+        停止されるまでキューへの追加を試みる
+
+        Args:
+            index: キューの番号
+            task: 追加する作業 (Noneは終端)
+
+        Returns:
+            bool: 追加できた場合True、停止された場合False
+        """
+        while not self.stopped.is_set():
+            try:
+                self.queues[index].put(task, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def expired(self) -> bool:
+        """
+        打ち切る時刻を過ぎたかどうかを返す
+
+        Returns:
+            bool: 時刻が指定されていて、それを過ぎた場合True
+        """
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def get(self, index: int) -> Task | None:
+        """
+        停止されるか打ち切る時刻を過ぎるまでキューからの取り出しを試みる
+
+        Args:
+            index: キューの番号
+
+        Returns:
+            Task | None: 取り出した作業、終端、停止された場合または時刻を過ぎた場合None
+        """
+        while not self.stopped.is_set() and not self.expired():
+            try:
+                return self.queues[index].get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return None
+
+    def finish(self, index: int) -> None:
+        """
+        キューの生産者の終了を記録し、最後の生産者であれば消費者の数だけ終端を追加する
+
+        Args:
+            index: キューの番号
+        """
+        with self.lock:
+            self.producers[index] -= 1
+            last = self.producers[index] == 0
+        if last:
+            for _ in range(self.consumers[index]):
+                self.put(index, None)
+
+    def run_walker(self) -> None:
+        """ディレクトリを走査し、候補となるファイルを最初のキューに追加する"""
+        metrics = self.metrics[0]
+        index = 0
+        try:
+            start = time.perf_counter()
+            for path in self.project.candidates(self.orphans, self.order, self.under):
+                metrics.record(self.queues[0].qsize(), time.perf_counter() - start)
+                if not self.acquire():
+                    return
+                with self.lock:
+                    self.walked[index] = path
+                if not self.put(0, Task(index, path)):
+                    return
+                index += 1
+                start = time.perf_counter()
+            self.walk_finished.set()
+        except Exception as e:
+            # 窓が空くまで待ち、例外を出力側に必ず届ける
+            if self.acquire():
+                self.put(0, Task(index, self.project.root, error=e))
+        finally:
+            self.finish(0)
+
+    def run_scout(self) -> None:
+        """
+        処理中の窓に縛られずに先行して走査し、対象のファイルの大きさから関数の数の上限をゲートに記録する
+
+        大きさしか見ないため読み込みは増えず、走査を終えた時点でゲートの残りの上限が確定する
+        """
+        assert self.gate is not None
+        try:
+            for path in self.project.candidates(self.orphans, None, self.under):
+                if self.stopped.is_set():
+                    return
+                target = self.project.classify(path, self.filter, self.orphans)
+                if target is None:
+                    continue
+                source, orphaned = target
+                if orphaned:
+                    # 孤立したスペックファイルのレポートには関数がない
+                    self.gate.expect(source, 0)
+                    continue
+                try:
+                    estimate: int | None = bound_functions(self.project.size(source))
+                except OSError as e:
+                    logger.debug(f"Could not bound functions in {source}: {e}")
+                    estimate = None
+                self.gate.expect(source, estimate)
+            self.gate.finish()
+        except Exception as e:
+            # 走査の失敗は run_walker が報告するため、ここでは上限を確定させないだけにする
+            logger.debug(f"Scout walk failed: {e}")
+
+    def acquire(self) -> bool:
+        """
+        停止されるまで処理中のファイルの窓に空きができるのを待つ
+
+        Returns:
+            bool: 窓に空きを確保できた場合True、停止された場合False
+        """
+        while not self.window.acquire(timeout=POLL_INTERVAL):
+            if self.stopped.is_set():
+                return False
+        return True
+
+    def run_stage(self, stage: int) -> None:
+        """
+        ステージのワーカーとして、入力キューの作業を処理して次のキューに渡す
+
+        Args:
+            stage: ステージの番号
+        """
+        handler = self.handlers[stage]
+        metrics = self.metrics[stage + 1]
+        try:
+            while True:
+                depth = self.queues[stage].qsize()
+                task = self.get(stage)
+                if task is None:
+                    return
+                start = time.perf_counter()
+                skipped = False
+                if task.error is None:
+                    try:
+                        skipped = handler(task)
+                    except Exception as e:
+                        task.error = e
+                metrics.record(depth, time.perf_counter() - start, skipped)
+                if not self.put(stage + 1, task):
+                    return
+        finally:
+            self.finish(stage + 1)
+
+    def __iter__(self) -> Generator[FileReport]:
+        """
+        各ステージのスレッドを起動し、レポートを走査順に出力する
+
+        Returns:
+            Generator[FileReport]: ファイルのレポート
+        """
+        threads = [threading.Thread(target=self.run_walker, name="sndtk-walker")]
+        if self.gate is not None:
+            threads.append(threading.Thread(target=self.run_scout, name="sndtk-scout"))
+        for stage, name in enumerate(STAGES):
+            threads.extend(
+                threading.Thread(target=self.run_stage, args=(stage,), name=f"sndtk-{name}")
+                for _ in range(self.consumers[stage])
+            )
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        metrics = self.metrics[-1]
+        pending: dict[int, Task] = {}
+        next_index = 0
+        try:
+            while True:
+                depth = self.queues[-1].qsize()
+                task = self.get(len(self.queues) - 1)
+                if task is None:
+                    break
+                start = time.perf_counter()
+                pending[task.index] = task
+                while next_index in pending:
+                    ready = pending.pop(next_index)
+                    with self.lock:
+                        self.walked.pop(next_index, None)
+                    next_index += 1
+                    self.window.release()
+                    if ready.error is not None:
+                        raise ready.error
+                    if ready.report is not None:
+                        yield ready.report
+                metrics.record(depth + len(pending), time.perf_counter() - start)
+            if self.deadline is not None:
+                yield from self.drain(pending, next_index)
+        finally:
+            self.stopped.set()
+            # 時間切れの場合、読み込みや解析で止まっているスレッドは待たずに見捨てる
+            timeout = POLL_INTERVAL if self.expired() else None
+            for thread in threads:
+                thread.join(timeout)
+
+    def drain(self, pending: Mapping[int, Task], next_index: int) -> Generator[FileReport]:
+        """
+        パイプラインを停止し、まだ出力していない走査済みのファイルのレポートを走査順に返す
+
+        完了していた作業はそのレポートを、それ以外のファイルは評価されなかったものとして返す。
+        走査が終わっていない場合は、最後にルートディレクトリを評価されなかったものとして返す
+
+        Args:
+            pending: 完了したが出力していない作業
+            next_index: 次に出力する作業の番号
+
+        Returns:
+            Generator[FileReport]: ファイルのレポート
+        """
+        self.stopped.set()
+        with self.lock:
+            walked = sorted(item for item in self.walked.items() if item[0] >= next_index)
+        if walked:
+            logger.warning(f"Time budget exhausted with {len(walked)} files in flight")
+        for index, path in walked:
+            task = pending.get(index)
+            if task is not None:
+                if task.error is not None:
+                    raise task.error
+                if task.report is not None:
+                    yield task.report
+                continue
+            target = self.project.classify(path, self.filter, self.orphans)
+            if target is not None:
+                yield FileReport.generate_unevaluated(target[0], BUDGET_EXHAUSTED)
+        if not self.walk_finished.is_set():
+            # 走査していないファイルは列挙できないため、ルートを評価されなかったものとして返す
+            yield FileReport.generate_unevaluated(self.project.root, WALK_UNFINISHED)
+
+    def format_metrics(self) -> str:
+        """
+        ステージごとの統計を表形式で返す。設定によりスキップしたファイルがあれば理由とともに続ける
+
+        Returns:
+            str: 統計の表
+        """
+        header = (
+            f"{'stage':<10}{'workers':>8}{'items':>8}{'skipped':>8}{'busy (ms)':>12}"
+            f"{'max queue':>12}{'avg queue':>12}"
+        )
+        lines = [header, *(str(metrics) for metrics in self.metrics)]
+        with self.lock:
+            skipped = sorted(self.skipped)
+        if skipped:
+            lines.append("")
+            lines.append("skipped files:")
+            lines.extend(f"  {path}: {reason}" for path, reason in skipped)
+        return "\n".join(lines)
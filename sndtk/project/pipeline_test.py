@@ -0,0 +1,646 @@
+"""Tests for Pipeline."""
+
+import json
+import queue
+import tempfile
+import threading
+import time
+from collections.abc import Generator
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from sndtk.config import Settings
+from sndtk.git import GitTree
+from sndtk.parsers.python import ParseTimeoutError
+from sndtk.project.pipeline import (
+    BUDGET_EXHAUSTED,
+    STAGES,
+    WALK_UNFINISHED,
+    Pipeline,
+    StageMetrics,
+    Task,
+)
+from sndtk.project.project import Project
+from sndtk.report import CoverageGate, FileReport
+from sndtk.spec.types import Identifier
+
+
+def write_modules(root: Path, count: int) -> list[Path]:
+    paths = []
+    for i in range(count):
+        path = root / f"module{i:02d}.py"
+        path.write_text(f"def f{i}():\n    pass\n")
+        paths.append(path)
+    return paths
+
+
+def test__StageMetrics__record__accumulates_items_time_and_depth() -> None:
+    """Accumulates the item count, busy time and queue depths."""
+    metrics = StageMetrics("parser", 2)
+    metrics.record(3, 0.5)
+    metrics.record(1, 0.25)
+    assert metrics.items == 2
+    assert metrics.busy == 0.75
+    assert metrics.max_depth == 3
+    assert metrics.total_depth == 4
+
+
+def test__StageMetrics__mean_depth__returns_average_queue_depth() -> None:
+    """Returns the average queue depth over the recorded items."""
+    metrics = StageMetrics("parser", 1)
+    metrics.record(3, 0.0)
+    metrics.record(1, 0.0)
+    assert metrics.mean_depth == 2.0
+
+
+def test__StageMetrics__mean_depth__returns_zero_without_items() -> None:
+    """Returns zero when nothing was recorded (boundary value)."""
+    assert StageMetrics("parser", 1).mean_depth == 0.0
+
+
+def test__StageMetrics____str____formats_row() -> None:
+    """Formats the metrics as a row of the metrics table."""
+    metrics = StageMetrics("parser", 2)
+    metrics.record(4, 0.0125)
+    assert str(metrics).split() == ["parser", "2", "1", "0", "12.5", "4", "4.0"]
+
+
+def test__Pipeline____init____sets_stage_workers() -> None:
+    """Uses the project worker count for CPU stages and applies overrides."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project = Project(Path(tmpdir), workers=3)
+        pipeline = Pipeline(project, workers={"reader": 4})
+        assert [m.workers for m in pipeline.metrics] == [1, 1, 4, 3, 3, 1]
+        assert len(pipeline.queues) == len(STAGES) + 1
+
+
+def test__Pipeline____init____raises_for_unknown_stage() -> None:
+    """Raises ValueError for a stage name that does not exist."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with pytest.raises(ValueError, match="Unknown pipeline stage: emitter"):
+            Pipeline(Project(Path(tmpdir)), workers={"emitter": 2})
+
+
+def test__Pipeline____init____raises_for_non_positive_sizes() -> None:
+    """Raises ValueError when a worker count or the queue size is less than one (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project = Project(Path(tmpdir))
+        with pytest.raises(ValueError, match="parser workers must be positive"):
+            Pipeline(project, workers={"parser": 0})
+        with pytest.raises(ValueError, match="maxsize must be positive"):
+            Pipeline(project, maxsize=0)
+
+
+def test__Pipeline__classify__marks_filtered_files_as_skipped() -> None:
+    """Marks files rejected by the project filter as skipped."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pipeline = Pipeline(Project(Path(tmpdir)))
+        task = Task(0, Path(tmpdir) / "module_test.py")
+        assert pipeline.classify(task) is True
+        assert task.skipped
+
+
+def test__Pipeline__classify__maps_orphaned_spec_to_source() -> None:
+    """Replaces an orphaned spec file with its missing source when orphans are requested."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pipeline = Pipeline(Project(Path(tmpdir)), orphans=True)
+        task = Task(0, Path(tmpdir) / "removed_spec.json")
+        pipeline.classify(task)
+        assert task.path == Path(tmpdir) / "removed.py"
+        assert task.orphaned
+        assert not task.skipped
+
+
+def test__Pipeline__read__reads_source_bytes() -> None:
+    """Reads the source file contents."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (path,) = write_modules(Path(tmpdir), 1)
+        task = Task(0, path)
+        Pipeline(Project(Path(tmpdir))).read(task)
+        assert task.source == path.read_bytes()
+
+
+def test__Pipeline__read__records_estimates_for_gate() -> None:
+    """Counts the functions of read files and of files skipped by the settings for the gate."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path, large = write_modules(Path(tmpdir), 2)
+        large.write_text("def f():\n    pass\n" * 10)
+        project = Project(Path(tmpdir), settings=Settings(max_file_size=100))
+        gate = CoverageGate(Path(tmpdir), {".": 50})
+        pipeline = Pipeline(project, gate=gate)
+        for task in [Task(0, path), Task(1, large), Task(2, Path(tmpdir) / "x.py", skipped=True)]:
+            pipeline.read(task)
+        assert gate.estimates == {path: 1, large: 0}
+
+
+def test__Pipeline__read__skips_files_with_generated_report() -> None:
+    """Does not read files that are skipped, orphaned or already reported."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (path,) = write_modules(Path(tmpdir), 1)
+        project = Project(Path(tmpdir))
+        project.report(path)
+        pipeline = Pipeline(project)
+        for task in [Task(0, path), Task(1, path, skipped=True), Task(2, path, orphaned=True)]:
+            pipeline.read(task)
+            assert task.source is None
+
+
+def test__Pipeline__expect__records_estimate_only_with_gate() -> None:
+    """Passes the estimate to the gate, and does nothing without a gate (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "module.py"
+        Pipeline(Project(Path(tmpdir))).expect(path, 1)
+        gate = CoverageGate(Path(tmpdir), {".": 50})
+        Pipeline(Project(Path(tmpdir)), gate=gate).expect(path, 1)
+        assert gate.estimates == {path: 1}
+
+
+def test__Pipeline__parse__parses_read_source() -> None:
+    """Parses the read source and releases the bytes."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        task = Task(0, Path(tmpdir) / "module.py", source=b"def f():\n    pass\n")
+        Pipeline(Project(Path(tmpdir))).parse(task)
+        assert task.functions is not None
+        assert [function.identifier for function in task.functions] == ["f"]
+        assert task.source is None
+
+
+def test__Pipeline__parse__skips_tasks_without_source() -> None:
+    """Leaves tasks without source untouched (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        task = Task(0, Path(tmpdir) / "module.py")
+        Pipeline(Project(Path(tmpdir))).parse(task)
+        assert task.functions is None
+
+
+def test__Pipeline__verify__generates_report_from_parsed_functions() -> None:
+    """Generates the file report from the parsed functions and stores it in the project."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (path,) = write_modules(Path(tmpdir), 1)
+        project = Project(Path(tmpdir))
+        pipeline = Pipeline(project)
+        task = Task(0, path, source=path.read_bytes())
+        pipeline.parse(task)
+        pipeline.verify(task)
+        assert task.report is not None
+        assert [f.function.identifier for f in task.report.functions] == ["f0"]
+        assert project.reports[path] is task.report
+
+
+def test__Pipeline__verify__generates_orphan_report() -> None:
+    """Generates an orphan report for orphaned tasks."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = Path(tmpdir) / "removed.py"
+        spec = {"filepath": str(source), "testpath": "removed_test.py", "functions": []}
+        (Path(tmpdir) / "removed_spec.json").write_text(json.dumps(spec))
+        task = Task(0, source, orphaned=True)
+        Pipeline(Project(Path(tmpdir))).verify(task)
+        assert task.report is not None
+        assert task.report.orphaned
+
+
+def test__Pipeline__verify__skips_skipped_tasks() -> None:
+    """Does not generate a report for skipped tasks (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        task = Task(0, Path(tmpdir) / "module.py", skipped=True)
+        Pipeline(Project(Path(tmpdir))).verify(task)
+        assert task.report is None
+
+
+def test__Pipeline__verify__keeps_report_generated_while_reading() -> None:
+    """Keeps the skip report generated while reading without generating it again."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "module.py"
+        report = FileReport.generate_skipped(path, "File too large")
+        task = Task(0, path, report=report)
+        project = Project(Path(tmpdir))
+        with patch.object(project, "report") as mock_report:
+            Pipeline(project).verify(task)
+        mock_report.assert_not_called()
+        assert task.report is report
+
+
+def test__Pipeline__put__adds_task_to_queue() -> None:
+    """Adds the task to the queue."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pipeline = Pipeline(Project(Path(tmpdir)))
+        task = Task(0, Path(tmpdir))
+        assert pipeline.put(1, task) is True
+        assert pipeline.queues[1].get_nowait() is task
+
+
+def test__Pipeline__put__returns_false_when_stopped_while_full() -> None:
+    """Gives up and returns False when the pipeline stops while the queue is full."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pipeline = Pipeline(Project(Path(tmpdir)), maxsize=1)
+        pipeline.put(0, Task(0, Path(tmpdir)))
+        pipeline.stopped.set()
+        assert pipeline.put(0, Task(1, Path(tmpdir))) is False
+
+
+def test__Pipeline__get__returns_queued_task() -> None:
+    """Returns the next task in the queue."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pipeline = Pipeline(Project(Path(tmpdir)))
+        task = Task(0, Path(tmpdir))
+        pipeline.queues[2].put(task)
+        assert pipeline.get(2) is task
+
+
+def test__Pipeline__get__returns_none_when_stopped() -> None:
+    """Returns None when the pipeline is stopped (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pipeline = Pipeline(Project(Path(tmpdir)))
+        pipeline.stopped.set()
+        assert pipeline.get(0) is None
+
+
+def test__Pipeline__finish__ends_queue_after_last_producer() -> None:
+    """Adds one end marker per consumer once the last producer of a queue finishes."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pipeline = Pipeline(Project(Path(tmpdir)), workers={"parser": 2, "verifier": 3})
+        pipeline.finish(3)
+        assert pipeline.queues[3].empty()
+        pipeline.finish(3)
+        markers = [pipeline.queues[3].get_nowait() for _ in range(3)]
+        assert markers == [None, None, None]
+        with pytest.raises(queue.Empty):
+            pipeline.queues[3].get_nowait()
+
+
+def test__Pipeline__run_walker__queues_candidate_files_in_walk_order() -> None:
+    """Queues Python files with increasing indexes and ends the queue."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = write_modules(Path(tmpdir), 3)
+        (Path(tmpdir) / "notes.txt").write_text("")
+        pipeline = Pipeline(Project(Path(tmpdir)))
+        pipeline.run_walker()
+        tasks = [pipeline.queues[0].get_nowait() for _ in range(4)]
+        assert tasks[-1] is None
+        assert sorted(task.path for task in tasks[:-1] if task) == paths
+        assert [task.index for task in tasks[:-1] if task] == [0, 1, 2]
+
+
+def test__Pipeline__run_walker__queues_spec_files_when_orphans_requested() -> None:
+    """Also queues spec files when orphans are requested."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / "removed_spec.json").write_text("{}")
+        pipeline = Pipeline(Project(Path(tmpdir)), orphans=True)
+        pipeline.run_walker()
+        task = pipeline.queues[0].get_nowait()
+        assert task is not None
+        assert task.path == Path(tmpdir) / "removed_spec.json"
+
+
+def test__Pipeline__run_stage__processes_tasks_until_end() -> None:
+    """Applies the stage handler to each task and forwards the end marker."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (path,) = write_modules(Path(tmpdir), 1)
+        pipeline = Pipeline(Project(Path(tmpdir)))
+        pipeline.queues[1].put(Task(0, path))
+        for _ in range(pipeline.consumers[1]):
+            pipeline.queues[1].put(None)
+        for _ in range(pipeline.consumers[1]):
+            pipeline.run_stage(1)
+        task = pipeline.queues[2].get_nowait()
+        assert task is not None
+        assert task.source == path.read_bytes()
+        assert pipeline.metrics[2].items == 1
+
+
+def test__Pipeline__run_stage__records_handler_errors_on_task() -> None:
+    """Records handler exceptions on the task instead of stopping the stage."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pipeline = Pipeline(Project(Path(tmpdir)))
+        pipeline.queues[1].put(Task(0, Path(tmpdir) / "missing.py"))
+        for _ in range(pipeline.consumers[1]):
+            pipeline.queues[1].put(None)
+        for _ in range(pipeline.consumers[1]):
+            pipeline.run_stage(1)
+        task = pipeline.queues[2].get_nowait()
+        assert task is not None
+        assert isinstance(task.error, FileNotFoundError)
+
+
+def test__Pipeline____iter____yields_reports_in_walk_order() -> None:
+    """Yields the same reports as serial iteration, in walk order."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_modules(Path(tmpdir), 20)
+        serial = [report.filepath for report in Project(Path(tmpdir)).iter_reports()]
+        pipeline = Pipeline(
+            Project(Path(tmpdir)), workers={"reader": 3, "parser": 2, "verifier": 2}, maxsize=2
+        )
+        assert [report.filepath for report in pipeline] == serial
+        assert pipeline.metrics[-1].items == 20
+
+
+def test__Pipeline____iter____narrows_reports_to_identifier() -> None:
+    """Yields only the identified file, narrowed to the identified function."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = write_modules(Path(tmpdir), 3)
+        pipeline = Pipeline(Project(Path(tmpdir)), Identifier(paths[1], "f1"))
+        reports = list(pipeline)
+        assert [report.filepath for report in reports] == [paths[1]]
+        assert [f.function.identifier for f in reports[0].functions] == ["f1"]
+
+
+def test__Pipeline____iter____raises_stage_errors_in_order() -> None:
+    """Raises the error of a failed file when its turn comes."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_modules(Path(tmpdir), 2)
+        (Path(tmpdir) / "module99.py").write_text("def broken(:\n")
+        with pytest.raises(SyntaxError):
+            list(Pipeline(Project(Path(tmpdir))))
+
+
+def test__Pipeline____iter____raises_walk_error_with_full_window() -> None:
+    """Raises an error of the walk even when the window is full at the time it fails."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = write_modules(Path(tmpdir), 10)
+        project = Project(Path(tmpdir), workers=1)
+
+        report = project.report
+
+        def candidates(*args: object) -> Generator[Path]:
+            yield from paths
+            raise PermissionError("denied")
+
+        def slow_report(path: Path, *args: object) -> FileReport:
+            # Keep the window full when the walk fails
+            time.sleep(0.1)
+            return report(path)
+
+        with (
+            patch.object(project, "candidates", side_effect=candidates),
+            patch.object(project, "report", side_effect=slow_report),
+        ):
+            with pytest.raises(PermissionError, match="denied"):
+                list(Pipeline(project, maxsize=1))
+
+
+def test__Pipeline__acquire__waits_for_window_until_stopped() -> None:
+    """Takes a free slot of the window, and gives up when stopped while full (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pipeline = Pipeline(Project(Path(tmpdir)), maxsize=1)
+        for _ in range(len(pipeline.queues)):
+            assert pipeline.acquire() is True
+        threading.Timer(0.1, pipeline.stopped.set).start()
+        assert pipeline.acquire() is False
+
+
+def test__Pipeline____iter____stops_threads_when_closed_early() -> None:
+    """Stops every stage thread when the consumer stops iterating early."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_modules(Path(tmpdir), 30)
+        pipeline = Pipeline(Project(Path(tmpdir)), maxsize=1)
+        reports = iter(pipeline)
+        next(reports)
+        reports.close()
+        assert pipeline.stopped.is_set()
+        assert pipeline.metrics[-1].items < 30
+
+
+def test__Pipeline__format_metrics__formats_table_with_one_row_per_stage() -> None:
+    """Formats a header and one row per stage, from walker to emitter."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        lines = Pipeline(Project(Path(tmpdir))).format_metrics().splitlines()
+        assert lines[0].split()[:3] == ["stage", "workers", "items"]
+        assert [line.split()[0] for line in lines[1:]] == ["walker", *STAGES, "emitter"]
+
+
+def test__StageMetrics__record__counts_skipped_items() -> None:
+    """Counts the items the stage dropped or skipped."""
+    metrics = StageMetrics("reader", 1)
+    metrics.record(0, 0.0, skipped=True)
+    metrics.record(0, 0.0)
+    assert metrics.items == 2
+    assert metrics.skipped == 1
+
+
+def test__Pipeline__read__skips_files_excluded_by_settings() -> None:
+    """Does not read files over max_file_size and records the reason."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (path,) = write_modules(Path(tmpdir), 1)
+        project = Project(Path(tmpdir), settings=Settings(max_file_size=4))
+        pipeline = Pipeline(project)
+        task = Task(0, path)
+        assert pipeline.read(task) is True
+        assert task.source is None
+        assert pipeline.skipped == [(path, project.skip_reason(path))]
+        assert task.report is not None
+        assert task.report.skipped == project.skip_reason(path)
+
+
+def test__Pipeline____iter____yields_skipped_reports_and_counts_them() -> None:
+    """Yields skip reports for generated files and counts them in the reader metrics."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        paths = write_modules(root, 3)
+        paths[1].write_text("# @generated\ndef g():\n    pass\n")
+        project = Project(root, workers=2, settings=Settings(generated_markers=["@generated"]))
+        pipeline = Pipeline(project)
+        reports = list(pipeline)
+        skipped = {report.filepath: report.skipped for report in reports}
+        assert skipped == {paths[0]: None, paths[1]: "Generated file: @generated", paths[2]: None}
+        assert pipeline.metrics[2].skipped == 1
+
+
+def test__Pipeline____iter____checks_skip_reason_once_per_file() -> None:
+    """Checks whether each file is skipped only once while reading."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        paths = write_modules(root, 3)
+        paths[1].write_text("# @generated\ndef g():\n    pass\n")
+        project = Project(root, workers=2, settings=Settings(generated_markers=["@generated"]))
+        with patch.object(project, "skip_reason", wraps=project.skip_reason) as mock_skip_reason:
+            reports = list(Pipeline(project))
+        assert len(reports) == 3
+        assert sorted(call.args[0] for call in mock_skip_reason.call_args_list) == sorted(paths)
+
+
+def test__Pipeline__format_metrics__lists_skipped_files() -> None:
+    """Lists skipped files with their reasons after the table."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pipeline = Pipeline(Project(Path(tmpdir)))
+        pipeline.skipped.append((Path("big.py"), "File too large"))
+        lines = pipeline.format_metrics().splitlines()
+        assert lines[-2:] == ["skipped files:", "  big.py: File too large"]
+
+
+def test__Pipeline__expired__reports_whether_deadline_passed() -> None:
+    """Returns True only when a deadline is set and has passed."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project = Project(Path(tmpdir))
+        assert Pipeline(project).expired() is False
+        assert Pipeline(project, deadline=time.monotonic() + 60).expired() is False
+        assert Pipeline(project, deadline=time.monotonic()).expired() is True
+
+
+def test__Pipeline__get__returns_none_after_deadline() -> None:
+    """Stops waiting for the queue once the deadline has passed (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pipeline = Pipeline(Project(Path(tmpdir)), deadline=time.monotonic())
+        assert pipeline.get(0) is None
+
+
+def test__Pipeline__parse__marks_task_unevaluated_on_timeout() -> None:
+    """Marks the task as not evaluated when parsing times out."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project = Project(Path(tmpdir))
+        task = Task(0, Path(tmpdir) / "slow.py", source=b"def f():\n    pass\n")
+        error = ParseTimeoutError(task.path, 1)
+        with patch.object(project.parser, "parse_functions", side_effect=error):
+            Pipeline(project).parse(task)
+        assert task.unevaluated == "Parse timed out after 1 s"
+        assert task.functions is None
+        assert task.source is None
+
+
+def test__Pipeline__verify__generates_unevaluated_report() -> None:
+    """Generates a not-evaluated report for tasks whose parse timed out."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        task = Task(0, Path(tmpdir) / "slow.py", unevaluated="Parse timed out after 1 s")
+        Pipeline(Project(Path(tmpdir))).verify(task)
+        assert task.report is not None
+        assert task.report.unevaluated == "Parse timed out after 1 s"
+
+
+def test__Pipeline__drain__marks_walked_files_as_unevaluated() -> None:
+    """Yields completed reports and marks the other walked files as not evaluated."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = write_modules(Path(tmpdir), 3)
+        project = Project(Path(tmpdir))
+        pipeline = Pipeline(project)
+        pipeline.walked = dict(enumerate([Path(tmpdir) / "ignored_test.py", *paths]))
+        pipeline.walk_finished.set()
+        done = Task(2, paths[1], report=project.report(paths[1]))
+        reports = list(pipeline.drain({2: done}, 1))
+        assert [report.filepath for report in reports] == paths
+        assert [report.unevaluated for report in reports] == [
+            BUDGET_EXHAUSTED,
+            None,
+            BUDGET_EXHAUSTED,
+        ]
+        assert pipeline.stopped.is_set()
+
+
+def test__Pipeline____iter____stops_at_deadline_with_partial_results() -> None:
+    """Yields finished reports and marks files still in progress at the deadline as not evaluated."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = write_modules(Path(tmpdir), 3)
+        project = Project(Path(tmpdir), workers=2)
+        release = threading.Event()
+        report = project.report
+
+        def slow_report(path: Path, *args: object) -> FileReport:
+            if path == paths[1]:
+                release.wait(5)
+            return report(path)
+
+        try:
+            with patch.object(project, "report", side_effect=slow_report):
+                pipeline = Pipeline(project, deadline=time.monotonic() + 1.0)
+                start = time.monotonic()
+                reports = {report.filepath: report.unevaluated for report in pipeline}
+                assert time.monotonic() - start < 3
+        finally:
+            release.set()
+        assert reports == {paths[0]: None, paths[1]: BUDGET_EXHAUSTED, paths[2]: None}
+
+
+def test__Pipeline__drain__reports_root_when_walk_is_unfinished() -> None:
+    """Reports the root as not evaluated when the deadline passed before the walk finished."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pipeline = Pipeline(Project(Path(tmpdir)))
+        reports = list(pipeline.drain({}, 0))
+        assert [(report.filepath, report.unevaluated) for report in reports] == [
+            (Path(tmpdir), WALK_UNFINISHED)
+        ]
+
+
+def test__Pipeline__run_walker__marks_walk_finished() -> None:
+    """Records every walked candidate and marks the walk as finished."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = write_modules(Path(tmpdir), 2)
+        pipeline = Pipeline(Project(Path(tmpdir)))
+        pipeline.run_walker()
+        assert sorted(pipeline.walked.values()) == paths
+        assert pipeline.walk_finished.is_set()
+
+
+def test__Pipeline____iter____walks_files_in_given_order() -> None:
+    """Feeds and yields files in the given order instead of directory order."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = write_modules(Path(tmpdir), 5)
+        pipeline = Pipeline(Project(Path(tmpdir), workers=2), order="path")
+        assert [report.filepath for report in pipeline] == paths
+
+
+def test__Pipeline____iter____narrows_gate_bound_with_read_contents() -> None:
+    """Narrows the size-based bound of every file to its def-line count as the files are read."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_modules(Path(tmpdir), 3)
+        gate = CoverageGate(Path(tmpdir), {".": 50})
+        assert len(list(Pipeline(Project(Path(tmpdir), workers=2), gate=gate))) == 3
+        assert gate.complete
+        assert gate.thresholds[0].remaining == 3
+
+
+def test__Pipeline__run_scout__bounds_functions_from_file_sizes() -> None:
+    """Records a size-based bound for every candidate without reading it and finishes the gate."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = write_modules(Path(tmpdir), 3)
+        (Path(tmpdir) / "module_test.py").write_text("def test():\n    pass\n")
+        gate = CoverageGate(Path(tmpdir), {".": 50})
+        project = Project(Path(tmpdir))
+        with patch.object(project, "read_bytes") as mock_read:
+            Pipeline(project, gate=gate).run_scout()
+        mock_read.assert_not_called()
+        assert gate.estimates == dict.fromkeys(paths, 2)
+        assert gate.complete
+
+
+def test__Pipeline__run_scout__leaves_gate_unfinished_when_stopped() -> None:
+    """Keeps the gate bound unknown when the pipeline stops during the walk (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_modules(Path(tmpdir), 3)
+        gate = CoverageGate(Path(tmpdir), {".": 50})
+        pipeline = Pipeline(Project(Path(tmpdir)), gate=gate)
+        pipeline.stopped.set()
+        pipeline.run_scout()
+        assert not gate.complete
+
+
+def test__Pipeline____iter____keeps_only_files_in_flight() -> None:
+    """Forgets walked files once their reports are yielded, keeping memory within the window."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_modules(Path(tmpdir), 20)
+        pipeline = Pipeline(Project(Path(tmpdir), workers=2, remember=False), maxsize=1)
+        for _ in pipeline:
+            assert len(pipeline.walked) <= len(pipeline.queues)
+        assert pipeline.walked == {}
+        assert pipeline.project.reports == {}
+
+
+def test__Pipeline__run_walker__walks_only_under_given_directory() -> None:
+    """Walks only the given directory when under is specified."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "pkg").mkdir()
+        (root / "pkg" / "a.py").write_text("def a():\n    pass\n")
+        (root / "b.py").write_text("def b():\n    pass\n")
+        reports = list(Pipeline(Project(root, workers=2), under=root / "pkg"))
+        assert [report.filepath for report in reports] == [root / "pkg" / "a.py"]
+
+
+def test__Pipeline__read__reads_source_from_git_tree() -> None:
+    """Reads the source file contents from the git tree of the project."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (path,) = write_modules(Path(tmpdir), 1)
+        tree = MagicMock(spec=GitTree)
+        tree.read_bytes.return_value = b"def committed():\n    pass\n"
+        task = Task(0, path)
+        Pipeline(Project(Path(tmpdir), tree=tree)).read(task)
+        assert task.source == b"def committed():\n    pass\n"
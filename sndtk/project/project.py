@@ -0,0 +1,513 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, Generator, Iterable
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from sndtk.cache import CacheStore
+from sndtk.config import Settings
+from sndtk.filters import (
+    CompositeFileFilter,
+    ConfigFilter,
+    ExactFilter,
+    FileFilter,
+    GitignoreFilter,
+    PatternFilter,
+    SelectFilter,
+)
+from sndtk.parsers.index import SymbolIndex
+from sndtk.parsers.python import ParseTimeoutError, PythonParser
+from sndtk.parsers.types import Function
+from sndtk.report import FileReport, FunctionReport, LazyFunctionReports
+from sndtk.spec.paths import SPEC_SUFFIX, source_path_for, spec_path_for
+from sndtk.spec.types import Identifier
+
+from .order import order_paths
+from .pipeline import BUDGET_EXHAUSTED, Pipeline
+from .threads import default_workers
+from .walk import walk
+
+if TYPE_CHECKING:
+    from sndtk.git import GitTree
+    from sndtk.report import CoverageGate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 8
+GENERATED_SCAN_SIZE = 4096
+
+
+class Project:
+    """
+    プロジェクト全体のレポートを生成するためのライブラリAPI
+
+    フィルター、パーサー、テストファイルの索引、生成済みのレポートを保持し、
+    同じインスタンスへの繰り返しの問い合わせでは変更のないファイルを再解析しない。
+    GILが無効なビルドでは段階的なパイプラインで複数のファイルを並列に解析する
+    """
+
+    def __init__(
+        self,
+        root: Path = Path("."),
+        cache: CacheStore | None = None,
+        workers: int | None = None,
+        settings: Settings | None = None,
+        select: SelectFilter | None = None,
+        tree: GitTree | None = None,
+        remember: bool = True,
+    ) -> None:
+        """
+        Args:
+            root: 走査するプロジェクトのルートディレクトリ
+            cache: 解析結果の永続キャッシュ
+            workers: レポート生成に用いるスレッド数 (Noneの場合GILの有無から決定、1の場合逐次実行)
+            settings: [tool.sndtk] の設定値 (Noneの場合rootのpyproject.tomlから読み込む)
+            select: 指定した場合、パターンに一致するファイルと関数だけを対象とする
+            tree: 指定した場合、作業ツリーの代わりにコミットのツリーのファイルを対象とする。
+                設定とフィルターは作業ツリーから読み込む
+            remember: Falseの場合、生成したレポートを記録しない。1回限りの走査で
+                レポートを保持し続けないために用いる
+        """
+        if workers is not None and workers < 1:
+            raise ValueError(f"workers must be positive: {workers}")
+        self.root = root
+        self.settings = Settings.load(root) if settings is None else settings
+        self.workers = default_workers() if workers is None else workers
+        self.select = select
+        self.tree = tree
+        self.remember = remember
+        # .gitignore と pyproject.toml はルートから読み込み、無い場合はそのフィルターを用いない
+        filters: list[FileFilter] = [PatternFilter()]
+        if (root / ".gitignore").exists():
+            filters.insert(0, GitignoreFilter(root))
+        if (root / "pyproject.toml").exists():
+            filters.append(ConfigFilter(root))
+        if select is not None:
+            filters.append(select)
+        self.filter = CompositeFileFilter(*filters)
+        self.parser = PythonParser(cache, self.settings.parse_timeout, tree)
+        self.index = SymbolIndex(self.parser, tree)
+        self.reports: dict[Path, FileReport] = {}
+        self.lock = threading.Lock()
+
+    def report(
+        self,
+        path: Path,
+        identifier: Identifier | None = None,
+        functions: list[Function] | None = None,
+        lazy: bool = False,
+    ) -> FileReport:
+        """
+        ファイルのレポートを返す。生成済みのレポートがあれば再利用する
+
+        remember が False の場合、生成したレポートは記録しない
+
+        レポートは関数ごとに遅延評価する形で記録し、lazy が False の場合は返す前に評価を済ませる
+
+        Args:
+            path: ソースファイルのパス
+            identifier: 関数を指定する識別子
+            functions: 解析済みの関数 (Noneの場合はファイルを解析する)
+            lazy: Trueの場合、関数のレポートを参照されたときに生成する
+
+        Returns:
+            FileReport: ファイルのレポート
+        """
+        with self.lock:
+            report = self.reports.get(path)
+        if report is None:
+            reason = self.skip_reason(path) if functions is None else None
+            if reason is not None:
+                report = FileReport.generate_skipped(path, reason)
+            else:
+                try:
+                    report = FileReport.generate(
+                        path,
+                        None,
+                        self.parser,
+                        self.index,
+                        functions,
+                        lazy=True,
+                        select=self.select,
+                        tree=self.tree,
+                    )
+                    if report.filespec is not None:
+                        # シナリオは参照されたときに検証するため、テストファイルの解析の時間切れも
+                        # ここで扱えるよう、スペックが参照するテストファイルを先に索引する
+                        for testpath in report.filespec.testpaths():
+                            self.index.names(testpath)
+                except ParseTimeoutError as e:
+                    # 時間切れは一時的な場合もあるため、レポートを記録しない
+                    return FileReport.generate_unevaluated(path, str(e))
+            if self.remember:
+                with self.lock:
+                    report = self.reports.setdefault(path, report)
+
+        if identifier is not None and identifier.function_identifier != "":
+            if isinstance(report.functions, LazyFunctionReports):
+                # 対象の関数だけを評価する
+                narrowed = report.functions.select(identifier.function_identifier)
+            else:
+                narrowed = [
+                    function_report
+                    for function_report in report.functions
+                    if function_report.function.identifier == identifier.function_identifier
+                ]
+            return dataclasses.replace(report, functions=narrowed)
+        if not lazy and isinstance(report.functions, LazyFunctionReports):
+            report.functions.evaluate()
+        return report
+
+    def skip_reason(self, path: Path) -> str | None:
+        """
+        設定により解析せずにスキップするファイルかどうかを判定する
+
+        max_file_size を超えるファイルと、先頭に generated_markers のいずれかを含むファイルをスキップする
+
+        Args:
+            path: ソースファイルのパス
+
+        Returns:
+            str | None: スキップする理由、解析する場合None
+        """
+        limit = self.settings.max_file_size
+        if limit is not None:
+            size = self.size(path)
+            if size > limit:
+                return f"File too large: {size} bytes (max_file_size {limit} bytes)"
+
+        markers = self.settings.generated_markers
+        if markers:
+            if self.tree is not None:
+                head = self.tree.read_bytes(path)[:GENERATED_SCAN_SIZE]
+            else:
+                with open(path, "rb") as f:
+                    head = f.read(GENERATED_SCAN_SIZE)
+            for marker in markers:
+                if marker.encode() in head:
+                    return f"Generated file: {marker}"
+        return None
+
+    def size(self, path: Path) -> int:
+        """
+        対象のツリーのファイルの大きさを返す
+
+        Args:
+            path: ファイルのパス
+
+        Returns:
+            int: ファイルの大きさ (バイト)
+        """
+        return self.tree.size(path) if self.tree is not None else path.stat().st_size
+
+    def is_file(self, path: Path) -> bool:
+        """
+        対象のツリーにファイルがあるかどうかを判定する
+
+        Args:
+            path: ファイルのパス
+
+        Returns:
+            bool: ファイルがある場合True
+        """
+        return self.tree.is_file(path) if self.tree is not None else path.is_file()
+
+    def read_bytes(self, path: Path) -> bytes:
+        """
+        対象のツリーからファイルの内容を読み込む
+
+        Args:
+            path: ファイルのパス
+
+        Returns:
+            bytes: ファイルの内容
+        """
+        return self.tree.read_bytes(path) if self.tree is not None else path.read_bytes()
+
+    def filter_for(self, identifier: Identifier | None = None) -> FileFilter:
+        """
+        識別子で対象を絞り込んだフィルターを返す
+
+        Args:
+            identifier: 対象を絞り込む識別子
+
+        Returns:
+            FileFilter: プロジェクトのフィルター
+        """
+        if identifier is None:
+            return self.filter
+        return CompositeFileFilter(*self.filter.filters, ExactFilter(identifier.filepath))
+
+    def classify(
+        self, path: Path, filter: FileFilter, orphans: bool = False
+    ) -> tuple[Path, bool] | None:
+        """
+        走査で見つかったパスがレポートの対象かどうかを判定する
+
+        Args:
+            path: 走査で見つかったパス
+            filter: 適用するフィルター
+            orphans: ソースファイルが存在しないスペックファイルも対象とする場合True
+
+        Returns:
+            tuple[Path, bool] | None: ソースファイルのパスと、ソースファイルが存在しない場合True。
+                対象外の場合None
+        """
+        if path.suffix == ".py":
+            if filter.is_ignored(path):
+                logger.debug(f"Ignoring file (filtered): {path}")
+                return None
+            logger.debug(f"Processing file: {path}")
+            return path, False
+        if orphans:
+            source = source_path_for(path)
+            if source is None or self.is_file(source) or filter.is_ignored(source):
+                return None
+            logger.debug(f"Found orphaned spec file: {path}")
+            return source, True
+        return None
+
+    def candidates(
+        self, orphans: bool = False, order: str | None = None, under: Path | None = None
+    ) -> Iterable[Path]:
+        """
+        レポートの対象となりうるファイルを走査する。フィルターはまだ適用しないが、
+        select が指定されている場合は一致するファイルを含みえないディレクトリに入らない
+
+        Args:
+            orphans: スペックファイルも候補に含める場合True
+            order: 並べ替えの方法 (path, recent, churn, size)。Noneの場合は走査順に逐次返す
+            under: 走査を始めるディレクトリ (Noneの場合プロジェクトのルート)
+
+        Returns:
+            Iterable[Path]: Pythonファイルと、orphansがTrueの場合はスペックファイルのパス
+        """
+        enter = self.select.may_contain if self.select is not None else None
+        start = under or self.root
+        if self.tree is not None and order not in (None, "path"):
+            # recent と size は作業ツリーのファイルの情報、churn は作業ツリーの履歴で並べ替える
+            raise ValueError(f"Order {order} is not supported for a git revision")
+        found = self.tree.walk(start, enter) if self.tree is not None else walk(start, enter)
+        paths = (
+            path
+            for path in found
+            if path.suffix == ".py" or (orphans and path.name.endswith(SPEC_SUFFIX))
+        )
+        if order is None:
+            return paths
+        return order_paths(paths, order, self.root)
+
+    def iter_paths(
+        self,
+        identifier: Identifier | None = None,
+        orphans: bool = False,
+        order: str | None = None,
+        under: Path | None = None,
+    ) -> Generator[tuple[Path, bool]]:
+        """
+        フィルターを通過したソースファイルのパスを走査順に返す
+
+        Args:
+            identifier: 対象を絞り込む識別子
+            orphans: ソースファイルが存在しないスペックファイルも含める場合True
+            order: 並べ替えの方法 (path, recent, churn, size)。Noneの場合は走査順
+            under: 走査を始めるディレクトリ (Noneの場合プロジェクトのルート)
+
+        Returns:
+            Generator[tuple[Path, bool]]: ソースファイルのパスと、ソースファイルが存在しない場合True
+        """
+        filter = self.filter_for(identifier)
+        for path in self.candidates(orphans, order, under):
+            target = self.classify(path, filter, orphans)
+            if target is not None:
+                yield target
+
+    def iter_reports(
+        self,
+        identifier: Identifier | None = None,
+        orphans: bool = False,
+        deadline: float | None = None,
+        order: str | None = None,
+        under: Path | None = None,
+        gate: CoverageGate | None = None,
+    ) -> Generator[FileReport]:
+        """
+        フィルターを通過した全てのソースファイルのレポートを走査順に返す
+
+        逐次実行では1ファイルずつ、関数のレポートも参照されたときに評価するため、
+        途中で止めれば残りの関数のシナリオや残りのファイルは評価しない
+
+        Args:
+            identifier: 対象を絞り込む識別子
+            orphans: ソースファイルが存在しないスペックファイルのレポートも含める場合True
+            deadline: 打ち切る時刻 (time.monotonic の値)。指定した場合は常にパイプラインを用い、
+                時刻を過ぎると残りのファイルを評価されなかったものとして返す
+            order: 評価する順序 (path, recent, churn, size)。Noneの場合は走査順
+            under: 走査を始めるディレクトリ (Noneの場合プロジェクトのルート)
+            gate: 指定した場合は常にパイプラインを用い、読み込みの段階で関数の数の上限を記録する
+
+        Returns:
+            Generator[FileReport]: ファイルのレポート
+        """
+        logger.info(f"Generating reports for root: {self.root}")
+        if self.workers > 1 or deadline is not None or gate is not None:
+            yield from Pipeline(
+                self, identifier, orphans, deadline=deadline, order=order, under=under, gate=gate
+            )
+            return
+
+        for path, orphaned in self.iter_paths(identifier, orphans, order, under):
+            if orphaned:
+                yield FileReport.generate_orphan(path, self.tree)
+            else:
+                yield self.report(path, identifier, lazy=True)
+
+    def iter_targets(
+        self, identifiers: Iterable[Identifier], deadline: float | None = None
+    ) -> Generator[FileReport]:
+        """
+        識別子ごとのレポートを入力順に返す
+
+        同じファイルを指す識別子が複数あってもファイルは一度だけ解析し、
+        関数の識別子で絞り込むときは対象の関数だけを評価する
+
+        Args:
+            identifiers: 対象の識別子
+            deadline: 打ち切る時刻 (time.monotonic の値)。過ぎた後の識別子は評価されなかったものとして返す
+
+        Returns:
+            Generator[FileReport]: 識別子ごとのレポート
+        """
+        for identifier in identifiers:
+            path = identifier.filepath
+            if deadline is not None and time.monotonic() >= deadline:
+                yield FileReport.generate_unevaluated(path, BUDGET_EXHAUSTED)
+                continue
+            if not self.is_file(path):
+                logger.warning(f"Target file not found: {path}")
+                continue
+            if self.filter.is_ignored(path):
+                logger.debug(f"Ignoring target (filtered): {path}")
+                continue
+            yield self.report(path, identifier, lazy=True)
+
+    async def aiter_reports(
+        self,
+        identifier: Identifier | None = None,
+        orphans: bool = False,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        executor: Executor | None = None,
+    ) -> AsyncGenerator[FileReport]:
+        """
+        iter_reports の非同期版。ファイルの読み込みと解析をエグゼキューターで実行し、
+        イベントループをブロックせずにレポートを走査順に返す
+
+        Args:
+            identifier: 対象を絞り込む識別子
+            orphans: ソースファイルが存在しないスペックファイルのレポートも含める場合True
+            concurrency: 同時に生成するレポートの上限
+            executor: レポートの生成に用いるエグゼキューター (Noneの場合イベントループの既定)
+
+        Returns:
+            AsyncGenerator[FileReport]: ファイルのレポート
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be positive: {concurrency}")
+
+        logger.info(f"Generating reports asynchronously for root: {self.root}")
+        loop = asyncio.get_running_loop()
+        paths = await loop.run_in_executor(executor, list, self.iter_paths(identifier, orphans))
+
+        pending: deque[asyncio.Future[FileReport]] = deque()
+        try:
+            for path, orphaned in paths:
+                if len(pending) >= concurrency:
+                    yield await pending.popleft()
+                if orphaned:
+                    pending.append(
+                        loop.run_in_executor(executor, FileReport.generate_orphan, path, self.tree)
+                    )
+                else:
+                    pending.append(loop.run_in_executor(executor, self.report, path, identifier))
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def iter_functions(self, identifier: Identifier | None = None) -> Generator[FunctionReport]:
+        """
+        全ての関数のレポートを走査順に返す
+
+        Args:
+            identifier: 対象を絞り込む識別子
+
+        Returns:
+            Generator[FunctionReport]: 関数のレポート
+        """
+        for report in self.iter_reports(identifier):
+            yield from report.functions
+
+    def first_uncovered(
+        self, identifier: Identifier | None = None, under: Path | None = None
+    ) -> FunctionReport | None:
+        """
+        走査順で最初のカバーされていない関数のレポートを返す
+
+        Args:
+            identifier: 対象を絞り込む識別子
+            under: 走査を始めるディレクトリ (Noneの場合プロジェクトのルート)
+
+        Returns:
+            FunctionReport | None: 関数のレポート、全てカバーされている場合None
+        """
+        for report in self.iter_reports(identifier, under=under):
+            function_report = report.get_first_uncovered_function()
+            if function_report is not None:
+                return function_report
+        return None
+
+    def close(self) -> None:
+        """解析に用いたワーカープロセスを終了する"""
+        self.parser.close()
+
+    def refresh(self, changed_paths: Iterable[Path]) -> int:
+        """
+        変更されたファイルに依存する解析結果とレポートを破棄する
+
+        ソースファイル、スペックファイル、テストファイルのいずれの変更も受け付ける
+
+        Args:
+            changed_paths: 変更、追加、削除されたファイルのパス
+
+        Returns:
+            int: 破棄したレポートの数
+        """
+        changed = {path.resolve() for path in changed_paths}
+        for path in changed:
+            self.index.invalidate(path)
+
+        with self.lock:
+            stale = [
+                path
+                for path, report in self.reports.items()
+                if path.resolve() in changed
+                or spec_path_for(path).resolve() in changed
+                or (
+                    report.filespec is not None
+                    and any(
+                        testpath.resolve() in changed for testpath in report.filespec.testpaths()
+                    )
+                )
+            ]
+            for path in stale:
+                del self.reports[path]
+        logger.debug(f"Invalidated {len(stale)} reports for {len(changed)} changed paths")
+        return len(stale)
@@ -0,0 +1,777 @@
+"""Tests for Project."""
+
+import asyncio
+import json
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import chdir
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from sndtk.cache import CacheStore
+from sndtk.config import Settings
+from sndtk.filters import SelectFilter
+from sndtk.git import GitTree
+from sndtk.parsers.python import ParseTimeoutError
+from sndtk.project.pipeline import Pipeline
+from sndtk.project.project import Project
+from sndtk.report import FileReport, LazyFunctionReports
+from sndtk.spec.types import Identifier
+
+
+def write_project(root: Path) -> Path:
+    source = root / "module.py"
+    source.write_text("def covered():\n    pass\n\n\ndef uncovered():\n    pass\n")
+    (root / "module_test.py").write_text("def test__covered__works():\n    pass\n")
+    spec = {
+        "filepath": str(source),
+        "testpath": str(root / "module_test.py"),
+        "functions": [
+            {
+                "identifier": "covered",
+                "scenarios": [{"testname": "test__covered__works", "description": "Works"}],
+            }
+        ],
+    }
+    (root / "module_spec.json").write_text(json.dumps(spec))
+    return source
+
+
+def test__Project____init____builds_filter_chain_and_parser() -> None:
+    """Builds the default filter chain and a parser backed by the given cache."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / ".gitignore").write_text("")
+        (Path(tmpdir) / "pyproject.toml").write_text("")
+        with CacheStore(Path(tmpdir) / "cache", 1024) as cache:
+            project = Project(Path(tmpdir), cache)
+            assert len(project.filter.filters) == 3
+            assert project.parser.cache is cache
+            assert project.index.parser is project.parser
+            assert project.reports == {}
+
+
+def test__Project____init____reads_filters_from_root() -> None:
+    """Reads .gitignore and the exclude setting from root regardless of the working directory."""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as cwd:
+        root = Path(tmpdir)
+        (root / ".gitignore").write_text("ignored.py\n")
+        (root / "pyproject.toml").write_text('[tool.sndtk]\nexclude = ["excluded.py"]\n')
+        with chdir(cwd):
+            project = Project(root)
+            assert project.filter.is_ignored(root / "ignored.py")
+            assert project.filter.is_ignored(root / "excluded.py")
+            assert not project.filter.is_ignored(root / "kept.py")
+
+
+def test__Project____init____skips_missing_filter_files() -> None:
+    """Uses only the pattern filter when root has no .gitignore or pyproject.toml (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as cwd:
+        with chdir(cwd):
+            project = Project(Path(tmpdir))
+        assert len(project.filter.filters) == 1
+
+
+def test__Project__report__does_not_remember_reports_when_disabled() -> None:
+    """Generates the report without storing it when remember is False."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        project = Project(Path(tmpdir), remember=False)
+        assert project.report(source) is not project.report(source)
+        assert project.reports == {}
+
+
+def test__Project__report__generates_report_for_file() -> None:
+    """Generates the report for a source file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        report = Project(Path(tmpdir)).report(source)
+        assert [f.function.identifier for f in report.functions] == ["covered", "uncovered"]
+        assert report.functions[0].covered
+
+
+def test__Project__report__reuses_generated_report() -> None:
+    """Returns the same report without re-parsing on repeated calls."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        project = Project(Path(tmpdir))
+        with patch.object(project.parser, "parse", wraps=project.parser.parse) as mock_parse:
+            first = project.report(source)
+            second = project.report(source)
+        assert first is second
+        assert mock_parse.call_count == 2  # the source file and its test file
+
+
+def test__Project__report__narrows_functions_to_identifier() -> None:
+    """Narrows the functions to the one named by the identifier."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        project = Project(Path(tmpdir))
+        report = project.report(source, Identifier(source, "uncovered"))
+        assert [f.function.identifier for f in report.functions] == ["uncovered"]
+        assert len(project.report(source).functions) == 2
+
+
+def test__Project__iter_reports__yields_reports_for_unfiltered_sources() -> None:
+    """Yields reports for source files, skipping test files."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        reports = list(Project(Path(tmpdir)).iter_reports())
+        assert [report.filepath for report in reports] == [source]
+
+
+def test__Project__iter_reports__yields_only_identified_file() -> None:
+    """Yields only the file named by the identifier."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        (Path(tmpdir) / "other.py").write_text("def other():\n    pass\n")
+        reports = list(Project(Path(tmpdir)).iter_reports(Identifier(source, "")))
+        assert [report.filepath for report in reports] == [source]
+
+
+def test__Project__iter_reports__yields_orphaned_spec_files() -> None:
+    """Yields orphan reports for spec files whose source is missing when requested."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        source.unlink()
+        project = Project(Path(tmpdir))
+        assert list(project.iter_reports()) == []
+        reports = list(project.iter_reports(orphans=True))
+        assert len(reports) == 1
+        assert reports[0].orphaned
+
+
+def test__Project__iter_functions__yields_function_reports() -> None:
+    """Yields the reports of every function in walk order."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_project(Path(tmpdir))
+        functions = list(Project(Path(tmpdir)).iter_functions())
+        assert [f.function.identifier for f in functions] == ["covered", "uncovered"]
+
+
+def test__Project__first_uncovered__returns_first_uncovered_function() -> None:
+    """Returns the first function that is not covered."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_project(Path(tmpdir))
+        function_report = Project(Path(tmpdir)).first_uncovered()
+        assert function_report is not None
+        assert function_report.function.identifier == "uncovered"
+
+
+def test__Project__first_uncovered__returns_none_when_all_covered() -> None:
+    """Returns None when every function is covered (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / "empty.py").write_text("")
+        assert Project(Path(tmpdir)).first_uncovered() is None
+
+
+def test__Project__refresh__regenerates_changed_source() -> None:
+    """Regenerates the report of a changed source file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        project = Project(Path(tmpdir))
+        project.report(source)
+        source.write_text("def covered():\n    pass\n")
+        assert project.refresh([source]) == 1
+        assert len(project.report(source).functions) == 1
+
+
+def test__Project__refresh__regenerates_reports_depending_on_changed_test_file() -> None:
+    """Regenerates reports whose spec references a changed test file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        testpath = Path(tmpdir) / "module_test.py"
+        project = Project(Path(tmpdir))
+        assert project.report(source).functions[0].covered
+        testpath.write_text("")
+        assert project.refresh([testpath]) == 1
+        assert not project.report(source).functions[0].covered
+
+
+def test__Project__refresh__regenerates_report_of_changed_spec_file() -> None:
+    """Regenerates the report of a source whose spec file changed."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        project = Project(Path(tmpdir))
+        project.report(source)
+        spec_path = Path(tmpdir) / "module_spec.json"
+        spec_path.unlink()
+        assert project.refresh([spec_path]) == 1
+        assert project.report(source).filespec is None
+
+
+def test__Project__refresh__keeps_reports_of_unrelated_files() -> None:
+    """Keeps reports that do not depend on the changed paths (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        project = Project(Path(tmpdir))
+        report = project.report(source)
+        assert project.refresh([Path(tmpdir) / "unrelated.py"]) == 0
+        assert project.report(source) is report
+
+
+def test__Project__iter_paths__yields_sources_and_orphaned_sources() -> None:
+    """Yields source paths, and the sources of orphaned spec files flagged as orphaned."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        orphan = Path(tmpdir) / "removed.py"
+        (Path(tmpdir) / "removed_spec.json").write_text("{}")
+        project = Project(Path(tmpdir))
+        assert list(project.iter_paths()) == [(source, False)]
+        assert sorted(project.iter_paths(orphans=True)) == [(source, False), (orphan, True)]
+
+
+async def collect(project: Project, **kwargs: object) -> list[FileReport]:
+    return [report async for report in project.aiter_reports(**kwargs)]  # type: ignore[arg-type]
+
+
+def test__Project__aiter_reports__yields_reports_in_walk_order() -> None:
+    """Yields the same reports as iter_reports, in walk order."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for i in range(5):
+            (Path(tmpdir) / f"module{i}.py").write_text(f"def f{i}():\n    pass\n")
+        project = Project(Path(tmpdir))
+        reports = asyncio.run(collect(project, concurrency=2))
+        assert [r.filepath for r in reports] == [r.filepath for r in project.iter_reports()]
+
+
+def test__Project__aiter_reports__generates_reports_in_executor() -> None:
+    """Generates reports off the event loop thread."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        project = Project(Path(tmpdir))
+        threads: list[int] = []
+        original = project.report
+
+        def report(path: Path, identifier: Identifier | None = None) -> FileReport:
+            threads.append(threading.get_ident())
+            return original(path, identifier)
+
+        with patch.object(project, "report", side_effect=report):
+            reports = asyncio.run(collect(project))
+        assert [r.filepath for r in reports] == [source]
+        assert threads != [threading.get_ident()]
+
+
+def test__Project__aiter_reports__shares_cache_across_executor_threads() -> None:
+    """Shares the persistent cache across executor threads."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir) / "project"
+        root.mkdir()
+        for i in range(5):
+            (root / f"module{i}.py").write_text(f"def f{i}():\n    pass\n")
+        with CacheStore(Path(tmpdir) / "cache", 1024 * 1024) as cache:
+            reports = asyncio.run(collect(Project(root, cache), concurrency=4))
+            assert len(reports) == 5
+            assert cache.misses == 5
+
+
+def test__Project__aiter_reports__yields_orphan_reports() -> None:
+    """Yields orphan reports for spec files whose source is missing when requested."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        source.unlink()
+        reports = asyncio.run(collect(Project(Path(tmpdir)), orphans=True))
+        assert len(reports) == 1
+        assert reports[0].orphaned
+
+
+def test__Project__aiter_reports__raises_when_concurrency_is_not_positive() -> None:
+    """Raises ValueError when concurrency is less than one (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with pytest.raises(ValueError, match="concurrency must be positive"):
+            asyncio.run(collect(Project(Path(tmpdir)), concurrency=0))
+
+
+def test__Project____init____picks_workers_from_gil_status() -> None:
+    """Picks the number of threads from the GIL status when workers is not given."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with patch("sndtk.project.project.default_workers", return_value=4):
+            assert Project(Path(tmpdir)).workers == 4
+        assert Project(Path(tmpdir), workers=2).workers == 2
+
+
+def test__Project____init____raises_when_workers_is_not_positive() -> None:
+    """Raises ValueError when workers is less than one (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with pytest.raises(ValueError, match="workers must be positive"):
+            Project(Path(tmpdir), workers=0)
+
+
+def test__Project__iter_reports__uses_pipeline_when_workers_exceed_one() -> None:
+    """Generates reports through the staged pipeline when more than one worker is configured."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        project = Project(Path(tmpdir), workers=2)
+        with patch("sndtk.project.project.Pipeline", wraps=Pipeline) as mock_pipeline:
+            reports = list(project.iter_reports())
+        mock_pipeline.assert_called_once_with(
+            project, None, False, deadline=None, order=None, under=None, gate=None
+        )
+        assert [report.filepath for report in reports] == [source]
+
+
+def test__Project__filter_for__returns_project_filter_without_identifier() -> None:
+    """Returns the project filter unchanged when no identifier is given (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project = Project(Path(tmpdir))
+        assert project.filter_for(None) is project.filter
+
+
+def test__Project__filter_for__restricts_filter_to_identified_file() -> None:
+    """Ignores every file other than the one named by the identifier."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project = Project(Path(tmpdir))
+        filter = project.filter_for(Identifier(Path(tmpdir) / "a.py", ""))
+        assert not filter.is_ignored(Path(tmpdir) / "a.py")
+        assert filter.is_ignored(Path(tmpdir) / "b.py")
+
+
+def test__Project__classify__accepts_unfiltered_source() -> None:
+    """Accepts Python sources that pass the filter."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project = Project(Path(tmpdir))
+        path = Path(tmpdir) / "module.py"
+        assert project.classify(path, project.filter) == (path, False)
+
+
+def test__Project__classify__rejects_filtered_and_non_python_files() -> None:
+    """Rejects filtered sources, and non-Python files when orphans are not requested."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project = Project(Path(tmpdir))
+        assert project.classify(Path(tmpdir) / "module_test.py", project.filter) is None
+        assert project.classify(Path(tmpdir) / "module_spec.json", project.filter) is None
+
+
+def test__Project__classify__maps_orphaned_spec_to_source() -> None:
+    """Maps a spec file whose source is missing to that source when orphans are requested."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project = Project(Path(tmpdir))
+        spec_path = Path(tmpdir) / "removed_spec.json"
+        source = Path(tmpdir) / "removed.py"
+        assert project.classify(spec_path, project.filter, orphans=True) == (source, True)
+        source.touch()
+        assert project.classify(spec_path, project.filter, orphans=True) is None
+
+
+def test__Project__report__uses_given_functions() -> None:
+    """Uses already parsed functions instead of parsing the file again."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        project = Project(Path(tmpdir))
+        functions = project.parser.parse_source(source, source.read_bytes())
+        with patch.object(project.parser, "parse", wraps=project.parser.parse) as mock_parse:
+            report = project.report(source, functions=functions[:1])
+        assert [f.function.identifier for f in report.functions] == ["covered"]
+        assert all(call.args[0] != source for call in mock_parse.call_args_list)
+
+
+def test__Project____init____loads_settings_from_root() -> None:
+    """Loads [tool.sndtk] settings from the root pyproject.toml unless settings are given."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "pyproject.toml").write_text('[tool.sndtk]\nmax_file_size = "1KB"\n')
+        assert Project(root).settings.max_file_size == 1024
+        assert Project(root, settings=Settings()).settings.max_file_size is None
+
+
+def test__Project__skip_reason__skips_files_over_max_file_size() -> None:
+    """Returns a reason for files larger than max_file_size."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "tables.py"
+        path.write_bytes(b"X = 1\n" * 10)
+        project = Project(Path(tmpdir), settings=Settings(max_file_size=59))
+        assert project.skip_reason(path) == ("File too large: 60 bytes (max_file_size 59 bytes)")
+
+
+def test__Project__skip_reason__keeps_files_at_max_file_size() -> None:
+    """Returns None for files exactly at max_file_size (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "tables.py"
+        path.write_bytes(b"X = 1\n" * 10)
+        project = Project(Path(tmpdir), settings=Settings(max_file_size=60))
+        assert project.skip_reason(path) is None
+
+
+def test__Project__skip_reason__skips_files_with_generated_marker() -> None:
+    """Returns a reason for files whose header contains a generated-file marker."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "service_pb2.py"
+        path.write_text("# Generated by the protocol buffer compiler.  DO NOT EDIT!\n")
+        project = Project(Path(tmpdir), settings=Settings(generated_markers=["DO NOT EDIT"]))
+        assert project.skip_reason(path) == "Generated file: DO NOT EDIT"
+
+
+def test__Project__skip_reason__ignores_markers_after_the_header() -> None:
+    """Returns None when the marker only appears after the scanned header."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "module.py"
+        path.write_text("X = 1\n" * 1000 + "# @generated\n")
+        project = Project(Path(tmpdir), settings=Settings(generated_markers=["@generated"]))
+        assert project.skip_reason(path) is None
+
+
+def test__Project__report__returns_skipped_report_without_parsing() -> None:
+    """Returns a skip report without parsing files excluded by the settings."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        source = write_project(root)
+        source.write_text("# @generated\n" + source.read_text())
+        project = Project(root, settings=Settings(generated_markers=["@generated"]))
+        with patch.object(project.parser, "parse") as mock_parse:
+            report = project.report(source)
+        mock_parse.assert_not_called()
+        assert report.skipped == "Generated file: @generated"
+        assert report.stale == []
+
+
+def test__Project__report__returns_unevaluated_report_on_parse_timeout() -> None:
+    """Returns a not-evaluated report without remembering it when parsing times out."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        project = Project(Path(tmpdir), settings=Settings(parse_timeout=1))
+        error = ParseTimeoutError(source, 1)
+        with patch.object(project.parser, "parse_functions", side_effect=error):
+            report = project.report(source)
+        assert report.unevaluated == "Parse timed out after 1 s"
+        assert source not in project.reports
+        assert project.report(source).unevaluated is None
+
+
+def time_out_on_test_files(project: Project) -> Any:
+    """Patch the parser of the project to time out only on test files."""
+    parse = project.parser.parse
+
+    def fake_parse(path: Path) -> Any:
+        if path.name.endswith("_test.py"):
+            raise ParseTimeoutError(path, 1)
+        return parse(path)
+
+    return patch.object(project.parser, "parse", side_effect=fake_parse)
+
+
+def test__Project__report__returns_unevaluated_report_on_test_file_timeout() -> None:
+    """Returns a not-evaluated report when parsing a test file of the spec times out."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        project = Project(Path(tmpdir), workers=1)
+        with time_out_on_test_files(project):
+            report = project.report(source)
+            assert report.unevaluated == "Parse timed out after 1 s"
+            assert source not in project.reports
+
+
+def test__Project__iter_reports__reports_test_file_timeout_as_unevaluated() -> None:
+    """Yields a not-evaluated report instead of raising when a test file times out in the pipeline."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_project(Path(tmpdir))
+        for workers in (1, 4):
+            project = Project(Path(tmpdir), workers=workers)
+            with time_out_on_test_files(project):
+                reports = list(project.iter_reports(deadline=time.monotonic() + 30))
+            assert [report.unevaluated for report in reports] == ["Parse timed out after 1 s"]
+
+
+def test__Project__iter_reports__uses_pipeline_when_deadline_is_given() -> None:
+    """Generates reports through the pipeline with the deadline even with a single worker."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        project = Project(Path(tmpdir), workers=1)
+        deadline = time.monotonic() + 60
+        with patch("sndtk.project.project.Pipeline", wraps=Pipeline) as mock_pipeline:
+            reports = list(project.iter_reports(deadline=deadline))
+        mock_pipeline.assert_called_once_with(
+            project, None, False, deadline=deadline, order=None, under=None, gate=None
+        )
+        assert [report.filepath for report in reports] == [source]
+
+
+def test__Project__close__stops_parser_workers() -> None:
+    """Stops the worker processes started for parse timeouts."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        project = Project(Path(tmpdir), settings=Settings(parse_timeout=30))
+        project.report(source)
+        assert len(project.parser.workers) == 1
+        project.close()
+        assert project.parser.workers == []
+
+
+def test__Project__candidates__yields_python_files_and_optionally_specs() -> None:
+    """Yields Python files, and spec files only when orphans are requested."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        source = write_project(root)
+        (root / "README.md").write_text("")
+        assert sorted(Project(root).candidates()) == [source, root / "module_test.py"]
+        assert sorted(Project(root).candidates(orphans=True)) == [
+            source,
+            root / "module_spec.json",
+            root / "module_test.py",
+        ]
+
+
+def test__Project__candidates__sorts_by_order() -> None:
+    """Returns the candidates sorted by the given order."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        for name in ["b.py", "c.py", "a.py"]:
+            (root / name).write_text("")
+        assert list(Project(root).candidates(order="path")) == [
+            root / "a.py",
+            root / "b.py",
+            root / "c.py",
+        ]
+
+
+def test__Project__iter_reports__evaluates_lazily_in_order() -> None:
+    """Evaluates files one by one in the given order, so stopping early skips the rest."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        for name in ["b.py", "c.py", "a.py"]:
+            (root / name).write_text("def f():\n    pass\n")
+        project = Project(root, workers=1)
+        reports = project.iter_reports(order="path")
+        assert next(reports).filepath == root / "a.py"
+        reports.close()
+        assert list(project.reports) == [root / "a.py"]
+
+
+def test__Project__report__evaluates_function_reports_unless_lazy() -> None:
+    """Evaluates every function report before returning unless lazy evaluation is requested."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        project = Project(Path(tmpdir))
+        functions = project.report(source, lazy=True).functions
+        assert isinstance(functions, LazyFunctionReports)
+        assert functions.evaluated == 0
+        project.report(source)
+        assert functions.evaluated == 2
+
+
+def test__Project__report__narrows_without_evaluating_other_functions() -> None:
+    """Evaluates only the identified function when narrowing a memoised report."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        project = Project(Path(tmpdir))
+        report = project.report(source, Identifier(source, "uncovered"))
+        assert [f.function.identifier for f in report.functions] == ["uncovered"]
+        functions = project.reports[source].functions
+        assert isinstance(functions, LazyFunctionReports)
+        assert functions.evaluated == 1
+
+
+def test__Project__first_uncovered__stops_evaluating_at_first_uncovered_function() -> None:
+    """Does not verify the scenarios of functions after the first uncovered one."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        source.write_text(source.read_text() + "\n\ndef later():\n    pass\n")
+        project = Project(Path(tmpdir), workers=1)
+        function_report = project.first_uncovered()
+        assert function_report is not None
+        assert function_report.function.identifier == "uncovered"
+        functions = project.reports[source].functions
+        assert isinstance(functions, LazyFunctionReports)
+        assert functions.evaluated == 2
+
+
+def test__Project__iter_targets__yields_reports_in_input_order_parsing_each_file_once() -> None:
+    """Yields narrowed reports in input order, parsing a file targeted twice only once."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        other = Path(tmpdir) / "other.py"
+        other.write_text("def other():\n    pass\n")
+        project = Project(Path(tmpdir))
+        targets = [
+            Identifier(source, "uncovered"),
+            Identifier(other, ""),
+            Identifier(source, "covered"),
+        ]
+        with patch.object(project.parser, "parse", wraps=project.parser.parse) as parse:
+            reports = list(project.iter_targets(targets))
+        assert [[f.function.identifier for f in r.functions] for r in reports] == [
+            ["uncovered"],
+            ["other"],
+            ["covered"],
+        ]
+        parsed = [call.args[0] for call in parse.call_args_list]
+        assert parsed.count(source) == 1
+
+
+def test__Project__iter_targets__skips_missing_and_filtered_files() -> None:
+    """Skips targets whose file does not exist or is excluded by the filters."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "ignored.py").write_text("def f():\n    pass\n")
+        project = Project(root)
+        targets = [Identifier(root / "missing.py", "f"), Identifier(root / "ignored.py", "f")]
+        with patch.object(project.filter, "is_ignored", return_value=True):
+            assert list(project.iter_targets(targets)) == []
+
+
+def test__Project__iter_targets__returns_unevaluated_reports_after_deadline() -> None:
+    """Returns the remaining targets as not evaluated once the deadline has passed."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        reports = list(Project(Path(tmpdir)).iter_targets([Identifier(source, "")], deadline=0.0))
+        assert reports[0].unevaluated == "time budget exhausted"
+
+
+def test__Project____init____adds_select_filter_to_filter_chain() -> None:
+    """Appends the select filter to the default filter chain."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        select = SelectFilter(["*.py"], Path(tmpdir))
+        project = Project(Path(tmpdir), select=select)
+        assert project.filter.filters[-1] is select
+
+
+def test__Project__candidates__does_not_enter_unselected_directories() -> None:
+    """Does not walk directories that cannot contain selected files."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "pkg").mkdir()
+        (root / "docs").mkdir()
+        (root / "pkg" / "a.py").write_text("")
+        (root / "docs" / "b.py").write_text("")
+        project = Project(root, select=SelectFilter(["pkg/*.py"], root))
+        assert list(project.candidates()) == [root / "pkg" / "a.py"]
+
+
+def test__Project__iter_reports__reports_only_selected_files_and_functions() -> None:
+    """Reports only the files and functions matching the select patterns."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        write_project(root)
+        (root / "other.py").write_text("def uncovered():\n    pass\n")
+        project = Project(root, workers=1, select=SelectFilter(["module.py::unc*"], root))
+        reports = list(project.iter_reports())
+        assert [r.filepath for r in reports] == [root / "module.py"]
+        assert [f.function.identifier for f in reports[0].functions] == ["uncovered"]
+
+
+def test__Project__candidates__walks_only_under_given_directory() -> None:
+    """Walks only the given directory when under is specified."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "pkg").mkdir()
+        (root / "pkg" / "a.py").write_text("")
+        (root / "b.py").write_text("")
+        assert list(Project(root).candidates(under=root / "pkg")) == [root / "pkg" / "a.py"]
+
+
+def test__Project__first_uncovered__searches_only_under_given_directory() -> None:
+    """Returns the first uncovered function among the files under the given directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "pkg").mkdir()
+        (root / "pkg" / "covered.py").write_text("X = 1\n")
+        (root / "other.py").write_text("def other():\n    pass\n")
+        project = Project(root)
+        assert project.first_uncovered(under=root / "pkg") is None
+        function_report = project.first_uncovered()
+        assert function_report is not None
+        assert function_report.function.identifier == "other"
+
+
+def commit_project(root: Path) -> Path:
+    """Commit the project, then remove the test file and add a file in the working tree."""
+    source = write_project(root)
+    for args in (["init", "-q"], ["add", "."], ["commit", "-q", "-m", "initial"]):
+        subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+            cwd=root,
+            check=True,
+            capture_output=True,
+        )
+    (root / "module_test.py").unlink()
+    (root / "added.py").write_text("def added():\n    pass\n")
+    return source
+
+
+def test__Project__size__returns_file_size() -> None:
+    """Returns the size of the file in the working tree."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        assert Project(Path(tmpdir)).size(source) == source.stat().st_size
+
+
+def test__Project__is_file__checks_git_tree_when_given() -> None:
+    """Checks the git tree instead of the working tree when the project has one."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir).resolve()
+        commit_project(root)
+        with GitTree("HEAD", root) as tree:
+            assert Project(root, tree=tree).is_file(root / "module_test.py")
+            assert not Project(root, tree=tree).is_file(root / "added.py")
+        assert Project(root).is_file(root / "added.py")
+
+
+def test__Project__read_bytes__reads_git_tree_when_given() -> None:
+    """Reads the committed contents when the project has a git tree."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir).resolve()
+        source = commit_project(root)
+        source.write_text("changed\n")
+        with GitTree("HEAD", root) as tree:
+            assert Project(root, tree=tree).read_bytes(source).startswith(b"def covered")
+        assert Project(root).read_bytes(source) == b"changed\n"
+
+
+def test__Project__skip_reason__checks_files_in_git_tree() -> None:
+    """Uses the committed size and header of the file when the project has a git tree."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir).resolve()
+        source = commit_project(root)
+        source.write_text("# @generated\n")
+        settings = Settings(max_file_size=1024, generated_markers=["@generated"])
+        with GitTree("HEAD", root) as tree:
+            assert Project(root, settings=settings, tree=tree).skip_reason(source) is None
+        assert Project(root, settings=settings).skip_reason(source) is not None
+
+
+def test__Project__candidates__walks_git_tree() -> None:
+    """Lists the files of the git tree instead of the working tree."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir).resolve()
+        commit_project(root)
+        with GitTree("HEAD", root) as tree:
+            assert sorted(Project(root, tree=tree).candidates()) == [
+                root / "module.py",
+                root / "module_test.py",
+            ]
+
+
+def test__Project__candidates__rejects_order_for_git_tree() -> None:
+    """Raises ValueError for orders that depend on the working tree."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir).resolve()
+        commit_project(root)
+        with GitTree("HEAD", root) as tree, pytest.raises(ValueError, match="not supported"):
+            list(Project(root, tree=tree).candidates(order="recent"))
+
+
+def test__Project__iter_reports__reports_git_revision() -> None:
+    """Reports the committed sources, specs and tests rather than the working tree."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir).resolve()
+        commit_project(root)
+        with GitTree("HEAD", root) as tree:
+            reports = list(Project(root, tree=tree).iter_reports())
+            assert [report.filepath for report in reports] == [root / "module.py"]
+            assert reports[0].functions[0].covered
+
+
+def test__Project__iter_targets__checks_targets_in_git_tree() -> None:
+    """Skips target files that do not exist in the git tree."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir).resolve()
+        source = commit_project(root)
+        with GitTree("HEAD", root) as tree:
+            project = Project(root, tree=tree)
+            targets = [Identifier(root / "added.py", ""), Identifier(source, "")]
+            reports = list(project.iter_targets(targets))
+        assert [report.filepath for report in reports] == [source]
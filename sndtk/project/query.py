@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any, TextIO
+
+from sndtk.spec.paths import spec_path_for
+from sndtk.spec.types import Identifier
+
+from .project import Project
+
+logger = logging.getLogger(__name__)
+
+
+class QueryError(Exception):
+    """問い合わせに応答できない場合の例外。メッセージはそのままエラーの応答になる"""
+
+
+class QuerySession:
+    """
+    NDJSON の問い合わせに1行ずつ応答するセッション
+
+    1つの Project を保持し続けるため、フィルター、解析結果、テストファイルの索引、
+    生成済みのレポートは問い合わせの間で再利用される。編集されたファイルは
+    refresh の問い合わせで通知する
+    """
+
+    def __init__(self, project: Project) -> None:
+        """
+        Args:
+            project: 問い合わせに用いるプロジェクト
+        """
+        self.project = project
+        self.methods: dict[str, Callable[[dict[str, Any]], Any]] = {
+            "report": self.report,
+            "first": self.first,
+            "create": self.create,
+            "refresh": self.refresh,
+        }
+
+    def param(self, request: dict[str, Any], name: str) -> str:
+        """
+        問い合わせから文字列のパラメーターを取り出す
+
+        Args:
+            request: 問い合わせ
+            name: パラメーター名
+
+        Returns:
+            str: パラメーターの値
+        """
+        value = request.get(name)
+        if not isinstance(value, str) or value == "":
+            raise QueryError(f"Missing parameter: {name}")
+        return value
+
+    def target(self, request: dict[str, Any]) -> Identifier:
+        """
+        問い合わせの target パラメーターを識別子に変換する
+
+        Args:
+            request: 問い合わせ
+
+        Returns:
+            Identifier: 対象の識別子
+        """
+        try:
+            identifier = Identifier.from_string(self.param(request, "target"))
+        except ValueError as e:
+            raise QueryError(str(e)) from e
+        assert identifier is not None
+        return identifier
+
+    def report(self, request: dict[str, Any]) -> dict[str, Any]:
+        """
+        ファイルまたは関数のレポートを返す
+
+        Args:
+            request: target (path.py または path.py::identifier) を含む問い合わせ
+
+        Returns:
+            dict[str, Any]: ファイルのレポート
+        """
+        identifier = self.target(request)
+        report = next(self.project.iter_targets([identifier]), None)
+        if report is None:
+            raise QueryError(f"Target not found or excluded: {identifier.filepath}")
+        return report.to_dict()
+
+    def first(self, request: dict[str, Any]) -> dict[str, Any] | None:
+        """
+        パスの下で最初のカバーされていない関数を返す
+
+        Args:
+            request: path (ファイルまたはディレクトリ、省略時はプロジェクトのルート) を含む問い合わせ
+
+        Returns:
+            dict[str, Any] | None: 関数のレポートとファイルのパス、全てカバーされている場合None
+        """
+        path = Path(request["path"]) if request.get("path") else None
+        if path is not None and not path.exists():
+            raise QueryError(f"Path not found: {path}")
+        if path is not None and path.is_file():
+            # ファイルは走査せず、保持しているレポートから直接答える
+            if self.project.filter.is_ignored(path):
+                return None
+            function_report = self.project.report(path, lazy=True).get_first_uncovered_function()
+        else:
+            function_report = self.project.first_uncovered(under=path)
+        if function_report is None:
+            return None
+        return {"filepath": str(function_report.function.filepath), **function_report.to_dict()}
+
+    def create(self, request: dict[str, Any]) -> dict[str, Any]:
+        """
+        関数のスペックを作成する。既にスペックがある場合は何もしない
+
+        Args:
+            request: target (path.py::identifier) を含む問い合わせ
+
+        Returns:
+            dict[str, Any]: スペックを作成したかどうかと、スペックファイルのパス
+        """
+        # スペックモデル (pydantic) は作成の問い合わせを受けたときに読み込む
+        from sndtk.spec import FileSpec
+
+        identifier = self.target(request)
+        if identifier.function_identifier == "":
+            raise QueryError("create requires a function target (path.py::identifier)")
+        report = next(self.project.iter_targets([identifier]), None)
+        if report is None or len(report.functions) == 0:
+            raise QueryError(f"Function not found: {request['target']}")
+
+        specpath = spec_path_for(report.filepath)
+        specced = (
+            {spec.identifier for spec in report.filespec.functions} if report.filespec else set()
+        )
+        if identifier.function_identifier in specced:
+            return {"created": False, "specpath": str(specpath)}
+
+        function = report.functions[0].function
+        if report.filespec is None:
+            filespec = FileSpec.create(report.filepath, function)
+        else:
+            filespec = report.filespec.add(function)
+        filespec.save()
+        self.project.refresh([specpath])
+        logger.info(f"Created spec for {function.identifier} in {specpath}")
+        return {"created": True, "specpath": str(specpath)}
+
+    def refresh(self, request: dict[str, Any]) -> dict[str, Any]:
+        """
+        変更されたファイルに依存する解析結果とレポートを破棄する
+
+        Args:
+            request: paths (変更されたファイルのパスのリスト) を含む問い合わせ
+
+        Returns:
+            dict[str, Any]: 破棄したレポートの数
+        """
+        paths = request.get("paths")
+        if not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+            raise QueryError("Missing parameter: paths")
+        return {"invalidated": self.project.refresh(Path(path) for path in paths)}
+
+    def handle(self, line: str) -> dict[str, Any]:
+        """
+        1行の問い合わせに応答する。失敗した場合もエラーの応答を返し、例外は送出しない
+
+        Args:
+            line: JSONの問い合わせ ({"id": ..., "method": ..., ...})
+
+        Returns:
+            dict[str, Any]: id と、result または error を含む応答
+        """
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            return {"id": None, "error": f"Invalid JSON: {e}"}
+        if not isinstance(request, dict):
+            return {"id": None, "error": "Request must be a JSON object"}
+
+        response: dict[str, Any] = {"id": request.get("id")}
+        name = request.get("method")
+        method = self.methods.get(name) if isinstance(name, str) else None
+        if method is None:
+            response["error"] = f"Unknown method: {name}"
+            return response
+        try:
+            response["result"] = method(request)
+        except QueryError as e:
+            response["error"] = str(e)
+        except Exception as e:
+            # 1つの問い合わせの失敗でセッションを終了しない
+            logger.debug(f"Query failed: {line}", exc_info=True)
+            response["error"] = f"{type(e).__name__}: {e}"
+        return response
+
+    def serve(self, lines: Iterable[str], output: TextIO) -> int:
+        """
+        入力が終わるまで問い合わせに応答し、1行に1つの応答を書き出す
+
+        キャッシュがある場合は、応答を書き出す前にその問い合わせでの変更を書き込む
+
+        Args:
+            lines: 問い合わせの行 (空行は無視する)
+            output: 応答の書き込み先
+
+        Returns:
+            int: 応答した問い合わせの数
+        """
+        count = 0
+        for line in lines:
+            if line.strip() == "":
+                continue
+            response = self.handle(line)
+            cache = self.project.parser.cache
+            if cache is not None:
+                # セッションは長く続くため、応答ごとにキャッシュへの変更を書き込む
+                cache.flush()
+            output.write(json.dumps(response, ensure_ascii=False) + "\n")
+            output.flush()
+            count += 1
+        logger.info(f"Answered {count} queries")
+        return count
@@ -0,0 +1,251 @@
+"""Tests for QuerySession."""
+
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from sndtk.cache import CacheStore
+from sndtk.project.project import Project
+from sndtk.project.query import QueryError, QuerySession
+
+
+def write_project(root: Path) -> Path:
+    source = root / "module.py"
+    source.write_text("def covered():\n    pass\n\n\ndef uncovered():\n    pass\n")
+    (root / "module_test.py").write_text("def test__covered__works():\n    pass\n")
+    spec = {
+        "filepath": str(source),
+        "testpath": str(root / "module_test.py"),
+        "functions": [
+            {
+                "identifier": "covered",
+                "scenarios": [{"testname": "test__covered__works", "description": "Works"}],
+            }
+        ],
+    }
+    (root / "module_spec.json").write_text(json.dumps(spec))
+    return source
+
+
+def session(root: Path) -> QuerySession:
+    return QuerySession(Project(root, workers=1))
+
+
+def test__QuerySession____init____registers_every_method() -> None:
+    """Registers the report, first, create and refresh methods."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        assert set(session(Path(tmpdir)).methods) == {"report", "first", "create", "refresh"}
+
+
+def test__QuerySession__param__returns_string_parameter() -> None:
+    """Returns the value of a string parameter."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        assert session(Path(tmpdir)).param({"target": "a.py"}, "target") == "a.py"
+
+
+def test__QuerySession__param__raises_query_error_when_missing_or_empty() -> None:
+    """Raises QueryError when the parameter is missing, empty or not a string (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        query = session(Path(tmpdir))
+        requests: list[dict[str, Any]] = [{}, {"target": ""}, {"target": 1}]
+        for request in requests:
+            with pytest.raises(QueryError, match="Missing parameter: target"):
+                query.param(request, "target")
+
+
+def test__QuerySession__target__parses_identifier() -> None:
+    """Parses the target parameter into an identifier."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        identifier = session(Path(tmpdir)).target({"target": "a.py::A::f"})
+        assert identifier.filepath == Path("a.py")
+        assert identifier.function_identifier == "A::f"
+
+
+def test__QuerySession__target__raises_query_error_for_invalid_identifier() -> None:
+    """Raises QueryError when the target is not a valid identifier."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with pytest.raises(QueryError, match="Invalid identifier"):
+            session(Path(tmpdir)).target({"target": "not-an-identifier"})
+
+
+def test__QuerySession__report__returns_file_report_as_dict() -> None:
+    """Returns the report of the targeted file or function as a dict."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        result = session(Path(tmpdir)).report({"target": f"{source}::covered"})
+        assert result["filepath"] == str(source)
+        assert [f["identifier"] for f in result["functions"]] == ["covered"]
+        assert result["covered"] is True
+
+
+def test__QuerySession__report__raises_query_error_for_missing_file() -> None:
+    """Raises QueryError when the targeted file does not exist."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with pytest.raises(QueryError, match="Target not found"):
+            session(Path(tmpdir)).report({"target": f"{tmpdir}/missing.py"})
+
+
+def test__QuerySession__first__returns_first_uncovered_function_under_directory() -> None:
+    """Returns the first uncovered function under the given directory."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "pkg").mkdir()
+        source = write_project(root / "pkg")
+        (root / "other.py").write_text("def other():\n    pass\n")
+        result = session(root).first({"path": str(root / "pkg")})
+        assert result is not None
+        assert result["filepath"] == str(source)
+        assert result["identifier"] == "uncovered"
+
+
+def test__QuerySession__first__answers_file_from_cached_report_without_walk() -> None:
+    """Answers a file from the report kept by the project without walking the tree."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        query = session(Path(tmpdir))
+        query.report({"target": str(source)})
+        with patch.object(query.project, "candidates") as mock_candidates:
+            result = query.first({"path": str(source)})
+        mock_candidates.assert_not_called()
+        assert result is not None
+        assert result["identifier"] == "uncovered"
+        assert list(query.project.reports) == [source]
+
+
+def test__QuerySession__first__returns_none_for_ignored_file() -> None:
+    """Returns None for a file the project filters out (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_project(Path(tmpdir))
+        query = session(Path(tmpdir))
+        assert query.first({"path": str(Path(tmpdir) / "module_test.py")}) is None
+
+
+def test__QuerySession__first__returns_none_when_file_is_covered() -> None:
+    """Returns None when every function in the given file is covered."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "empty.py").write_text("X = 1\n")
+        assert session(root).first({"path": str(root / "empty.py")}) is None
+
+
+def test__QuerySession__first__raises_query_error_for_missing_path() -> None:
+    """Raises QueryError when the given path does not exist."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with pytest.raises(QueryError, match="Path not found"):
+            session(Path(tmpdir)).first({"path": f"{tmpdir}/missing"})
+
+
+def test__QuerySession__create__creates_spec_and_refreshes_report() -> None:
+    """Creates the spec of the targeted function and drops the cached report of its file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        query = session(Path(tmpdir))
+        query.report({"target": str(source)})
+        result = query.create({"target": f"{source}::uncovered"})
+        assert result == {"created": True, "specpath": str(Path(tmpdir) / "module_spec.json")}
+        report = query.report({"target": f"{source}::uncovered"})
+        assert len(report["functions"][0]["scenarios"]) == 3
+
+
+def test__QuerySession__create__does_nothing_when_spec_exists() -> None:
+    """Does not change the spec when the function already has a spec entry."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        before = (Path(tmpdir) / "module_spec.json").read_text()
+        result = session(Path(tmpdir)).create({"target": f"{source}::covered"})
+        assert result["created"] is False
+        assert (Path(tmpdir) / "module_spec.json").read_text() == before
+
+
+def test__QuerySession__create__raises_query_error_without_function() -> None:
+    """Raises QueryError when the target is a file or names a function that does not exist."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        query = session(Path(tmpdir))
+        with pytest.raises(QueryError, match="requires a function target"):
+            query.create({"target": str(source)})
+        with pytest.raises(QueryError, match="Function not found"):
+            query.create({"target": f"{source}::missing"})
+
+
+def test__QuerySession__refresh__invalidates_reports_of_changed_files() -> None:
+    """Drops the reports that depend on the given paths."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        query = session(Path(tmpdir))
+        query.report({"target": str(source)})
+        assert query.refresh({"paths": [str(Path(tmpdir) / "module_test.py")]}) == {
+            "invalidated": 1
+        }
+
+
+def test__QuerySession__refresh__raises_query_error_without_paths() -> None:
+    """Raises QueryError when paths is not a list of strings."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with pytest.raises(QueryError, match="Missing parameter: paths"):
+            session(Path(tmpdir)).refresh({"paths": "a.py"})
+
+
+@pytest.mark.parametrize(
+    ("line", "error"),
+    [
+        ("not json", "Invalid JSON"),
+        ("[1]", "Request must be a JSON object"),
+        ('{"id": 7, "method": "nope"}', "Unknown method: nope"),
+        ('{"id": 7, "method": "report"}', "Missing parameter: target"),
+    ],
+)
+def test__QuerySession__handle__returns_error_response_for_bad_request(
+    line: str, error: str
+) -> None:
+    """Returns an error response instead of raising for malformed or failing requests."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        response = session(Path(tmpdir)).handle(line)
+        assert "result" not in response
+        assert response["error"].startswith(error)
+
+
+def test__QuerySession__handle__echoes_id_with_result() -> None:
+    """Returns the result together with the id of the request."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        response = session(Path(tmpdir)).handle(
+            json.dumps({"id": "a", "method": "report", "target": str(source)})
+        )
+        assert response["id"] == "a"
+        assert response["result"]["filepath"] == str(source)
+
+
+def test__QuerySession__serve__writes_one_response_per_request() -> None:
+    """Writes one NDJSON response per non-blank request line, in order, reusing the project."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        query = session(Path(tmpdir))
+        requests: list[dict[str, Any]] = [
+            {"id": 1, "method": "report", "target": f"{source}::covered"},
+            {"id": 2, "method": "report", "target": f"{source}::uncovered"},
+        ]
+        lines = [json.dumps(request) + "\n" for request in requests]
+        output = StringIO()
+        assert query.serve([lines[0], "\n", lines[1]], output) == 2
+        responses = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert [response["id"] for response in responses] == [1, 2]
+        assert list(query.project.reports) == [source]
+
+
+def test__QuerySession__serve__flushes_cache_after_each_request() -> None:
+    """Writes the cache changes of every request before answering it."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        source = write_project(Path(tmpdir))
+        with CacheStore(Path(tmpdir) / "cache", 1024 * 1024) as cache:
+            query = QuerySession(Project(Path(tmpdir), cache, workers=1))
+            request = json.dumps({"id": 1, "method": "report", "target": str(source)})
+            with patch.object(cache, "flush", wraps=cache.flush) as mock_flush:
+                assert query.serve([request, request], StringIO()) == 2
+            assert mock_flush.call_count == 2
+            assert cache.accessed == set()
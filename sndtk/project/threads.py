@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import os
+import sys
+
+
+def gil_enabled() -> bool:
+    """
+    実行中のインタープリターでGILが有効かどうかを返す
+
+    Returns:
+        bool: GILが有効な場合True (フリースレッド版でないビルドを含む)
+    """
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    if is_gil_enabled is None:
+        return True
+    return bool(is_gil_enabled())
+
+
+def default_workers() -> int:
+    """
+    レポート生成に用いるスレッド数の既定値を返す
+
+    GILが有効な場合はスレッドで解析しても並列にならないため逐次実行とする
+
+    Returns:
+        int: スレッド数 (1の場合は逐次実行)
+    """
+    if gil_enabled():
+        return 1
+    return os.cpu_count() or 1
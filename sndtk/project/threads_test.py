@@ -0,0 +1,36 @@
+"""Tests for thread-parallel execution defaults."""
+
+import sys
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from sndtk.project.threads import default_workers, gil_enabled
+
+
+def test__gil_enabled__returns_interpreter_gil_status() -> None:
+    """Returns the status reported by sys._is_gil_enabled."""
+    with patch.object(sys, "_is_gil_enabled", return_value=False, create=True):
+        assert gil_enabled() is False
+    with patch.object(sys, "_is_gil_enabled", return_value=True, create=True):
+        assert gil_enabled() is True
+
+
+def test__gil_enabled__returns_true_when_interpreter_has_no_free_threading() -> None:
+    """Returns True on interpreters without sys._is_gil_enabled (boundary value)."""
+    with patch("sndtk.project.threads.sys", new=SimpleNamespace()):
+        assert gil_enabled() is True
+
+
+def test__default_workers__returns_one_when_gil_is_enabled() -> None:
+    """Returns one worker (serial execution) when the GIL is enabled."""
+    with patch("sndtk.project.threads.gil_enabled", return_value=True):
+        assert default_workers() == 1
+
+
+def test__default_workers__returns_cpu_count_when_gil_is_disabled() -> None:
+    """Returns the CPU count when running on a free-threaded build with the GIL disabled."""
+    with (
+        patch("sndtk.project.threads.gil_enabled", return_value=False),
+        patch("sndtk.project.threads.os.cpu_count", return_value=6),
+    ):
+        assert default_workers() == 6
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Generator
+from os import listdir
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def walk(path: Path, enter: Callable[[Path], bool] | None = None) -> Generator[Path]:
+    for item in listdir(path):
+        item_path = path / item
+        if item_path.is_dir():
+            if enter is not None and not enter(item_path):
+                logger.debug(f"Pruning directory: {item_path}")
+                continue
+            logger.debug(f"Entering directory: {item_path}")
+            yield from walk(item_path, enter)
+        else:
+            logger.debug(f"Found file: {item_path}")
+            yield item_path
@@ -0,0 +1,81 @@
+"""Tests for walk."""
+
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from sndtk.project.walk import walk
+
+
+def test__walk__yields_no_paths_when_directory_is_empty() -> None:
+    """Yields no paths when directory is empty (boundary value)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        results = list(walk(path))
+        assert len(results) == 0
+
+
+def test__walk__yields_files_when_directory_contains_only_files() -> None:
+    """Yields files correctly when directory contains only files."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        file1 = path / "file1.txt"
+        file2 = path / "file2.txt"
+        file1.touch()
+        file2.touch()
+        results = list(walk(path))
+        assert len(results) == 2
+        assert file1 in results
+        assert file2 in results
+
+
+def test__walk__yields_files_from_nested_directories() -> None:
+    """Yields files correctly from nested directories."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        subdir = path / "subdir"
+        subdir.mkdir()
+        file1 = path / "file1.txt"
+        file2 = subdir / "file2.txt"
+        file1.touch()
+        file2.touch()
+        results = list(walk(path))
+        assert len(results) == 2
+        assert file1 in results
+        assert file2 in results
+
+
+def test__walk__yields_files_from_mixed_structure() -> None:
+    """Yields files correctly from mixed file and directory structure."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        file1 = path / "file1.txt"
+        subdir1 = path / "subdir1"
+        subdir1.mkdir()
+        file2 = subdir1 / "file2.txt"
+        subdir2 = subdir1 / "subdir2"
+        subdir2.mkdir()
+        file3 = subdir2 / "file3.txt"
+        file1.touch()
+        file2.touch()
+        file3.touch()
+        results = list(walk(path))
+        assert len(results) == 3
+        assert file1 in results
+        assert file2 in results
+        assert file3 in results
+
+
+def test__walk__does_not_enter_directories_rejected_by_enter() -> None:
+    """Does not list directories for which enter returns False."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir)
+        (path / "keep").mkdir()
+        (path / "skip").mkdir()
+        (path / "keep" / "a.py").touch()
+        (path / "skip" / "b.py").touch()
+        with patch("sndtk.project.walk.listdir", wraps=os.listdir) as listdir:
+            results = list(walk(path, lambda directory: directory.name != "skip"))
+        assert results == [path / "keep" / "a.py"]
+        assert path / "skip" not in [call.args[0] for call in listdir.call_args_list]
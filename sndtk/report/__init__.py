@@ -1,5 +1,22 @@
 from .file import FileReport
-from .function import FunctionReport
+from .function import FunctionReport, LazyFunctionReports
+from .gate import CoverageGate, Threshold
+from .migration import Migration, MigrationPlan
 from .scenario import ScenarioReport
+from .snapshot import Snapshot, SnapshotDiff
+from .summary import CoverageCounts, TreeSummary
 
-__all__ = ["FileReport", "FunctionReport", "ScenarioReport"]
+__all__ = [
+    "CoverageCounts",
+    "CoverageGate",
+    "FileReport",
+    "FunctionReport",
+    "LazyFunctionReports",
+    "Migration",
+    "MigrationPlan",
+    "ScenarioReport",
+    "Snapshot",
+    "SnapshotDiff",
+    "Threshold",
+    "TreeSummary",
+]
@@ -1,14 +1,23 @@
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass
+from collections.abc import Sequence
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
+from sndtk.parsers.index import SymbolIndex
 from sndtk.parsers.python import PythonParser
-from sndtk.spec import FileSpec
+from sndtk.parsers.types import Function
+from sndtk.spec.paths import spec_path_for
 from sndtk.spec.types import Identifier
 
-from .function import FunctionReport
+from .function import FunctionReport, LazyFunctionReports
+
+if TYPE_CHECKING:
+    from sndtk.filters import SelectFilter
+    from sndtk.git import GitTree
+    from sndtk.spec import FileSpec, FunctionSpec
 
 logger = logging.getLogger(__name__)
 
@@ -17,33 +26,149 @@ logger = logging.getLogger(__name__)
 class FileReport:
     filepath: Path
     filespec: FileSpec | None
-    functions: list[FunctionReport]
+    functions: Sequence[FunctionReport]
+    stale: list[FunctionSpec] = field(default_factory=list)
+    orphaned: bool = False
+    skipped: str | None = None
+    unevaluated: str | None = None
 
     @classmethod
-    def generate(cls, filepath: Path, identifier: Identifier | None) -> FileReport:
+    def generate(
+        cls,
+        filepath: Path,
+        identifier: Identifier | None,
+        parser: PythonParser | None = None,
+        index: SymbolIndex | None = None,
+        functions: list[Function] | None = None,
+        lazy: bool = False,
+        select: SelectFilter | None = None,
+        tree: GitTree | None = None,
+    ) -> FileReport:
+        """
+        ソースファイルのレポートを生成する
+
+        Args:
+            filepath: ソースファイルのパス
+            identifier: 関数を指定する識別子
+            parser: 解析に用いるパーサー
+            index: テストファイルの索引
+            functions: 解析済みの関数 (Noneの場合はファイルを解析する)
+            lazy: Trueの場合、関数のレポートを参照されたときに生成する
+            select: 指定した場合、パターンに一致する関数だけをレポートに含める
+            tree: 指定した場合、スペックファイルをコミットのツリーから読み込む
+
+        Returns:
+            FileReport: ファイルのレポート
+        """
         logger.debug(f"Generating report for {filepath}")
-        parser = PythonParser()
-        functions = list(parser.parse(filepath))
-        logger.debug(f"Parsed {len(functions)} functions from {filepath}")
+        parser = parser or PythonParser()
+        index = index or SymbolIndex(parser)
+        if functions is None:
+            functions = list(parser.parse(filepath))
+            logger.debug(f"Parsed {len(functions)} functions from {filepath}")
 
-        try:
-            filespec = FileSpec.load(filepath)
+        filespec: FileSpec | None = None
+        spec_path = spec_path_for(filepath)
+        has_spec = tree.is_file(spec_path) if tree is not None else spec_path.exists()
+        if has_spec:
+            # スペックモデル (pydantic) はスペックファイルがある場合のみ読み込む
+            from sndtk.spec import FileSpec
+
+            filespec = FileSpec.load(filepath, tree)
             logger.debug(f"Loaded spec file for {filepath}")
-        except FileNotFoundError:
+        else:
             logger.debug(f"No spec file found for {filepath}")
-            filespec = None
+
+        parsed = {function.identifier for function in functions}
+        stale = [f for f in filespec.functions if f.identifier not in parsed] if filespec else []
+        if stale:
+            logger.debug(f"Found {len(stale)} stale spec entries for {filepath}")
 
         spec_dict = {f.identifier: f for f in filespec.functions} if filespec else {}
         file_testpath = filespec.testpath if filespec and filespec.testpath else None
-        function_reports = [
-            FunctionReport.generate(function, spec_dict, file_testpath)
+        selected = [
+            function
             for function in functions
             if identifier is None
             or identifier.function_identifier == ""
             or function.identifier == identifier.function_identifier
         ]
-        logger.debug(f"Generated {len(function_reports)} function reports")
-        return FileReport(filepath=filepath, filespec=filespec, functions=function_reports)
+        if select is not None:
+            # シナリオを検証する前に、選択されなかった関数を除外する
+            selected = [
+                function
+                for function in selected
+                if select.matches_function(filepath, function.identifier)
+            ]
+        function_reports: Sequence[FunctionReport]
+        if lazy:
+            function_reports = LazyFunctionReports(selected, spec_dict, file_testpath, index)
+            logger.debug(f"Deferred {len(function_reports)} function reports")
+        else:
+            function_reports = [
+                FunctionReport.generate(function, spec_dict, file_testpath, index)
+                for function in selected
+            ]
+            logger.debug(f"Generated {len(function_reports)} function reports")
+        return FileReport(
+            filepath=filepath, filespec=filespec, functions=function_reports, stale=stale
+        )
+
+    @classmethod
+    def generate_orphan(cls, filepath: Path, tree: GitTree | None = None) -> FileReport:
+        """
+        ソースファイルが存在しないスペックファイルのレポートを生成する
+
+        Args:
+            filepath: 削除されたソースファイルのパス
+            tree: 指定した場合、スペックファイルをコミットのツリーから読み込む
+
+        Returns:
+            FileReport: 全てのスペックエントリを古いものとして含むレポート
+        """
+        logger.debug(f"Generating orphan report for {filepath}")
+        from sndtk.spec import FileSpec
+
+        filespec = FileSpec.load(filepath, tree)
+        return FileReport(
+            filepath=filepath,
+            filespec=filespec,
+            functions=[],
+            stale=list(filespec.functions),
+            orphaned=True,
+        )
+
+    @classmethod
+    def generate_skipped(cls, filepath: Path, reason: str) -> FileReport:
+        """
+        解析せずにスキップしたファイルのレポートを生成する
+
+        スペックファイルは読み込まないため、既存のエントリが古いものとして扱われることはない
+
+        Args:
+            filepath: スキップしたソースファイルのパス
+            reason: スキップした理由
+
+        Returns:
+            FileReport: 関数を含まないレポート
+        """
+        logger.debug(f"Skipping {filepath}: {reason}")
+        return FileReport(filepath=filepath, filespec=None, functions=[], skipped=reason)
+
+    @classmethod
+    def generate_unevaluated(cls, filepath: Path, reason: str) -> FileReport:
+        """
+        時間切れにより評価できなかったファイルのレポートを生成する
+
+        Args:
+            filepath: 評価できなかったソースファイルのパス
+            reason: 評価できなかった理由
+
+        Returns:
+            FileReport: 関数を含まないレポート
+        """
+        logger.debug(f"Not evaluated {filepath}: {reason}")
+        return FileReport(filepath=filepath, filespec=None, functions=[], unevaluated=reason)
 
     def get_first_uncovered_function(self) -> FunctionReport | None:
         if len(self.functions) == 0:
@@ -66,7 +191,66 @@ class FileReport:
             ]
         )
 
+    def changed_functions(self) -> list[FunctionReport]:
+        """
+        スペック作成後に実装が変更された、カバー済みの関数を返す
+
+        Returns:
+            list[FunctionReport]: 実装が変更された関数のレポート
+        """
+        return [function for function in self.functions if function.covered and function.changed]
+
+    def format_changed(self) -> str:
+        """
+        実装が変更された関数の一覧を整形する
+
+        Returns:
+            str: 整形されたレポート、変更された関数がない場合は空文字列
+        """
+        changed = self.changed_functions()
+        if len(changed) == 0:
+            return ""
+        entries = "\n".join([f"  ✏️ {function.function.identifier}" for function in changed])
+        return f"✏️ {self.filepath}:\n{entries}"
+
+    def format_stale(self) -> str:
+        """
+        古いスペックエントリの一覧を整形する
+
+        Returns:
+            str: 整形されたレポート、古いエントリがない場合は空文字列
+        """
+        if self.orphaned:
+            return f"🗑️ {spec_path_for(self.filepath)}: Source file not found: {self.filepath}"
+        if len(self.stale) == 0:
+            return ""
+        entries = "\n".join([f"  🗑️ {function.identifier}" for function in self.stale])
+        return f"🗑️ {spec_path_for(self.filepath)}:\n{entries}"
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        JSONに変換できる辞書を返す。遅延評価のレポートは全ての関数を評価する
+
+        Returns:
+            dict[str, Any]: ファイルのパスとカバー状況、関数ごとのレポート、古いスペックエントリ
+        """
+        return {
+            "filepath": str(self.filepath),
+            "covered": self.covered,
+            "functions": [function.to_dict() for function in self.functions],
+            "stale": [function.identifier for function in self.stale],
+            "orphaned": self.orphaned,
+            "skipped": self.skipped,
+            "unevaluated": self.unevaluated,
+        }
+
     def __str__(self) -> str:
+        if self.skipped is not None:
+            return f"⏭️ {self.filepath}: {self.skipped}"
+
+        if self.unevaluated is not None:
+            return f"⏸️ {self.filepath}: Not evaluated: {self.unevaluated}"
+
         if len(self.functions) == 0:
             return f"🪽 {self.filepath}"
 
@@ -1,12 +1,21 @@
 """Tests for FileReport."""
 
+import json
+import subprocess
+import sys
 import tempfile
 from pathlib import Path
+from unittest.mock import MagicMock
 
+import pytest
+
+from sndtk.git import GitTree
 from sndtk.parsers.types import Function
 from sndtk.report.file import FileReport
-from sndtk.report.function import FunctionReport
+from sndtk.report.function import FunctionReport, LazyFunctionReports
 from sndtk.report.scenario import ScenarioReport
+from sndtk.spec import FunctionSpec
+from sndtk.spec.paths import spec_path_for
 from sndtk.spec.types import Identifier
 
 
@@ -61,6 +70,24 @@ def test__FileReport__generate__generates_report_without_spec_file() -> None:
         assert len(report.functions[0].scenarios) == 0
 
 
+def test__FileReport__generate__does_not_import_pydantic_without_spec_file() -> None:
+    """Does not import the spec models when the file has no spec file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "test.py"
+        filepath.write_text("def test_function():\n    pass\n")
+        code = (
+            "import sys\n"
+            "from pathlib import Path\n"
+            "from sndtk.report.file import FileReport\n"
+            f"report = FileReport.generate(Path({str(filepath)!r}), None)\n"
+            "print(len(report.functions), 'pydantic' in sys.modules)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == "1 False"
+
+
 def test__FileReport__generate__generates_report_with_empty_file() -> None:
     """Generates report correctly with empty file (boundary value)."""
     with tempfile.TemporaryDirectory() as tmpdir:
@@ -484,3 +511,266 @@ def test__FileReport____str____returns_cross_with_reports_when_uncovered() -> No
     result = str(report)
     assert result.startswith(f"❌ {filepath}:")
     assert "function1" in result or "function2" in result
+
+
+def write_spec(filepath: Path, identifiers: list[str]) -> None:
+    spec = {
+        "filepath": str(filepath),
+        "testpath": str(filepath.with_name(filepath.stem + "_test.py")),
+        "functions": [{"identifier": identifier, "scenarios": []} for identifier in identifiers],
+    }
+    spec_path_for(filepath).write_text(json.dumps(spec))
+
+
+def test__FileReport__generate__collects_stale_spec_entries() -> None:
+    """Collects spec entries whose function no longer exists in the source."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "test.py"
+        filepath.write_text("def kept():\n    pass\n")
+        write_spec(filepath, ["kept", "removed", "Class::method"])
+        report = FileReport.generate(filepath, None)
+        assert [function.identifier for function in report.stale] == ["removed", "Class::method"]
+        assert report.orphaned is False
+
+
+def test__FileReport__generate__collects_stale_entries_regardless_of_identifier() -> None:
+    """Collects stale entries against all parsed functions even when a function is targeted."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "test.py"
+        filepath.write_text("def f1():\n    pass\n\ndef f2():\n    pass\n")
+        write_spec(filepath, ["f1", "f2"])
+        identifier = Identifier(filepath=filepath, function_identifier="f1")
+        report = FileReport.generate(filepath, identifier)
+        assert report.stale == []
+
+
+def test__FileReport__generate_orphan__marks_all_entries_stale() -> None:
+    """Marks every spec entry as stale and the report as orphaned."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "deleted.py"
+        write_spec(filepath, ["f1", "f2"])
+        report = FileReport.generate_orphan(filepath)
+        assert report.orphaned is True
+        assert report.functions == []
+        assert [function.identifier for function in report.stale] == ["f1", "f2"]
+
+
+def test__FileReport__generate_orphan__raises_file_not_found_error_without_spec() -> None:
+    """Raises FileNotFoundError when the spec file does not exist."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with pytest.raises(FileNotFoundError):
+            FileReport.generate_orphan(Path(tmpdir) / "deleted.py")
+
+
+def test__FileReport__format_stale__returns_empty_string_without_stale_entries() -> None:
+    """Returns an empty string when there are no stale entries (boundary value)."""
+    report = FileReport(filepath=Path("test.py"), filespec=None, functions=[])
+    assert report.format_stale() == ""
+
+
+def test__FileReport__format_stale__lists_stale_entries() -> None:
+    """Lists stale entries under the spec file path."""
+    report = FileReport(
+        filepath=Path("pkg/test.py"),
+        filespec=None,
+        functions=[],
+        stale=[FunctionSpec(identifier="old", scenarios=[])],
+    )
+    assert report.format_stale() == "🗑️ pkg/test_spec.json:\n  🗑️ old"
+
+
+def test__FileReport__format_stale__reports_orphaned_spec_file() -> None:
+    """Reports the missing source file for an orphaned spec file."""
+    report = FileReport(
+        filepath=Path("pkg/test.py"),
+        filespec=None,
+        functions=[],
+        stale=[FunctionSpec(identifier="old", scenarios=[])],
+        orphaned=True,
+    )
+    assert report.format_stale() == "🗑️ pkg/test_spec.json: Source file not found: pkg/test.py"
+
+
+def make_function_report(identifier: str, *, covered: bool, changed: bool) -> FunctionReport:
+    return FunctionReport(
+        function=Function(
+            filepath=Path("test.py"), name=identifier, line=1, column=0, identifier=identifier
+        ),
+        scenarios=[ScenarioReport(testname="test", reason=None if covered else "missing")],
+        changed=changed,
+    )
+
+
+def test__FileReport__changed_functions__returns_covered_changed_functions() -> None:
+    """Returns only covered functions whose implementation changed."""
+    report = FileReport(
+        filepath=Path("test.py"),
+        filespec=None,
+        functions=[
+            make_function_report("changed", covered=True, changed=True),
+            make_function_report("uncovered", covered=False, changed=True),
+            make_function_report("unchanged", covered=True, changed=False),
+        ],
+    )
+    assert [f.function.identifier for f in report.changed_functions()] == ["changed"]
+
+
+def test__FileReport__changed_functions__returns_empty_list_when_empty() -> None:
+    """Returns an empty list when there are no functions (boundary value)."""
+    report = FileReport(filepath=Path("test.py"), filespec=None, functions=[])
+    assert report.changed_functions() == []
+
+
+def test__FileReport__format_changed__lists_changed_functions() -> None:
+    """Lists changed functions under the file path."""
+    report = FileReport(
+        filepath=Path("test.py"),
+        filespec=None,
+        functions=[make_function_report("f", covered=True, changed=True)],
+    )
+    assert report.format_changed() == "✏️ test.py:\n  ✏️ f"
+
+
+def test__FileReport__format_changed__returns_empty_string_without_changes() -> None:
+    """Returns an empty string when no function changed (boundary value)."""
+    report = FileReport(
+        filepath=Path("test.py"),
+        filespec=None,
+        functions=[make_function_report("f", covered=True, changed=False)],
+    )
+    assert report.format_changed() == ""
+
+
+def test__FileReport__generate__uses_given_functions_without_parsing() -> None:
+    """Uses already parsed functions without parsing the source file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "test.py"
+        functions = [Function(filepath=filepath, name="f", line=1, column=0, identifier="f")]
+        report = FileReport.generate(filepath, None, functions=functions)
+        assert [f.function.identifier for f in report.functions] == ["f"]
+
+
+def test__FileReport__generate_skipped__creates_report_without_functions_or_spec() -> None:
+    """Creates a covered report with the skip reason and without reading the spec file."""
+    report = FileReport.generate_skipped(Path("pb/large_pb2.py"), "Generated file: @generated")
+    assert report.skipped == "Generated file: @generated"
+    assert report.filespec is None
+    assert report.functions == []
+    assert report.stale == []
+    assert report.covered is True
+
+
+def test__FileReport____str____returns_skip_reason_when_skipped() -> None:
+    """Returns the skip emoji with the reason when the file was skipped."""
+    report = FileReport.generate_skipped(Path("large.py"), "File too large")
+    assert str(report) == "⏭️ large.py: File too large"
+
+
+def test__FileReport__generate_unevaluated__creates_report_without_functions() -> None:
+    """Creates a report with the reason and without functions or spec."""
+    report = FileReport.generate_unevaluated(Path("slow.py"), "time budget exhausted")
+    assert report.unevaluated == "time budget exhausted"
+    assert report.skipped is None
+    assert report.filespec is None
+    assert report.functions == []
+
+
+def test__FileReport____str____returns_pause_when_not_evaluated() -> None:
+    """Returns the pause emoji with the reason when the file was not evaluated."""
+    report = FileReport.generate_unevaluated(Path("slow.py"), "time budget exhausted")
+    assert str(report) == "⏸️ slow.py: Not evaluated: time budget exhausted"
+
+
+def test__FileReport__generate__defers_function_reports_when_lazy() -> None:
+    """Defers generating the function reports until they are accessed when lazy."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "test.py"
+        functions = [
+            Function(filepath=filepath, name=name, line=1, column=0, identifier=name)
+            for name in ["f", "g"]
+        ]
+        report = FileReport.generate(filepath, None, functions=functions, lazy=True)
+        assert isinstance(report.functions, LazyFunctionReports)
+        assert report.functions.evaluated == 0
+        assert [f.function.identifier for f in report.functions] == ["f", "g"]
+
+
+def test__FileReport__get_first_uncovered_function__stops_at_first_uncovered_when_lazy() -> None:
+    """Does not generate the reports of functions after the first uncovered one when lazy."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "test.py"
+        functions = [
+            Function(filepath=filepath, name=name, line=1, column=0, identifier=name)
+            for name in ["f", "g", "h"]
+        ]
+        report = FileReport.generate(filepath, None, functions=functions, lazy=True)
+        function_report = report.get_first_uncovered_function()
+        assert function_report is not None
+        assert function_report.function.identifier == "f"
+        assert isinstance(report.functions, LazyFunctionReports)
+        assert report.functions.evaluated == 1
+
+
+def test__FileReport__generate__keeps_only_selected_functions() -> None:
+    """Keeps only the functions matching the select patterns, before verifying any scenario."""
+    from sndtk.filters import SelectFilter
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "service.py"
+        functions = [
+            Function(filepath=filepath, name=name, line=1, column=0, identifier=f"Service::{name}")
+            for name in ["handle_get", "close", "handle_put"]
+        ]
+        select = SelectFilter(["*.py::Service::handle_*"], Path(tmpdir))
+        report = FileReport.generate(filepath, None, functions=functions, select=select)
+        assert [f.function.identifier for f in report.functions] == [
+            "Service::handle_get",
+            "Service::handle_put",
+        ]
+
+
+def test__FileReport__to_dict__returns_json_serializable_report() -> None:
+    """Returns a JSON-serializable dict with the functions and stale spec entries."""
+    report = FileReport(
+        filepath=Path("a.py"),
+        filespec=None,
+        functions=[make_function_report("f", covered=False, changed=False)],
+        stale=[FunctionSpec(testpath=None, identifier="gone", scenarios=[])],
+    )
+    result = report.to_dict()
+    assert json.loads(json.dumps(result)) == result
+    assert result["filepath"] == "a.py"
+    assert result["covered"] is False
+    assert [f["identifier"] for f in result["functions"]] == ["f"]
+    assert result["stale"] == ["gone"]
+    assert result["skipped"] is None
+
+
+def make_spec_tree(filepath: Path, identifiers: list[str]) -> MagicMock:
+    """Make a stand-in for GitTree holding only the spec file of the source."""
+    spec = {
+        "filepath": str(filepath),
+        "testpath": str(filepath.with_name(filepath.stem + "_test.py")),
+        "functions": [{"identifier": identifier, "scenarios": []} for identifier in identifiers],
+    }
+    tree = MagicMock(spec=GitTree)
+    tree.is_file.side_effect = lambda path: path == spec_path_for(filepath)
+    tree.read_bytes.return_value = json.dumps(spec).encode()
+    return tree
+
+
+def test__FileReport__generate__reads_spec_from_git_tree() -> None:
+    """Looks up and loads the spec file in the git tree instead of the working tree."""
+    filepath = Path("missing.py")
+    function = Function(filepath=filepath, name="f", line=1, column=0, identifier="f")
+    tree = make_spec_tree(filepath, ["f", "gone"])
+    report = FileReport.generate(filepath, None, functions=[function], tree=tree)
+    assert report.filespec is not None
+    assert [spec.identifier for spec in report.stale] == ["gone"]
+
+
+def test__FileReport__generate_orphan__reads_spec_from_git_tree() -> None:
+    """Loads the orphaned spec file from the git tree when one is given."""
+    tree = make_spec_tree(Path("deleted.py"), ["f"])
+    report = FileReport.generate_orphan(Path("deleted.py"), tree)
+    assert [spec.identifier for spec in report.stale] == ["f"]
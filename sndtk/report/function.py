@@ -1,18 +1,25 @@
 from __future__ import annotations
 
+import threading
+from collections.abc import Sequence
 from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, overload
 
+from sndtk.parsers.index import SymbolIndex
 from sndtk.parsers.types import Function
-from sndtk.spec import FunctionSpec
 
 from .scenario import ScenarioReport
 
+if TYPE_CHECKING:
+    from sndtk.spec import FunctionSpec
+
 
 @dataclass
 class FunctionReport:
     function: Function
     scenarios: list[ScenarioReport]
+    changed: bool = False
 
     @classmethod
     def generate(
@@ -20,18 +27,25 @@ class FunctionReport:
         function: Function,
         spec_dict: dict[str, FunctionSpec],
         file_testpath: Path | None,
+        index: SymbolIndex | None = None,
     ) -> FunctionReport:
         function_spec = spec_dict.get(function.identifier)
         if function_spec is None:
             return FunctionReport(function=function, scenarios=[])
+        changed = (
+            function_spec.fingerprint is not None
+            and function.fingerprint != ""
+            and function_spec.fingerprint != function.fingerprint
+        )
         function_testpath = function_spec.testpath or file_testpath
         if function_testpath is None:
-            return FunctionReport(function=function, scenarios=[])
+            return FunctionReport(function=function, scenarios=[], changed=changed)
+        index = index or SymbolIndex()
         scenarios = [
-            ScenarioReport.generate(scenario, function_testpath)
+            ScenarioReport.generate(scenario, function_testpath, index)
             for scenario in function_spec.scenarios
         ]
-        return FunctionReport(function=function, scenarios=scenarios)
+        return FunctionReport(function=function, scenarios=scenarios, changed=changed)
 
     @property
     def covered(self) -> bool:
@@ -39,6 +53,22 @@ class FunctionReport:
             return False
         return all(scenario.reason is None for scenario in self.scenarios)
 
+    def to_dict(self) -> dict[str, Any]:
+        """
+        JSONに変換できる辞書を返す
+
+        Returns:
+            dict[str, Any]: 関数の識別子と位置、カバー状況、シナリオごとのレポート
+        """
+        return {
+            "identifier": self.function.identifier,
+            "line": self.function.line,
+            "column": self.function.column,
+            "covered": self.covered,
+            "changed": self.changed,
+            "scenarios": [scenario.to_dict() for scenario in self.scenarios],
+        }
+
     def __str__(self) -> str:
         total = len(self.scenarios)
         if total == 0:
@@ -50,3 +80,96 @@ class FunctionReport:
 
         scenario_report = "\n".join([f"    {scenario}" for scenario in self.scenarios])
         return f"❌ {self.function.identifier} ({covered / total:.2%}):\n{scenario_report}"
+
+
+class LazyFunctionReports(Sequence[FunctionReport]):
+    """
+    要求されたときに初めて関数のレポートを生成する列
+
+    シナリオの検証は要素を参照したときに行い、結果を保持する。
+    先頭から走査して途中で止めれば、残りの関数のシナリオは検証しない
+    """
+
+    def __init__(
+        self,
+        functions: list[Function],
+        spec_dict: dict[str, FunctionSpec],
+        file_testpath: Path | None,
+        index: SymbolIndex,
+    ) -> None:
+        """
+        Args:
+            functions: レポートを生成する関数
+            spec_dict: 識別子から関数スペックへの辞書
+            file_testpath: ファイル全体のテストファイルのパス
+            index: テストファイルの索引
+        """
+        self.functions = functions
+        self.spec_dict = spec_dict
+        self.file_testpath = file_testpath
+        self.symbol_index = index
+        self.reports: list[FunctionReport | None] = [None] * len(functions)
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.functions)
+
+    @overload
+    def __getitem__(self, position: int) -> FunctionReport: ...
+
+    @overload
+    def __getitem__(self, position: slice) -> list[FunctionReport]: ...
+
+    def __getitem__(self, position: int | slice) -> FunctionReport | list[FunctionReport]:
+        if isinstance(position, slice):
+            return [self[i] for i in range(len(self))[position]]
+        # 同じファイルのレポートを複数のスレッドが参照しても、各関数は一度だけ検証する
+        with self.lock:
+            report = self.reports[position]
+            if report is None:
+                report = FunctionReport.generate(
+                    self.functions[position], self.spec_dict, self.file_testpath, self.symbol_index
+                )
+                self.reports[position] = report
+        return report
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return list(self) == list(other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"LazyFunctionReports({self.evaluated}/{len(self)} evaluated)"
+
+    @property
+    def evaluated(self) -> int:
+        """
+        レポートを生成済みの関数の数
+
+        Returns:
+            int: 生成済みの関数の数
+        """
+        return len([report for report in self.reports if report is not None])
+
+    def evaluate(self) -> None:
+        """全ての関数のレポートを生成する"""
+        for _ in self:
+            pass
+
+    def select(self, function_identifier: str) -> list[FunctionReport]:
+        """
+        識別子が一致する関数のレポートだけを生成して返す
+
+        Args:
+            function_identifier: 関数の識別子
+
+        Returns:
+            list[FunctionReport]: 一致した関数のレポート
+        """
+        return [
+            self[i]
+            for i, function in enumerate(self.functions)
+            if function.identifier == function_identifier
+        ]
@@ -1,10 +1,14 @@
 """Tests for FunctionReport."""
 
+import ast
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
 
+from sndtk.parsers.index import SymbolIndex
+from sndtk.parsers.python import search
 from sndtk.parsers.types import Function
-from sndtk.report.function import FunctionReport
+from sndtk.report.function import FunctionReport, LazyFunctionReports
 from sndtk.report.scenario import ScenarioReport
 from sndtk.spec.function import FunctionSpec
 from sndtk.spec.scenario import ScenarioSpec
@@ -228,3 +232,137 @@ def test__FunctionReport____str____returns_cross_with_percentage_when_some_uncov
     result = str(report)
     assert result.startswith("❌ test_function (50.00%):")
     assert "test1" in result or "test2" in result
+
+
+def test__FunctionReport__generate__marks_changed_when_fingerprint_differs() -> None:
+    """Marks the function as changed when the spec fingerprint differs from the current one."""
+    function = Function(
+        filepath=Path("test.py"), name="f", line=1, column=0, identifier="f", fingerprint="new"
+    )
+    spec_dict = {"f": FunctionSpec(identifier="f", fingerprint="old", scenarios=[])}
+    report = FunctionReport.generate(function, spec_dict, Path("test_test.py"))
+    assert report.changed is True
+
+
+def test__FunctionReport__generate__does_not_mark_changed_when_fingerprint_matches() -> None:
+    """Does not mark the function as changed when the fingerprints match."""
+    function = Function(
+        filepath=Path("test.py"), name="f", line=1, column=0, identifier="f", fingerprint="same"
+    )
+    spec_dict = {"f": FunctionSpec(identifier="f", fingerprint="same", scenarios=[])}
+    report = FunctionReport.generate(function, spec_dict, Path("test_test.py"))
+    assert report.changed is False
+
+
+def test__FunctionReport__generate__keeps_pinned_fingerprint_unchanged() -> None:
+    """Does not mark a parsed function as changed against a digest pinned across versions."""
+    source = "def f(a, *args, key=None, **kwargs):\n    return g(a, *args, key=key, **kwargs)\n"
+    (function,) = search(ast.parse(source), Path("test.py"))
+    spec_dict = {"f": FunctionSpec(identifier="f", fingerprint="e8d89b624f470ebb", scenarios=[])}
+    report = FunctionReport.generate(function, spec_dict, None)
+    assert report.changed is False
+
+
+def test__FunctionReport__generate__does_not_mark_changed_without_recorded_fingerprint() -> None:
+    """Does not mark the function as changed when the spec has no fingerprint (boundary value)."""
+    function = Function(
+        filepath=Path("test.py"), name="f", line=1, column=0, identifier="f", fingerprint="new"
+    )
+    spec_dict = {"f": FunctionSpec(identifier="f", scenarios=[])}
+    report = FunctionReport.generate(function, spec_dict, None)
+    assert report.changed is False
+
+
+def make_lazy_reports(identifiers: list[str]) -> LazyFunctionReports:
+    functions = [
+        Function(filepath=Path("test.py"), name=name, line=1, column=0, identifier=name)
+        for name in identifiers
+    ]
+    return LazyFunctionReports(functions, {}, None, SymbolIndex())
+
+
+def test__LazyFunctionReports____init____does_not_generate_reports() -> None:
+    """Does not generate any function report when created."""
+    reports = make_lazy_reports(["a", "b"])
+    assert reports.reports == [None, None]
+
+
+def test__LazyFunctionReports____len____returns_number_of_functions_without_generating() -> None:
+    """Returns the number of functions without generating their reports."""
+    reports = make_lazy_reports(["a", "b", "c"])
+    assert len(reports) == 3
+    assert reports.evaluated == 0
+
+
+def test__LazyFunctionReports____getitem____generates_report_once_on_access() -> None:
+    """Generates the report of the accessed function only, and reuses it on later access."""
+    reports = make_lazy_reports(["a", "b"])
+    with patch.object(FunctionReport, "generate", wraps=FunctionReport.generate) as generate:
+        first = reports[1]
+        assert reports[1] is first
+    assert generate.call_count == 1
+    assert first.function.identifier == "b"
+    assert reports.reports[0] is None
+
+
+def test__LazyFunctionReports____getitem____returns_list_for_slice() -> None:
+    """Returns a list of the reports in the slice."""
+    reports = make_lazy_reports(["a", "b", "c"])
+    assert [r.function.identifier for r in reports[1:]] == ["b", "c"]
+    assert reports.evaluated == 2
+
+
+def test__LazyFunctionReports____eq____equals_list_of_same_reports() -> None:
+    """Equals a list containing the same reports in the same order."""
+    reports = make_lazy_reports(["a"])
+    assert reports == [reports[0]]
+    assert reports != []
+
+
+def test__LazyFunctionReports____eq____returns_not_implemented_for_non_sequence() -> None:
+    """Returns NotImplemented when compared with an object that is not a sequence."""
+    assert make_lazy_reports([]).__eq__(None) is NotImplemented
+
+
+def test__LazyFunctionReports____repr____shows_evaluated_count() -> None:
+    """Shows how many of the function reports have been generated."""
+    reports = make_lazy_reports(["a", "b"])
+    reports[0]
+    assert repr(reports) == "LazyFunctionReports(1/2 evaluated)"
+
+
+def test__LazyFunctionReports__evaluated__counts_generated_reports() -> None:
+    """Counts the function reports generated so far."""
+    reports = make_lazy_reports(["a", "b", "c"])
+    reports[0]
+    reports[2]
+    assert reports.evaluated == 2
+
+
+def test__LazyFunctionReports__evaluate__generates_all_reports() -> None:
+    """Generates the reports of every function."""
+    reports = make_lazy_reports(["a", "b"])
+    reports.evaluate()
+    assert reports.evaluated == 2
+
+
+def test__LazyFunctionReports__select__generates_only_matching_reports() -> None:
+    """Returns and generates only the reports of functions with the given identifier."""
+    reports = make_lazy_reports(["a", "b", "a"])
+    selected = reports.select("a")
+    assert [r.function.identifier for r in selected] == ["a", "a"]
+    assert reports.reports[1] is None
+
+
+def test__FunctionReport__to_dict__returns_identifier_position_and_scenarios() -> None:
+    """Returns the identifier, position, coverage and scenario reports of the function."""
+    function = Function(filepath=Path("test.py"), name="f", line=3, column=4, identifier="A::f")
+    report = FunctionReport(function=function, scenarios=[ScenarioReport(testname="test_f")])
+    assert report.to_dict() == {
+        "identifier": "A::f",
+        "line": 3,
+        "column": 4,
+        "covered": True,
+        "changed": False,
+        "scenarios": [{"testname": "test_f", "covered": True, "reason": None}],
+    }
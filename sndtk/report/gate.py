@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .file import FileReport
+from .summary import CoverageCounts
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Threshold:
+    """ディレクトリの関数カバレッジの下限と、そのディレクトリのレポートの途中経過"""
+
+    directory: Path
+    minimum: float
+    counts: CoverageCounts = field(default_factory=CoverageCounts)
+    # まだレポートされていないファイルの関数の数の上限。Noneの場合は上限が分からない
+    remaining: int | None = None
+
+    def contains(self, relative: Path) -> bool:
+        """
+        ファイルがこのディレクトリの下にあるかどうかを判定する
+
+        Args:
+            relative: ルートからの相対パス
+
+        Returns:
+            bool: ディレクトリの下にある場合True
+        """
+        return relative.parts[: len(self.directory.parts)] == self.directory.parts
+
+    @property
+    def percent(self) -> float:
+        if self.counts.functions == 0:
+            return 100.0
+        return self.counts.covered * 100 / self.counts.functions
+
+    @property
+    def passed(self) -> bool:
+        return self.percent >= self.minimum
+
+    def outcome(self) -> bool | None:
+        """
+        残りのファイルの結果によらず合否が決まっているかどうかを判定する
+
+        Returns:
+            bool | None: 合格が確定した場合True、不合格が確定した場合False、未確定の場合None
+        """
+        covered, functions = self.counts.covered, self.counts.functions
+        if self.remaining is None:
+            # 残りの関数の数が分からなくても、100%の下限は未カバーの関数が1つあれば満たせない
+            return False if self.minimum >= 100 and covered < functions else None
+        total = functions + self.remaining
+        if (covered + self.remaining) * 100 < self.minimum * total:
+            return False
+        if covered * 100 >= self.minimum * total:
+            return True
+        return None
+
+    def __str__(self) -> str:
+        mark = "✅" if self.passed else "❌"
+        return (
+            f"{mark} {self.directory}: {self.percent:.2f}% of functions covered "
+            f"(minimum {self.minimum:g}%)"
+        )
+
+
+class CoverageGate:
+    """
+    ストリームで受け取ったレポートから、ディレクトリごとのカバレッジの下限を判定する
+
+    expect と finish で残りのファイルの関数の数の上限を与えると、全てのレポートを待たずに合否が確定したかを判定できる
+    """
+
+    def __init__(self, root: Path, thresholds: dict[str, float]) -> None:
+        """
+        Args:
+            root: ディレクトリの基準となるルート
+            thresholds: ルートからの相対パスのディレクトリごとの下限 (%)
+        """
+        self.root = root
+        self.thresholds = [
+            Threshold(Path(directory), minimum) for directory, minimum in sorted(thresholds.items())
+        ]
+        # まだレポートされていないファイルの見積もり。complete になるまで残りの上限は分からない
+        self.estimates: dict[Path, int | None] = {}
+        self.complete = False
+        # ディレクトリごとの見積もりの合計と、上限が分からないファイルの数
+        self.pending = [0] * len(self.thresholds)
+        self.unknown = [0] * len(self.thresholds)
+        # 見積もりが記録される前にレポートされたファイル。complete になるまで保持する
+        self.reported: set[Path] = set()
+        self.lock = threading.Lock()
+
+    def relative(self, path: Path) -> Path:
+        """
+        ルートからの相対パスを返す
+
+        Args:
+            path: ファイルのパス
+
+        Returns:
+            Path: ルートからの相対パス (ルートの外の場合はそのままのパス)
+        """
+        try:
+            return path.relative_to(self.root)
+        except ValueError:
+            return path
+
+    def expect(self, path: Path, estimate: int | None) -> None:
+        """
+        これからレポートされるファイルの関数の数の上限を記録する
+
+        同じファイルに複数の上限が与えられた場合は小さい方を用いる。走査で大きさから求めた上限を、
+        読み込んだ内容から数えた上限で狭めるために用いる。既にレポートされたファイルは記録しない
+
+        Args:
+            path: ソースファイルのパス
+            estimate: 関数の数の上限。Noneの場合は上限が分からない
+        """
+        with self.lock:
+            if path in self.reported:
+                return
+            if path in self.estimates:
+                current = self.estimates[path]
+                if estimate is None or (current is not None and current <= estimate):
+                    return
+                self.count(path, current, -1)
+            self.estimates[path] = estimate
+            self.count(path, estimate, 1)
+            self.refresh()
+
+    def finish(self) -> None:
+        """レポートされる全てのファイルを記録し終えたことを記録し、各ディレクトリの残りの上限を確定させる"""
+        with self.lock:
+            self.complete = True
+            self.reported.clear()
+            self.bound()
+        logger.debug(f"Estimated functions in {len(self.estimates)} pending files")
+
+    def add(self, report: FileReport) -> None:
+        """
+        ファイルのレポートを、そのファイルを含むディレクトリの途中経過に加える
+
+        評価されなかったファイルは残りのファイルとして扱い続ける
+
+        Args:
+            report: ファイルのレポート
+        """
+        if report.unevaluated is not None:
+            return
+        counts = CoverageCounts.generate(report)
+        relative = self.relative(report.filepath)
+        with self.lock:
+            if report.filepath in self.estimates:
+                self.count(report.filepath, self.estimates.pop(report.filepath), -1)
+            elif not self.complete:
+                self.reported.add(report.filepath)
+            for threshold in self.thresholds:
+                if threshold.contains(relative):
+                    threshold.counts.add(counts)
+            self.refresh()
+
+    def count(self, path: Path, estimate: int | None, sign: int) -> None:
+        """
+        ファイルの見積もりを、そのファイルを含むディレクトリの合計に加えるか取り除く
+
+        Args:
+            path: ソースファイルのパス
+            estimate: 関数の数の上限。Noneの場合は上限が分からないファイルの数に数える
+            sign: 加える場合1、取り除く場合-1
+        """
+        relative = self.relative(path)
+        for i, threshold in enumerate(self.thresholds):
+            if not threshold.contains(relative):
+                continue
+            if estimate is None:
+                self.unknown[i] += sign
+            else:
+                self.pending[i] += sign * estimate
+
+    def refresh(self) -> None:
+        """ディレクトリごとの合計から残りの上限を更新する。全てのファイルを記録し終えるまでは分からないものとする"""
+        for i, threshold in enumerate(self.thresholds):
+            known = self.complete and self.unknown[i] == 0
+            threshold.remaining = self.pending[i] if known else None
+
+    def bound(self) -> None:
+        """まだレポートされていないファイルの見積もりから、各ディレクトリの合計を計算し直す"""
+        self.pending = [0] * len(self.thresholds)
+        self.unknown = [0] * len(self.thresholds)
+        for path, estimate in self.estimates.items():
+            self.count(path, estimate, 1)
+        self.refresh()
+
+    def outcome(self) -> bool | None:
+        """
+        残りのファイルの結果によらず全体の合否が決まっているかどうかを判定する
+
+        Returns:
+            bool | None: 全ての下限を満たすことが確定した場合True、
+                いずれかの下限を満たせないことが確定した場合False、未確定の場合None
+        """
+        with self.lock:
+            outcomes = [threshold.outcome() for threshold in self.thresholds]
+        if False in outcomes:
+            return False
+        if all(outcome is True for outcome in outcomes):
+            return True
+        return None
+
+    @property
+    def passed(self) -> bool:
+        return all(threshold.passed for threshold in self.thresholds)
+
+    def format(self) -> str:
+        """
+        ディレクトリごとの判定結果を整形する
+
+        Returns:
+            str: 1行に1つのディレクトリの判定結果
+        """
+        return "\n".join(str(threshold) for threshold in self.thresholds)
@@ -0,0 +1,257 @@
+"""Tests for Threshold and CoverageGate."""
+
+from pathlib import Path
+
+from sndtk.parsers.types import Function
+from sndtk.report.file import FileReport
+from sndtk.report.function import FunctionReport
+from sndtk.report.gate import CoverageGate, Threshold
+from sndtk.report.scenario import ScenarioReport
+from sndtk.report.summary import CoverageCounts
+
+
+def make_report(filepath: Path, covered: list[bool]) -> FileReport:
+    """Make a report with one function per entry, covered or with a failing scenario."""
+    functions = [
+        FunctionReport(
+            function=Function(
+                filepath=filepath, name=f"f{i}", line=1, column=0, identifier=f"f{i}"
+            ),
+            scenarios=[ScenarioReport(testname="test", reason=None if ok else "missing")],
+        )
+        for i, ok in enumerate(covered)
+    ]
+    return FileReport(filepath=filepath, filespec=None, functions=functions)
+
+
+def test__Threshold__contains__matches_files_under_directory() -> None:
+    """Returns True for files in the directory or below it and False otherwise."""
+    threshold = Threshold(Path("pkg/sub"), 50)
+    assert threshold.contains(Path("pkg/sub/a.py"))
+    assert threshold.contains(Path("pkg/sub/deep/b.py"))
+    assert not threshold.contains(Path("pkg/a.py"))
+    assert not threshold.contains(Path("pkg/subway/a.py"))
+
+
+def test__Threshold__contains__root_contains_every_file() -> None:
+    """Returns True for every relative path when the directory is the root (boundary value)."""
+    assert Threshold(Path("."), 50).contains(Path("a.py"))
+
+
+def test__Threshold__percent__returns_covered_percentage() -> None:
+    """Returns the percentage of covered functions so far."""
+    threshold = Threshold(Path("."), 50, CoverageCounts(covered=1, uncovered=2, unspecced=1))
+    assert threshold.percent == 25.0
+
+
+def test__Threshold__percent__returns_full_without_functions() -> None:
+    """Returns 100 when no functions have been reported (boundary value)."""
+    assert Threshold(Path("."), 50).percent == 100.0
+
+
+def test__Threshold__passed__compares_percent_with_minimum() -> None:
+    """Returns True only when the percentage reaches the minimum, inclusive (boundary value)."""
+    assert Threshold(Path("."), 50, CoverageCounts(covered=1, uncovered=1)).passed
+    assert not Threshold(Path("."), 51, CoverageCounts(covered=1, uncovered=1)).passed
+
+
+def test__Threshold__outcome__decides_fail_when_remaining_cannot_reach_minimum() -> None:
+    """Returns False when the threshold fails even if every remaining function is covered."""
+    threshold = Threshold(Path("."), 80, CoverageCounts(covered=1, uncovered=3), remaining=4)
+    assert threshold.outcome() is False
+
+
+def test__Threshold__outcome__decides_pass_when_remaining_cannot_fall_below_minimum() -> None:
+    """Returns True when the threshold passes even if every remaining function is uncovered."""
+    threshold = Threshold(Path("."), 50, CoverageCounts(covered=4), remaining=4)
+    assert threshold.outcome() is True
+
+
+def test__Threshold__outcome__returns_none_while_undecided() -> None:
+    """Returns None when the remaining functions can still change the result."""
+    threshold = Threshold(Path("."), 50, CoverageCounts(covered=1, uncovered=1), remaining=2)
+    assert threshold.outcome() is None
+
+
+def test__Threshold__outcome__decides_full_minimum_without_bound() -> None:
+    """Returns False for a 100% minimum once a function is uncovered, even without a bound."""
+    assert Threshold(Path("."), 100, CoverageCounts(uncovered=1)).outcome() is False
+    assert Threshold(Path("."), 90, CoverageCounts(uncovered=1)).outcome() is None
+
+
+def test__Threshold____str____formats_result() -> None:
+    """Formats the mark, directory, percentage and minimum."""
+    threshold = Threshold(Path("pkg"), 60, CoverageCounts(covered=1, uncovered=1))
+    assert str(threshold) == "❌ pkg: 50.00% of functions covered (minimum 60%)"
+
+
+def test__CoverageGate____init____sorts_thresholds_by_directory() -> None:
+    """Creates one threshold per directory sorted by path and no estimates."""
+    gate = CoverageGate(Path("src"), {"pkg": 50, ".": 80})
+    assert [(t.directory, t.minimum) for t in gate.thresholds] == [
+        (Path("."), 80),
+        (Path("pkg"), 50),
+    ]
+    assert gate.estimates == {}
+    assert not gate.complete
+
+
+def test__CoverageGate__relative__returns_path_relative_to_root() -> None:
+    """Returns the path relative to the root, or the path itself outside the root."""
+    gate = CoverageGate(Path("src"), {})
+    assert gate.relative(Path("src/pkg/a.py")) == Path("pkg/a.py")
+    assert gate.relative(Path("other/a.py")) == Path("other/a.py")
+
+
+def test__CoverageGate__expect__leaves_bound_unknown_until_finished() -> None:
+    """Records the estimate but keeps the remaining bound unknown until every file is expected."""
+    root = Path("src")
+    gate = CoverageGate(root, {".": 50})
+    gate.expect(root / "a.py", 2)
+    assert gate.estimates == {root / "a.py": 2}
+    assert gate.thresholds[0].remaining is None
+
+
+def test__CoverageGate__expect__updates_bound_after_finish() -> None:
+    """Includes a file expected after finish in the remaining bound."""
+    root = Path("src")
+    gate = CoverageGate(root, {".": 50})
+    gate.finish()
+    gate.expect(root / "a.py", 2)
+    assert gate.thresholds[0].remaining == 2
+
+
+def test__CoverageGate__expect__keeps_the_tighter_bound() -> None:
+    """Keeps the smaller of two bounds for the same file, and ignores an unknown one."""
+    root = Path("src")
+    gate = CoverageGate(root, {".": 50})
+    gate.finish()
+    gate.expect(root / "a.py", 5)
+    gate.expect(root / "a.py", 2)
+    gate.expect(root / "a.py", 3)
+    gate.expect(root / "a.py", None)
+    assert gate.thresholds[0].remaining == 2
+
+
+def test__CoverageGate__expect__ignores_files_already_reported() -> None:
+    """Does not count a file whose report arrived before its bound (boundary value)."""
+    root = Path("src")
+    gate = CoverageGate(root, {".": 50})
+    gate.add(make_report(root / "a.py", [True]))
+    gate.expect(root / "a.py", 4)
+    gate.finish()
+    assert gate.thresholds[0].remaining == 0
+
+
+def test__CoverageGate__finish__bounds_remaining_functions_per_directory() -> None:
+    """Sets the remaining bound of each threshold from the expected files."""
+    root = Path("src")
+    gate = CoverageGate(root, {".": 50, "pkg": 50})
+    gate.expect(root / "a.py", 1)
+    gate.expect(root / "pkg" / "b.py", 2)
+    gate.finish()
+    assert gate.complete
+    assert [t.remaining for t in gate.thresholds] == [3, 2]
+
+
+def test__CoverageGate__finish__bounds_zero_without_expected_files() -> None:
+    """Sets every remaining bound to zero when no file is pending (boundary value)."""
+    gate = CoverageGate(Path("src"), {".": 50})
+    gate.finish()
+    assert gate.thresholds[0].remaining == 0
+
+
+def test__CoverageGate__add__updates_counts_and_remaining() -> None:
+    """Adds the counts of a file to every threshold containing it and lowers their bound."""
+    root = Path("src")
+    gate = CoverageGate(root, {".": 50, "pkg": 50, "other": 50})
+    gate.estimates = {root / "pkg/a.py": 3, root / "b.py": 1}
+    gate.finish()
+    gate.add(make_report(root / "pkg/a.py", [True, False]))
+    assert [t.counts.functions for t in gate.thresholds] == [2, 0, 2]
+    assert [t.remaining for t in gate.thresholds] == [1, 0, 0]
+
+
+def test__CoverageGate__add__ignores_unevaluated_report() -> None:
+    """Keeps an unevaluated file counted as remaining (boundary value)."""
+    root = Path("src")
+    gate = CoverageGate(root, {".": 50})
+    gate.estimates = {root / "a.py": 2}
+    gate.finish()
+    gate.add(FileReport.generate_unevaluated(root / "a.py", "Time budget exhausted"))
+    assert gate.thresholds[0].counts.functions == 0
+    assert gate.thresholds[0].remaining == 2
+
+
+def test__CoverageGate__bound__sums_estimates_of_pending_files() -> None:
+    """Sets each remaining bound to the sum of the estimates of files in its directory."""
+    root = Path("src")
+    gate = CoverageGate(root, {".": 50, "pkg": 50})
+    gate.estimates = {root / "pkg/a.py": 2, root / "b.py": None}
+    gate.complete = True
+    gate.bound()
+    assert [t.remaining for t in gate.thresholds] == [None, 2]
+
+
+def test__CoverageGate__bound__leaves_bound_unknown_before_finish() -> None:
+    """Keeps every remaining bound unknown until all files are expected (boundary value)."""
+    root = Path("src")
+    gate = CoverageGate(root, {".": 50})
+    gate.estimates = {root / "a.py": 2}
+    gate.bound()
+    assert gate.thresholds[0].remaining is None
+
+
+def test__CoverageGate__count__adds_estimate_to_containing_directories() -> None:
+    """Adds the estimate to the directories containing the file and counts unknown bounds apart."""
+    root = Path("src")
+    gate = CoverageGate(root, {".": 50, "pkg": 50})
+    gate.count(root / "pkg/a.py", 3, 1)
+    gate.count(root / "b.py", None, 1)
+    assert gate.pending == [3, 3]
+    assert gate.unknown == [1, 0]
+    gate.count(root / "pkg/a.py", 3, -1)
+    assert gate.pending == [0, 0]
+
+
+def test__CoverageGate__refresh__sets_remaining_from_totals() -> None:
+    """Sets the remaining bound from the totals once finished, and None for unknown bounds."""
+    gate = CoverageGate(Path("src"), {".": 50, "pkg": 50})
+    gate.pending = [3, 2]
+    gate.unknown = [1, 0]
+    gate.refresh()
+    assert [t.remaining for t in gate.thresholds] == [None, None]
+    gate.complete = True
+    gate.refresh()
+    assert [t.remaining for t in gate.thresholds] == [None, 2]
+
+
+def test__CoverageGate__outcome__combines_threshold_outcomes() -> None:
+    """Returns False if any threshold fails, True if all pass and None otherwise."""
+    gate = CoverageGate(Path("."), {".": 50, "pkg": 50})
+    gate.thresholds[0].remaining = 0
+    gate.thresholds[1].remaining = 2
+    assert gate.outcome() is None
+    gate.thresholds[1].remaining = 0
+    assert gate.outcome() is True
+    gate.thresholds[0].counts.uncovered = 1
+    assert gate.outcome() is False
+
+
+def test__CoverageGate__passed__requires_every_threshold() -> None:
+    """Returns True only when every threshold reaches its minimum."""
+    gate = CoverageGate(Path("."), {".": 50, "pkg": 100})
+    gate.add(make_report(Path("a.py"), [True, False]))
+    assert gate.passed
+    gate.add(make_report(Path("pkg/b.py"), [False]))
+    assert not gate.passed
+
+
+def test__CoverageGate__format__prints_one_line_per_threshold() -> None:
+    """Formats the result of every threshold on its own line."""
+    gate = CoverageGate(Path("."), {".": 50, "pkg": 100})
+    gate.add(make_report(Path("pkg/a.py"), [True, False]))
+    assert gate.format() == (
+        "✅ .: 50.00% of functions covered (minimum 50%)\n"
+        "❌ pkg: 50.00% of functions covered (minimum 100%)"
+    )
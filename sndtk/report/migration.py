@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from sndtk.parsers.types import Function
+from sndtk.spec.paths import spec_path_for
+
+from .file import FileReport
+
+if TYPE_CHECKING:
+    from sndtk.spec import FileSpec, FunctionSpec
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Migration:
+    """古いスペックエントリを新しい識別子の関数へ移し替える操作"""
+
+    source: FileReport
+    target: FileReport
+    function_spec: FunctionSpec
+    function: Function
+
+    def __str__(self) -> str:
+        return (
+            f"🚚 {self.source.filepath}::{self.function_spec.identifier} -> "
+            f"{self.target.filepath}::{self.function.identifier}"
+        )
+
+
+@dataclass
+class MigrationPlan:
+    migrations: list[Migration] = field(default_factory=list)
+    fingerprints: list[tuple[FileReport, FunctionSpec, str]] = field(default_factory=list)
+
+    @classmethod
+    def generate(cls, reports: Iterable[FileReport]) -> MigrationPlan:
+        """
+        フィンガープリントで古いスペックエントリと未登録の関数を突き合わせる
+
+        フィンガープリントが一意に対応する組み合わせのみを移し替え対象とする。
+        また、フィンガープリントが記録されていない既存のエントリには現在の値を記録する。
+
+        Args:
+            reports: 孤立したスペックファイルを含むファイルレポート
+
+        Returns:
+            MigrationPlan: 移し替えとフィンガープリント記録の計画
+        """
+        plan = cls()
+        stale_index: dict[str, list[tuple[FileReport, FunctionSpec]]] = defaultdict(list)
+        candidate_index: dict[str, list[tuple[FileReport, Function]]] = defaultdict(list)
+
+        for report in reports:
+            for function_spec in report.stale:
+                if function_spec.fingerprint:
+                    stale_index[function_spec.fingerprint].append((report, function_spec))
+
+            spec_dict = (
+                {f.identifier: f for f in report.filespec.functions} if report.filespec else {}
+            )
+            for function_report in report.functions:
+                function = function_report.function
+                if not function.fingerprint:
+                    continue
+                existing = spec_dict.get(function.identifier)
+                if existing is None:
+                    candidate_index[function.fingerprint].append((report, function))
+                elif existing.fingerprint is None:
+                    plan.fingerprints.append((report, existing, function.fingerprint))
+
+        for digest, stale in stale_index.items():
+            candidates = candidate_index.get(digest, [])
+            if len(candidates) == 0:
+                continue
+            if len(stale) != 1 or len(candidates) != 1:
+                logger.info(
+                    f"Skipping ambiguous fingerprint {digest}: "
+                    f"{len(stale)} stale entries, {len(candidates)} candidates"
+                )
+                continue
+            (source, function_spec), (target, function) = stale[0], candidates[0]
+            plan.migrations.append(
+                Migration(
+                    source=source,
+                    target=target,
+                    function_spec=function_spec,
+                    function=function,
+                )
+            )
+
+        logger.debug(
+            f"Planned {len(plan.migrations)} migrations and "
+            f"{len(plan.fingerprints)} fingerprint updates"
+        )
+        return plan
+
+    def apply(self) -> list[Path]:
+        """
+        計画に従ってスペックを書き換え、変更のあったスペックファイルを一度ずつ保存する
+
+        孤立したスペックファイルが空になった場合は削除する
+
+        Returns:
+            list[Path]: 書き換えまたは削除したスペックファイルのパス
+        """
+        from sndtk.spec import FileSpec
+
+        reports = [
+            *(report for report, _, _ in self.fingerprints),
+            *(migration.source for migration in self.migrations),
+            *(migration.target for migration in self.migrations),
+        ]
+        filespecs: dict[Path, FileSpec] = {}
+        orphaned: set[Path] = set()
+        for report in reports:
+            if report.filepath in filespecs:
+                continue
+            filespecs[report.filepath] = report.filespec or FileSpec(
+                filepath=report.filepath,
+                testpath=report.filepath.parent / (report.filepath.stem + "_test.py"),
+                functions=[],
+            )
+            if report.orphaned:
+                orphaned.add(report.filepath)
+
+        for _, function_spec, digest in self.fingerprints:
+            function_spec.fingerprint = digest
+
+        for migration in self.migrations:
+            source = filespecs[migration.source.filepath]
+            target = filespecs[migration.target.filepath]
+            testpath = migration.function_spec.testpath or Path(source.testpath)
+            source.remove({migration.function_spec.identifier})
+            target.functions.append(
+                migration.function_spec.model_copy(
+                    update={
+                        "identifier": migration.function.identifier,
+                        "fingerprint": migration.function.fingerprint,
+                        "testpath": None if testpath == Path(target.testpath) else testpath,
+                    }
+                )
+            )
+
+        paths: list[Path] = []
+        for filepath, filespec in filespecs.items():
+            if filepath in orphaned and len(filespec.functions) == 0:
+                spec_path = spec_path_for(filepath)
+                logger.info(f"Removing emptied orphaned spec file {spec_path}")
+                spec_path.unlink()
+                paths.append(spec_path)
+            else:
+                paths.append(filespec.save())
+        return paths
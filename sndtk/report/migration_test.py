@@ -0,0 +1,150 @@
+"""Tests for MigrationPlan."""
+
+import json
+import tempfile
+from pathlib import Path
+
+from sndtk.parsers.types import Function
+from sndtk.report.file import FileReport
+from sndtk.report.migration import Migration, MigrationPlan
+from sndtk.spec import FileSpec, FunctionSpec
+from sndtk.spec.paths import spec_path_for
+
+
+def write_module(filepath: Path, source: str, specs: list[dict[str, object]] | None = None) -> None:
+    filepath.write_text(source)
+    if specs is not None:
+        spec = {
+            "filepath": str(filepath),
+            "testpath": str(filepath.with_name(filepath.stem + "_test.py")),
+            "functions": specs,
+        }
+        spec_path_for(filepath).write_text(json.dumps(spec))
+
+
+def fingerprint_of(filepath: Path, identifier: str) -> str:
+    report = FileReport.generate(filepath, None)
+    return next(
+        function_report.function.fingerprint
+        for function_report in report.functions
+        if function_report.function.identifier == identifier
+    )
+
+
+def function_spec(identifier: str, fingerprint: str | None) -> dict[str, object]:
+    return {
+        "identifier": identifier,
+        "fingerprint": fingerprint,
+        "scenarios": [{"testname": f"test__{identifier}__works", "description": "Works"}],
+    }
+
+
+def test__Migration____str____formats_source_and_target() -> None:
+    """Formats the old and new identifiers with their file paths."""
+    migration = Migration(
+        source=FileReport(filepath=Path("a.py"), filespec=None, functions=[]),
+        target=FileReport(filepath=Path("b.py"), filespec=None, functions=[]),
+        function_spec=FunctionSpec(identifier="old", scenarios=[]),
+        function=Function(
+            filepath=Path("b.py"), name="new", line=1, column=0, identifier="Class::new"
+        ),
+    )
+    assert str(migration) == "🚚 a.py::old -> b.py::Class::new"
+
+
+def test__MigrationPlan__generate__returns_empty_plan_without_reports() -> None:
+    """Returns an empty plan when there are no reports (boundary value)."""
+    plan = MigrationPlan.generate([])
+    assert plan.migrations == []
+    assert plan.fingerprints == []
+
+
+def test__MigrationPlan__generate__matches_renamed_function_by_fingerprint() -> None:
+    """Matches a stale entry to a renamed function with the same body fingerprint."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "module.py"
+        write_module(filepath, "def new(a):\n    return a * 42\n")
+        digest = fingerprint_of(filepath, "new")
+        write_module(filepath, "def new(a):\n    return a * 42\n", [function_spec("old", digest)])
+        plan = MigrationPlan.generate([FileReport.generate(filepath, None)])
+        assert len(plan.migrations) == 1
+        assert plan.migrations[0].function_spec.identifier == "old"
+        assert plan.migrations[0].function.identifier == "new"
+
+
+def test__MigrationPlan__generate__skips_ambiguous_fingerprints() -> None:
+    """Skips fingerprints shared by several candidate functions."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "module.py"
+        source = "def a():\n    return 1\n\ndef b():\n    return 1\n"
+        write_module(filepath, source)
+        digest = fingerprint_of(filepath, "a")
+        write_module(filepath, source, [function_spec("old", digest)])
+        plan = MigrationPlan.generate([FileReport.generate(filepath, None)])
+        assert plan.migrations == []
+
+
+def test__MigrationPlan__generate__skips_stale_entries_without_fingerprint() -> None:
+    """Skips stale entries that have no recorded fingerprint."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "module.py"
+        write_module(filepath, "def new():\n    return 1\n", [function_spec("old", None)])
+        plan = MigrationPlan.generate([FileReport.generate(filepath, None)])
+        assert plan.migrations == []
+
+
+def test__MigrationPlan__generate__collects_missing_fingerprints() -> None:
+    """Collects existing entries without a fingerprint for backfilling."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "module.py"
+        write_module(filepath, "def f():\n    return 1\n", [function_spec("f", None)])
+        plan = MigrationPlan.generate([FileReport.generate(filepath, None)])
+        assert len(plan.fingerprints) == 1
+        assert plan.fingerprints[0][1].identifier == "f"
+        assert plan.fingerprints[0][2] == fingerprint_of(filepath, "f")
+
+
+def test__MigrationPlan__apply__renames_entry_within_file() -> None:
+    """Rewrites the entry identifier in place when the function was renamed in the same file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "module.py"
+        write_module(filepath, "def new(a):\n    return a * 42\n")
+        digest = fingerprint_of(filepath, "new")
+        write_module(filepath, "def new(a):\n    return a * 42\n", [function_spec("old", digest)])
+        paths = MigrationPlan.generate([FileReport.generate(filepath, None)]).apply()
+        assert paths == [spec_path_for(filepath)]
+        spec = FileSpec.load(filepath)
+        assert [function.identifier for function in spec.functions] == ["new"]
+        assert spec.functions[0].testpath is None
+        assert spec.functions[0].scenarios[0].testname == "test__old__works"
+
+
+def test__MigrationPlan__apply__moves_entry_across_files_and_removes_orphan() -> None:
+    """Moves the entry into the new file's spec, keeps the old testpath and deletes the emptied orphan spec."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        old_path = Path(tmpdir) / "old.py"
+        new_path = Path(tmpdir) / "new.py"
+        write_module(new_path, "class Service:\n    def handle(self, a):\n        return a * 42\n")
+        digest = fingerprint_of(new_path, "Service::handle")
+        write_module(old_path, "", [function_spec("handle", digest)])
+        old_path.unlink()
+        reports = [FileReport.generate(new_path, None), FileReport.generate_orphan(old_path)]
+        MigrationPlan.generate(reports).apply()
+        assert not spec_path_for(old_path).exists()
+        spec = FileSpec.load(new_path)
+        assert spec.functions[0].identifier == "Service::handle"
+        assert spec.functions[0].testpath == Path(tmpdir) / "old_test.py"
+
+
+def test__MigrationPlan__apply__records_missing_fingerprints() -> None:
+    """Records fingerprints for existing entries without one."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "module.py"
+        write_module(filepath, "def f():\n    return 1\n", [function_spec("f", None)])
+        MigrationPlan.generate([FileReport.generate(filepath, None)]).apply()
+        assert FileSpec.load(filepath).functions[0].fingerprint == fingerprint_of(filepath, "f")
+
+
+def test__MigrationPlan__apply__returns_empty_list_for_empty_plan() -> None:
+    """Returns an empty list and writes nothing for an empty plan (boundary value)."""
+    assert MigrationPlan().apply() == []
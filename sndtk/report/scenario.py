@@ -2,9 +2,12 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-from sndtk.parsers.python import PythonParser
-from sndtk.spec import ScenarioSpec
+from sndtk.parsers.index import SymbolIndex
+
+if TYPE_CHECKING:
+    from sndtk.spec import ScenarioSpec
 
 
 @dataclass
@@ -13,27 +16,40 @@ class ScenarioReport:
     reason: str | None = None
 
     @classmethod
-    def generate(cls, scenario: ScenarioSpec, function_testpath: Path) -> ScenarioReport:
+    def generate(
+        cls,
+        scenario: ScenarioSpec,
+        function_testpath: Path,
+        index: SymbolIndex | None = None,
+    ) -> ScenarioReport:
         testpath = scenario.testpath or function_testpath
-        if not testpath.exists():
+        names = (index or SymbolIndex()).names(testpath)
+        if names is None:
             return cls(
                 testname=scenario.testname,
                 reason=f"Test file not found: {testpath}",
             )
 
-        parser = PythonParser()
-        for function in parser.parse(testpath):
-            if function.name == scenario.testname:
-                return cls(
-                    testname=scenario.testname,
-                    reason=None,
-                )
+        if scenario.testname in names:
+            return cls(
+                testname=scenario.testname,
+                reason=None,
+            )
 
         return cls(
             testname=scenario.testname,
             reason=f"Test function not found: {scenario.testname}",
         )
 
+    def to_dict(self) -> dict[str, Any]:
+        """
+        JSONに変換できる辞書を返す
+
+        Returns:
+            dict[str, Any]: テスト名、カバーされているかどうか、カバーされていない理由
+        """
+        return {"testname": self.testname, "covered": self.reason is None, "reason": self.reason}
+
     def __str__(self) -> str:
         if self.reason is None:
             return f"✅ {self.testname}"
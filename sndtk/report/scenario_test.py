@@ -3,6 +3,7 @@
 import tempfile
 from pathlib import Path
 
+from sndtk.parsers.index import SymbolIndex
 from sndtk.report.scenario import ScenarioReport
 from sndtk.spec.scenario import ScenarioSpec
 
@@ -90,3 +91,30 @@ def test__ScenarioReport____str____returns_cross_with_reason_when_reason_exists(
     )
     result = str(report)
     assert result == "❌ test_function: Test function not found: test_function"
+
+
+def test__ScenarioReport__generate__looks_up_test_names_in_given_index() -> None:
+    """Looks up the test name in the given index instead of re-parsing the test file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        test_file = Path(tmpdir) / "test_file.py"
+        test_file.write_text("def test_function():\n    pass\n")
+        index = SymbolIndex()
+        index.names(test_file)
+        test_file.write_text("")
+        scenario = ScenarioSpec(testpath=None, testname="test_function", description="Test")
+        report = ScenarioReport.generate(scenario, test_file, index)
+        assert report.reason is None
+
+
+def test__ScenarioReport__to_dict__returns_testname_coverage_and_reason() -> None:
+    """Returns the test name, whether it is covered and the reason when it is not."""
+    assert ScenarioReport(testname="test_a").to_dict() == {
+        "testname": "test_a",
+        "covered": True,
+        "reason": None,
+    }
+    assert ScenarioReport(testname="test_b", reason="Test function not found").to_dict() == {
+        "testname": "test_b",
+        "covered": False,
+        "reason": "Test function not found",
+    }
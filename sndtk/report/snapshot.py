@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+
+from .file import FileReport
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    filepath TEXT PRIMARY KEY,
+    unknown TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS functions (
+    filepath TEXT NOT NULL,
+    identifier TEXT NOT NULL,
+    covered INTEGER NOT NULL,
+    PRIMARY KEY (filepath, identifier)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS scenarios (
+    filepath TEXT NOT NULL,
+    identifier TEXT NOT NULL,
+    testname TEXT NOT NULL,
+    reason TEXT,
+    PRIMARY KEY (filepath, identifier, testname)
+) WITHOUT ROWID;
+"""
+
+
+class Snapshot:
+    """
+    1回の実行の関数ごとのカバー状況とシナリオの状態を保存するSQLiteのスナップショット
+
+    ファイルのパスはルートからの相対パスで保存するため、別のチェックアウトのスナップショットとも比較できる。
+    作成中のスナップショットは一時ファイルに書き込み、save で置き換えるため、
+    比較元と同じパスに保存しても比較元は実行中に壊れない
+    """
+
+    def __init__(
+        self, connection: sqlite3.Connection, root: Path, path: Path | None = None
+    ) -> None:
+        """
+        Args:
+            connection: スナップショットのデータベースへの接続
+            root: ファイルのパスの基準となるディレクトリ
+            path: save で書き込むパス (Noneの場合は保存しない)
+        """
+        self.connection = connection
+        self.root = root
+        self.path = path
+
+    @classmethod
+    def create(cls, path: Path | None, root: Path) -> Snapshot:
+        """
+        空のスナップショットを作成する
+
+        Args:
+            path: 保存先のパス (Noneの場合はメモリ上にのみ作成する)
+            root: ファイルのパスの基準となるディレクトリ
+
+        Returns:
+            Snapshot: 書き込み可能なスナップショット
+        """
+        if path is None:
+            connection = sqlite3.connect(":memory:")
+        else:
+            temporary = cls.temporary(path)
+            temporary.unlink(missing_ok=True)
+            connection = sqlite3.connect(temporary)
+        connection.executescript(SCHEMA)
+        return cls(connection, root, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Snapshot:
+        """
+        保存されたスナップショットを読み込む
+
+        Args:
+            path: スナップショットのパス
+
+        Returns:
+            Snapshot: 読み込み専用のスナップショット
+        """
+        if not path.is_file():
+            raise FileNotFoundError(f"No snapshot found at {path}")
+        connection = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+        return cls(connection, Path("."))
+
+    @staticmethod
+    def temporary(path: Path) -> Path:
+        return path.with_name(f"{path.name}.tmp")
+
+    def relative(self, path: Path) -> str:
+        """
+        ルートからの相対パスを返す
+
+        Args:
+            path: ファイルのパス
+
+        Returns:
+            str: ルートからの相対パス (ルートの外の場合はそのままのパス)
+        """
+        try:
+            return path.relative_to(self.root).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def add(self, report: FileReport) -> None:
+        """
+        ファイルのレポートを書き込む
+
+        評価されなかったファイルと飛ばされたファイルは、関数の状態が分からないファイルとして記録する
+
+        Args:
+            report: ファイルのレポート
+        """
+        filepath = self.relative(report.filepath)
+        unknown = report.unevaluated if report.unevaluated is not None else report.skipped
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files (filepath, unknown) VALUES (?, ?)", (filepath, unknown)
+        )
+        if unknown is not None:
+            return
+        functions: list[tuple[str, str, bool]] = []
+        scenarios: list[tuple[str, str, str, str | None]] = []
+        for function_report in report.functions:
+            identifier = function_report.function.identifier
+            functions.append((filepath, identifier, function_report.covered))
+            scenarios.extend(
+                (filepath, identifier, scenario.testname, scenario.reason)
+                for scenario in function_report.scenarios
+            )
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO functions (filepath, identifier, covered) VALUES (?, ?, ?)",
+            functions,
+        )
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO scenarios (filepath, identifier, testname, reason) "
+            "VALUES (?, ?, ?, ?)",
+            scenarios,
+        )
+
+    def functions(self) -> dict[tuple[str, str], bool]:
+        """
+        関数ごとのカバー状況を返す
+
+        Returns:
+            dict[tuple[str, str], bool]: ファイルのパスと関数の識別子から、カバーされているかどうかへの辞書
+        """
+        return {
+            (filepath, identifier): bool(covered)
+            for filepath, identifier, covered in self.connection.execute(
+                "SELECT filepath, identifier, covered FROM functions"
+            )
+        }
+
+    def unknown_files(self) -> set[str]:
+        """
+        関数の状態が分からないファイルを返す
+
+        Returns:
+            set[str]: 評価されなかったファイルと飛ばされたファイルのパス
+        """
+        return {
+            filepath
+            for (filepath,) in self.connection.execute(
+                "SELECT filepath FROM files WHERE unknown IS NOT NULL"
+            )
+        }
+
+    def failures(self, filepath: str, identifier: str) -> list[str]:
+        """
+        関数がカバーされていない理由を返す
+
+        Args:
+            filepath: ファイルのパス
+            identifier: 関数の識別子
+
+        Returns:
+            list[str]: 満たされていないシナリオごとの理由、シナリオがない場合はその旨
+        """
+        rows = self.connection.execute(
+            "SELECT testname, reason FROM scenarios WHERE filepath = ? AND identifier = ? "
+            "ORDER BY testname",
+            (filepath, identifier),
+        ).fetchall()
+        if len(rows) == 0:
+            return ["⚠️ No scenarios defined"]
+        return [f"❌ {testname}: {reason}" for testname, reason in rows if reason is not None]
+
+    def save(self) -> None:
+        """書き込んだ内容を確定し、保存先のパスのスナップショットを置き換える"""
+        self.connection.commit()
+        if self.path is None:
+            return
+        self.connection.close()
+        os.replace(self.temporary(self.path), self.path)
+        logger.info(f"Saved snapshot to {self.path}")
+        self.connection = sqlite3.connect(self.path)
+
+    def close(self) -> None:
+        """接続を閉じる。保存されなかった一時ファイルは削除する"""
+        self.connection.close()
+        if self.path is not None:
+            self.temporary(self.path).unlink(missing_ok=True)
+
+    def __enter__(self) -> Snapshot:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def is_within(filepath: str, paths: set[str]) -> bool:
+    """
+    ファイルがいずれかのパスそのものか、その下にあるかどうかを判定する
+
+    Args:
+        filepath: ルートからの相対パス
+        paths: ルートからの相対パスのファイルまたはディレクトリ ("." はルート)
+
+    Returns:
+        bool: いずれかのパスに含まれる場合True
+    """
+    if filepath in paths or "." in paths:
+        return True
+    return any(filepath.startswith(f"{path}/") for path in paths)
+
+
+@dataclass
+class SnapshotDiff:
+    """2つのスナップショットの間で状態が変わった関数"""
+
+    # path::identifier から、カバーされていない理由への辞書
+    uncovered: dict[str, list[str]] = field(default_factory=dict)
+    covered: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+    @classmethod
+    def generate(cls, old: Snapshot, new: Snapshot) -> SnapshotDiff:
+        """
+        スナップショットを比較する
+
+        新しくカバーされなくなった関数には、比較先で追加されたカバーされていない関数も含む。
+        比較先で状態が分からないファイルの関数は削除されたものとして扱わない。走査が終わらなかった
+        ルートのように状態が分からないディレクトリは、その下の全てのファイルの状態が分からないものとする
+
+        Args:
+            old: 比較元のスナップショット
+            new: 比較先のスナップショット
+
+        Returns:
+            SnapshotDiff: 状態が変わった関数
+        """
+        before = old.functions()
+        after = new.functions()
+        unknown = new.unknown_files()
+        diff = cls()
+        for key in sorted(after):
+            covered = after[key]
+            previous = before.get(key)
+            name = "::".join(key)
+            if not covered and previous is not False:
+                diff.uncovered[name] = new.failures(*key)
+            elif covered and previous is False:
+                diff.covered.append(name)
+        diff.removed = [
+            "::".join(key)
+            for key in sorted(before)
+            if key not in after and not is_within(key[0], unknown)
+        ]
+        logger.debug(
+            f"Compared {len(before)} functions with {len(after)} functions: "
+            f"{len(diff.uncovered)} newly uncovered, {len(diff.covered)} newly covered, "
+            f"{len(diff.removed)} removed"
+        )
+        return diff
+
+    @property
+    def regressed(self) -> bool:
+        return len(self.uncovered) > 0
+
+    def __str__(self) -> str:
+        lines = []
+        for name, failures in self.uncovered.items():
+            lines.append(f"❌ {name}: Newly uncovered")
+            lines.extend(f"  {failure}" for failure in failures)
+        lines.extend(f"✅ {name}: Newly covered" for name in self.covered)
+        lines.extend(f"🗑️ {name}: Removed" for name in self.removed)
+        lines.append(
+            f"{len(self.uncovered)} newly uncovered, {len(self.covered)} newly covered, "
+            f"{len(self.removed)} removed"
+        )
+        return "\n".join(lines)
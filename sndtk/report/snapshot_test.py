@@ -0,0 +1,260 @@
+"""Tests for Snapshot and SnapshotDiff."""
+
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from sndtk.parsers.types import Function
+from sndtk.project.pipeline import WALK_UNFINISHED
+from sndtk.report.file import FileReport
+from sndtk.report.function import FunctionReport
+from sndtk.report.scenario import ScenarioReport
+from sndtk.report.snapshot import Snapshot, SnapshotDiff, is_within
+
+
+def make_report(filepath: Path, functions: dict[str, list[str | None]]) -> FileReport:
+    """Make a report with the given functions, each scenario given by its reason."""
+    return FileReport(
+        filepath=filepath,
+        filespec=None,
+        functions=[
+            FunctionReport(
+                function=Function(filepath=filepath, name=name, line=1, column=0, identifier=name),
+                scenarios=[
+                    ScenarioReport(testname=f"test__{name}__{i}", reason=reason)
+                    for i, reason in enumerate(reasons)
+                ],
+            )
+            for name, reasons in functions.items()
+        ],
+    )
+
+
+def make_snapshot(reports: list[FileReport]) -> Snapshot:
+    """Make an in-memory snapshot of the reports relative to src."""
+    snapshot = Snapshot.create(None, Path("src"))
+    for report in reports:
+        snapshot.add(report)
+    return snapshot
+
+
+def test__Snapshot____init____keeps_connection_and_paths() -> None:
+    """Keeps the connection, the root and the path to save to."""
+    connection = sqlite3.connect(":memory:")
+    snapshot = Snapshot(connection, Path("src"), Path("snap.db"))
+    assert snapshot.connection is connection
+    assert snapshot.root == Path("src")
+    assert snapshot.path == Path("snap.db")
+
+
+def test__Snapshot__create__creates_empty_snapshot_in_temporary_file() -> None:
+    """Creates the tables in a temporary file next to the path and not the path itself."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "snap.db"
+        with Snapshot.create(path, Path(tmpdir)) as snapshot:
+            assert snapshot.functions() == {}
+            assert Path(tmpdir, "snap.db.tmp").exists()
+            assert not path.exists()
+
+
+def test__Snapshot__create__creates_in_memory_without_path() -> None:
+    """Creates a snapshot that is never written to disk when the path is None (boundary value)."""
+    with Snapshot.create(None, Path(".")) as snapshot:
+        assert snapshot.path is None
+        assert snapshot.unknown_files() == set()
+
+
+def test__Snapshot__load__reads_saved_snapshot() -> None:
+    """Reads the functions of a saved snapshot."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "snap.db"
+        with Snapshot.create(path, Path("src")) as snapshot:
+            snapshot.add(make_report(Path("src/a.py"), {"f": [None]}))
+            snapshot.save()
+        with Snapshot.load(path) as loaded:
+            assert loaded.functions() == {("a.py", "f"): True}
+
+
+def test__Snapshot__load__raises_for_missing_file() -> None:
+    """Raises FileNotFoundError when there is no snapshot at the path."""
+    with tempfile.TemporaryDirectory() as tmpdir, pytest.raises(FileNotFoundError):
+        Snapshot.load(Path(tmpdir) / "missing.db")
+
+
+def test__Snapshot__temporary__appends_tmp_suffix() -> None:
+    """Returns the path with .tmp appended to the file name."""
+    assert Snapshot.temporary(Path("out/snap.db")) == Path("out/snap.db.tmp")
+
+
+def test__Snapshot__relative__returns_posix_path_relative_to_root() -> None:
+    """Returns the path relative to the root, or the path itself outside the root."""
+    snapshot = make_snapshot([])
+    assert snapshot.relative(Path("src/pkg/a.py")) == "pkg/a.py"
+    assert snapshot.relative(Path("other/a.py")) == "other/a.py"
+
+
+def test__Snapshot__add__writes_functions_and_scenarios() -> None:
+    """Writes the covered state of every function and the status of every scenario."""
+    snapshot = make_snapshot([make_report(Path("src/a.py"), {"f": [None], "g": ["missing"]})])
+    assert snapshot.functions() == {("a.py", "f"): True, ("a.py", "g"): False}
+    assert snapshot.connection.execute("SELECT COUNT(*) FROM scenarios").fetchone() == (2,)
+
+
+def test__Snapshot__add__records_unevaluated_file_as_unknown() -> None:
+    """Records an unevaluated or skipped file without functions as unknown."""
+    snapshot = make_snapshot(
+        [
+            FileReport.generate_unevaluated(Path("src/a.py"), "Time budget exhausted"),
+            FileReport.generate_skipped(Path("src/b.py"), "Generated file"),
+        ]
+    )
+    assert snapshot.unknown_files() == {"a.py", "b.py"}
+    assert snapshot.functions() == {}
+
+
+def test__Snapshot__functions__returns_covered_state_by_key() -> None:
+    """Returns the covered state keyed by relative path and identifier."""
+    snapshot = make_snapshot([make_report(Path("src/pkg/a.py"), {"A::f": []})])
+    assert snapshot.functions() == {("pkg/a.py", "A::f"): False}
+
+
+def test__Snapshot__unknown_files__excludes_evaluated_files() -> None:
+    """Returns only the files whose functions were not evaluated."""
+    snapshot = make_snapshot(
+        [
+            make_report(Path("src/a.py"), {"f": []}),
+            FileReport.generate_unevaluated(Path("src/b.py"), "Time budget exhausted"),
+        ]
+    )
+    assert snapshot.unknown_files() == {"b.py"}
+
+
+def test__Snapshot__failures__lists_failing_scenarios() -> None:
+    """Returns one line per failing scenario of the function."""
+    snapshot = make_snapshot([make_report(Path("src/a.py"), {"f": [None, "missing"]})])
+    assert snapshot.failures("a.py", "f") == ["❌ test__f__1: missing"]
+
+
+def test__Snapshot__failures__reports_function_without_scenarios() -> None:
+    """Returns a warning line when the function has no scenarios (boundary value)."""
+    snapshot = make_snapshot([make_report(Path("src/a.py"), {"f": []})])
+    assert snapshot.failures("a.py", "f") == ["⚠️ No scenarios defined"]
+
+
+def test__Snapshot__save__replaces_existing_snapshot() -> None:
+    """Commits and moves the temporary file over an existing snapshot at the path."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "snap.db"
+        path.write_bytes(b"old")
+        with Snapshot.create(path, Path("src")) as snapshot:
+            snapshot.add(make_report(Path("src/a.py"), {"f": []}))
+            snapshot.save()
+            assert snapshot.functions() == {("a.py", "f"): False}
+        assert not Path(tmpdir, "snap.db.tmp").exists()
+        with Snapshot.load(path) as loaded:
+            assert loaded.functions() == {("a.py", "f"): False}
+
+
+def test__Snapshot__close__discards_unsaved_snapshot() -> None:
+    """Removes the temporary file and leaves the path untouched when not saved."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "snap.db"
+        snapshot = Snapshot.create(path, Path("src"))
+        snapshot.close()
+        assert list(Path(tmpdir).iterdir()) == []
+
+
+def test__Snapshot____enter____returns_itself() -> None:
+    """Returns the snapshot itself as the context value."""
+    snapshot = make_snapshot([])
+    with snapshot as entered:
+        assert entered is snapshot
+
+
+def test__Snapshot____exit____closes_connection() -> None:
+    """Closes the connection when leaving the context."""
+    with make_snapshot([]) as snapshot:
+        pass
+    with pytest.raises(sqlite3.ProgrammingError):
+        snapshot.functions()
+
+
+def test__SnapshotDiff__generate__classifies_changed_functions() -> None:
+    """Lists newly uncovered, newly covered and removed functions and nothing unchanged."""
+    old = make_snapshot(
+        [make_report(Path("src/a.py"), {"kept": [None], "lost": [None], "fixed": [], "gone": []})]
+    )
+    new = make_snapshot(
+        [make_report(Path("src/a.py"), {"kept": [None], "lost": ["missing"], "fixed": [None]})]
+    )
+    diff = SnapshotDiff.generate(old, new)
+    assert diff.uncovered == {"a.py::lost": ["❌ test__lost__0: missing"]}
+    assert diff.covered == ["a.py::fixed"]
+    assert diff.removed == ["a.py::gone"]
+
+
+def test__SnapshotDiff__generate__reports_new_uncovered_function() -> None:
+    """Counts a function added without coverage as newly uncovered."""
+    old = make_snapshot([])
+    new = make_snapshot([make_report(Path("src/a.py"), {"f": [], "g": [None]})])
+    diff = SnapshotDiff.generate(old, new)
+    assert list(diff.uncovered) == ["a.py::f"]
+    assert diff.covered == []
+
+
+def test__SnapshotDiff__generate__keeps_functions_of_unknown_files() -> None:
+    """Does not report functions of files the new snapshot did not evaluate as removed."""
+    old = make_snapshot([make_report(Path("src/a.py"), {"f": [None]})])
+    new = make_snapshot(
+        [FileReport.generate_unevaluated(Path("src/a.py"), "Time budget exhausted")]
+    )
+    assert SnapshotDiff.generate(old, new).removed == []
+
+
+def test__SnapshotDiff__generate__keeps_functions_under_unfinished_walk() -> None:
+    """Does not report any function as removed when the walk of the root did not finish."""
+    old = make_snapshot([make_report(Path("src/pkg/a.py"), {"f": [None]})])
+    new = make_snapshot([FileReport.generate_unevaluated(Path("src"), WALK_UNFINISHED)])
+    assert SnapshotDiff.generate(old, new).removed == []
+
+
+def test__is_within__matches_paths_and_their_subtrees() -> None:
+    """Matches the path itself, files under a directory and everything under the root."""
+    assert is_within("pkg/a.py", {"pkg/a.py"})
+    assert is_within("pkg/a.py", {"pkg"})
+    assert not is_within("pkgx/a.py", {"pkg"})
+    assert is_within("pkg/a.py", {"."})
+
+
+def test__is_within__returns_false_without_paths() -> None:
+    """Returns False when there is no path to match (boundary value)."""
+    assert not is_within("a.py", set())
+
+
+def test__SnapshotDiff__regressed__is_true_only_with_newly_uncovered_functions() -> None:
+    """Returns True only when a function became uncovered."""
+    assert SnapshotDiff(uncovered={"a.py::f": []}).regressed
+    assert not SnapshotDiff(covered=["a.py::f"], removed=["a.py::g"]).regressed
+
+
+def test__SnapshotDiff____str____lists_changes_and_totals() -> None:
+    """Formats one line per changed function, failing scenarios and a totals line."""
+    diff = SnapshotDiff(
+        uncovered={"a.py::f": ["⚠️ No scenarios defined"]},
+        covered=["a.py::g"],
+        removed=["a.py::h"],
+    )
+    assert str(diff) == (
+        "❌ a.py::f: Newly uncovered\n"
+        "  ⚠️ No scenarios defined\n"
+        "✅ a.py::g: Newly covered\n"
+        "🗑️ a.py::h: Removed\n"
+        "1 newly uncovered, 1 newly covered, 1 removed"
+    )
+
+
+def test__SnapshotDiff____str____prints_only_totals_without_changes() -> None:
+    """Prints only the totals line when nothing changed (boundary value)."""
+    assert str(SnapshotDiff()) == "0 newly uncovered, 0 newly covered, 0 removed"
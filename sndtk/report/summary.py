@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+from .file import FileReport
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CoverageCounts:
+    """ディレクトリ以下の関数とシナリオの集計"""
+
+    files: int = 0
+    covered: int = 0
+    uncovered: int = 0
+    unspecced: int = 0
+    scenarios: int = 0
+    passing: int = 0
+
+    @classmethod
+    def generate(cls, report: FileReport) -> CoverageCounts:
+        """
+        ファイルのレポートを集計する
+
+        Args:
+            report: ファイルのレポート
+
+        Returns:
+            CoverageCounts: ファイル1つ分の集計
+        """
+        counts = cls(files=1)
+        for function in report.functions:
+            if len(function.scenarios) == 0:
+                counts.unspecced += 1
+            elif function.covered:
+                counts.covered += 1
+            else:
+                counts.uncovered += 1
+            counts.scenarios += len(function.scenarios)
+            counts.passing += len([s for s in function.scenarios if s.reason is None])
+        return counts
+
+    def add(self, other: CoverageCounts) -> None:
+        """
+        別の集計を加える
+
+        Args:
+            other: 加える集計
+        """
+        self.files += other.files
+        self.covered += other.covered
+        self.uncovered += other.uncovered
+        self.unspecced += other.unspecced
+        self.scenarios += other.scenarios
+        self.passing += other.passing
+
+    def subtract(self, other: CoverageCounts) -> None:
+        """
+        加えた集計を取り除く
+
+        Args:
+            other: 取り除く集計
+        """
+        self.files -= other.files
+        self.covered -= other.covered
+        self.uncovered -= other.uncovered
+        self.unspecced -= other.unspecced
+        self.scenarios -= other.scenarios
+        self.passing -= other.passing
+
+    @property
+    def functions(self) -> int:
+        return self.covered + self.uncovered + self.unspecced
+
+    def __str__(self) -> str:
+        if self.functions == 0:
+            return f"no functions ({self.files} files)"
+        scenarios = f"{self.passing}/{self.scenarios} scenarios"
+        if self.scenarios > 0:
+            scenarios += f" ({self.passing / self.scenarios:.0%})"
+        return (
+            f"{self.covered / self.functions:.2%} "
+            f"({self.covered}/{self.functions} functions covered, {self.uncovered} uncovered, "
+            f"{self.unspecced} without spec; {scenarios})"
+        )
+
+
+class TreeSummary:
+    """
+    ストリームで受け取ったレポートをディレクトリの階層ごとに集計する
+
+    レポートは集計した後に保持しないため、メモリ使用量はファイル数ではなくディレクトリ数に比例する
+    """
+
+    def __init__(self, root: Path) -> None:
+        """
+        Args:
+            root: 集計の基準となるディレクトリ
+        """
+        self.root = root
+        self.directories: dict[Path, CoverageCounts] = {}
+
+    def add(self, report: FileReport) -> None:
+        """
+        ファイルのレポートを、そのファイルを含む全てのディレクトリの集計に加える
+
+        Args:
+            report: ファイルのレポート
+        """
+        counts = CoverageCounts.generate(report)
+        try:
+            relative = report.filepath.relative_to(self.root)
+        except ValueError:
+            relative = report.filepath
+        for directory in relative.parents:
+            self.directories.setdefault(directory, CoverageCounts()).add(counts)
+
+    def format(self, depth: int | None = None) -> str:
+        """
+        集計をディレクトリの木として整形する
+
+        Args:
+            depth: 表示するディレクトリの深さ (0の場合はルートのみ、Noneの場合は全て)
+
+        Returns:
+            str: 整形された集計、レポートがない場合は空文字列
+        """
+        lines = []
+        for directory in sorted(self.directories, key=lambda path: path.parts):
+            level = len(directory.parts)
+            if depth is not None and level > depth:
+                continue
+            counts = self.directories[directory]
+            if counts.functions == 0:
+                mark = "🪽"
+            elif counts.covered == counts.functions:
+                mark = "✅"
+            else:
+                mark = "❌"
+            name = str(self.root / directory) if level == 0 else f"{directory.name}/"
+            lines.append(f"{'  ' * level}{mark} {name} {counts}")
+        return "\n".join(lines)
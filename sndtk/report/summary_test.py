@@ -0,0 +1,123 @@
+"""Tests for CoverageCounts and TreeSummary."""
+
+from pathlib import Path
+
+from sndtk.parsers.types import Function
+from sndtk.report.file import FileReport
+from sndtk.report.function import FunctionReport
+from sndtk.report.scenario import ScenarioReport
+from sndtk.report.summary import CoverageCounts, TreeSummary
+
+
+def make_report(filepath: Path, scenarios: list[list[str | None]]) -> FileReport:
+    """Make a report with one function per entry, each scenario given by its reason."""
+    functions = [
+        FunctionReport(
+            function=Function(
+                filepath=filepath, name=f"f{i}", line=1, column=0, identifier=f"f{i}"
+            ),
+            scenarios=[ScenarioReport(testname="test", reason=reason) for reason in reasons],
+        )
+        for i, reasons in enumerate(scenarios)
+    ]
+    return FileReport(filepath=filepath, filespec=None, functions=functions)
+
+
+def test__CoverageCounts__generate__counts_functions_and_scenarios() -> None:
+    """Counts covered, uncovered and unspecced functions and passing scenarios of a file."""
+    report = make_report(Path("a.py"), [[None, None], [None, "missing"], []])
+    assert CoverageCounts.generate(report) == CoverageCounts(
+        files=1, covered=1, uncovered=1, unspecced=1, scenarios=4, passing=3
+    )
+
+
+def test__CoverageCounts__generate__counts_file_without_functions() -> None:
+    """Counts a file without functions as one file and nothing else (boundary value)."""
+    report = FileReport.generate_skipped(Path("a.py"), "Generated file")
+    assert CoverageCounts.generate(report) == CoverageCounts(files=1)
+
+
+def test__CoverageCounts__add__sums_every_count() -> None:
+    """Adds every count of the other totals."""
+    counts = CoverageCounts(files=1, covered=2, uncovered=3, unspecced=4, scenarios=5, passing=6)
+    counts.add(CoverageCounts(files=1, covered=1, uncovered=1, unspecced=1, scenarios=1, passing=1))
+    assert counts == CoverageCounts(
+        files=2, covered=3, uncovered=4, unspecced=5, scenarios=6, passing=7
+    )
+
+
+def test__CoverageCounts__subtract__removes_every_count() -> None:
+    """Subtracts every count of totals added before."""
+    counts = CoverageCounts(files=2, covered=3, uncovered=4, unspecced=5, scenarios=6, passing=7)
+    counts.subtract(
+        CoverageCounts(files=1, covered=1, uncovered=1, unspecced=1, scenarios=1, passing=1)
+    )
+    assert counts == CoverageCounts(
+        files=1, covered=2, uncovered=3, unspecced=4, scenarios=5, passing=6
+    )
+
+
+def test__CoverageCounts__functions__returns_total_number_of_functions() -> None:
+    """Returns the sum of covered, uncovered and unspecced functions."""
+    assert CoverageCounts(covered=1, uncovered=2, unspecced=3).functions == 6
+
+
+def test__CoverageCounts____str____formats_percentages() -> None:
+    """Formats function coverage and scenario completion as percentages."""
+    counts = CoverageCounts(files=1, covered=1, uncovered=1, unspecced=2, scenarios=4, passing=3)
+    assert str(counts) == (
+        "25.00% (1/4 functions covered, 1 uncovered, 2 without spec; 3/4 scenarios (75%))"
+    )
+
+
+def test__CoverageCounts____str____formats_counts_without_functions() -> None:
+    """Formats only the number of files when there are no functions (boundary value)."""
+    assert str(CoverageCounts(files=2)) == "no functions (2 files)"
+
+
+def test__TreeSummary____init____starts_without_directories() -> None:
+    """Starts with the given root and no directory totals."""
+    summary = TreeSummary(Path("src"))
+    assert summary.root == Path("src")
+    assert summary.directories == {}
+
+
+def test__TreeSummary__add__adds_counts_to_every_ancestor_directory() -> None:
+    """Adds the counts of a file to its directory and every directory above it up to the root."""
+    summary = TreeSummary(Path("src"))
+    summary.add(make_report(Path("src/pkg/sub/a.py"), [[None]]))
+    summary.add(make_report(Path("src/pkg/b.py"), [[]]))
+    assert set(summary.directories) == {Path("."), Path("pkg"), Path("pkg/sub")}
+    assert summary.directories[Path(".")].files == 2
+    assert summary.directories[Path("pkg/sub")] == CoverageCounts(
+        files=1, covered=1, scenarios=1, passing=1
+    )
+
+
+def test__TreeSummary__add__keeps_files_outside_root_under_their_own_parents() -> None:
+    """Aggregates a file outside the root under its own parent directories (boundary value)."""
+    summary = TreeSummary(Path("src"))
+    summary.add(make_report(Path("other/a.py"), [[None]]))
+    assert set(summary.directories) == {Path("."), Path("other")}
+
+
+def test__TreeSummary__format__prints_indented_tree_limited_by_depth() -> None:
+    """Prints one indented line per directory in path order, down to the given depth."""
+    summary = TreeSummary(Path("src"))
+    summary.add(make_report(Path("src/pkg/sub/a.py"), [[None]]))
+    summary.add(make_report(Path("src/pkg/b.py"), [[]]))
+    summary.add(make_report(Path("src/docs/c.py"), []))
+    lines = summary.format().splitlines()
+    assert [line.split(" (")[0] for line in lines] == [
+        "❌ src 50.00%",
+        "  🪽 docs/ no functions",
+        "  ❌ pkg/ 50.00%",
+        "    ✅ sub/ 100.00%",
+    ]
+    assert len(summary.format(1).splitlines()) == 3
+    assert len(summary.format(0).splitlines()) == 1
+
+
+def test__TreeSummary__format__returns_empty_string_without_reports() -> None:
+    """Returns an empty string when no report was added (boundary value)."""
+    assert TreeSummary(Path(".")).format() == ""
@@ -1,6 +1,27 @@
-from .file import FileSpec
-from .function import FunctionSpec
-from .scenario import ScenarioSpec
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .file import FileSpec
+    from .function import FunctionSpec
+    from .scenario import ScenarioSpec
+
+# pydantic の読み込みは起動時間の大半を占めるため、スペックモデルは初回アクセス時に読み込む
+_LAZY_ATTRIBUTES = {
+    "FileSpec": ".file",
+    "FunctionSpec": ".function",
+    "ScenarioSpec": ".scenario",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(module, __name__), name)
+
 
 __all__ = [
     "FileSpec",
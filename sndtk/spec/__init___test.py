@@ -0,0 +1,29 @@
+"""Tests for the sndtk.spec package."""
+
+import subprocess
+import sys
+
+import pytest
+
+import sndtk.spec
+from sndtk.spec.file import FileSpec
+
+
+def test____getattr____returns_spec_model_on_first_access() -> None:
+    """Returns the spec model class from its submodule on first access."""
+    assert sndtk.spec.__getattr__("FileSpec") is FileSpec
+
+
+def test____getattr____raises_attribute_error_for_unknown_name() -> None:
+    """Raises AttributeError for a name that is not exported."""
+    with pytest.raises(AttributeError, match="has no attribute 'Unknown'"):
+        sndtk.spec.__getattr__("Unknown")
+
+
+def test____getattr____does_not_import_pydantic_until_accessed() -> None:
+    """Does not import pydantic when only the package or its identifier types are imported."""
+    code = "import sys, sndtk.spec.types; print('pydantic' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "False"
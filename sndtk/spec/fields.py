@@ -0,0 +1,6 @@
+from pathlib import Path
+from typing import Annotated
+
+from pydantic import PlainSerializer
+
+StrPath = Annotated[Path, PlainSerializer(lambda path: str(path))]
@@ -2,14 +2,21 @@ from __future__ import annotations
 
 import json
 import logging
+import os
+import tempfile
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from pydantic import BaseModel
 
 from sndtk.parsers.types import Function
+from sndtk.spec.fields import StrPath
 from sndtk.spec.function import FunctionSpec
+from sndtk.spec.paths import spec_path_for
 from sndtk.spec.scenario import ScenarioSpec
-from sndtk.spec.types import StrPath
+
+if TYPE_CHECKING:
+    from sndtk.git import GitTree
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +38,7 @@ class FileSpec(BaseModel):
             FunctionSpec(
                 testpath=None,
                 identifier=function.identifier,
+                fingerprint=function.fingerprint or None,
                 scenarios=[
                     ScenarioSpec(
                         testpath=None,
@@ -43,21 +51,82 @@ class FileSpec(BaseModel):
         )
         return self
 
+    def remove(self, identifiers: set[str]) -> FileSpec:
+        self.functions = [
+            function for function in self.functions if function.identifier not in identifiers
+        ]
+        return self
+
+    def testpaths(self) -> set[Path]:
+        """
+        スペックが参照する全てのテストファイルのパスを返す
+
+        Returns:
+            set[Path]: テストファイルのパス
+        """
+        testpaths = {Path(self.testpath)}
+        for function in self.functions:
+            if function.testpath is not None:
+                testpaths.add(Path(function.testpath))
+            testpaths.update(
+                Path(scenario.testpath)
+                for scenario in function.scenarios
+                if scenario.testpath is not None
+            )
+        return testpaths
+
     @classmethod
-    def load(cls, filepath: Path) -> FileSpec:
-        spec_path = filepath.parent / (filepath.stem + "_spec.json")
+    def load(cls, filepath: Path, tree: GitTree | None = None) -> FileSpec:
+        spec_path = spec_path_for(filepath)
         logger.debug(f"Loading spec from {spec_path}")
-        with open(spec_path, "rb") as f:
-            content = json.load(f)
-            spec = cls.model_validate(content)
-            logger.debug(f"Loaded spec with {len(spec.functions)} functions")
-            return spec
+        if tree is not None:
+            content = json.loads(tree.read_bytes(spec_path))
+        else:
+            with open(spec_path, "rb") as f:
+                content = json.load(f)
+        spec = cls.model_validate(content)
+        logger.debug(f"Loaded spec with {len(spec.functions)} functions")
+        return spec
+
+    def dumps(self) -> bytes:
+        """
+        フィールドの定義順で整形した正規のJSONにシリアライズする
+
+        Returns:
+            bytes: シリアライズされたスペック
+        """
+        return json.dumps(self.model_dump(exclude_none=True), indent=2).encode()
 
     def save(self) -> Path:
-        filepath = Path(self.filepath)
-        spec_path = filepath.parent / (filepath.stem + "_spec.json")
+        """
+        内容が変化した場合のみ、一時ファイル経由でアトミックに書き込む
+
+        Returns:
+            Path: スペックファイルのパス
+        """
+        spec_path = spec_path_for(Path(self.filepath))
+        content = self.dumps()
+        try:
+            if spec_path.read_bytes() == content:
+                logger.debug(f"Spec at {spec_path} is unchanged, skipping write")
+                return spec_path
+            mode = spec_path.stat().st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+
         logger.info(f"Saving spec to {spec_path}")
         logger.debug(f"Spec contains {len(self.functions)} functions")
-        with open(spec_path, "w") as f:
-            json.dump(self.model_dump(exclude_none=True), f, indent=2)
+        fd, temp_path = tempfile.mkstemp(
+            dir=spec_path.parent, prefix=f".{spec_path.name}.", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, spec_path)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
         return spec_path
@@ -1,9 +1,14 @@
 """Tests for FileSpec."""
 
 import json
+import os
 import tempfile
 from pathlib import Path
+from unittest.mock import MagicMock, patch
 
+import pytest
+
+from sndtk.git import GitTree
 from sndtk.parsers.types import Function
 from sndtk.spec.file import FileSpec
 
@@ -254,3 +259,158 @@ def test__FileSpec__save__returns_correct_path() -> None:
         expected_path = Path(tmpdir) / "test_spec.json"
         assert spec_path == expected_path
         assert spec_path.exists()
+
+
+def test__FileSpec__dumps__serializes_fields_in_definition_order() -> None:
+    """Serializes fields in definition order with two-space indentation."""
+    spec = FileSpec(filepath=Path("test.py"), testpath=Path("test_test.py"), functions=[])
+    assert spec.dumps() == (
+        b'{\n  "filepath": "test.py",\n  "testpath": "test_test.py",\n  "functions": []\n}'
+    )
+
+
+def test__FileSpec__dumps__omits_none_values() -> None:
+    """Omits fields whose value is None."""
+    filepath = Path("test.py")
+    spec = FileSpec.create(
+        filepath,
+        Function(filepath=filepath, name="f", line=1, column=0, identifier="f"),
+    )
+    assert b"null" not in spec.dumps()
+
+
+def test__FileSpec__dumps__returns_identical_bytes_for_round_trip() -> None:
+    """Returns identical bytes for a spec that was loaded from its own output."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "test.py"
+        spec = FileSpec.create(
+            filepath,
+            Function(filepath=filepath, name="f", line=1, column=0, identifier="f"),
+        )
+        spec.save()
+        assert FileSpec.load(filepath).dumps() == spec.dumps()
+
+
+def test__FileSpec__save__skips_write_when_content_is_unchanged() -> None:
+    """Skips writing when the serialized content is unchanged."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "test.py"
+        spec = FileSpec(filepath=filepath, testpath=Path(tmpdir) / "test_test.py", functions=[])
+        spec_path = spec.save()
+        os.utime(spec_path, (0, 0))
+        spec.save()
+        assert spec_path.stat().st_mtime == 0
+
+
+def test__FileSpec__save__overwrites_when_content_changes() -> None:
+    """Overwrites the spec file when the serialized content changes."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "test.py"
+        spec = FileSpec(filepath=filepath, testpath=Path(tmpdir) / "test_test.py", functions=[])
+        spec_path = spec.save()
+        spec.add(Function(filepath=filepath, name="f", line=1, column=0, identifier="f"))
+        spec.save()
+        assert spec_path.read_bytes() == spec.dumps()
+        assert len(FileSpec.load(filepath).functions) == 1
+
+
+def test__FileSpec__save__preserves_file_mode() -> None:
+    """Preserves the permission bits of an existing spec file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "test.py"
+        spec = FileSpec(filepath=filepath, testpath=Path(tmpdir) / "test_test.py", functions=[])
+        spec_path = spec.save()
+        spec_path.chmod(0o640)
+        spec.add(Function(filepath=filepath, name="f", line=1, column=0, identifier="f"))
+        spec.save()
+        assert spec_path.stat().st_mode & 0o777 == 0o640
+
+
+def test__FileSpec__save__keeps_original_file_when_write_fails() -> None:
+    """Keeps the original spec file intact and removes the temporary file when writing fails."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filepath = Path(tmpdir) / "test.py"
+        spec = FileSpec(filepath=filepath, testpath=Path(tmpdir) / "test_test.py", functions=[])
+        spec_path = spec.save()
+        original = spec_path.read_bytes()
+        spec.add(Function(filepath=filepath, name="f", line=1, column=0, identifier="f"))
+        with patch("sndtk.spec.file.os.replace", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                spec.save()
+        assert spec_path.read_bytes() == original
+        assert sorted(path.name for path in Path(tmpdir).iterdir()) == ["test_spec.json"]
+
+
+def test__FileSpec__remove__removes_matching_functions() -> None:
+    """Removes functions whose identifier is in the given set and returns self."""
+    filepath = Path("test.py")
+    spec = FileSpec(filepath=filepath, testpath=Path("test_test.py"), functions=[])
+    for name in ["f1", "f2", "f3"]:
+        spec.add(Function(filepath=filepath, name=name, line=1, column=0, identifier=name))
+    result = spec.remove({"f1", "f3", "missing"})
+    assert result is spec
+    assert [function.identifier for function in spec.functions] == ["f2"]
+
+
+def test__FileSpec__remove__keeps_functions_when_identifiers_are_empty() -> None:
+    """Keeps all functions when the identifier set is empty (boundary value)."""
+    filepath = Path("test.py")
+    spec = FileSpec.create(
+        filepath, Function(filepath=filepath, name="f", line=1, column=0, identifier="f")
+    )
+    spec.remove(set())
+    assert len(spec.functions) == 1
+
+
+def test__FileSpec__add__records_function_fingerprint() -> None:
+    """Records the function fingerprint in the new function spec."""
+    filepath = Path("test.py")
+    spec = FileSpec(filepath=filepath, testpath=Path("test_test.py"), functions=[])
+    spec.add(
+        Function(filepath=filepath, name="f", line=1, column=0, identifier="f", fingerprint="abc")
+    )
+    assert spec.functions[0].fingerprint == "abc"
+
+
+def test__FileSpec__testpaths__returns_file_testpath_when_nothing_is_overridden() -> None:
+    """Returns only the file testpath when no function or scenario overrides it (boundary value)."""
+    filepath = Path("pkg/module.py")
+    spec = FileSpec.create(
+        filepath, Function(filepath=filepath, name="f", line=1, column=0, identifier="f")
+    )
+    assert spec.testpaths() == {Path("pkg/module_test.py")}
+
+
+def test__FileSpec__testpaths__includes_function_and_scenario_testpaths() -> None:
+    """Includes testpaths overridden by functions and scenarios."""
+    spec = FileSpec.model_validate(
+        {
+            "filepath": "pkg/module.py",
+            "testpath": "pkg/module_test.py",
+            "functions": [
+                {"identifier": "f", "testpath": "tests/f_test.py", "scenarios": []},
+                {
+                    "identifier": "g",
+                    "scenarios": [
+                        {"testpath": "tests/g_test.py", "testname": "test_g", "description": "g"}
+                    ],
+                },
+            ],
+        }
+    )
+    assert spec.testpaths() == {
+        Path("pkg/module_test.py"),
+        Path("tests/f_test.py"),
+        Path("tests/g_test.py"),
+    }
+
+
+def test__FileSpec__load__reads_spec_from_git_tree() -> None:
+    """Loads the spec file from the git tree when one is given."""
+    tree = MagicMock(spec=GitTree)
+    tree.read_bytes.return_value = json.dumps(
+        {"filepath": "a.py", "testpath": "a_test.py", "functions": []}
+    ).encode()
+    spec = FileSpec.load(Path("a.py"), tree)
+    assert spec.testpath == Path("a_test.py")
+    tree.read_bytes.assert_called_once_with(Path("a_spec.json"))
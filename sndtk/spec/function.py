@@ -1,10 +1,11 @@
 from pydantic import BaseModel, Field
 
+from sndtk.spec.fields import StrPath
 from sndtk.spec.scenario import ScenarioSpec
-from sndtk.spec.types import StrPath
 
 
 class FunctionSpec(BaseModel):
     testpath: StrPath | None = Field(default=None)
     identifier: str
+    fingerprint: str | None = Field(default=None)
     scenarios: list[ScenarioSpec]
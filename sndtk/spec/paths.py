@@ -0,0 +1,31 @@
+from pathlib import Path
+
+SPEC_SUFFIX = "_spec.json"
+
+
+def spec_path_for(filepath: Path) -> Path:
+    """
+    ソースファイルに対応するスペックファイルのパスを返す
+
+    Args:
+        filepath: ソースファイルのパス
+
+    Returns:
+        Path: スペックファイルのパス
+    """
+    return filepath.parent / (filepath.stem + SPEC_SUFFIX)
+
+
+def source_path_for(spec_path: Path) -> Path | None:
+    """
+    スペックファイルに対応するソースファイルのパスを返す
+
+    Args:
+        spec_path: スペックファイルのパス
+
+    Returns:
+        Path | None: ソースファイルのパス、スペックファイルでない場合None
+    """
+    if not spec_path.name.endswith(SPEC_SUFFIX) or spec_path.name == SPEC_SUFFIX:
+        return None
+    return spec_path.parent / (spec_path.name.removesuffix(SPEC_SUFFIX) + ".py")
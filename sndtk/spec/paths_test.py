@@ -0,0 +1,24 @@
+"""Tests for spec file paths."""
+
+from pathlib import Path
+
+from sndtk.spec.paths import source_path_for, spec_path_for
+
+
+def test__spec_path_for__returns_spec_path_next_to_source() -> None:
+    """Returns the _spec.json path next to the source file."""
+    assert spec_path_for(Path("pkg/module.py")) == Path("pkg/module_spec.json")
+    assert spec_path_for(Path("__main__.py")) == Path("__main___spec.json")
+
+
+def test__source_path_for__returns_source_path_for_spec_file() -> None:
+    """Returns the source path for a spec file."""
+    assert source_path_for(Path("pkg/module_spec.json")) == Path("pkg/module.py")
+    assert source_path_for(Path("__main___spec.json")) == Path("__main__.py")
+
+
+def test__source_path_for__returns_none_for_non_spec_files() -> None:
+    """Returns None for files that are not spec files, including a bare _spec.json (boundary value)."""
+    assert source_path_for(Path("pkg/module.json")) is None
+    assert source_path_for(Path("pkg/module.py")) is None
+    assert source_path_for(Path("pkg/_spec.json")) is None
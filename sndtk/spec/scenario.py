@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 
-from sndtk.spec.types import StrPath
+from sndtk.spec.fields import StrPath
 
 
 class ScenarioSpec(BaseModel):
@@ -2,11 +2,6 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Annotated
-
-from pydantic import PlainSerializer
-
-StrPath = Annotated[Path, PlainSerializer(lambda path: str(path))]
 
 
 @dataclass